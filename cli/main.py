@@ -28,6 +28,7 @@ from rich.text import Text
 
 # 项目内部导入
 from cli.models import AnalystType
+from cli.streaming import GraphStreamState, PanelRefreshTracker, get_cached_markdown, visible_messages
 from cli.utils import (
     select_analysts,
     select_deep_thinking_agent,
@@ -37,6 +38,7 @@ from cli.utils import (
 )
 from tradingagents.default_config import DEFAULT_CONFIG
 from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.utils.debate_history import speaker_history, speaker_turns
 from tradingagents.utils.logging_manager import get_logger
 
 # 加载环境变量
@@ -150,11 +152,25 @@ app = typer.Typer(
 
 # Create a deque to store recent messages with a maximum length
 class MessageBuffer:
+    SECTION_TITLES = {
+        "market_report": "Market Analysis",
+        "sentiment_report": "Social Sentiment",
+        "news_report": "News Analysis",
+        "fundamentals_report": "Fundamentals Analysis",
+        "investment_plan": "Research Team Decision",
+        "trader_investment_plan": "Trading Team Plan",
+        "final_trade_decision": "Portfolio Management Decision",
+    }
+
     def __init__(self, max_length=DEFAULT_MESSAGE_BUFFER_SIZE):
         self.messages = deque(maxlen=max_length)
         self.tool_calls = deque(maxlen=max_length)
-        self.current_report = None
-        self.final_report = None  # Store the complete final report
+        self.current_section = None  # 最近一次更新的报告段落
+        self._final_report_cache = None  # 完整报告的拼接缓存
+        # 数据版本号：显示层据此跳过未变化面板的重建
+        self.status_version = 0
+        self.messages_version = 0
+        self.report_version = 0
         self.agent_status = {
             # Analyst Team
             "Market Analyst": "pending",
@@ -188,51 +204,53 @@ class MessageBuffer:
     def add_message(self, message_type, content):
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         self.messages.append((timestamp, message_type, content))
+        self.messages_version += 1
 
     def add_tool_call(self, tool_name, args):
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         self.tool_calls.append((timestamp, tool_name, args))
+        self.messages_version += 1
 
     def update_agent_status(self, agent, status):
         if agent in self.agent_status:
+            if self.agent_status[agent] != status:
+                self.status_version += 1
             self.agent_status[agent] = status
             self.current_agent = agent
 
     def update_report_section(self, section_name, content):
         if section_name in self.report_sections:
+            if self.report_sections[section_name] == content and self.current_section == section_name:
+                return
             self.report_sections[section_name] = content
-            self._update_current_report()
-
-    def _update_current_report(self):
+            self.current_section = section_name if content else self.current_section
+            self.report_version += 1
+            self._final_report_cache = None
+
+    def reset_reports(self):
+        """清空所有报告段落（开始新的分析时调用）"""
+        for section in self.report_sections:
+            self.report_sections[section] = None
+        self.current_section = None
+        self.report_version += 1
+        self._final_report_cache = None
+
+    @property
+    def current_report(self):
         # For the panel display, only show the most recently updated section
-        latest_section = None
-        latest_content = None
-
-        # Find the most recently updated section
-        for section, content in self.report_sections.items():
-            if content is not None:
-                latest_section = section
-                latest_content = content
-               
-        if latest_section and latest_content:
-            # Format the current section for display
-            section_titles = {
-                "market_report": "Market Analysis",
-                "sentiment_report": "Social Sentiment",
-                "news_report": "News Analysis",
-                "fundamentals_report": "Fundamentals Analysis",
-                "investment_plan": "Research Team Decision",
-                "trader_investment_plan": "Trading Team Plan",
-                "final_trade_decision": "Portfolio Management Decision",
-            }
-            self.current_report = (
-                f"### {section_titles[latest_section]}\n{latest_content}"
-            )
-
-        # Update the final complete report
-        self._update_final_report()
-
-    def _update_final_report(self):
+        content = self.report_sections.get(self.current_section) if self.current_section else None
+        if not content:
+            return None
+        return f"### {self.SECTION_TITLES[self.current_section]}\n{content}"
+
+    @property
+    def final_report(self):
+        # 完整报告只在读取时按需拼接，流式更新时不再每个增量都重建
+        if self._final_report_cache is None:
+            self._final_report_cache = self._build_final_report() or ""
+        return self._final_report_cache or None
+
+    def _build_final_report(self):
         report_parts = []
 
         # Analyst Team Reports
@@ -278,10 +296,11 @@ class MessageBuffer:
             report_parts.append("## Portfolio Management Decision")
             report_parts.append(f"{self.report_sections['final_trade_decision']}")
 
-        self.final_report = "\n\n".join(report_parts) if report_parts else None
+        return "\n\n".join(report_parts) if report_parts else None
 
 
 message_buffer = MessageBuffer()
+display_tracker = PanelRefreshTracker()
 
 
 def create_layout():
@@ -301,6 +320,8 @@ def create_layout():
     layout["upper"].split_row(
         Layout(name="progress", ratio=2), Layout(name="messages", ratio=3)
     )
+    # 新布局的所有面板都需要渲染一次
+    display_tracker.reset()
     return layout
 
 
@@ -309,71 +330,58 @@ def update_display(layout, spinner_text=None):
     更新CLI界面显示内容
     Update CLI interface display content
     
+    只重建数据版本发生变化的面板，报告面板复用按段落缓存的Markdown渲染结果
+
     Args:
         layout: Rich Layout对象
         spinner_text: 可选的spinner文本
     """
     # Header with welcome message
-    layout["header"].update(
-        Panel(
-            "[bold green]Welcome to TradingAgents CLI[/bold green]\n"
-            "[dim]© [Tauric Research](https://github.com/TauricResearch)[/dim]",
-            title="Welcome to TradingAgents",
-            border_style="green",
-            padding=(1, 2),
-            expand=True,
+    if display_tracker.needs_update("header", "static"):
+        layout["header"].update(
+            Panel(
+                "[bold green]Welcome to TradingAgents CLI[/bold green]\n"
+                "[dim]© [Tauric Research](https://github.com/TauricResearch)[/dim]",
+                title="Welcome to TradingAgents",
+                border_style="green",
+                padding=(1, 2),
+                expand=True,
+            )
         )
-    )
 
     # Progress panel showing agent status
-    progress_table = Table(
-        show_header=True,
-        header_style="bold magenta",
-        show_footer=False,
-        box=box.SIMPLE_HEAD,  # Use simple header with horizontal lines
-        title=None,  # Remove the redundant Progress title
-        padding=(0, 2),  # Add horizontal padding
-        expand=True,  # Make table expand to fill available space
-    )
-    progress_table.add_column("Team", style="cyan", justify="center", width=20)
-    progress_table.add_column("Agent", style="green", justify="center", width=20)
-    progress_table.add_column("Status", style="yellow", justify="center", width=20)
-
-    # Group agents by team
-    teams = {
-        "Analyst Team": [
-            "Market Analyst",
-            "Social Analyst",
-            "News Analyst",
-            "Fundamentals Analyst",
-        ],
-        "Research Team": ["Bull Researcher", "Bear Researcher", "Research Manager"],
-        "Trading Team": ["Trader"],
-        "Risk Management": ["Risky Analyst", "Neutral Analyst", "Safe Analyst"],
-        "Portfolio Management": ["Portfolio Manager"],
-    }
+    if display_tracker.needs_update("progress", message_buffer.status_version):
+        progress_table = Table(
+            show_header=True,
+            header_style="bold magenta",
+            show_footer=False,
+            box=box.SIMPLE_HEAD,  # Use simple header with horizontal lines
+            title=None,  # Remove the redundant Progress title
+            padding=(0, 2),  # Add horizontal padding
+            expand=True,  # Make table expand to fill available space
+        )
+        progress_table.add_column("Team", style="cyan", justify="center", width=20)
+        progress_table.add_column("Agent", style="green", justify="center", width=20)
+        progress_table.add_column("Status", style="yellow", justify="center", width=20)
+
+        # Group agents by team
+        teams = {
+            "Analyst Team": [
+                "Market Analyst",
+                "Social Analyst",
+                "News Analyst",
+                "Fundamentals Analyst",
+            ],
+            "Research Team": ["Bull Researcher", "Bear Researcher", "Research Manager"],
+            "Trading Team": ["Trader"],
+            "Risk Management": ["Risky Analyst", "Neutral Analyst", "Safe Analyst"],
+            "Portfolio Management": ["Portfolio Manager"],
+        }
 
-    for team, agents in teams.items():
-        # Add first agent with team name
-        first_agent = agents[0]
-        status = message_buffer.agent_status[first_agent]
-        if status == "in_progress":
-            spinner = Spinner(
-                "dots", text="[blue]in_progress[/blue]", style="bold cyan"
-            )
-            status_cell = spinner
-        else:
-            status_color = {
-                "pending": "yellow",
-                "completed": "green",
-                "error": "red",
-            }.get(status, "white")
-            status_cell = f"[{status_color}]{status}[/{status_color}]"
-        progress_table.add_row(team, first_agent, status_cell)
-
-        # Add remaining agents in team
-        for agent in agents[1:]:
-            status = message_buffer.agent_status[agent]
+        for team, agents in teams.items():
+            # Add first agent with team name
+            first_agent = agents[0]
+            status = message_buffer.agent_status[first_agent]
             if status == "in_progress":
                 spinner = Spinner(
                     "dots", text="[blue]in_progress[/blue]", style="bold cyan"
@@ -386,135 +394,155 @@ def update_display(layout, spinner_text=None):
                     "error": "red",
                 }.get(status, "white")
                 status_cell = f"[{status_color}]{status}[/{status_color}]"
-            progress_table.add_row("", agent, status_cell)
-
-        # Add horizontal line after each team
-        progress_table.add_row("─" * 20, "─" * 20, "─" * 20, style="dim")
-
-    layout["progress"].update(
-        Panel(progress_table, title="Progress", border_style="cyan", padding=(1, 2))
-    )
-
-    # Messages panel showing recent messages and tool calls
-    messages_table = Table(
-        show_header=True,
-        header_style="bold magenta",
-        show_footer=False,
-        expand=True,  # Make table expand to fill available space
-        box=box.MINIMAL,  # Use minimal box style for a lighter look
-        show_lines=True,  # Keep horizontal lines
-        padding=(0, 1),  # Add some padding between columns
-    )
-    messages_table.add_column("Time", style="cyan", width=8, justify="center")
-    messages_table.add_column("Type", style="green", width=10, justify="center")
-    messages_table.add_column(
-        "Content", style="white", no_wrap=False, ratio=1
-    )  # Make content column expand
-
-    # Combine tool calls and messages
-    all_messages = []
-
-    # Add tool calls
-    for timestamp, tool_name, args in message_buffer.tool_calls:
-        # Truncate tool call args if too long
-        if isinstance(args, str) and len(args) > DEFAULT_MAX_TOOL_ARGS_LENGTH:
-            args = args[:97] + "..."
-        all_messages.append((timestamp, "Tool", f"{tool_name}: {args}"))
-
-    # Add regular messages
-    for timestamp, msg_type, content in message_buffer.messages:
-        # Convert content to string if it's not already
-        content_str = content
-        if isinstance(content, list):
-            # Handle list of content blocks (Anthropic format)
-            text_parts = []
-            for item in content:
-                if isinstance(item, dict):
-                    if item.get('type') == 'text':
-                        text_parts.append(item.get('text', ''))
-                    elif item.get('type') == 'tool_use':
-                        text_parts.append(f"[Tool: {item.get('name', 'unknown')}]")
+            progress_table.add_row(team, first_agent, status_cell)
+
+            # Add remaining agents in team
+            for agent in agents[1:]:
+                status = message_buffer.agent_status[agent]
+                if status == "in_progress":
+                    spinner = Spinner(
+                        "dots", text="[blue]in_progress[/blue]", style="bold cyan"
+                    )
+                    status_cell = spinner
                 else:
-                    text_parts.append(str(item))
-            content_str = ' '.join(text_parts)
-        elif not isinstance(content_str, str):
-            content_str = str(content)
-            
-        # Truncate message content if too long
-        if len(content_str) > DEFAULT_MAX_CONTENT_LENGTH:
-            content_str = content_str[:197] + "..."
-        all_messages.append((timestamp, msg_type, content_str))
-
-    # Sort by timestamp
-    all_messages.sort(key=lambda x: x[0])
-
-    # Calculate how many messages we can show based on available space
-    # Start with a reasonable number and adjust based on content length
-    max_messages = DEFAULT_MAX_DISPLAY_MESSAGES  # Increased from 8 to better fill the space
-
-    # Get the last N messages that will fit in the panel
-    recent_messages = all_messages[-max_messages:]
-
-    # Add messages to table
-    for timestamp, msg_type, content in recent_messages:
-        # Format content with word wrapping
-        wrapped_content = Text(content, overflow="fold")
-        messages_table.add_row(timestamp, msg_type, wrapped_content)
-
-    if spinner_text:
-        messages_table.add_row("", "Spinner", spinner_text)
-
-    # Add a footer to indicate if messages were truncated
-    if len(all_messages) > max_messages:
-        messages_table.footer = (
-            f"[dim]Showing last {max_messages} of {len(all_messages)} messages[/dim]"
+                    status_color = {
+                        "pending": "yellow",
+                        "completed": "green",
+                        "error": "red",
+                    }.get(status, "white")
+                    status_cell = f"[{status_color}]{status}[/{status_color}]"
+                progress_table.add_row("", agent, status_cell)
+
+            # Add horizontal line after each team
+            progress_table.add_row("─" * 20, "─" * 20, "─" * 20, style="dim")
+
+        layout["progress"].update(
+            Panel(progress_table, title="Progress", border_style="cyan", padding=(1, 2))
         )
 
-    layout["messages"].update(
-        Panel(
-            messages_table,
-            title="Messages & Tools",
-            border_style="blue",
-            padding=(1, 2),
+    # Messages panel showing recent messages and tool calls
+    if display_tracker.needs_update("messages", (message_buffer.messages_version, spinner_text)):
+        messages_table = Table(
+            show_header=True,
+            header_style="bold magenta",
+            show_footer=False,
+            expand=True,  # Make table expand to fill available space
+            box=box.MINIMAL,  # Use minimal box style for a lighter look
+            show_lines=True,  # Keep horizontal lines
+            padding=(0, 1),  # Add some padding between columns
         )
-    )
+        messages_table.add_column("Time", style="cyan", width=8, justify="center")
+        messages_table.add_column("Type", style="green", width=10, justify="center")
+        messages_table.add_column(
+            "Content", style="white", no_wrap=False, ratio=1
+        )  # Make content column expand
+
+        # Combine tool calls and messages
+        all_messages = []
+
+        # Add tool calls
+        for timestamp, tool_name, args in message_buffer.tool_calls:
+            # Truncate tool call args if too long
+            if isinstance(args, str) and len(args) > DEFAULT_MAX_TOOL_ARGS_LENGTH:
+                args = args[:97] + "..."
+            all_messages.append((timestamp, "Tool", f"{tool_name}: {args}"))
+
+        # Add regular messages
+        for timestamp, msg_type, content in message_buffer.messages:
+            # Convert content to string if it's not already
+            content_str = content
+            if isinstance(content, list):
+                # Handle list of content blocks (Anthropic format)
+                text_parts = []
+                for item in content:
+                    if isinstance(item, dict):
+                        if item.get('type') == 'text':
+                            text_parts.append(item.get('text', ''))
+                        elif item.get('type') == 'tool_use':
+                            text_parts.append(f"[Tool: {item.get('name', 'unknown')}]")
+                    else:
+                        text_parts.append(str(item))
+                content_str = ' '.join(text_parts)
+            elif not isinstance(content_str, str):
+                content_str = str(content)
+            
+            # Truncate message content if too long
+            if len(content_str) > DEFAULT_MAX_CONTENT_LENGTH:
+                content_str = content_str[:197] + "..."
+            all_messages.append((timestamp, msg_type, content_str))
+
+        # Sort by timestamp
+        all_messages.sort(key=lambda x: x[0])
+
+        # Calculate how many messages we can show based on available space
+        # Start with a reasonable number and adjust based on content length
+        max_messages = DEFAULT_MAX_DISPLAY_MESSAGES  # Increased from 8 to better fill the space
+
+        # Get the last N messages that will fit in the panel
+        recent_messages = all_messages[-max_messages:]
+
+        # Add messages to table
+        for timestamp, msg_type, content in recent_messages:
+            # Format content with word wrapping
+            wrapped_content = Text(content, overflow="fold")
+            messages_table.add_row(timestamp, msg_type, wrapped_content)
+
+        if spinner_text:
+            messages_table.add_row("", "Spinner", spinner_text)
+
+        # Add a footer to indicate if messages were truncated
+        if len(all_messages) > max_messages:
+            messages_table.footer = (
+                f"[dim]Showing last {max_messages} of {len(all_messages)} messages[/dim]"
+            )
 
-    # Analysis panel showing current report
-    if message_buffer.current_report:
-        layout["analysis"].update(
+        layout["messages"].update(
             Panel(
-                Markdown(message_buffer.current_report),
-                title="Current Report",
-                border_style="green",
+                messages_table,
+                title="Messages & Tools",
+                border_style="blue",
                 padding=(1, 2),
             )
         )
-    else:
-        layout["analysis"].update(
-            Panel(
-                "[italic]Waiting for analysis report...[/italic]",
-                title="Current Report",
-                border_style="green",
-                padding=(1, 2),
+
+    # Analysis panel showing current report
+    if display_tracker.needs_update("analysis", message_buffer.report_version):
+        if message_buffer.current_report:
+            layout["analysis"].update(
+                Panel(
+                    get_cached_markdown(message_buffer.current_report),
+                    title="Current Report",
+                    border_style="green",
+                    padding=(1, 2),
+                )
+            )
+        else:
+            layout["analysis"].update(
+                Panel(
+                    "[italic]Waiting for analysis report...[/italic]",
+                    title="Current Report",
+                    border_style="green",
+                    padding=(1, 2),
+                )
             )
-        )
 
     # Footer with statistics
-    tool_calls_count = len(message_buffer.tool_calls)
-    llm_calls_count = sum(
-        1 for _, msg_type, _ in message_buffer.messages if msg_type == "Reasoning"
-    )
-    reports_count = sum(
-        1 for content in message_buffer.report_sections.values() if content is not None
-    )
+    if display_tracker.needs_update("footer", (message_buffer.messages_version, message_buffer.report_version)):
+        tool_calls_count = len(message_buffer.tool_calls)
+        llm_calls_count = sum(
+            1 for _, msg_type, _ in message_buffer.messages if msg_type == "Reasoning"
+        )
+        reports_count = sum(
+            1 for content in message_buffer.report_sections.values() if content is not None
+        )
 
-    stats_table = Table(show_header=False, box=None, padding=(0, 2), expand=True)
-    stats_table.add_column("Stats", justify="center")
-    stats_table.add_row(
-        f"Tool Calls: {tool_calls_count} | LLM Calls: {llm_calls_count} | Generated Reports: {reports_count}"
-    )
+        stats_table = Table(show_header=False, box=None, padding=(0, 2), expand=True)
+        stats_table.add_column("Stats", justify="center")
+        stats_table.add_row(
+            f"Tool Calls: {tool_calls_count} | LLM Calls: {llm_calls_count} | Generated Reports: {reports_count}"
+        )
 
-    layout["footer"].update(Panel(stats_table, border_style="grey50"))
+        layout["footer"].update(Panel(stats_table, border_style="grey50"))
 
 
 def get_user_selections():
@@ -821,10 +849,10 @@ def display_complete_report(final_state):
         debate_state = final_state["investment_debate_state"]
 
         # Bull Researcher Analysis
-        if debate_state.get("bull_history"):
+        if speaker_history(debate_state, "Bull Analyst"):
             research_reports.append(
                 Panel(
-                    Markdown(debate_state["bull_history"]),
+                    Markdown(speaker_history(debate_state, "Bull Analyst")),
                     title="Bull Researcher",
                     border_style="blue",
                     padding=(1, 2),
@@ -832,10 +860,10 @@ def display_complete_report(final_state):
             )
 
         # Bear Researcher Analysis
-        if debate_state.get("bear_history"):
+        if speaker_history(debate_state, "Bear Analyst"):
             research_reports.append(
                 Panel(
-                    Markdown(debate_state["bear_history"]),
+                    Markdown(speaker_history(debate_state, "Bear Analyst")),
                     title="Bear Researcher",
                     border_style="blue",
                     padding=(1, 2),
@@ -885,10 +913,10 @@ def display_complete_report(final_state):
         risk_state = final_state["risk_debate_state"]
 
         # Aggressive (Risky) Analyst Analysis
-        if risk_state.get("risky_history"):
+        if speaker_history(risk_state, "Risky Analyst"):
             risk_reports.append(
                 Panel(
-                    Markdown(risk_state["risky_history"]),
+                    Markdown(speaker_history(risk_state, "Risky Analyst")),
                     title="Aggressive Analyst",
                     border_style="blue",
                     padding=(1, 2),
@@ -896,10 +924,10 @@ def display_complete_report(final_state):
             )
 
         # Conservative (Safe) Analyst Analysis
-        if risk_state.get("safe_history"):
+        if speaker_history(risk_state, "Safe Analyst"):
             risk_reports.append(
                 Panel(
-                    Markdown(risk_state["safe_history"]),
+                    Markdown(speaker_history(risk_state, "Safe Analyst")),
                     title="Conservative Analyst",
                     border_style="blue",
                     padding=(1, 2),
@@ -907,10 +935,10 @@ def display_complete_report(final_state):
             )
 
         # Neutral Analyst Analysis
-        if risk_state.get("neutral_history"):
+        if speaker_history(risk_state, "Neutral Analyst"):
             risk_reports.append(
                 Panel(
-                    Markdown(risk_state["neutral_history"]),
+                    Markdown(speaker_history(risk_state, "Neutral Analyst")),
                     title="Neutral Analyst",
                     border_style="blue",
                     padding=(1, 2),
@@ -1155,10 +1183,7 @@ def run_analysis():
             message_buffer.update_agent_status(agent, "pending")
 
         # Reset report sections
-        for section in message_buffer.report_sections:
-            message_buffer.report_sections[section] = None
-        message_buffer.current_report = None
-        message_buffer.final_report = None
+        message_buffer.reset_reports()
 
         # Update agent status to in_progress for the first analyst
         first_analyst = f"{selections['analysts'][0].value.capitalize()} Analyst"
@@ -1235,7 +1260,7 @@ def run_analysis():
         init_agent_state = graph.propagator.create_initial_state(
             selections["ticker"], selections["analysis_date"]
         )
-        args = graph.propagator.get_graph_args()
+        args = graph.propagator.get_graph_args(stream_mode="updates")
 
         ui.show_success("数据获取准备完成")
 
@@ -1245,7 +1270,8 @@ def run_analysis():
         ui.show_user_message("💡 提示：智能分析包含多个团队协作，请耐心等待约10分钟", "dim")
 
         # Stream the analysis
-        trace = []
+        # 以逐节点增量(stream_mode="updates")消费图的输出，每个增量只包含该节点写入的字段
+        stream_state = GraphStreamState(init_agent_state)
         current_analyst = None
         analysis_steps = {
             "market_report": "📈 市场分析师",
@@ -1258,32 +1284,34 @@ def run_analysis():
         # 跟踪已完成的分析师，避免重复提示
         completed_analysts = set()
 
-        for chunk in graph.graph.stream(init_agent_state, **args):
-            if len(chunk["messages"]) > 0:
-                # Get the last message from the chunk
-                last_message = chunk["messages"][-1]
-
-                # Extract message content and type
-                if hasattr(last_message, "content"):
-                    content = extract_content_string(last_message.content)  # Use the helper function
-                    msg_type = "Reasoning"
-                else:
-                    content = str(last_message)
-                    msg_type = "System"
-
-                # Add message to buffer
-                message_buffer.add_message(msg_type, content)                
-
-                # If it's a tool call, add it to tool calls
-                if hasattr(last_message, "tool_calls"):
-                    for tool_call in last_message.tool_calls:
-                        # Handle both dictionary and object tool calls
-                        if isinstance(tool_call, dict):
-                            message_buffer.add_tool_call(
-                                tool_call["name"], tool_call["args"]
-                            )
-                        else:
-                            message_buffer.add_tool_call(tool_call.name, tool_call.args)
+        for update in graph.graph.stream(stream_state.input, **args):
+            for node_name, chunk in stream_state.apply(update):
+                # Get the last new message of this node
+                new_messages = visible_messages(chunk)
+                if new_messages:
+                    last_message = new_messages[-1]
+
+                    # Extract message content and type
+                    if hasattr(last_message, "content"):
+                        content = extract_content_string(last_message.content)  # Use the helper function
+                        msg_type = "Reasoning"
+                    else:
+                        content = str(last_message)
+                        msg_type = "System"
+
+                    # Add message to buffer
+                    message_buffer.add_message(msg_type, content)
+
+                    # If it's a tool call, add it to tool calls
+                    if hasattr(last_message, "tool_calls"):
+                        for tool_call in last_message.tool_calls:
+                            # Handle both dictionary and object tool calls
+                            if isinstance(tool_call, dict):
+                                message_buffer.add_tool_call(
+                                    tool_call["name"], tool_call["args"]
+                                )
+                            else:
+                                message_buffer.add_tool_call(tool_call.name, tool_call.args)
 
                 # Update reports and agent status based on chunk content
                 # Analyst Team Reports
@@ -1363,7 +1391,8 @@ def run_analysis():
                     debate_state = chunk["investment_debate_state"]
 
                     # Update Bull Researcher status and report
-                    if "bull_history" in debate_state and debate_state["bull_history"]:
+                    bull_turns = speaker_turns(debate_state, "Bull Analyst")
+                    if bull_turns:
                         # 显示研究团队开始工作
                         if "research_team_started" not in completed_analysts:
                             ui.show_progress("🔬 研究团队开始深度分析...")
@@ -1372,8 +1401,7 @@ def run_analysis():
                         # Keep all research team members in progress
                         update_research_team_status("in_progress")
                         # Extract latest bull response
-                        bull_responses = debate_state["bull_history"].split("\n")
-                        latest_bull = bull_responses[-1] if bull_responses else ""
+                        latest_bull = f"Bull Analyst: {bull_turns[-1]}"
                         if latest_bull:
                             message_buffer.add_message("Reasoning", latest_bull)
                             # Update research report with bull's latest analysis
@@ -1383,12 +1411,12 @@ def run_analysis():
                             )
 
                     # Update Bear Researcher status and report
-                    if "bear_history" in debate_state and debate_state["bear_history"]:
+                    bear_turns = speaker_turns(debate_state, "Bear Analyst")
+                    if bear_turns:
                         # Keep all research team members in progress
                         update_research_team_status("in_progress")
                         # Extract latest bear response
-                        bear_responses = debate_state["bear_history"].split("\n")
-                        latest_bear = bear_responses[-1] if bear_responses else ""
+                        latest_bear = f"Bear Analyst: {bear_turns[-1]}"
                         if latest_bear:
                             message_buffer.add_message("Reasoning", latest_bear)
                             # Update research report with bear's latest analysis
@@ -1541,14 +1569,12 @@ def run_analysis():
                 # Update the display
                 update_display(layout)
 
-            trace.append(chunk)
-
         # 显示最终决策阶段
         ui.show_step_header(5, "投资决策生成 | Investment Decision Generation")
         ui.show_progress("正在处理投资信号...")
 
         # Get final state and decision
-        final_state = trace[-1]
+        final_state = stream_state.state
         decision = graph.process_signal(final_state["final_trade_decision"], selections['ticker'])
 
         ui.show_success("🤖 投资信号处理完成")
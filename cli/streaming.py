@@ -0,0 +1,102 @@
+"""
+CLI增量流式显示工具
+- GraphStreamState: 把 stream_mode="updates" 产生的逐节点增量合并为完整状态
+- CachedMarkdown: 预解析的Markdown，按宽度缓存渲染结果，Live刷新时直接回放
+- PanelRefreshTracker: 记录各面板上次渲染时的数据版本，数据未变化的面板不重建
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Tuple
+
+from langgraph.graph.message import add_messages
+from rich.markdown import Markdown
+from rich.segment import Segment
+
+
+class GraphStreamState:
+    """把逐节点的状态增量合并为完整的AgentState"""
+
+    def __init__(self, initial_state: Dict[str, Any]):
+        # 初始消息在这里分配好id，并用input作为图的输入，
+        # 使之后清理节点的RemoveMessage能对应到本地状态中的同一条消息
+        messages = add_messages([], list(initial_state.get("messages", [])))
+        self.input = dict(initial_state, messages=list(messages))
+        self.state = dict(initial_state, messages=messages)
+
+    def apply(self, chunk: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        合并一个updates块（{节点名: 该节点返回的增量}）
+
+        Returns:
+            List[Tuple[str, Dict]]: 本块中各节点的(节点名, 增量)，不含空增量
+        """
+        deltas = []
+        for node_name, delta in chunk.items():
+            if not isinstance(delta, dict) or not delta:
+                continue
+            for key, value in delta.items():
+                if key == "messages":
+                    self.state["messages"] = self._merge_messages(value)
+                else:
+                    self.state[key] = value
+            deltas.append((node_name, delta))
+        return deltas
+
+    def _merge_messages(self, value) -> list:
+        """按add_messages规则合并消息，忽略本地不存在的消息的删除请求"""
+        value = value if isinstance(value, list) else [value]
+        known_ids = {m.id for m in self.state["messages"]}
+        value = [m for m in value if not (getattr(m, "type", None) == "remove" and m.id not in known_ids)]
+        return add_messages(self.state["messages"], value)
+
+
+def visible_messages(delta: Dict[str, Any]) -> list:
+    """增量中新增的消息（去掉清理节点产生的RemoveMessage）"""
+    messages = delta.get("messages") or []
+    if not isinstance(messages, list):
+        messages = [messages]
+    return [m for m in messages if getattr(m, "type", None) != "remove"]
+
+
+class CachedMarkdown:
+    """Markdown只解析一次；渲染出的行按宽度缓存，宽度不变时每次刷新只回放缓存"""
+
+    def __init__(self, markup: str):
+        self.markup = markup
+        self.markdown = Markdown(markup)
+        self._width = None
+        self._lines = None
+        self.render_count = 0
+
+    def __rich_console__(self, console, options):
+        if self._lines is None or self._width != options.max_width:
+            self._lines = console.render_lines(self.markdown, options.update(height=None), pad=False)
+            self._width = options.max_width
+            self.render_count += 1
+        new_line = Segment.line()
+        for line in self._lines:
+            yield from line
+            yield new_line
+
+
+@lru_cache(maxsize=16)
+def get_cached_markdown(markup: str) -> CachedMarkdown:
+    """按内容复用CachedMarkdown，同一段报告不会被重复解析和排版"""
+    return CachedMarkdown(markup)
+
+
+class PanelRefreshTracker:
+    """记录各面板上次渲染时的数据版本"""
+
+    def __init__(self):
+        self._keys: Dict[str, Hashable] = {}
+
+    def needs_update(self, panel: str, key: Hashable) -> bool:
+        """数据版本与上次渲染时不同则返回True并记录新版本"""
+        if panel in self._keys and self._keys[panel] == key:
+            return False
+        self._keys[panel] = key
+        return True
+
+    def reset(self):
+        self._keys.clear()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+基准测试基线管理工具
+读取pytest-benchmark导出的JSON（--benchmark-json），保存为精简的基线文件，或与基线比较并标出性能回退
+
+用法:
+    python -m pytest tests/benchmarks --benchmark-json=.benchmarks/latest.json
+    python scripts/benchmark_compare.py compare .benchmarks/latest.json
+    python scripts/benchmark_compare.py compare .benchmarks/latest.json --threshold 0.3 --stat min
+    python scripts/benchmark_compare.py save .benchmarks/latest.json     # 更新基线
+
+存在回退时compare以退出码1结束，可直接用于CI
+"""
+
+import sys
+import os
+import json
+import argparse
+import platform
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BASELINE = os.path.join(project_root, 'tests', 'benchmarks', 'baselines', 'baseline.json')
+STAT_KEYS = ('min', 'median', 'mean', 'stddev', 'rounds')
+# 慢于基线超过该比例视为回退（共享机器上墙钟时间抖动常达30%以上）
+DEFAULT_THRESHOLD = 0.5
+# 绝对差值低于该值（秒）时视为噪声，避免微秒级测试的抖动被误报
+DEFAULT_MIN_DELTA = 0.0005
+
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    读取基准结果，返回 {测试全名: 统计值}
+
+    同时支持pytest-benchmark的原始JSON（benchmarks为列表）和本工具保存的基线（benchmarks为字典）
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    benchmarks = data.get('benchmarks', {})
+    if isinstance(benchmarks, dict):
+        return benchmarks
+    return {
+        item.get('fullname') or item['name']: {key: item['stats'][key] for key in STAT_KEYS if key in item['stats']}
+        for item in benchmarks
+    }
+
+
+def save_baseline(results_path: str, baseline_path: str) -> int:
+    """把pytest-benchmark的结果精简后写入基线文件，返回写入的测试数"""
+    with open(results_path, 'r', encoding='utf-8') as f:
+        machine_info = json.load(f).get('machine_info', {})
+
+    baseline = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'python': machine_info.get('python_version', platform.python_version()),
+            'system': machine_info.get('system', platform.system()),
+            'cpu': (machine_info.get('cpu') or {}).get('brand_raw', platform.processor()),
+        },
+        'benchmarks': dict(sorted(load_results(results_path).items())),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+    with open(baseline_path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return len(baseline['benchmarks'])
+
+
+def compare_results(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]],
+                    stat: str = 'median', threshold: float = DEFAULT_THRESHOLD,
+                    min_delta: float = DEFAULT_MIN_DELTA) -> Dict[str, List[Tuple]]:
+    """
+    比较两组结果
+
+    Returns:
+        Dict: regressions/improvements/unchanged 为 (名称, 基线值, 当前值, 比值) 列表，
+              added/missing 为只出现在一侧的测试名称
+    """
+    report = {'regressions': [], 'improvements': [], 'unchanged': [],
+              'added': sorted(set(current) - set(baseline)),
+              'missing': sorted(set(baseline) - set(current))}
+
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name][stat], current[name][stat]
+        ratio = new / old if old else float('inf')
+        row = (name, old, new, ratio)
+        if abs(new - old) < min_delta:
+            report['unchanged'].append(row)
+        elif ratio > 1 + threshold:
+            report['regressions'].append(row)
+        elif ratio < 1 / (1 + threshold):
+            report['improvements'].append(row)
+        else:
+            report['unchanged'].append(row)
+    return report
+
+
+def _format_seconds(value: float) -> str:
+    if value >= 1:
+        return f"{value:.2f}s"
+    if value >= 1e-3:
+        return f"{value * 1e3:.2f}ms"
+    return f"{value * 1e6:.0f}us"
+
+
+def print_report(report: Dict[str, List], stat: str, threshold: float):
+    print(f"📊 基准测试比较 (统计值: {stat}, 回退阈值: +{threshold:.0%})")
+    sections = (('regressions', '❌ 性能回退'), ('improvements', '✅ 性能提升'), ('unchanged', '➖ 无明显变化'))
+    for key, title in sections:
+        rows = report[key]
+        if not rows:
+            continue
+        print(f"\n{title} ({len(rows)})")
+        for name, old, new, ratio in rows:
+            print(f"   {_format_seconds(old):>10} -> {_format_seconds(new):>10}  {ratio:6.2f}x  {name}")
+
+    if report['added']:
+        print(f"\n🆕 基线中没有的测试 ({len(report['added'])})")
+        for name in report['added']:
+            print(f"   {name}")
+    if report['missing']:
+        print(f"\n⚠️ 本次未运行的基线测试 ({len(report['missing'])})")
+        for name in report['missing']:
+            print(f"   {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='基准测试基线管理工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compare_parser = subparsers.add_parser('compare', help='与基线比较并标出性能回退')
+    compare_parser.add_argument('results', help='pytest-benchmark导出的JSON文件')
+    compare_parser.add_argument('--baseline', '-b', default=DEFAULT_BASELINE, help='基线文件路径')
+    compare_parser.add_argument('--stat', choices=('min', 'median', 'mean'), default='median',
+                                help='参与比较的统计值')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='慢于基线超过该比例视为回退（默认0.5即50%%）')
+    compare_parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                                help='绝对差值低于该秒数时忽略')
+
+    save_parser = subparsers.add_parser('save', help='把结果保存为新的基线')
+    save_parser.add_argument('results', help='pytest-benchmark导出的JSON文件')
+    save_parser.add_argument('--baseline', '-b', default=DEFAULT_BASELINE, help='基线文件路径')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.results):
+        print(f"❌ 结果文件不存在: {args.results}")
+        sys.exit(1)
+
+    if args.command == 'save':
+        count = save_baseline(args.results, args.baseline)
+        print(f"💾 已保存{count}项基准到: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"❌ 基线文件不存在: {args.baseline}（先运行 save 子命令生成）")
+        sys.exit(1)
+
+    report = compare_results(load_results(args.baseline), load_results(args.results),
+                             args.stat, args.threshold, args.min_delta)
+    print_report(report, args.stat, args.threshold)
+    if report['regressions']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+辩论提前结束回放工具
+读取 TradingAgentsGraph._log_state 写出的完整状态日志（eval_results/{股票}/TradingAgentsStrategy_logs/full_states_log.json），
+在已完成的完整辩论上回放收敛判断，统计可节省的辩论轮数，以及提前结束时各方立场与完整辩论结束时的差异
+（立场变化作为最终决策可能变化的近似指标）
+
+用法:
+    python scripts/debate_convergence_report.py
+    python scripts/debate_convergence_report.py --results-dir eval_results --threshold 0.3 --min-rounds 2
+"""
+
+import sys
+import os
+import glob
+import json
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.debate_convergence import DebateConvergence, replay_debate
+from tradingagents.utils.debate_history import INVEST_SPEAKERS, RISK_SPEAKERS, speaker_turns
+
+DEBATES = {
+    "investment": ("investment_debate_state", INVEST_SPEAKERS),
+    "risk": ("risk_debate_state", RISK_SPEAKERS),
+}
+
+
+def load_states(results_dir):
+    """读取所有完整状态日志，返回 [(股票, 日期, 状态), ...]"""
+    pattern = os.path.join(results_dir, "*", "TradingAgentsStrategy_logs", "full_states_log.json")
+    states = []
+    for path in sorted(glob.glob(pattern)):
+        ticker = os.path.basename(os.path.dirname(os.path.dirname(path)))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                log = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 跳过无法读取的日志 {path}: {e}")
+            continue
+        states.extend((ticker, date, state) for date, state in log.items())
+    return states
+
+
+def replay_states(states, convergence_by_debate):
+    """对每次分析的每场辩论回放收敛判断，返回逐条结果"""
+    rows = []
+    for ticker, date, state in states:
+        for debate, (key, speakers) in DEBATES.items():
+            debate_state = state.get(key) or {}
+            turns = {speaker: speaker_turns(debate_state, speaker) for speaker in speakers}
+            result = replay_debate(turns, convergence_by_debate[debate])
+            if result["rounds"]:
+                rows.append({"ticker": ticker, "date": date, "debate": debate, **result})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在已保存的辩论上回放提前结束判断")
+    parser.add_argument("--results-dir", default=os.getenv("TRADINGAGENTS_RESULTS_DIR", "eval_results"))
+    parser.add_argument("--threshold", type=float, default=0.35, help="新颖度阈值")
+    parser.add_argument("--min-rounds", type=int, default=2, help="提前结束前至少进行的轮数")
+    args = parser.parse_args()
+
+    convergence = DebateConvergence(args.min_rounds, args.threshold)
+    rows = replay_states(load_states(args.results_dir),
+                         {"investment": convergence, "risk": convergence})
+    if not rows:
+        print(f"❌ {args.results_dir} 下没有包含辩论记录的状态日志")
+        return
+
+    print(f"{'股票':<10} {'日期':<12} {'辩论':<12} {'轮数':>4} {'收敛轮':>6} {'节省':>4}  立场变化")
+    for row in rows:
+        print(f"{row['ticker']:<10} {row['date']:<12} {row['debate']:<12} {row['rounds']:>4} "
+              f"{row['stop_round']:>6} {row['rounds_saved']:>4}  {'是' if row['stance_changed'] else '否'}")
+
+    total_rounds = sum(row["rounds"] for row in rows)
+    saved = sum(row["rounds_saved"] for row in rows)
+    changed = sum(row["stance_changed"] for row in rows)
+    early = sum(1 for row in rows if row["rounds_saved"])
+    print(f"\n📊 共 {len(rows)} 场辩论 / {total_rounds} 轮：{early} 场可提前结束，节省 {saved} 轮"
+          f"（{saved / total_rounds:.0%}），立场与完整辩论不同 {changed} 场")
+
+
+if __name__ == "__main__":
+    main()
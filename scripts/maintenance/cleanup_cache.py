@@ -37,6 +37,9 @@ def cleanup_file_cache(max_age_days: int = 7):
         logger.info(f"📁 检查缓存目录: {cache_dir}")
         
         for cache_file in cache_dir.rglob("*"):
+            # 全市场快照是按交易日累积的历史数据，不按文件时间清理
+            if "tushare_universe" in cache_file.parts:
+                continue
             if cache_file.is_file():
                 try:
                     file_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
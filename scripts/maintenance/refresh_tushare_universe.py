@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tushare全市场快照刷新工具
+按交易日批量拉取全市场日线和股票基本信息，适合作为夜间定时任务运行
+
+示例:
+    python scripts/maintenance/refresh_tushare_universe.py                 # 补齐最近10天
+    python scripts/maintenance/refresh_tushare_universe.py --start 2020-01-01
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('scripts')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='刷新Tushare全市场快照')
+    parser.add_argument('--start', help='开始日期（YYYY-MM-DD或YYYYMMDD），为空时只补齐最近几天')
+    parser.add_argument('--end', help='结束日期，默认为今天')
+    parser.add_argument('--lookback-days', type=int, default=10, help='未指定开始日期时的回看天数')
+    parser.add_argument('--force', action='store_true', help='覆盖已存在的交易日分区')
+    args = parser.parse_args()
+
+    from tradingagents.dataflows.tushare_utils import get_tushare_provider
+
+    provider = get_tushare_provider()
+    if not provider.connected:
+        logger.error("❌ Tushare未连接，请检查TUSHARE_TOKEN配置")
+        return 1
+
+    store = provider.get_universe_store()
+    if store is None:
+        return 1
+
+    if args.start:
+        stats = store.refresh_range(args.start, args.end, force=args.force)
+    else:
+        stats = store.refresh_latest(args.lookback_days, force=args.force)
+
+    logger.info(f"📊 刷新统计: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
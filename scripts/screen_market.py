@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+全市场选股筛选工具
+基于本地Tushare全市场快照做向量化筛选，输出排序后的候选股票
+
+示例:
+    python scripts/screen_market.py --min-momentum 0.1 --min-volume-ratio 2
+    python scripts/screen_market.py --macd golden_cross --max-rsi 70 --top 20 --output candidates.txt
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('scripts')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全市场选股筛选')
+    parser.add_argument('--end', help='截止交易日，默认为快照中最新的交易日')
+    parser.add_argument('--momentum-window', type=int, default=20, help='动量回看交易日数')
+    parser.add_argument('--min-momentum', type=float, help='区间涨幅下限，如0.1表示+10%%')
+    parser.add_argument('--min-volume-ratio', type=float, help='当日成交量/前20日均量下限')
+    parser.add_argument('--macd', choices=['golden_cross', 'dead_cross', 'bullish', 'bearish'], help='MACD状态')
+    parser.add_argument('--min-rsi', type=float)
+    parser.add_argument('--max-rsi', type=float)
+    parser.add_argument('--min-amount', type=float, help='当日成交额下限（千元）')
+    parser.add_argument('--include-st', action='store_true', help='不排除ST股票')
+    parser.add_argument('--top', type=int, default=50, help='输出的候选数量')
+    parser.add_argument('--output', help='把候选股票代码逐行写入文件，供批量分析使用')
+    args = parser.parse_args()
+
+    from tradingagents.dataflows.stock_screener import (
+        ScreenCriteria, get_stock_screener, candidates_to_symbols
+    )
+
+    criteria = ScreenCriteria(
+        momentum_window=args.momentum_window,
+        min_momentum=args.min_momentum,
+        min_volume_ratio=args.min_volume_ratio,
+        macd_state=args.macd,
+        min_rsi=args.min_rsi,
+        max_rsi=args.max_rsi,
+        min_amount=args.min_amount,
+        exclude_st=not args.include_st,
+        top_n=args.top,
+    )
+    candidates = get_stock_screener().screen(criteria, end_date=args.end)
+    if candidates.empty:
+        logger.info("📭 没有符合条件的股票")
+        return 0
+
+    columns = [c for c in ['ts_code', 'name', 'industry', 'close', 'momentum', 'volume_ratio',
+                           'macd_state', 'rsi', 'score'] if c in candidates.columns]
+    print(candidates[columns].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    if args.output:
+        symbols = candidates_to_symbols(candidates)
+        Path(args.output).write_text("\n".join(symbols) + "\n", encoding='utf-8')
+        logger.info(f"💾 候选股票代码已写入: {args.output} ({len(symbols)}只)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+分析耗时分解工具
+读取调用链追踪导出的JSONL文件（TRACING_EXPORTER=jsonl），按分析输出火焰图式的耗时分解
+
+用法:
+    python scripts/trace_report.py --list
+    python scripts/trace_report.py                      # 最近一次分析
+    python scripts/trace_report.py --trace-id analysis_xxx --min-seconds 0.5
+"""
+
+import sys
+import os
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.tracing import load_spans, summarize_by_kind, format_flame
+
+
+def group_traces(spans):
+    """按trace_id分组，返回 {trace_id: [span, ...]}"""
+    traces = defaultdict(list)
+    for s in spans:
+        traces[s["trace_id"]].append(s)
+    return traces
+
+
+def trace_summary(trace_spans):
+    """返回(开始时间, 总耗时, 根span名称, 股票代码)"""
+    ids = {s["span_id"] for s in trace_spans}
+    roots = [s for s in trace_spans if not s.get("parent_id") or s["parent_id"] not in ids]
+    start = min(s.get("start_time", 0) for s in trace_spans)
+    duration = sum(s.get("duration") or 0 for s in roots)
+    root = max(roots, key=lambda s: s.get("duration") or 0)
+    return start, duration, root["name"], root.get("attributes", {}).get("symbol", "")
+
+
+def print_trace_list(traces):
+    print(f"{'开始时间':<20} {'总耗时':>9}  {'span数':>6}  trace_id / 根节点")
+    for trace_id, trace_spans in sorted(traces.items(), key=lambda kv: trace_summary(kv[1])[0]):
+        start, duration, root_name, symbol = trace_summary(trace_spans)
+        started = datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"{started:<20} {duration:8.2f}s  {len(trace_spans):>6}  {trace_id}  {root_name} {symbol}")
+
+
+def print_trace_report(trace_id, trace_spans, min_seconds):
+    start, duration, root_name, symbol = trace_summary(trace_spans)
+    print(f"📊 分析耗时分解: {trace_id} {symbol}")
+    print(f"   开始时间: {datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S')}, "
+          f"总耗时: {duration:.2f}s, span数: {len(trace_spans)}")
+    print()
+    print(format_flame(trace_spans, min_duration=min_seconds))
+    print()
+    print("⏱️ 按类型汇总（自身耗时，不含子span）")
+    summary = summarize_by_kind(trace_spans)
+    for kind, item in sorted(summary.items(), key=lambda kv: -kv[1]["self"]):
+        ratio = item["self"] / duration if duration else 0
+        print(f"   {kind:<12} {item['self']:8.2f}s {ratio:6.1%}  ({item['count']}次)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析耗时分解工具')
+    parser.add_argument('--file', '-f', default=os.getenv('TRACING_JSONL_PATH', './logs/traces.jsonl'),
+                        help='span JSONL文件路径')
+    parser.add_argument('--trace-id', '-t', help='要查看的trace_id（默认最近一次）')
+    parser.add_argument('--list', '-l', action='store_true', help='列出所有trace')
+    parser.add_argument('--min-seconds', type=float, default=0.0, help='隐藏耗时低于该值的节点')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"❌ span文件不存在: {args.file}（请设置 TRACING_EXPORTER=jsonl 后重新运行分析）")
+        sys.exit(1)
+
+    traces = group_traces(load_spans(args.file))
+    if not traces:
+        print("⚠️ 没有span记录")
+        return
+
+    if args.list:
+        print_trace_list(traces)
+        return
+
+    trace_id = args.trace_id or max(traces, key=lambda t: trace_summary(traces[t])[0])
+    if trace_id not in traces:
+        print(f"❌ 未找到trace: {trace_id}")
+        sys.exit(1)
+
+    print_trace_report(trace_id, traces[trace_id], args.min_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线基准测试的公共fixture
+未安装pytest-benchmark时跳过整个目录
+"""
+
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+    collect_ignore_glob = []
+except ImportError:
+    collect_ignore_glob = ["test_*.py"]
+
+from tests.benchmarks.fakes import offline_data_sources
+
+
+@pytest.fixture
+def offline_sources(monkeypatch):
+    """外部数据源全部替换为本地替身，并提供测试用的API密钥"""
+    for key in ("TUSHARE_TOKEN", "FINNHUB_API_KEY"):
+        monkeypatch.setenv(key, "benchmark")
+    with offline_data_sources() as fakes:
+        yield fakes
+
+
+@pytest.fixture
+def file_cache(tmp_path):
+    """使用临时目录的文件缓存"""
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    return StockDataCache(str(tmp_path / "data_cache"))
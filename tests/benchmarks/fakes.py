@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试用的本地替身
+为Tushare、AKShare、TDX、yfinance、Finnhub、LLM和嵌入接口提供确定性的离线实现，
+同一输入每次返回相同结果，基准测试的耗时只反映项目自身代码
+"""
+
+import json
+import zlib
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+
+def _seed(*parts: str) -> int:
+    return zlib.crc32("|".join(parts).encode("utf-8"))
+
+
+def make_price_frame(symbol: str, start_date: str = "2024-01-01",
+                     end_date: str = "2024-12-31") -> pd.DataFrame:
+    """按股票代码生成确定性的日线行情（工作日），列名为小写的 date/open/high/low/close/volume"""
+    dates = pd.bdate_range(start_date, end_date)
+    rng = np.random.RandomState(_seed(symbol) % (2 ** 32))
+    close = 20 + np.cumsum(rng.normal(0, 0.4, len(dates))).clip(-15, None)
+    open_ = close + rng.normal(0, 0.2, len(dates))
+    high = np.maximum(open_, close) + rng.uniform(0, 0.5, len(dates))
+    low = np.minimum(open_, close) - rng.uniform(0, 0.5, len(dates))
+    volume = rng.randint(1_000_000, 5_000_000, len(dates))
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "open": open_.round(2),
+        "high": high.round(2),
+        "low": low.round(2),
+        "close": close.round(2),
+        "volume": volume,
+    })
+
+
+def make_yfinance_frame(symbol: str, start_date: str = "2015-01-01",
+                        end_date: str = "2025-03-25") -> pd.DataFrame:
+    """yfinance风格的行情：Date索引，首字母大写的列名"""
+    frame = make_price_frame(symbol, start_date, end_date)
+    frame = frame.rename(columns=str.capitalize)
+    frame["Date"] = pd.to_datetime(frame["Date"])
+    return frame.set_index("Date")
+
+
+# ===== 数据源替身 =====
+
+class FakeTushareAdapter:
+    """替代 tushare_adapter.TushareDataAdapter"""
+
+    def get_stock_data(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        return make_price_frame(symbol, start_date or "2024-01-01", end_date or "2024-12-31")
+
+    def get_stock_info(self, symbol: str) -> Dict[str, str]:
+        return {"symbol": symbol, "name": f"测试股份{symbol[-2:]}", "industry": "银行"}
+
+
+class FakeAKShareProvider:
+    """替代 akshare_utils.AKShareProvider"""
+
+    connected = True
+
+    def get_stock_data(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        frame = make_price_frame(symbol, start_date or "2024-01-01", end_date or "2024-12-31")
+        return frame.rename(columns={"date": "日期", "open": "开盘", "high": "最高",
+                                     "low": "最低", "close": "收盘", "volume": "成交量"})
+
+
+class FakeTdxProvider:
+    """替代 tdx_utils.TongDaXinDataProvider"""
+
+    def is_connected(self) -> bool:
+        return True
+
+    def get_stock_history_data(self, stock_code: str, start_date: str, end_date: str,
+                               period: str = 'D') -> pd.DataFrame:
+        return make_price_frame(stock_code, start_date, end_date).rename(columns=str.capitalize)
+
+    def get_real_time_data(self, stock_code: str) -> Dict[str, Any]:
+        last = make_price_frame(stock_code).iloc[-1]
+        return {"code": stock_code, "name": f"测试股份{stock_code[-2:]}", "price": float(last["close"]),
+                "change_percent": 0.5, "volume": int(last["volume"]), "update_time": "2024-12-31 15:00:00"}
+
+    def get_stock_technical_indicators(self, stock_code: str, period: int = 20) -> Dict[str, float]:
+        close = make_price_frame(stock_code)["close"]
+        return {"MA5": float(close.tail(5).mean()), "MA10": float(close.tail(10).mean()),
+                "MA20": float(close.tail(20).mean()), "RSI": 50.0,
+                "MACD": 0.1, "MACD_signal": 0.05, "MACD_hist": 0.05}
+
+
+def fake_yf_download(symbol, start=None, end=None, **kwargs) -> pd.DataFrame:
+    """替代 yfinance.download"""
+    return make_yfinance_frame(symbol, start or "2015-01-01", end or "2025-03-25")
+
+
+class FakeFinnhubClient:
+    """替代 finnhub.Client"""
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key
+
+    def company_basic_financials(self, symbol: str, metric: str = "all") -> Dict[str, Any]:
+        rng = np.random.RandomState(_seed(symbol, "metric") % (2 ** 32))
+        return {"symbol": symbol, "metric": {
+            "peBasicExclExtraTTM": round(float(rng.uniform(10, 40)), 2),
+            "psTTM": round(float(rng.uniform(1, 10)), 2),
+            "pbQuarterly": round(float(rng.uniform(1, 8)), 2),
+            "roeTTM": round(float(rng.uniform(5, 30)), 2),
+            "roaTTM": round(float(rng.uniform(1, 15)), 2),
+            "netProfitMarginTTM": round(float(rng.uniform(5, 25)), 2),
+            "grossMarginTTM": round(float(rng.uniform(20, 60)), 2),
+            "currentRatioQuarterly": round(float(rng.uniform(0.8, 3)), 2),
+            "totalDebt/totalEquityQuarterly": round(float(rng.uniform(0.1, 2)), 2),
+        }}
+
+    def company_profile2(self, symbol: str = None) -> Dict[str, Any]:
+        return {"name": f"{symbol} Inc.", "finnhubIndustry": "Technology", "country": "US",
+                "currency": "USD", "marketCapitalization": 2_500_000, "shareOutstanding": 15_000}
+
+    def company_earnings(self, symbol: str, limit: int = 4) -> List[Dict[str, Any]]:
+        return [{"period": f"2024-{3 * (4 - i):02d}-30", "actual": 1.5 + 0.1 * i,
+                 "estimate": 1.4 + 0.1 * i, "surprisePercent": 3.2} for i in range(limit)]
+
+
+# ===== 嵌入与LLM替身 =====
+
+EMBEDDING_DIM = 256
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """由文本哈希生成的确定性单位向量"""
+    rng = np.random.RandomState(_seed(text) % (2 ** 32))
+    vector = rng.normal(size=dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeEmbeddingClient:
+    """替代 openai.OpenAI，只实现 embeddings.create"""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+        self.embeddings = SimpleNamespace(create=self._create)
+
+    def _create(self, model: str, input):
+        self.calls += 1
+        texts = [input] if isinstance(input, str) else list(input)
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=fake_embedding(text))
+                                     for i, text in enumerate(texts)])
+
+
+SIGNAL_JSON = json.dumps({
+    "action": "持有", "target_price": 12.5, "confidence": 0.7,
+    "risk_score": 0.5, "reasoning": "基本面稳定，估值合理",
+}, ensure_ascii=False)
+
+# (提示词关键字, 回复)，按顺序匹配第一条；回复保持确定性以便比较耗时
+DEFAULT_SCRIPT: Tuple[Tuple[str, str], ...] = (
+    ("结构化的投资决策信息", SIGNAL_JSON),
+    ("反思", "经验总结：在估值合理时维持仓位，控制回撤。"),
+)
+DEFAULT_REPLY = ("## 分析结论\n综合技术面、基本面与市场情绪，当前走势平稳，估值处于合理区间。\n"
+                 "目标价位: ¥12.50\n最终交易建议: **持有**")
+
+
+def _build_scripted_model_class():
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class ScriptedChatModel(BaseChatModel):
+        """
+        按脚本回复的LLM，可替代ChatOpenAI等适配器
+
+        根据提示词中的关键字选择回复，从不发起工具调用，
+        分析师节点直接生成报告，辩论按配置的轮数结束
+        """
+
+        model: str = "scripted"
+        base_url: Optional[str] = None
+        script: Sequence[Tuple[str, str]] = DEFAULT_SCRIPT
+        default_reply: str = DEFAULT_REPLY
+        calls: int = 0
+
+        @property
+        def _llm_type(self) -> str:
+            return "scripted"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            self.calls += 1
+            prompt = "\n".join(str(message.content) for message in messages)
+            reply = next((text for keyword, text in self.script if keyword in prompt), self.default_reply)
+            message = AIMessage(content=reply, usage_metadata={
+                "input_tokens": len(prompt) // 4, "output_tokens": len(reply) // 4,
+                "total_tokens": (len(prompt) + len(reply)) // 4})
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return ScriptedChatModel
+
+
+_scripted_model_class = None
+
+
+def __getattr__(name):
+    # langchain_core在首次使用时才导入，未安装时数据层基准测试仍可运行
+    global _scripted_model_class
+    if name == "ScriptedChatModel":
+        if _scripted_model_class is None:
+            _scripted_model_class = _build_scripted_model_class()
+        return _scripted_model_class
+    raise AttributeError(name)
+
+
+# ===== 安装替身 =====
+
+@contextmanager
+def offline_data_sources() -> Iterator[SimpleNamespace]:
+    """把所有外部数据源替换为本地替身"""
+    tushare_adapter = FakeTushareAdapter()
+    akshare_provider = FakeAKShareProvider()
+    tdx_provider = FakeTdxProvider()
+    no_mongodb = SimpleNamespace(is_mongodb_available=lambda: False, get_mongodb_client=lambda: None)
+
+    with ExitStack() as stack:
+        stack.enter_context(patch("tradingagents.dataflows.tushare_adapter.get_tushare_adapter",
+                                  return_value=tushare_adapter))
+        stack.enter_context(patch("tradingagents.dataflows.akshare_utils.get_akshare_provider",
+                                  return_value=akshare_provider))
+        stack.enter_context(patch("tradingagents.dataflows.tdx_utils.get_tdx_provider",
+                                  return_value=tdx_provider))
+        stack.enter_context(patch("tradingagents.config.database_manager.get_database_manager",
+                                  return_value=no_mongodb))
+        stack.enter_context(patch("yfinance.download", side_effect=fake_yf_download))
+        stack.enter_context(patch("finnhub.Client", FakeFinnhubClient))
+        yield SimpleNamespace(tushare=tushare_adapter, akshare=akshare_provider, tdx=tdx_provider)
+
+
+@contextmanager
+def scripted_llm_adapters(provider: str = "openai") -> Iterator[None]:
+    """让LLM注册表返回ScriptedChatModel，退出时恢复原登记"""
+    from tradingagents.utils.provider_registry import get_llm_adapters, LLM_ADAPTERS
+
+    registry = get_llm_adapters()
+    registry.register(provider, f"{__name__}:ScriptedChatModel")
+    try:
+        yield
+    finally:
+        registry.register(provider, LLM_ADAPTERS[provider])
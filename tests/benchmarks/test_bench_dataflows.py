@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据层基准测试：技术指标计算、文件缓存、数据库缓存、数据源管理器和Finnhub基本面
+所有外部接口由 tests/benchmarks/fakes.py 中的本地替身提供
+
+运行并与基线比较:
+    python -m pytest tests/benchmarks --benchmark-json=.benchmarks/latest.json
+    python scripts/benchmark_compare.py compare .benchmarks/latest.json
+"""
+
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from tests.benchmarks.fakes import make_price_frame, make_yfinance_frame
+
+pytestmark = pytest.mark.benchmark(group="dataflows", min_rounds=5)
+
+
+@pytest.fixture
+def yfin_data_dir(tmp_path):
+    """离线模式读取的 {symbol}-YFin-data-2015-01-01-2025-03-25.csv"""
+    frame = make_yfinance_frame("AAPL").reset_index()
+    frame["Date"] = frame["Date"].dt.strftime("%Y-%m-%d")
+    frame.to_csv(tmp_path / "AAPL-YFin-data-2015-01-01-2025-03-25.csv", index=False)
+    return str(tmp_path)
+
+
+def test_stockstats_offline(benchmark, yfin_data_dir):
+    from tradingagents.dataflows.stockstats_utils import StockstatsUtils
+
+    value = benchmark(StockstatsUtils.get_stock_stats, "AAPL", "macd", "2024-05-10", yfin_data_dir)
+    assert isinstance(value, float)
+
+
+def test_stockstats_online_cold(benchmark, offline_sources, tmp_path):
+    """在线模式，每轮清空缓存目录，包含下载（替身）、写CSV和指标计算"""
+    from tradingagents.dataflows.stockstats_utils import StockstatsUtils
+
+    cache_dir = tmp_path / "yfin_cache"
+
+    def clear_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    with patch("tradingagents.dataflows.stockstats_utils.get_config",
+               return_value={"data_cache_dir": str(cache_dir)}):
+        value = benchmark.pedantic(StockstatsUtils.get_stock_stats,
+                                   args=("AAPL", "rsi", "2024-05-10", "", True),
+                                   setup=clear_cache, rounds=5)
+    assert isinstance(value, float)
+
+
+def test_file_cache_save(benchmark, file_cache):
+    frame = make_price_frame("000001")
+    cache_key = benchmark(file_cache.save_stock_data, "000001", frame,
+                          "2024-01-01", "2024-12-31", "tushare")
+    assert cache_key
+
+
+def test_file_cache_find_and_load(benchmark, file_cache):
+    frame = make_price_frame("000001")
+    file_cache.save_stock_data("000001", frame, "2024-01-01", "2024-12-31", "tushare")
+
+    def find_and_load():
+        cache_key = file_cache.find_cached_stock_data("000001", "2024-01-01", "2024-12-31", "tushare")
+        return file_cache.load_stock_data(cache_key)
+
+    data = benchmark(find_and_load)
+    assert len(data) == len(frame)
+
+
+@pytest.fixture
+def db_cache():
+    """MongoDB和Redis分别由mongomock和fakeredis代替的数据库缓存"""
+    mongomock = pytest.importorskip("mongomock")
+    fakeredis = pytest.importorskip("fakeredis")
+    from tradingagents.dataflows import db_cache_manager
+
+    redis_client = fakeredis.FakeRedis()
+    with patch.object(db_cache_manager, "MONGODB_AVAILABLE", True), \
+         patch.object(db_cache_manager, "REDIS_AVAILABLE", True), \
+         patch.object(db_cache_manager, "MongoClient", mongomock.MongoClient, create=True), \
+         patch.object(db_cache_manager, "get_redis_client", return_value=redis_client):
+        manager = db_cache_manager.DatabaseCacheManager()
+    assert manager.mongodb_client is not None and manager.redis_client is not None
+    return manager
+
+
+def test_db_cache_save(benchmark, db_cache):
+    frame = make_price_frame("600519")
+    cache_key = benchmark(db_cache.save_stock_data, "600519", frame,
+                          "2024-01-01", "2024-12-31", "tushare")
+    assert cache_key
+
+
+def test_db_cache_find_and_load(benchmark, db_cache):
+    frame = make_price_frame("600519")
+    db_cache.save_stock_data("600519", frame, "2024-01-01", "2024-12-31", "tushare")
+
+    def find_and_load():
+        cache_key = db_cache.find_cached_stock_data("600519", "2024-01-01", "2024-12-31", "tushare")
+        return db_cache.load_stock_data(cache_key)
+
+    data = benchmark(find_and_load)
+    assert len(data) == len(frame)
+
+
+@pytest.mark.parametrize("source", ["tushare", "akshare", "tdx"])
+def test_data_source_manager_get_stock_data(benchmark, offline_sources, source):
+    from tradingagents.dataflows.data_source_manager import DataSourceManager, ChinaDataSource
+
+    manager = DataSourceManager()
+    manager.current_source = ChinaDataSource(source)
+    # TDX接口自带文件缓存，关闭后每轮都走完整的获取和格式化流程
+    with patch("tradingagents.dataflows.tdx_utils.FILE_CACHE_AVAILABLE", False):
+        result = benchmark(manager.get_stock_data, "000001", "2024-01-01", "2024-06-30")
+    assert "❌" not in result
+
+
+def test_finnhub_fundamentals_cold(benchmark, offline_sources, file_cache):
+    """每轮清空缓存，包含三次Finnhub请求（替身）、报告格式化和缓存写入"""
+    from tradingagents.dataflows.interface import get_fundamentals_finnhub
+
+    def clear_cache():
+        for path in file_cache.us_fundamentals_dir.iterdir():
+            path.unlink()
+
+    with patch("tradingagents.dataflows.cache_manager.get_cache", return_value=file_cache):
+        report = benchmark.pedantic(get_fundamentals_finnhub, args=("AAPL", "2024-05-10"),
+                                    setup=clear_cache, rounds=5)
+    assert "Finnhub" in report
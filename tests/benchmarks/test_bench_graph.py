@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+完整分析流程基准测试：TradingAgentsGraph.propagate
+LLM使用按脚本回复的ScriptedChatModel，嵌入和数据源使用本地替身，
+测得的是图编排、状态处理、记忆检索和日志等框架自身的开销
+"""
+
+import copy
+from unittest.mock import patch
+
+import pytest
+
+from tests.benchmarks.fakes import FakeEmbeddingClient, scripted_llm_adapters
+
+pytestmark = pytest.mark.benchmark(group="graph")
+
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_core")
+
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch, offline_sources):
+    try:
+        from tradingagents.default_config import DEFAULT_CONFIG
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+        from tradingagents.agents.utils import memory as memory_module
+    except ImportError as e:
+        pytest.skip(f"graph模块不可导入: {e}")
+
+    # 状态日志写入 eval_results/，切换到临时目录
+    monkeypatch.chdir(tmp_path)
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config.update({
+        "llm_provider": "openai",
+        "backend_url": "https://api.openai.com/v1",
+        "project_dir": str(tmp_path),
+        "data_cache_dir": str(tmp_path / "data_cache"),
+        "max_debate_rounds": 1,
+        "max_risk_discuss_rounds": 1,
+        "online_tools": True,
+        "memory_enabled": True,
+    })
+    with scripted_llm_adapters("openai"), \
+         patch.object(memory_module, "OpenAI", FakeEmbeddingClient):
+        yield TradingAgentsGraph(["market", "social", "news", "fundamentals"], config=config)
+
+
+def test_propagate(benchmark, graph):
+    final_state, decision = benchmark.pedantic(graph.propagate, args=("AAPL", "2024-05-10"),
+                                               rounds=3, iterations=1, warmup_rounds=1)
+    assert final_state["final_trade_decision"]
+    assert decision["action"] == "持有"
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记忆检索基准测试：FinancialSituationMemory.get_memories
+嵌入接口使用确定性的本地替身，向量检索使用真实的ChromaDB（内存模式）
+"""
+
+import importlib
+import itertools
+from unittest.mock import patch
+
+import pytest
+
+from tests.benchmarks.fakes import FakeEmbeddingClient
+
+pytestmark = pytest.mark.benchmark(group="memory", min_rounds=5)
+
+MEMORY_SIZE = 200
+CONFIG = {"llm_provider": "openai", "backend_url": "https://api.openai.com/v1"}
+_collection_ids = itertools.count()
+
+
+@pytest.fixture
+def memory():
+    pytest.importorskip("chromadb")
+    try:
+        memory_module = importlib.import_module("tradingagents.agents.utils.memory")
+    except ImportError as e:
+        pytest.skip(f"agents模块不可导入: {e}")
+
+    with patch.object(memory_module, "OpenAI", FakeEmbeddingClient):
+        # ChromaDB客户端是进程内单例，每个测试使用独立的集合
+        memory = memory_module.FinancialSituationMemory(f"benchmark_memory_{next(_collection_ids)}", CONFIG)
+    memory.add_situations([
+        (f"Situation {i}: sector {i % 11} volatility {i % 7}, rates {'rising' if i % 2 else 'falling'}",
+         f"Recommendation {i}: adjust exposure to sector {i % 11}")
+        for i in range(MEMORY_SIZE)
+    ])
+    return memory
+
+
+def test_get_memories(benchmark, memory):
+    matches = benchmark(memory.get_memories,
+                        "Sector 3 volatility 5 with rising rates and weak consumer demand", n_matches=2)
+    assert len(matches) == 2
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟新闻服务
+模拟FinnHub、Alpha Vantage、NewsAPI的响应格式，可为每个接口设置延迟，
+用于离线测试和基准测试新闻聚合器
+
+用法:
+    python tests/fake_news_server.py --port 8765 --delay finnhub=0.5 --delay newsapi=3
+"""
+
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse
+
+
+_TOPICS = [
+    ("beats earnings expectations", "Quarterly revenue came in ahead of consensus on strong services growth"),
+    ("announces share buyback", "The board approved a new repurchase program funded from free cash flow"),
+    ("faces antitrust probe in Europe", "Regulators opened a formal investigation into app store practices"),
+    ("expands manufacturing in India", "Suppliers are adding assembly lines to diversify the supply chain"),
+    ("launches new AI features", "The update brings on-device language models to recent hardware"),
+    ("cuts prices in China", "Discounts on flagship phones aim to defend share against local rivals"),
+    ("names new chief operating officer", "The executive reshuffle follows the retirement of a longtime leader"),
+    ("settles patent dispute", "Both companies agreed to drop pending lawsuits across jurisdictions"),
+    ("raises dividend", "The payout increase marks the twelfth consecutive annual raise"),
+    ("delays headset shipments", "Component shortages pushed the launch window into next quarter"),
+    ("wins streaming awards", "Original series collected several trophies at the annual ceremony"),
+    ("invests in chip startup", "The minority stake secures access to advanced packaging capacity"),
+    ("reports record wearables sales", "Watch and earbuds demand outpaced analyst forecasts this season"),
+    ("updates privacy policy", "New controls let users limit cross-app tracking by default"),
+    ("opens flagship store in Mumbai", "Crowds queued overnight ahead of the grand opening event"),
+    ("trims iPad orders", "Supply chain checks point to softer tablet demand into year end"),
+]
+
+
+def make_articles(ticker: str, count: int = 20, duplicate_every: int = 4) -> List[Dict]:
+    """
+    生成模拟新闻；每duplicate_every条中有一条是前一条的转载
+    （标题标点/大小写不同，正文结尾追加来源说明）
+    """
+    articles = []
+    now = datetime.now()
+    for i in range(count):
+        if i and i % duplicate_every == 0:
+            prev = articles[-1]
+            articles.append({
+                "title": prev["title"].upper().replace(":", " -") + "!",
+                "summary": prev["summary"] + " (转载自合作媒体)",
+                "time": prev["time"],
+                "source": "Reprint Wire",
+            })
+            continue
+        originals = sum(1 for a in articles if a["source"] == "Fake Newswire")
+        headline, summary = _TOPICS[originals % len(_TOPICS)]
+        articles.append({
+            "title": f"{ticker}: {headline} (report {i})",
+            "summary": f"{summary}, according to people familiar with the matter (report {i}).",
+            "time": now - timedelta(minutes=10 * i + 1),
+            "source": "Fake Newswire",
+        })
+    return articles
+
+
+class FakeNewsServer:
+    """在后台线程中运行的模拟新闻服务"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 delays: Dict[str, float] = None, articles_per_source: int = 20):
+        self.delays = delays or {}
+        self.articles_per_source = articles_per_source
+        self.request_counts: Dict[str, int] = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                route = urlparse(self.path).path.strip("/")
+                server.request_counts[route] = server.request_counts.get(route, 0) + 1
+                time.sleep(server.delays.get(route, 0))
+
+                try:
+                    body = json.dumps(server.render(route)).encode("utf-8")
+                except KeyError:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端已超时断开
+                    pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def news_urls(self) -> Dict[str, str]:
+        """可直接传给RealtimeNewsAggregator(news_urls=...)的地址"""
+        return {name: f"{self.base_url}/{name}" for name in ("finnhub", "alpha_vantage", "newsapi")}
+
+    def render(self, route: str):
+        articles = make_articles("AAPL", self.articles_per_source)
+        if route == "finnhub":
+            return [{"headline": a["title"], "summary": a["summary"], "source": a["source"],
+                     "datetime": int(a["time"].timestamp()), "url": ""} for a in articles]
+        if route == "alpha_vantage":
+            return {"feed": [{"title": a["title"], "summary": a["summary"], "source": a["source"],
+                              "time_published": a["time"].strftime("%Y%m%dT%H%M%S"), "url": ""}
+                             for a in articles]}
+        if route == "newsapi":
+            return {"articles": [{"title": a["title"], "description": a["summary"],
+                                  "source": {"name": a["source"]}, "url": "",
+                                  "publishedAt": a["time"].astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+                                 for a in articles]}
+        raise KeyError(route)
+
+    def start(self) -> "FakeNewsServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟新闻服务')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', action='append', default=[],
+                        help='接口延迟，格式 源名称=秒，如 newsapi=3')
+    args = parser.parse_args()
+
+    delays = {k: float(v) for k, v in (item.split('=', 1) for item in args.delay)}
+    server = FakeNewsServer(port=args.port, delays=delays).start()
+    print(f"📰 模拟新闻服务已启动: {server.base_url}")
+    for name, url in server.news_urls.items():
+        print(f"   {name}: {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步日志管道测试
+验证入队处理器不阻塞调用线程、延迟格式化、按调用位置限流以及按模块采样
+"""
+
+import sys
+import os
+import time
+import queue
+import shutil
+import logging
+import logging.handlers
+import tempfile
+import unittest
+import threading
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.logging_manager import DeferredQueueHandler, LogSamplingFilter, TradingAgentsLogger
+
+
+class SlowHandler(logging.Handler):
+    """模拟慢速磁盘的处理器"""
+
+    def __init__(self, delay=0.002):
+        super().__init__()
+        self.delay = delay
+        self.messages = []
+        self.setFormatter(logging.Formatter("%(asctime)s | %(message)s"))
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.messages.append(record.getMessage())
+
+
+def make_logger(name, *handlers):
+    logger = logging.getLogger(name)
+    logger.handlers = list(handlers)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+class TestDeferredQueueHandler(unittest.TestCase):
+    """异步入队测试"""
+
+    def test_caller_not_blocked_by_slow_handler(self):
+        slow = SlowHandler()
+        log_queue = queue.Queue()
+        listener = logging.handlers.QueueListener(log_queue, slow)
+        listener.start()
+        logger = make_logger("test.async.slow", DeferredQueueHandler(log_queue))
+
+        start = time.perf_counter()
+        for i in range(200):
+            logger.info("fetched %s rows for %s", i, "000001")
+        elapsed = time.perf_counter() - start
+        listener.stop()
+
+        # 同步写入至少需要 200 × 2ms
+        self.assertLess(elapsed, 200 * slow.delay / 4)
+        self.assertEqual(len(slow.messages), 200)
+        self.assertEqual(slow.messages[-1], "fetched 199 rows for 000001")
+
+    def test_mutable_args_formatted_eagerly(self):
+        log_queue = queue.Queue()
+        logger = make_logger("test.async.args", DeferredQueueHandler(log_queue))
+        payload = {"count": 1}
+        logger.info("payload %s, symbol %s", payload, "AAPL")
+        logger.info("symbol %s", "MSFT")
+        payload["count"] = 2
+
+        mutable_record, immutable_record = log_queue.get_nowait(), log_queue.get_nowait()
+        self.assertEqual(mutable_record.msg, "payload {'count': 1}, symbol AAPL")
+        self.assertIsNone(mutable_record.args)
+        # 不可变参数保持原样，到监听线程再格式化
+        self.assertEqual(immutable_record.args, ("MSFT",))
+
+    def test_full_queue_drops_only_low_levels(self):
+        handler = DeferredQueueHandler(queue.Queue(maxsize=1))
+        logger = make_logger("test.async.full", handler)
+        logger.info("first")
+        logger.info("dropped")
+        self.assertEqual(handler.dropped, 1)
+
+        threading.Timer(0.1, handler.queue.get_nowait).start()
+        logger.error("kept")
+        self.assertEqual(handler.dropped, 1)
+
+
+class TestLogSamplingFilter(unittest.TestCase):
+    """采样与限流测试"""
+
+    def test_rate_limit_per_callsite(self):
+        collector = SlowHandler(delay=0)
+        sampling = LogSamplingFilter(per_callsite=5, interval=0.2)
+        collector.addFilter(sampling)
+        logger = make_logger("test.sampling.rate", collector)
+
+        def cache_hit(i):
+            logger.info(f"⚡ 从缓存加载A股数据: {i}")
+
+        for i in range(30):
+            cache_hit(i)
+        logger.warning("warnings are never limited")
+        self.assertEqual(len(collector.messages), 6)
+
+        time.sleep(0.25)
+        cache_hit("next")
+        self.assertEqual(collector.messages[-1], "⚡ 从缓存加载A股数据: next (同一位置另有25条日志已被限流)")
+
+    def test_module_sample_rate(self):
+        collector = SlowHandler(delay=0)
+        collector.addFilter(LogSamplingFilter(per_callsite=0, modules={"test_async_logging": {"sample_rate": 0.1}}))
+        logger = make_logger("test.sampling.module", collector)
+        for i in range(100):
+            logger.debug("cache hit %s", i)
+        self.assertEqual(len(collector.messages), 10)
+
+    def test_same_record_decided_once_across_handlers(self):
+        first, second = SlowHandler(delay=0), SlowHandler(delay=0)
+        sampling = LogSamplingFilter(per_callsite=3, interval=60)
+        first.addFilter(sampling)
+        second.addFilter(sampling)
+        logger = make_logger("test.sampling.handlers", first, second)
+        for _ in range(10):
+            logger.info("repeated")
+        self.assertEqual(len(first.messages), 3)
+        self.assertEqual(len(second.messages), 3)
+
+
+class TestManagerPipeline(unittest.TestCase):
+    """TradingAgentsLogger异步管道测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root_handlers = logging.getLogger().handlers[:]
+
+    def tearDown(self):
+        logging.getLogger().handlers = self.root_handlers
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_async_file_logging(self):
+        manager = TradingAgentsLogger()
+        config = manager.config
+        config['handlers']['file']['directory'] = self.temp_dir
+        config['handlers']['console']['enabled'] = False
+        config['docker']['enabled'] = False
+        config['async'] = {'enabled': True, 'queue_size': 100}
+        manager.shutdown()
+        manager = TradingAgentsLogger(config)
+        try:
+            self.assertEqual(logging.getLogger().handlers, [manager.queue_handler])
+            logging.getLogger("tradingagents.test").warning("📦 异步写入测试")
+            manager.flush()
+        finally:
+            manager.shutdown()
+
+        with open(os.path.join(self.temp_dir, "tradingagents.log"), encoding="utf-8") as f:
+            self.assertIn("📦 异步写入测试", f.read())
+
+
+def benchmark_logging(messages: int = 20000):
+    """对比同步与异步写文件时调用线程的耗时"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for mode in ("同步", "异步"):
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(temp_dir, f"{mode}.log"), maxBytes=10 * 1024 * 1024, backupCount=1, encoding="utf-8")
+            file_handler.setFormatter(logging.Formatter(
+                "%(asctime)s | %(name)-20s | %(levelname)-8s | %(module)s:%(funcName)s:%(lineno)d | %(message)s"))
+            listener = None
+            if mode == "异步":
+                log_queue = queue.Queue()
+                listener = logging.handlers.QueueListener(log_queue, file_handler)
+                listener.start()
+                logger = make_logger(f"bench.{mode}", DeferredQueueHandler(log_queue))
+            else:
+                logger = make_logger(f"bench.{mode}", file_handler)
+
+            start = time.perf_counter()
+            for i in range(messages):
+                logger.info(f"⚡ 从缓存加载A股数据: {i:06d}")
+            elapsed = time.perf_counter() - start
+            if listener:
+                listener.stop()
+            file_handler.close()
+            print(f"  {mode}: 每条 {elapsed / messages * 1e6:.1f} µs")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    print(f"\n📊 日志写入基准测试")
+    benchmark_logging()
+    unittest.main()
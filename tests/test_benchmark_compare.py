@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试基线比较工具测试
+验证pytest-benchmark结果的读取、基线保存以及回退/提升/噪声的判定
+"""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'scripts'))
+
+from benchmark_compare import load_results, save_baseline, compare_results
+
+
+def make_pytest_benchmark_json(medians):
+    return {
+        "machine_info": {"python_version": "3.10.13", "system": "Linux", "cpu": {"brand_raw": "test"}},
+        "benchmarks": [
+            {"name": name.split("::")[-1], "fullname": name,
+             "stats": {"min": median * 0.9, "median": median, "mean": median, "stddev": 0.0, "rounds": 10,
+                       "max": median * 2, "iqr": 0.0}}
+            for name, median in medians.items()
+        ],
+    }
+
+
+class TestBenchmarkCompare(unittest.TestCase):
+    """基线比较测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.results_path = os.path.join(self.tmpdir.name, "latest.json")
+        self.baseline_path = os.path.join(self.tmpdir.name, "baselines", "baseline.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_results(self, medians):
+        with open(self.results_path, "w", encoding="utf-8") as f:
+            json.dump(make_pytest_benchmark_json(medians), f)
+
+    def test_save_and_reload_baseline(self):
+        self.write_results({"bench.py::test_a": 0.01, "bench.py::test_b": 0.2})
+        self.assertEqual(save_baseline(self.results_path, self.baseline_path), 2)
+
+        baseline = load_results(self.baseline_path)
+        self.assertEqual(baseline, load_results(self.results_path))
+        self.assertEqual(set(baseline["bench.py::test_a"]), {"min", "median", "mean", "stddev", "rounds"})
+
+    def test_compare_classifies_changes(self):
+        baseline = {name: {"median": value} for name, value in
+                    {"slow": 0.010, "fast": 0.010, "same": 0.010, "noise": 0.0001, "gone": 0.01}.items()}
+        current = {name: {"median": value} for name, value in
+                   {"slow": 0.020, "fast": 0.004, "same": 0.011, "noise": 0.0004, "new": 0.01}.items()}
+
+        report = compare_results(baseline, current, threshold=0.5, min_delta=0.0005)
+
+        self.assertEqual([row[0] for row in report["regressions"]], ["slow"])
+        self.assertEqual([row[0] for row in report["improvements"]], ["fast"])
+        # 微秒级差异低于min_delta，即使比值为4倍也不算回退
+        self.assertEqual(sorted(row[0] for row in report["unchanged"]), ["noise", "same"])
+        self.assertEqual(report["added"], ["new"])
+        self.assertEqual(report["missing"], ["gone"])
+
+
+if __name__ == '__main__':
+    unittest.main()
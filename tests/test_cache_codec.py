@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存编解码器测试
+验证二进制格式的往返一致性、旧版JSON缓存的兼容解码，
+并提供载荷大小与解码耗时的基准测试（直接运行本文件）
+"""
+
+import sys
+import os
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows.cache_codec import encode, decode, is_encoded, CODEC_FORMAT
+from tradingagents.dataflows.db_cache_manager import DatabaseCacheManager
+
+
+def make_daily_bars(years: int = 5) -> pd.DataFrame:
+    """生成模拟的日线数据"""
+    dates = pd.bdate_range('2020-01-01', periods=250 * years)
+    rng = np.random.default_rng(42)
+    close = 10 + rng.standard_normal(len(dates)).cumsum() * 0.1
+    return pd.DataFrame({
+        'ts_code': '000001.SZ',
+        'trade_date': dates,
+        'open': close + rng.random(len(dates)) * 0.1,
+        'high': close + 0.2,
+        'low': close - 0.2,
+        'close': close,
+        'pre_close': np.roll(close, 1),
+        'change': np.diff(close, prepend=close[0]),
+        'pct_chg': np.diff(close, prepend=close[0]) / close * 100,
+        'vol': rng.integers(1e5, 1e7, len(dates)).astype(float),
+        'amount': rng.random(len(dates)) * 1e8,
+    })
+
+
+def legacy_encode(df: pd.DataFrame) -> str:
+    """旧版Redis载荷：DataFrame转JSON后再整体json.dumps"""
+    return json.dumps({
+        "data": df.to_json(orient='records', date_format='iso'),
+        "data_format": "dataframe_json",
+        "symbol": "000001",
+        "data_source": "tushare",
+        "created_at": "2024-01-01T00:00:00",
+    }, ensure_ascii=False)
+
+
+class FakeRedis:
+    """只实现setex/get的内存Redis替身"""
+
+    def __init__(self):
+        self.store = {}
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value.encode('utf-8') if isinstance(value, str) else value
+
+    def get(self, key):
+        return self.store.get(key)
+
+
+class TestCacheCodec(unittest.TestCase):
+    """缓存编解码器测试类"""
+
+    def test_dataframe_roundtrip(self):
+        df = make_daily_bars(1)
+        raw = encode(df, {"symbol": "000001"})
+        self.assertTrue(is_encoded(raw))
+
+        decoded, meta = decode(raw)
+        pd.testing.assert_frame_equal(decoded, df)
+        self.assertEqual(meta["symbol"], "000001")
+
+    def test_text_and_object_roundtrip(self):
+        text = "股票数据报告\n" * 200
+        self.assertEqual(decode(encode(text))[0], text)
+
+        obj = {"a": [1, 2, 3], "b": "中文"}
+        self.assertEqual(decode(encode(obj))[0], obj)
+
+    def test_legacy_payload_not_encoded(self):
+        self.assertFalse(is_encoded(legacy_encode(make_daily_bars(1)).encode('utf-8')))
+        self.assertFalse(is_encoded("plain text"))
+        with self.assertRaises(ValueError):
+            decode(b'{"data": "x"}')
+
+    def test_db_cache_manager_reads_legacy_and_binary(self):
+        with patch.object(DatabaseCacheManager, '_init_mongodb'), \
+             patch.object(DatabaseCacheManager, '_init_redis'):
+            manager = DatabaseCacheManager()
+        manager.redis_client = FakeRedis()
+
+        df = make_daily_bars(1)
+
+        # 旧版JSON条目仍可透明读取
+        manager.redis_client.setex("stock:legacy", 60, legacy_encode(df))
+        legacy = manager.load_stock_data("stock:legacy")
+        self.assertEqual(len(legacy), len(df))
+        self.assertListEqual(list(legacy.columns), list(df.columns))
+
+        # 新写入的条目为二进制格式
+        cache_key = manager.save_stock_data("000001", df, "2020-01-01", "2020-12-31", "tushare")
+        self.assertTrue(is_encoded(manager.redis_client.store[cache_key]))
+        pd.testing.assert_frame_equal(manager.load_stock_data(cache_key), df)
+
+    def test_mongodb_legacy_doc_decoding(self):
+        df = make_daily_bars(1)
+        legacy_doc = {"data": df.to_json(orient='records', date_format='iso'), "data_format": "dataframe_json"}
+        self.assertEqual(len(DatabaseCacheManager._decode_mongodb_data(legacy_doc)), len(df))
+
+        doc = {"data": encode(df), "data_format": CODEC_FORMAT}
+        pd.testing.assert_frame_equal(DatabaseCacheManager._decode_mongodb_data(doc), df)
+
+
+def benchmark_codec(iterations: int = 50):
+    """载荷大小与解码耗时基准测试（5年日线）"""
+    df = make_daily_bars(5)
+    legacy_raw = legacy_encode(df).encode('utf-8')
+    binary_raw = encode(df, {"symbol": "000001"})
+
+    def decode_legacy():
+        data_dict = json.loads(legacy_raw)
+        return DatabaseCacheManager._decode_mongodb_data(data_dict)
+
+    def timed(func):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations * 1000
+
+    legacy_ms = timed(decode_legacy)
+    binary_ms = timed(lambda: decode(binary_raw))
+
+    print(f"\n📊 缓存编码基准测试 ({len(df)}行日线, {iterations}次)")
+    print(f"  旧版JSON:   {len(legacy_raw) / 1024:8.1f} KB, 解码 {legacy_ms:7.2f} ms")
+    print(f"  二进制格式: {len(binary_raw) / 1024:8.1f} KB, 解码 {binary_ms:7.2f} ms")
+    print(f"  体积缩小 {len(legacy_raw) / len(binary_raw):.1f}x, 解码提速 {legacy_ms / binary_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_codec()
+    unittest.main()
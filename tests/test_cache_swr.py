@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存stale-while-revalidate与开盘前预热测试
+验证TTL内直接命中、宽限期内返回旧数据并后台刷新、以及预热调度的时间计算
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows.cache_manager import StockDataCache
+from tradingagents.dataflows.cache_refresher import BackgroundRefresher, CacheWarmupScheduler
+from tradingagents.dataflows.optimized_china_data import OptimizedChinaDataProvider
+
+
+def age_cache_entry(cache: StockDataCache, cache_key: str, hours: float):
+    """把缓存条目的写入时间往前调整指定小时数"""
+    metadata_file = cache._get_metadata_path(cache_key)
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    metadata['cached_at'] = (datetime.now() - timedelta(hours=hours)).isoformat()
+    with open(metadata_file, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    """过期缓存后台刷新测试"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = StockDataCache(self.cache_dir)
+        with patch('tradingagents.dataflows.optimized_china_data.get_cache', return_value=self.cache):
+            self.provider = OptimizedChinaDataProvider()
+        self.provider.min_api_interval = 0
+        self.refresher = BackgroundRefresher()
+        self.fetch_calls = []
+        self.fetched = threading.Event()
+
+        def fake_fetch(symbol, start_date, end_date):
+            self.fetch_calls.append(symbol)
+            self.fetched.set()
+            return f"{symbol} 最新数据"
+
+        self.patches = [
+            patch('tradingagents.dataflows.data_source_manager.get_china_stock_data_unified',
+                  side_effect=fake_fetch),
+            patch('tradingagents.dataflows.cache_refresher.get_background_refresher',
+                  return_value=self.refresher),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _save(self, text):
+        return self.cache.save_stock_data("000001", text, "2024-01-01", "2024-01-31", "unified")
+
+    def test_fresh_cache_hit(self):
+        self._save("缓存数据")
+        self.assertEqual(self.provider.get_stock_data("000001", "2024-01-01", "2024-01-31"), "缓存数据")
+        self.assertEqual(self.fetch_calls, [])
+
+    def test_stale_cache_served_and_refreshed(self):
+        cache_key = self._save("旧数据")
+        age_cache_entry(self.cache, cache_key, hours=2)  # TTL 1小时，宽限期4小时
+
+        result = self.provider.get_stock_data("000001", "2024-01-01", "2024-01-31")
+        self.assertEqual(result, "旧数据")
+        self.assertTrue(self.fetched.wait(timeout=5))
+
+        # 等待后台任务写入缓存
+        deadline = time.time() + 5
+        while self.refresher.in_flight() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.provider.get_stock_data("000001", "2024-01-01", "2024-01-31"), "000001 最新数据")
+        self.assertEqual(self.fetch_calls, ["000001"])
+
+    def test_expired_beyond_grace_fetches_synchronously(self):
+        cache_key = self._save("很旧的数据")
+        age_cache_entry(self.cache, cache_key, hours=10)
+
+        result = self.provider.get_stock_data("000001", "2024-01-01", "2024-01-31")
+        self.assertEqual(result, "000001 最新数据")
+        self.assertEqual(self.fetch_calls, ["000001"])
+
+    def test_different_date_range_not_served(self):
+        self._save("1月数据")
+        result = self.provider.get_stock_data("000001", "2024-06-01", "2024-06-30")
+        self.assertEqual(result, "000001 最新数据")
+        self.assertEqual(self.fetch_calls, ["000001"])
+
+        # 两个日期范围各自命中自己的缓存
+        self.assertEqual(self.provider.get_stock_data("000001", "2024-01-01", "2024-01-31"), "1月数据")
+        self.assertEqual(self.provider.get_stock_data("000001", "2024-06-01", "2024-06-30"), "000001 最新数据")
+        self.assertEqual(self.fetch_calls, ["000001"])
+
+    def test_stale_different_date_range_not_refreshed(self):
+        cache_key = self._save("1月旧数据")
+        age_cache_entry(self.cache, cache_key, hours=2)
+
+        result = self.provider.get_stock_data("000001", "2024-06-01", "2024-06-30")
+        self.assertEqual(result, "000001 最新数据")
+        self.assertEqual(self.refresher.in_flight(), 0)
+
+    def test_covering_date_range_served(self):
+        self._save("1月数据")
+        self.assertEqual(self.provider.get_stock_data("000001", "2024-01-10", "2024-01-20"), "1月数据")
+        self.assertEqual(self.fetch_calls, [])
+
+
+class TestBackgroundRefresher(unittest.TestCase):
+    """后台刷新器去重测试"""
+
+    def test_duplicate_keys_deduplicated(self):
+        refresher = BackgroundRefresher()
+        release = threading.Event()
+        calls = []
+
+        def slow_refresh():
+            calls.append(1)
+            release.wait(timeout=5)
+
+        self.assertTrue(refresher.submit("k", slow_refresh))
+        self.assertFalse(refresher.submit("k", slow_refresh))
+        release.set()
+
+        deadline = time.time() + 5
+        while refresher.in_flight() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(refresher.submit("k", lambda: None))
+
+
+class TestWarmupScheduler(unittest.TestCase):
+    """开盘前预热调度测试"""
+
+    def test_next_run_time_skips_weekend(self):
+        scheduler = CacheWarmupScheduler(["000001"], warmup_time="09:00")
+        friday_after = datetime(2024, 1, 5, 10, 0)
+        self.assertEqual(scheduler.next_run_time(friday_after), datetime(2024, 1, 8, 9, 0))
+        monday_before = datetime(2024, 1, 8, 8, 30)
+        self.assertEqual(scheduler.next_run_time(monday_before), datetime(2024, 1, 8, 9, 0))
+
+    def test_run_once_refreshes_watchlist(self):
+        class FakeProvider:
+            def __init__(self):
+                self.symbols = []
+
+            def refresh_stock_data(self, symbol, start_date, end_date):
+                self.symbols.append(symbol)
+                return symbol != "600519"
+
+        provider = FakeProvider()
+        scheduler = CacheWarmupScheduler(["000001", " 600519", ""], provider=provider)
+        self.assertEqual(scheduler.run_once(), {"000001": True, "600519": False})
+        self.assertEqual(provider.symbols, ["000001", "600519"])
+
+
+if __name__ == '__main__':
+    unittest.main()
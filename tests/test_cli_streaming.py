@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CLI增量流式显示测试
+验证updates模式的增量合并结果与values模式一致、Markdown渲染缓存、面板版本跳过，
+以及MessageBuffer只在读取时拼接完整报告
+"""
+
+import sys
+import os
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.graph import StateGraph, MessagesState, START, END
+from rich.console import Console
+from rich.markdown import Markdown
+
+from cli.streaming import GraphStreamState, CachedMarkdown, PanelRefreshTracker, get_cached_markdown, visible_messages
+
+try:
+    from cli.main import MessageBuffer
+    CLI_MAIN_AVAILABLE = True
+except ImportError:
+    CLI_MAIN_AVAILABLE = False
+
+
+class DemoState(MessagesState):
+    market_report: str
+    debate: dict
+
+
+def build_demo_graph():
+    """分析师 -> 清理消息 -> 辩论 的小型图"""
+    def analyst(state):
+        return {"messages": [AIMessage(content="分析完成", id="a1")], "market_report": "## 技术面\n偏强"}
+
+    def clear(state):
+        removals = [RemoveMessage(id=m.id) for m in state["messages"]]
+        return {"messages": removals + [HumanMessage(content="Continue", id="h2")]}
+
+    def debate(state):
+        return {"debate": {"history": "Bull: 看多", "count": 1}}
+
+    workflow = StateGraph(DemoState)
+    workflow.add_node("Market Analyst", analyst)
+    workflow.add_node("Msg Clear", clear)
+    workflow.add_node("Bull Researcher", debate)
+    workflow.add_edge(START, "Market Analyst")
+    workflow.add_edge("Market Analyst", "Msg Clear")
+    workflow.add_edge("Msg Clear", "Bull Researcher")
+    workflow.add_edge("Bull Researcher", END)
+    return workflow.compile()
+
+
+def report_text(kb: int) -> str:
+    paragraph = "## 技术分析\n- **MACD**: 金叉，动能增强\n- RSI 处于 55 附近\n\n| 指标 | 数值 |\n|---|---|\n| MA5 | 10.2 |\n\n"
+    return paragraph * (kb * 1024 // len(paragraph.encode("utf-8")) + 1)
+
+
+class GraphStreamStateTest(unittest.TestCase):
+
+    def test_updates_merge_to_final_state(self):
+        graph = build_demo_graph()
+        initial = {"messages": [("human", "000001")], "market_report": "", "debate": {}}
+        expected = graph.invoke(initial)
+
+        stream_state = GraphStreamState(initial)
+        nodes = []
+        for update in graph.stream(stream_state.input, stream_mode="updates"):
+            nodes.extend(node for node, _ in stream_state.apply(update))
+
+        self.assertEqual(nodes, ["Market Analyst", "Msg Clear", "Bull Researcher"])
+        self.assertEqual(stream_state.state["market_report"], expected["market_report"])
+        self.assertEqual(stream_state.state["debate"], expected["debate"])
+        self.assertEqual([m.content for m in stream_state.state["messages"]],
+                         [m.content for m in expected["messages"]])
+
+    def test_unknown_removal_ignored(self):
+        stream_state = GraphStreamState({"messages": [("human", "000001")]})
+        stream_state.apply({"Msg Clear": {"messages": [RemoveMessage(id="missing"), HumanMessage(content="Continue")]}})
+        self.assertEqual([m.content for m in stream_state.state["messages"]], ["000001", "Continue"])
+
+    def test_visible_messages_skips_removals(self):
+        delta = {"messages": [RemoveMessage(id="a1"), HumanMessage(content="Continue")]}
+        self.assertEqual([m.content for m in visible_messages(delta)], ["Continue"])
+        self.assertEqual(visible_messages({"market_report": "x"}), [])
+
+
+class CachedMarkdownTest(unittest.TestCase):
+
+    def render(self, renderable, width=80):
+        console = Console(width=width, record=True, file=open(os.devnull, "w"), color_system=None)
+        console.print(renderable)
+        return console.export_text()
+
+    def test_output_matches_markdown(self):
+        text = report_text(2)
+        self.assertEqual(self.render(CachedMarkdown(text)), self.render(Markdown(text)))
+
+    def test_render_once_per_width(self):
+        cached = CachedMarkdown(report_text(4))
+        for _ in range(5):
+            self.render(cached)
+        self.assertEqual(cached.render_count, 1)
+        self.render(cached, width=60)
+        self.assertEqual(cached.render_count, 2)
+
+    def test_same_content_reuses_instance(self):
+        self.assertIs(get_cached_markdown("### 标题\n内容"), get_cached_markdown("### 标题\n内容"))
+
+    def test_panel_tracker(self):
+        tracker = PanelRefreshTracker()
+        self.assertTrue(tracker.needs_update("analysis", 1))
+        self.assertFalse(tracker.needs_update("analysis", 1))
+        self.assertTrue(tracker.needs_update("analysis", 2))
+        tracker.reset()
+        self.assertTrue(tracker.needs_update("analysis", 2))
+
+
+@unittest.skipUnless(CLI_MAIN_AVAILABLE, "cli.main依赖未安装")
+class MessageBufferTest(unittest.TestCase):
+
+    def test_current_report_follows_touched_section(self):
+        buffer = MessageBuffer()
+        buffer.update_report_section("market_report", "偏强")
+        buffer.update_report_section("news_report", "无重大新闻")
+        self.assertEqual(buffer.current_report, "### News Analysis\n无重大新闻")
+
+        version = buffer.report_version
+        buffer.update_report_section("news_report", "无重大新闻")
+        self.assertEqual(buffer.report_version, version)
+
+    def test_final_report_built_lazily(self):
+        buffer = MessageBuffer()
+        buffer.update_report_section("market_report", "偏强")
+        self.assertIsNone(buffer._final_report_cache)
+        self.assertIn("### Market Analysis\n偏强", buffer.final_report)
+        buffer.reset_reports()
+        self.assertIsNone(buffer.final_report)
+        self.assertIsNone(buffer.current_report)
+
+
+def benchmark_report_refresh(refreshes: int = 20):
+    """Live每次刷新报告面板的耗时：每次重建Markdown vs 缓存渲染结果"""
+    console = Console(width=120, file=open(os.devnull, "w"))
+    for kb in (1, 10, 40):
+        text = report_text(kb)
+        start = time.perf_counter()
+        for _ in range(refreshes):
+            console.print(Markdown(text))
+        rebuild = (time.perf_counter() - start) / refreshes
+        cached = CachedMarkdown(text)
+        start = time.perf_counter()
+        for _ in range(refreshes):
+            console.print(cached)
+        reuse = (time.perf_counter() - start) / refreshes
+        print(f"🖥️ 报告 {kb:>2}KB: 每次重建 {rebuild * 1000:.1f}ms，缓存 {reuse * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_report_refresh()
+    else:
+        unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上下文压缩测试
+验证表格摘要与行数裁剪、段落去重、token预算、报告压缩以及ToolNode包装
+"""
+
+import sys
+import os
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tests.benchmarks.fakes import make_price_frame, make_yfinance_frame
+from tradingagents.utils.context_compression import (
+    ContextCompressor, compress_tables, dedupe_sections, truncate_to_budget,
+    allocate_budget, count_tokens, compress_state_reports, compress_tool_node
+)
+
+try:
+    from langchain_core.messages import AIMessage
+    from langchain_core.tools import tool
+    from langgraph.prebuilt import ToolNode
+    from langgraph.graph import StateGraph, MessagesState, START, END
+    LANGGRAPH_AVAILABLE = True
+except ImportError:
+    LANGGRAPH_AVAILABLE = False
+
+
+def yfinance_csv(symbol="AAPL", start="2024-01-01", end="2024-06-30"):
+    """与get_YFin_data_online相同格式的输出"""
+    frame = make_yfinance_frame(symbol, start, end)
+    header = f"# Stock data for {symbol} from {start} to {end}\n# Total records: {len(frame)}\n\n"
+    return header + frame.to_csv()
+
+
+def indicator_window(days=60):
+    """与get_stock_stats_indicators_window相同格式的输出（日期降序，含非交易日）"""
+    lines = []
+    for offset in range(days):
+        date = time.strftime("%Y-%m-%d", time.gmtime(1715299200 - offset * 86400))
+        value = "N/A: Not a trading day (weekend or holiday)" if offset % 7 in (1, 2) else f"{1.5 - offset * 0.01:.4f}"
+        lines.append(f"{date}: {value}")
+    return ("## macd values from 2024-03-11 to 2024-05-10:\n\n" + "\n".join(lines) +
+            "\n\n\nMACD: Computes momentum via differences of EMAs. Usage: Look for crossovers and divergence.")
+
+
+class CompressTablesTest(unittest.TestCase):
+
+    def test_csv_table_keeps_latest_rows_and_summary(self):
+        text = yfinance_csv()
+        compressed = compress_tables(text, 10)
+        lines = compressed.splitlines()
+
+        self.assertIn("[表格摘要] 共130行（2024-01-01 至 2024-06-28），以下仅保留最近10行", compressed)
+        self.assertIn("Date,Open,High,Low,Close,Volume", lines)
+        data_rows = [line for line in lines if line.startswith("2024-")]
+        self.assertEqual(len(data_rows), 10)
+        self.assertTrue(data_rows[-1].startswith("2024-06-28"))
+        self.assertTrue(any(line.startswith("- Close: 最新") for line in lines))
+        self.assertLess(count_tokens(compressed), count_tokens(text) / 3)
+
+    def test_dataframe_output_skips_index_column(self):
+        frame = make_price_frame("000001", "2024-01-01", "2024-06-30").rename(columns=str.capitalize)
+        text = "## 📋 历史数据\n" + frame.to_string()
+        compressed = compress_tables(text, 5)
+
+        self.assertIn("- Close: 最新 25.62", compressed)
+        self.assertNotIn("- 列1", compressed)
+        self.assertIn("129  2024-06-28", compressed)
+        self.assertNotIn("124  2024-06-21", compressed)
+
+    def test_descending_indicator_series(self):
+        compressed = compress_tables(indicator_window(), 5)
+        series = [line for line in compressed.splitlines() if line.startswith("2024-")]
+        # 日期降序的输出保留日期最新的行，并保持原顺序
+        self.assertEqual([line[:10] for line in series],
+                         ["2024-05-10", "2024-05-09", "2024-05-08", "2024-05-07", "2024-05-06"])
+        self.assertIn("MACD: Computes momentum", compressed)
+
+    def test_short_tables_and_prose_unchanged(self):
+        text = "最近5日数据\n" + make_price_frame("000001", "2024-06-24", "2024-06-28").to_csv(index=False)
+        self.assertEqual(compress_tables(text, 10), text)
+        prose = "\n".join(["市场 情绪 整体 偏 乐观"] * 40)
+        self.assertEqual(compress_tables(prose, 10), prose)
+
+
+class BudgetTest(unittest.TestCase):
+
+    def test_dedupe_shared_across_outputs(self):
+        seen = set()
+        section = "MACD: Computes momentum via differences of EMAs."
+        first = dedupe_sections(f"## macd\n1.0\n\n{section}", seen)
+        second = dedupe_sections(f"## macds\n2.0\n\n{section}", seen)
+        self.assertIn(section, first)
+        self.assertNotIn(section, second)
+        self.assertIn("## macds", second)
+
+    def test_truncate_keeps_head_and_tail(self):
+        text = "\n".join(f"第{i}段：" + "分析内容" * 20 for i in range(100))
+        truncated = truncate_to_budget(text, 500)
+        self.assertLessEqual(count_tokens(truncated), 500)
+        self.assertTrue(truncated.startswith("第0段"))
+        self.assertTrue(truncated.endswith(text.splitlines()[-1]))
+        self.assertIn("已省略约", truncated)
+
+    def test_allocate_budget_water_filling(self):
+        self.assertEqual(allocate_budget([100, 5000, 5000], 3000), [100, 1450, 1450])
+        self.assertEqual(sum(allocate_budget([10, 20], 1000)), 30)
+
+    def test_outputs_fit_agent_budget(self):
+        compressor = ContextCompressor(budgets={"market": 600}, lookback_rows=30)
+        outputs = compressor.compress_tool_outputs([yfinance_csv(), indicator_window(), indicator_window()], "market")
+        self.assertLessEqual(sum(count_tokens(text) for text in outputs), 600)
+        self.assertIn("[表格摘要]", outputs[0])
+        self.assertEqual(compressor.stats["market"]["calls"], 1)
+
+    def test_within_budget_is_untouched(self):
+        compressor = ContextCompressor()
+        reports = {"market_report": "技术面偏强", "news_report": "无重大新闻"}
+        self.assertEqual(compressor.compress_reports(reports, "bull"), reports)
+        self.assertEqual(compressor.stats, {})
+
+    def test_compressors_are_per_graph(self):
+        """不同配置的图各自使用自己的压缩器，同一进程中互不覆盖"""
+        state = {"market_report": "\n".join(f"第{i}段：" + "技术面分析" * 20 for i in range(60)),
+                 "sentiment_report": "情绪中性", "news_report": "无重大新闻", "fundamentals_report": "估值合理"}
+        tight = ContextCompressor.from_config({"context_token_budgets": {"bull": 300}})
+        loose = ContextCompressor.from_config({"context_token_budgets": {"bull": 100000}})
+        disabled = ContextCompressor.from_config({"context_compression": False, "context_token_budgets": {"bull": 10}})
+
+        self.assertLessEqual(count_tokens("".join(compress_state_reports(state, "bull", tight))), 300)
+        self.assertEqual(compress_state_reports(state, "bull", loose)[0], state["market_report"])
+        self.assertEqual(compress_state_reports(state, "bull", disabled)[0], state["market_report"])
+        self.assertEqual(list(tight.stats), ["bull"])
+        self.assertEqual(loose.stats, {})
+
+    def test_disabled(self):
+        compressor = ContextCompressor(enabled=False, budgets={"market": 10})
+        text = yfinance_csv()
+        self.assertEqual(compressor.compress_text(text, "market"), text)
+
+
+@unittest.skipUnless(LANGGRAPH_AVAILABLE, "langgraph未安装")
+class ToolNodeTest(unittest.TestCase):
+
+    def test_tool_node_outputs_are_compressed(self):
+        @tool
+        def get_prices(symbol: str) -> str:
+            """返回行情CSV"""
+            return yfinance_csv(symbol)
+
+        compressor = ContextCompressor.from_config({"context_token_budgets": {"market": 500},
+                                                    "context_lookback_rows": 20})
+        workflow = StateGraph(MessagesState)
+        workflow.add_node("tools", compress_tool_node(ToolNode([get_prices]), "market", compressor))
+        workflow.add_edge(START, "tools")
+        workflow.add_edge("tools", END)
+        call = {"name": "get_prices", "args": {"symbol": "AAPL"}, "id": "call_1"}
+        result = workflow.compile().invoke({"messages": [AIMessage(content="", tool_calls=[call])]})
+        content = result["messages"][-1].content
+        self.assertIn("[表格摘要] 共130行", content)
+        self.assertLessEqual(count_tokens(content), 500)
+        self.assertEqual(compressor.stats["market"]["calls"], 1)
+
+
+def benchmark_compression(repeats: int = 20):
+    """一个分析师批次（行情CSV+8个指标）的压缩耗时与token节省"""
+    outputs = [yfinance_csv(end="2024-12-31")] + [indicator_window(90) for _ in range(8)]
+    before = sum(count_tokens(text) for text in outputs)
+    compressor = ContextCompressor()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        compressed = compressor.compress_tool_outputs(outputs, "market")
+    elapsed = (time.perf_counter() - start) / repeats
+    after = sum(count_tokens(text) for text in compressed)
+    print(f"🗜️ {before} -> {after} tokens ({after / before:.0%})，每批 {elapsed * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_compression()
+    else:
+        unittest.main()
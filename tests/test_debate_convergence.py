@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+辩论收敛提前结束测试
+验证新颖度/立场稳定性判断、最小/最大轮数边界、ConditionalLogic在收敛时路由到裁决节点并记录节省的轮数，
+以及在完整辩论记录上的回放统计
+"""
+
+import sys
+import os
+import time
+import threading
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.debate_convergence import (
+    DebateConvergence, lexical_similarity, replay_debate, split_turns
+)
+
+BULL_ROUNDS = [
+    "公司营收同比增长25%，毛利率提升至45%，新产品线打开第二增长曲线，建议买入。",
+    "我再次强调营收同比增长25%，毛利率提升至45%，新产品线打开增长曲线，仍然建议买入。",
+    "营收同比增长25%，毛利率提升至45%，新产品线打开第二增长曲线，坚持建议买入。",
+]
+BEAR_ROUNDS = [
+    "估值已达历史高位，市盈率60倍，行业竞争加剧，应收账款大幅增加，建议卖出。",
+    "估值处于历史高位，市盈率60倍，行业竞争加剧，应收账款增加，依然建议卖出。",
+    "估值已达历史高位，市盈率60倍，行业竞争加剧，应收账款大幅增加，维持建议卖出。",
+]
+NEW_ARGUMENT = "海外渠道刚刚签下三家大型分销商，订单能见度延伸到明年下半年，现金流拐点临近，建议买入。"
+
+
+def history(speaker, turns):
+    return "".join(f"\n{speaker}: {turn}" for turn in turns)
+
+
+def invest_state(bull_turns, bear_turns):
+    count = len(bull_turns) + len(bear_turns)
+    return {"investment_debate_state": {
+        "bull_history": history("Bull Analyst", bull_turns),
+        "bear_history": history("Bear Analyst", bear_turns),
+        "history": "", "current_response": f"Bear Analyst: {bear_turns[-1]}" if bear_turns else "",
+        "judge_decision": "", "count": count,
+    }}
+
+
+class DebateConvergenceTest(unittest.TestCase):
+
+    def test_split_turns(self):
+        self.assertEqual(split_turns(history("Bull Analyst", BULL_ROUNDS[:2]), "Bull Analyst"), BULL_ROUNDS[:2])
+        self.assertEqual(split_turns("", "Bull Analyst"), [])
+
+    def test_lexical_similarity(self):
+        self.assertGreater(lexical_similarity(BULL_ROUNDS[1], BULL_ROUNDS[:1]), 0.7)
+        self.assertLess(lexical_similarity(NEW_ARGUMENT, BULL_ROUNDS[:1] + BEAR_ROUNDS[:1]), 0.3)
+
+    def test_repeated_arguments_converge(self):
+        convergence = DebateConvergence(min_rounds=2, novelty_threshold=0.35)
+        result = convergence.assess({"Bull Analyst": BULL_ROUNDS[:2], "Bear Analyst": BEAR_ROUNDS[:2]})
+        self.assertTrue(result['stance_stable'])
+        self.assertTrue(result['converged'])
+        self.assertEqual(result['stances'], {"Bull Analyst": "买入", "Bear Analyst": "卖出"})
+
+    def test_novel_argument_or_stance_change_continues(self):
+        convergence = DebateConvergence(min_rounds=2, novelty_threshold=0.35)
+        novel = convergence.assess({"Bull Analyst": [BULL_ROUNDS[0], NEW_ARGUMENT], "Bear Analyst": BEAR_ROUNDS[:2]})
+        self.assertFalse(novel['converged'])
+
+        flipped = BEAR_ROUNDS[1].replace("依然建议卖出", "改为建议持有")
+        changed = convergence.assess({"Bull Analyst": BULL_ROUNDS[:2], "Bear Analyst": [BEAR_ROUNDS[0], flipped]})
+        self.assertFalse(changed['stance_stable'])
+        self.assertFalse(changed['converged'])
+
+    def test_min_rounds_bound(self):
+        turns = {"Bull Analyst": BULL_ROUNDS[:2], "Bear Analyst": BEAR_ROUNDS[:2]}
+        self.assertFalse(DebateConvergence(min_rounds=3).assess(turns)['converged'])
+        self.assertFalse(DebateConvergence().assess({"Bull Analyst": BULL_ROUNDS[:1],
+                                                     "Bear Analyst": BEAR_ROUNDS[:1]})['converged'])
+
+    def test_embedder_is_used(self):
+        calls = []
+
+        def embedder(text):
+            calls.append(text)
+            return [1.0, 0.0]
+
+        convergence = DebateConvergence(novelty_threshold=0.1, embedder=embedder)
+        self.assertEqual(convergence.novelty(NEW_ARGUMENT, BULL_ROUNDS[:1]), 0.0)
+        self.assertEqual(len(calls), 2)
+
+    def test_replay_reports_rounds_saved(self):
+        result = replay_debate({"Bull Analyst": BULL_ROUNDS, "Bear Analyst": BEAR_ROUNDS})
+        self.assertEqual(result, {'rounds': 3, 'stop_round': 2, 'rounds_saved': 1, 'stance_changed': False})
+
+        flipped = BULL_ROUNDS[:2] + ["新的证据显示需求见顶，改为建议卖出。"]
+        result = replay_debate({"Bull Analyst": flipped, "Bear Analyst": BEAR_ROUNDS})
+        self.assertTrue(result['stance_changed'])
+
+
+class ConditionalLogicEarlyStopTest(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            from tradingagents.graph.conditional_logic import ConditionalLogic, collect_debate_stats
+        except ImportError as e:
+            self.skipTest(f"graph模块不可导入: {e}")
+        self.ConditionalLogic = ConditionalLogic
+        self.collect_debate_stats = collect_debate_stats
+
+    def test_converged_debate_routes_to_manager(self):
+        logic = self.ConditionalLogic(max_debate_rounds=3, min_debate_rounds=2)
+        with self.collect_debate_stats() as stats:
+            self.assertEqual(logic.should_continue_debate(invest_state(BULL_ROUNDS[:2], BEAR_ROUNDS[:2])),
+                             "Research Manager")
+        self.assertEqual(stats[0]['rounds_saved'], 1)
+        self.assertTrue(stats[0]['early_stop'])
+
+    def test_mid_round_and_disabled_continue(self):
+        logic = self.ConditionalLogic(max_debate_rounds=3)
+        self.assertEqual(logic.should_continue_debate(invest_state(BULL_ROUNDS[:2], BEAR_ROUNDS[:1])),
+                         "Bull Researcher")
+        disabled = self.ConditionalLogic(max_debate_rounds=3, early_stop=False)
+        with self.collect_debate_stats() as stats:
+            self.assertEqual(disabled.should_continue_debate(invest_state(BULL_ROUNDS[:2], BEAR_ROUNDS[:2])),
+                             "Bull Researcher")
+        self.assertEqual(stats, [])
+
+    def test_max_rounds_still_ends_debate(self):
+        logic = self.ConditionalLogic(max_debate_rounds=1)
+        with self.collect_debate_stats() as stats:
+            self.assertEqual(logic.should_continue_debate(invest_state(BULL_ROUNDS[:1], BEAR_ROUNDS[:1])),
+                             "Research Manager")
+        self.assertEqual(stats[0]['rounds_saved'], 0)
+        self.assertFalse(stats[0]['early_stop'])
+
+    def test_concurrent_runs_keep_separate_stats(self):
+        logic = self.ConditionalLogic(max_debate_rounds=3, min_debate_rounds=2)
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def run(name, state):
+            with self.collect_debate_stats() as stats:
+                barrier.wait()
+                logic.should_continue_debate(state)
+                barrier.wait()
+            results[name] = stats
+
+        threads = [threading.Thread(target=run, args=("early", invest_state(BULL_ROUNDS[:2], BEAR_ROUNDS[:2]))),
+                   threading.Thread(target=run, args=("full", invest_state(BULL_ROUNDS, BEAR_ROUNDS)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([record['rounds_saved'] for record in results["early"]], [1])
+        self.assertEqual([record['rounds_saved'] for record in results["full"]], [0])
+
+    def test_risk_debate_converges(self):
+        logic = self.ConditionalLogic(max_risk_discuss_rounds=3)
+        neutral = ["短期估值偏高但基本面稳健，建议持有观察。", "短期估值偏高但基本面稳健，继续建议持有观察。"]
+        state = {"risk_debate_state": {
+            "risky_history": history("Risky Analyst", BULL_ROUNDS[:2]),
+            "safe_history": history("Safe Analyst", BEAR_ROUNDS[:2]),
+            "neutral_history": history("Neutral Analyst", neutral),
+            "latest_speaker": "Neutral", "count": 6,
+        }}
+        with self.collect_debate_stats() as stats:
+            self.assertEqual(logic.should_continue_risk_analysis(state), "Risk Judge")
+        self.assertEqual(stats[0]['debate'], "risk")
+
+
+def benchmark_debate_convergence(rounds: int = 200):
+    """单次收敛判断耗时，以及在示例辩论上节省的轮数"""
+    convergence = DebateConvergence()
+    turns = {"Bull Analyst": BULL_ROUNDS, "Bear Analyst": BEAR_ROUNDS}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        convergence.assess(turns)
+    per_assess = (time.perf_counter() - start) / rounds
+    result = replay_debate(turns, convergence)
+    print(f"⚡ 收敛判断 {per_assess * 1e3:.2f}ms/次；示例辩论 {result['rounds']} 轮，"
+          f"第{result['stop_round']}轮收敛，节省 {result['rounds_saved']} 轮（约{result['rounds_saved'] * 2}次LLM调用）")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_debate_convergence()
+    else:
+        unittest.main()
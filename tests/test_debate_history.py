@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结构化辩论历史测试
+验证发言记录只追加、各发言者历史按需派生、移出窗口的发言压缩为有界的滚动摘要，
+以及旧格式状态（只有字符串字段）的兼容读取
+"""
+
+import sys
+import os
+import time
+import unittest
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.context_compression import count_tokens
+from tradingagents.utils.debate_history import (
+    DebateWindow, INVEST_SPEAKERS, RISK_SPEAKERS, full_history, history_views,
+    speaker_history, speaker_turns, summarize_turn
+)
+
+LONG_TURN = ("公司第三季度营收同比增长25%，毛利率提升至45%。" + "管理层在业绩会上反复强调渠道改革的长期意义，" * 30 +
+             "经营现金流达到12亿元。综合来看我们维持买入建议。")
+
+
+def run_debate(window, speakers, rounds, content=LONG_TURN):
+    state = {"turns": [], "summary": "", "count": 0}
+    for round_index in range(rounds):
+        for speaker in speakers:
+            state = {**state, **window.append(state, speaker, f"第{round_index + 1}轮 {content}"),
+                     "count": state["count"] + 1}
+    return state
+
+
+class DebateHistoryTest(unittest.TestCase):
+
+    def test_views_derived_from_turns(self):
+        state = run_debate(DebateWindow(), INVEST_SPEAKERS, 2, content="观点")
+        self.assertEqual(speaker_turns(state, "Bear Analyst"), ["第1轮 观点", "第2轮 观点"])
+        self.assertEqual(speaker_history(state, "Bull Analyst"),
+                         "\nBull Analyst: 第1轮 观点\nBull Analyst: 第2轮 观点")
+        self.assertEqual(full_history(state).count("\n"), 4)
+        self.assertEqual(set(history_views(state, INVEST_SPEAKERS)), {"history", "bull_history", "bear_history"})
+
+    def test_append_only_shares_records(self):
+        window = DebateWindow()
+        first = window.append({"turns": [], "summary": ""}, "Bull Analyst", "a")
+        second = window.append(first, "Bear Analyst", "b")
+        self.assertEqual(len(first["turns"]), 1)
+        self.assertIs(second["turns"][0], first["turns"][0])
+
+    def test_prompt_history_keeps_recent_window(self):
+        window = DebateWindow(window_turns=2, summary_turn_tokens=60, summary_max_tokens=10000)
+        state = run_debate(window, INVEST_SPEAKERS, 3)
+        prompt = window.prompt_history(state)
+        self.assertIn("更早发言摘要", prompt)
+        self.assertEqual(state["summary"].count("\n") + 1, 4)
+        self.assertEqual(prompt.count(LONG_TURN), 2)
+        # 摘要保留首句（含数据）和结论
+        self.assertIn("同比增长25%", state["summary"])
+        self.assertIn("维持买入建议", state["summary"])
+
+    def test_prompt_size_bounded(self):
+        window = DebateWindow(window_turns=3, summary_turn_tokens=80, summary_max_tokens=300)
+        sizes = [count_tokens(window.prompt_history(run_debate(window, RISK_SPEAKERS, rounds)))
+                 for rounds in (2, 4, 8)]
+        self.assertLessEqual(sizes[2], sizes[1] + 10)
+        self.assertLessEqual(count_tokens(run_debate(window, RISK_SPEAKERS, 8)["summary"]), 300)
+
+    def test_summarize_turn(self):
+        self.assertEqual(summarize_turn("短观点。", 50), "短观点。")
+        summary = summarize_turn(LONG_TURN, 60)
+        self.assertLessEqual(count_tokens(summary), 70)
+        self.assertTrue(summary.startswith("公司第三季度"))
+
+    def test_legacy_string_state(self):
+        legacy = {"history": "\nRisky Analyst: 买入\nSafe Analyst: 卖出", "risky_history": "\nRisky Analyst: 买入",
+                  "safe_history": "\nSafe Analyst: 卖出"}
+        self.assertEqual(speaker_turns(legacy, "Risky Analyst"), ["买入"])
+        self.assertEqual(speaker_history(legacy, "Safe Analyst"), "\nSafe Analyst: 卖出")
+        self.assertEqual(speaker_history(legacy, "Neutral Analyst"), "")
+        self.assertEqual(DebateWindow().prompt_history(legacy), legacy["history"])
+
+    def test_windows_are_per_graph(self):
+        """两个图的辩论节点各自使用自己的窗口配置，同一进程中互不覆盖"""
+        from tradingagents.agents.risk_mgmt.aggresive_debator import create_risky_debator
+
+        class FakeLLM:
+            def __init__(self):
+                self.prompts = []
+
+            def invoke(self, prompt):
+                self.prompts.append(prompt)
+                return SimpleNamespace(content="继续看多")
+
+        narrow_llm, wide_llm = FakeLLM(), FakeLLM()
+        narrow = create_risky_debator(narrow_llm, DebateWindow.from_config({"debate_window_turns": 1}))
+        wide = create_risky_debator(wide_llm, DebateWindow.from_config({"debate_window_turns": 6}))
+
+        debate_state = {**run_debate(DebateWindow(window_turns=6), RISK_SPEAKERS, 1, content="观点"), "count": 3}
+        reports = {key: "报告" for key in ("market_report", "sentiment_report", "news_report", "fundamentals_report")}
+        state = {**reports, "trader_investment_plan": "买入", "risk_debate_state": debate_state}
+        narrow_state = narrow(state)["risk_debate_state"]
+        wide_state = wide(state)["risk_debate_state"]
+
+        self.assertEqual(narrow_llm.prompts[0].count("第1轮 观点"), 1)
+        self.assertEqual(wide_llm.prompts[0].count("第1轮 观点"), 3)
+        self.assertIn("Neutral Analyst: 第1轮 观点", narrow_state["summary"])
+        self.assertEqual(wide_state["summary"], "")
+
+
+def benchmark_debate_history(rounds: int = 5):
+    """多轮风险辩论中，旧的字符串拼接与有界窗口的状态大小和提示词token对比"""
+    window = DebateWindow()
+    legacy_state_chars, legacy_prompt_tokens = 0, 0
+    history, per_speaker = "", {speaker: "" for speaker in RISK_SPEAKERS}
+    state = {"turns": [], "summary": ""}
+    prompt_tokens = 0
+    start = time.perf_counter()
+    for round_index in range(rounds):
+        for speaker in RISK_SPEAKERS:
+            legacy_prompt_tokens += count_tokens(history)
+            prompt_tokens += count_tokens(window.prompt_history(state))
+            argument = f"{speaker}: 第{round_index + 1}轮 {LONG_TURN}"
+            history += "\n" + argument
+            per_speaker[speaker] += "\n" + argument
+            state = {**state, **window.append(state, speaker, f"第{round_index + 1}轮 {LONG_TURN}")}
+    elapsed = time.perf_counter() - start
+    legacy_state_chars = len(history) + sum(len(text) for text in per_speaker.values())
+    state_chars = sum(len(turn["content"]) for turn in state["turns"]) + len(state["summary"])
+    print(f"📦 {rounds}轮风险辩论: 状态 {legacy_state_chars} -> {state_chars} 字符；"
+          f"提示词历史累计 {legacy_prompt_tokens} -> {prompt_tokens} tokens；窗口维护耗时 {elapsed * 1e3:.1f}ms")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_debate_history()
+    else:
+        unittest.main()
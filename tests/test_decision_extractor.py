@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交易决策规则化提取测试
+验证模板字段解析、解析置信度（低置信度交给LLM）、决策语料上的命中率和准确率，
+以及SignalProcessor命中规则时不调用LLM
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.decision_extractor import (
+    DecisionExtractor, evaluate_corpus, load_corpus, record_decision
+)
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'decision_corpus.jsonl')
+
+TRADER_REPORT = """### 交易决策分析
+
+1. **投资建议**: 买入
+2. **目标价位**: ¥1,850.00（预期涨幅约12%）
+3. **置信度**: 78%
+4. **风险评分**: 0.35
+5. **详细推理**: 高端白酒需求恢复，估值处于历史中枢下方。
+
+最终交易建议: **买入**"""
+
+
+class DecisionExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = DecisionExtractor(min_confidence=0.75)
+
+    def test_parses_trader_template(self):
+        decision = self.extractor.extract(TRADER_REPORT)
+        self.assertEqual(decision['action'], '买入')
+        self.assertEqual(decision['target_price'], 1850.0)
+        self.assertAlmostEqual(decision['confidence'], 0.78)
+        self.assertAlmostEqual(decision['risk_score'], 0.35)
+        self.assertEqual(decision['reasoning'], '高端白酒需求恢复，估值处于历史中枢下方。')
+        self.assertTrue(self.extractor.is_confident(decision))
+
+    def test_final_marker_wins_over_template_echo(self):
+        text = "请给出买入/持有/卖出建议。\n目标价位: $190\nFINAL TRANSACTION PROPOSAL: **SELL**"
+        decision = self.extractor.extract(text)
+        self.assertEqual((decision['action'], decision['target_price']), ('卖出', 190.0))
+
+    def test_range_and_revised_targets(self):
+        self.assertEqual(self.extractor.extract("目标价位: ¥11.50-12.50\n最终交易建议: **持有**")['target_price'], 12.0)
+
+        revised = self.extractor.extract("原目标价¥45，现将目标价位上调至¥48.50。\n最终交易建议: **买入**")
+        self.assertEqual(revised['target_price'], 48.5)
+        self.assertTrue(self.extractor.is_confident(revised))
+
+        conflicting = self.extractor.extract("目标价¥45。另一处目标价¥52。\n最终交易建议: **买入**")
+        self.assertFalse(self.extractor.is_confident(conflicting))
+
+    def test_low_confidence_defers_to_llm(self):
+        # 没有目标价、目标价只有百分比、没有明确建议时都交给LLM
+        for text in ("最终交易建议: **买入**，具体点位等待财报确认",
+                     "**投资建议**: 买入\n**目标价位**: 上涨15%",
+                     "激进派主张买入，保守派主张卖出，目标价¥40"):
+            self.assertFalse(self.extractor.is_confident(self.extractor.extract(text)), text)
+
+    def test_defaults_and_levels(self):
+        decision = self.extractor.extract("目标价：HK$420\n风险等级：较高\n最终交易建议：**持有**")
+        self.assertEqual(decision['confidence'], 0.7)
+        self.assertEqual(decision['risk_score'], 0.7)
+        self.assertEqual(decision['target_price'], 420.0)
+
+    def test_corpus_accuracy_and_hit_rate(self):
+        metrics = evaluate_corpus(load_corpus(CORPUS_PATH), self.extractor)
+        self.assertEqual(metrics['errors'], [])
+        self.assertEqual(metrics['accuracy'], 1.0)
+        self.assertGreaterEqual(metrics['hit_rate'], 0.7)
+
+    def test_record_decision_appends_corpus(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'corpus', 'decisions.jsonl')
+            record_decision("最终交易建议: **持有**", {'action': '持有', 'target_price': 10.0, 'reasoning': 'x'}, path)
+            record_decision("最终交易建议: **卖出**", {'action': '卖出', 'target_price': None}, path)
+            records = load_corpus(path)
+            self.assertEqual([r['expected'] for r in records],
+                             [{'action': '持有', 'target_price': 10.0}, {'action': '卖出', 'target_price': None}])
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class SignalProcessorFastPathTest(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            from tradingagents.graph.signal_processing import SignalProcessor
+        except ImportError as e:
+            self.skipTest(f"graph模块不可导入: {e}")
+        self.llm = MagicMock()
+        self.llm.invoke.return_value.content = json.dumps(
+            {"action": "持有", "target_price": 10.0, "confidence": 0.6, "risk_score": 0.4, "reasoning": "LLM"},
+            ensure_ascii=False)
+        self.processor = SignalProcessor(self.llm)
+
+    def test_template_report_skips_llm(self):
+        decision = self.processor.process_signal(TRADER_REPORT, "600519")
+        self.assertEqual((decision['action'], decision['target_price']), ('买入', 1850.0))
+        self.llm.invoke.assert_not_called()
+
+    def test_ambiguous_report_uses_llm(self):
+        decision = self.processor.process_signal("市场分歧较大，我们倾向于等待。", "000001")
+        self.llm.invoke.assert_called_once()
+        self.assertEqual(decision['reasoning'], "LLM")
+
+
+def benchmark_decision_extraction(rounds: int = 200):
+    """规则解析单次耗时，以及语料上可省去LLM调用的比例"""
+    extractor = DecisionExtractor()
+    records = load_corpus(CORPUS_PATH)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for record in records:
+            extractor.extract(record['text'])
+    per_parse = (time.perf_counter() - start) / (rounds * len(records))
+
+    metrics = evaluate_corpus(records, extractor)
+    print(f"⚡ 规则解析 {per_parse * 1e6:.0f}µs/次；语料 {metrics['total']} 条，命中率 {metrics['hit_rate']:.0%}"
+          f"（省去LLM调用），命中准确率 {metrics['accuracy']:.0%}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_decision_extraction()
+    else:
+        unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入耗时预算测试
+在独立的子进程中冷启动导入核心模块，验证不会加载未使用的数据源/LLM SDK，且耗时在预算之内
+"""
+
+import sys
+import os
+import json
+import unittest
+import importlib.util
+import subprocess
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.provider_registry import ProviderRegistry, ProviderUnavailableError, lazy_import
+
+# 导入核心模块时不应加载的第三方SDK
+HEAVY_MODULES = (
+    "yfinance", "akshare", "tushare", "baostock", "pytdx", "finnhub", "chromadb",
+    "dashscope", "praw", "bs4", "pandas", "openai", "langchain_core",
+    "langchain_anthropic", "langchain_google_genai",
+)
+
+# 冷启动导入预算（秒），留有余量以适应较慢的CI机器
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe_import(*modules):
+    """在子进程中导入模块，返回耗时和已加载的重量级SDK"""
+    code = _PROBE.format(modules=modules, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportBudget(unittest.TestCase):
+    """冷启动导入测试"""
+
+    def test_dataflows_interface_is_lightweight(self):
+        result = probe_import("tradingagents.dataflows.interface",
+                              "tradingagents.dataflows.data_source_manager",
+                              "tradingagents.llm_adapters")
+        self.assertEqual(result["loaded"], [])
+        self.assertLess(result["elapsed"], IMPORT_BUDGET_SECONDS)
+
+    @unittest.skipUnless(importlib.util.find_spec("langgraph") and importlib.util.find_spec("langchain"),
+                         "langgraph/langchain未安装")
+    def test_trading_graph_skips_unused_llm_sdks(self):
+        result = probe_import("tradingagents.graph.trading_graph")
+        for module in ("langchain_anthropic", "langchain_google_genai", "chromadb", "dashscope",
+                       "akshare", "tushare", "baostock", "pytdx", "yfinance"):
+            self.assertNotIn(module, result["loaded"])
+
+
+class TestProviderRegistry(unittest.TestCase):
+    """延迟注册表测试"""
+
+    def test_resolved_on_first_use(self):
+        registry = ProviderRegistry("test", {"json_dumps": "json:dumps", "missing": "no_such_module_xyz"})
+        self.assertFalse(registry.is_loaded("json_dumps"))
+        self.assertIs(registry.get("json_dumps"), json.dumps)
+        self.assertTrue(registry.is_loaded("json_dumps"))
+        self.assertIn("json_dumps", registry.load_times())
+
+        self.assertFalse(registry.is_available("missing"))
+        with self.assertRaises(ProviderUnavailableError):
+            registry.get("missing")
+        with self.assertRaises(KeyError):
+            registry.get("unregistered")
+
+    def test_lazy_module_proxy(self):
+        module = lazy_import("colorsys")
+        self.assertIn("not loaded", repr(module))
+        self.assertEqual(module.rgb_to_hsv(0, 0, 0), (0.0, 0.0, 0.0))
+
+    def test_legacy_flags_still_importable(self):
+        from tradingagents.dataflows import interface
+        self.assertIsInstance(interface.HK_STOCK_AVAILABLE, bool)
+        self.assertIsInstance(interface.STOCKSTATS_AVAILABLE, bool)
+
+
+if __name__ == '__main__':
+    unittest.main()
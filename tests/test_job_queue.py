@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析任务队列测试
+验证优先级、每用户上限、队列满时拒绝、取消排队中/运行中的任务、排队位置，
+以及Redis列表后端（fakeredis作为本地Redis替身）
+"""
+
+import sys
+import os
+import time
+import threading
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from web.utils.job_queue import (
+    JobQueue, InProcessJobBackend, RedisJobBackend, AnalysisJob,
+    QueueFullError, UserLimitError, JobCancelledError
+)
+from web.utils.progress_bus import InProcessProgressBus, ProgressWatcher
+
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+class BlockingHandler:
+    """记录执行顺序的处理函数，收到release信号前一直阻塞（期间检查取消）"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+        self.started_event = threading.Event()
+
+    def __call__(self, job, check_cancelled):
+        self.started.append(job.job_id)
+        self.started_event.set()
+        while not self.release.wait(0.01):
+            check_cancelled()
+
+
+def wait_until(predicate, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class JobQueueTestMixin:
+    """两种后端共用的测试用例"""
+
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.handler = BlockingHandler()
+        self.queue = JobQueue(self.handler, backend=self.make_backend(), max_workers=1,
+                              max_queue_size=3, per_user_limit=2, poll_interval=0.05)
+
+    def tearDown(self):
+        self.handler.release.set()
+        self.queue.shutdown()
+
+    def occupy_worker(self):
+        """提交一个任务占住唯一的工作线程"""
+        self.queue.submit({}, job_id="blocker", user_id="owner")
+        self.assertTrue(self.handler.started_event.wait(3.0))
+
+    def test_priority_order_and_positions(self):
+        self.occupy_worker()
+        self.queue.submit({}, job_id="low", user_id="u1", priority="low")
+        self.queue.submit({}, job_id="normal", user_id="u2")
+        self.queue.submit({}, job_id="high", user_id="u3", priority="high")
+
+        self.assertEqual(self.queue.position("high"), 1)
+        self.assertEqual(self.queue.position("normal"), 2)
+        self.assertEqual(self.queue.position("low"), 3)
+        self.assertIsNone(self.queue.position("blocker"))
+
+        self.handler.release.set()
+        self.assertTrue(wait_until(lambda: len(self.handler.started) == 4))
+        self.assertEqual(self.handler.started, ["blocker", "high", "normal", "low"])
+        self.assertTrue(wait_until(lambda: self.queue.get_job("low").status == 'completed'))
+
+    def test_per_user_limit(self):
+        self.occupy_worker()
+        self.queue.submit({}, job_id="a1", user_id="alice")
+        self.queue.submit({}, job_id="a2", user_id="alice")
+        with self.assertRaises(UserLimitError):
+            self.queue.submit({}, job_id="a3", user_id="alice")
+
+        # 任务结束后额度释放
+        self.queue.cancel("a1")
+        self.queue.submit({}, job_id="a3", user_id="alice")
+
+    def test_queue_full_rejected(self):
+        self.occupy_worker()
+        for index in range(3):
+            self.queue.submit({}, job_id=f"job{index}", user_id=f"user{index}")
+        with self.assertRaises(QueueFullError):
+            self.queue.submit({}, job_id="overflow", user_id="late")
+        self.assertEqual(self.queue.stats()['queued'], 3)
+
+    def test_cancel_queued_job(self):
+        self.occupy_worker()
+        self.queue.submit({}, job_id="first", user_id="u1")
+        self.queue.submit({}, job_id="second", user_id="u2")
+
+        self.assertTrue(self.queue.cancel("first"))
+        self.assertEqual(self.queue.get_job("first").status, 'cancelled')
+        self.assertEqual(self.queue.position("second"), 1)
+
+        self.handler.release.set()
+        self.assertTrue(wait_until(lambda: self.queue.get_job("second").status == 'completed'))
+        self.assertNotIn("first", self.handler.started)
+
+    def test_cancel_running_job(self):
+        self.occupy_worker()
+        self.assertTrue(self.queue.cancel("blocker"))
+        self.assertTrue(wait_until(lambda: self.queue.get_job("blocker").status == 'cancelled'))
+        self.assertEqual(self.queue.stats()['running'], 0)
+        self.assertFalse(self.queue.cancel("blocker"))
+
+    def test_handler_error_marks_failed(self):
+        def failing(job, check_cancelled):
+            raise RuntimeError("boom")
+
+        self.queue.handler = failing
+        self.queue.submit({}, job_id="bad", user_id="u1")
+        self.assertTrue(wait_until(lambda: self.queue.get_job("bad").status == 'failed'))
+        self.assertEqual(self.queue.get_job("bad").error, "boom")
+
+
+class InProcessJobQueueTest(JobQueueTestMixin, unittest.TestCase):
+
+    def make_backend(self):
+        return InProcessJobBackend()
+
+    def test_worker_pool_is_bounded(self):
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def handler(job, check_cancelled):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        queue = JobQueue(handler, max_workers=3, max_queue_size=50, per_user_limit=50, poll_interval=0.05)
+        try:
+            for index in range(20):
+                queue.submit({}, job_id=f"job{index}", user_id="load")
+            self.assertTrue(wait_until(lambda: all(
+                queue.get_job(f"job{index}").status == 'completed' for index in range(20))))
+            self.assertEqual(peak[0], 3)
+        finally:
+            queue.shutdown()
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE, "fakeredis未安装")
+class RedisJobQueueTest(JobQueueTestMixin, unittest.TestCase):
+
+    def make_backend(self):
+        return RedisJobBackend(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+
+    def test_job_round_trips_through_redis(self):
+        backend = self.queue.backend
+        job = AnalysisJob(job_id="rt", user_id="u1", payload={'stock_symbol': '000001', 'analysts': ['market']})
+        backend.push(job, 10, 10)
+        restored = backend.get("rt")
+        self.assertEqual(restored.payload, job.payload)
+        self.assertEqual(restored.status, 'queued')
+
+
+class RestartedTrackerWatcherTest(unittest.TestCase):
+    """排队的分析开始执行时工作线程会创建新的跟踪器，事件序号从1重新开始"""
+
+    def test_snapshot_event_resets_sequence(self):
+        bus = InProcessProgressBus()
+        queued_state = {'status': 'queued', 'event_seq': 2}
+        watcher = ProgressWatcher("restart", bus, lambda _: dict(queued_state))
+        self.assertEqual(watcher.seq, 2)
+
+        bus.publish("restart", {'seq': 1, 'type': 'snapshot', 'set': {'status': 'running', 'progress_percentage': 0.0}})
+        bus.publish("restart", {'seq': 2, 'type': 'delta', 'set': {'status': 'cancelled'}})
+        self.assertTrue(watcher.poll())
+        self.assertEqual(watcher.state['status'], 'cancelled')
+        self.assertTrue(watcher.finished)
+        self.assertEqual(watcher.snapshot_loads, 1)
+        watcher.close()
+
+
+def benchmark_queue_throughput(job_count: int = 2000, workers: int = 4):
+    """空处理函数下的提交+调度吞吐"""
+    queue = JobQueue(lambda job, check: None, max_workers=workers,
+                     max_queue_size=job_count, per_user_limit=job_count, poll_interval=0.05)
+    start = time.perf_counter()
+    for index in range(job_count):
+        queue.submit({}, job_id=f"bench{index}", user_id="bench",
+                     priority=("high", "normal", "low")[index % 3])
+    wait_until(lambda: queue.stats()['queued'] == 0 and queue.stats()['running'] == 0, timeout=60)
+    elapsed = time.perf_counter() - start
+    queue.shutdown()
+    print(f"📥 {job_count}个任务 / {workers}个工作线程: {elapsed:.3f}s ({job_count / elapsed:.0f} 任务/秒)")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_queue_throughput()
+    else:
+        unittest.main()
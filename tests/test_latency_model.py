@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析耗时模型测试
+验证冷启动先验、按节点学习和逐级回退、持久化、从追踪span记录，
+以及进度跟踪器的剩余时间和任务队列的排队等待估算/准入
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.config.config_manager import ConfigManager
+from tradingagents.utils import latency_model
+from tradingagents.utils.latency_model import (
+    LatencyModel, expected_nodes, node_durations_from_spans, SETUP_NODE, FINALIZE_NODE
+)
+from tradingagents.utils.tracing import Tracer, start_trace, span
+from web.utils.job_queue import JobQueue, InProcessJobBackend, WaitTooLongError
+
+
+def run_durations(analyst_seconds=100.0, research_seconds=40.0):
+    return {SETUP_NODE: 10.0, "Market Analyst": analyst_seconds, "tools_market": 20.0,
+            "Bull Researcher": research_seconds, "Bear Researcher": research_seconds,
+            "Research Manager": 15.0, "Trader": 10.0, "Risky Analyst": 8.0, "Safe Analyst": 8.0,
+            "Neutral Analyst": 8.0, "Risk Judge": 12.0, FINALIZE_NODE: 3.0}
+
+
+class LatencyModelTest(unittest.TestCase):
+
+    def test_cold_start_matches_legacy_table(self):
+        model = LatencyModel()
+        # 原经验表: (60 + 分析师数 * 180) * 1.0 * 1.0
+        self.assertAlmostEqual(model.predict_total(["market", "news"], "dashscope", "qwen-plus", 2), 420.0)
+        self.assertAlmostEqual(model.predict_total(["market"], "deepseek", None, 1), (60 + 120) * 0.7 * 0.8)
+
+    def test_learns_exact_key_and_backs_off(self):
+        model = LatencyModel(alpha=0.5)
+        for _ in range(3):
+            model.record_run(run_durations(), "dashscope", "qwen-plus", 3)
+
+        self.assertAlmostEqual(model.predict("Market Analyst", "dashscope", "qwen-plus", 3), 100.0)
+        self.assertAlmostEqual(model.predict_total(["market"], "dashscope", "qwen-plus", 3),
+                               sum(run_durations().values()))
+        # 同供应商同模型的其它深度、其它供应商同深度都回退到已学习的统计
+        self.assertAlmostEqual(model.predict("Trader", "dashscope", "qwen-plus", 1), 10.0)
+        self.assertAlmostEqual(model.predict("Trader", "google", "gemini", 3), 10.0)
+        # 没有学习过的分析师节点使用先验
+        self.assertGreater(model.predict("News Analyst", "dashscope", "qwen-plus", 3), 0)
+
+    def test_recent_runs_weigh_more(self):
+        model = LatencyModel(alpha=0.5)
+        model.record_run({"Trader": 10.0}, "dashscope", "qwen-plus", 2)
+        model.record_run({"Trader": 30.0}, "dashscope", "qwen-plus", 2)
+        self.assertAlmostEqual(model.predict("Trader", "dashscope", "qwen-plus", 2), 20.0)
+        model.record_run({"Trader": 30.0}, "dashscope", "qwen-plus", 2)
+        self.assertAlmostEqual(model.predict("Trader", "dashscope", "qwen-plus", 2), 25.0)
+
+    def test_predict_remaining(self):
+        model = LatencyModel()
+        model.record_run(run_durations(), "dashscope", "qwen-plus", 2)
+        total = model.predict_total(["market"], "dashscope", "qwen-plus", 2)
+        remaining = model.predict_remaining(["market"], "dashscope", "qwen-plus", 2,
+                                            completed=[SETUP_NODE], current="Market Analyst", current_elapsed=60)
+        self.assertAlmostEqual(remaining, total - 10.0 - 60.0)
+
+    def test_persistence(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "latency.db")
+            LatencyModel(path).record_run(run_durations(), "dashscope", "qwen-plus", 2)
+            reloaded = LatencyModel(path)
+            self.assertAlmostEqual(reloaded.predict("Market Analyst", "dashscope", "qwen-plus", 2), 100.0)
+            self.assertEqual(reloaded.sample_count("dashscope", "qwen-plus", 2), 1)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def test_default_db_path(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            with patch.dict(os.environ, {'LATENCY_MODEL_DB': os.path.join(tmp_dir, "custom.db")}):
+                self.assertEqual(latency_model.default_db_path(), os.path.join(tmp_dir, "custom.db"))
+            with patch.dict(os.environ, {'LATENCY_MODEL_DB': ''}), \
+                    patch.object(ConfigManager, 'get_data_dir', return_value=tmp_dir):
+                self.assertEqual(latency_model.default_db_path(), os.path.join(tmp_dir, "latency_model.db"))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def test_record_trace_sums_node_spans(self):
+        tracer = Tracer()
+        with patch("tradingagents.utils.tracing.get_tracer", return_value=tracer):
+            with start_trace("analysis", trace_id="session_1"):
+                for _ in range(2):
+                    with span("Bull Researcher", kind="node"):
+                        with span("llm.chat", kind="llm"):
+                            time.sleep(0.01)
+            model = LatencyModel()
+            durations = model.record_trace("session_1", "dashscope", "qwen-plus", 2, setup_seconds=5.0)
+
+        self.assertEqual(set(durations), {"Bull Researcher", SETUP_NODE})
+        self.assertGreaterEqual(durations["Bull Researcher"], 0.02)
+        self.assertEqual(node_durations_from_spans([s.to_dict() for s in tracer.get_spans("session_1")]),
+                         {"Bull Researcher": durations["Bull Researcher"]})
+
+    def test_expected_nodes_order(self):
+        nodes = expected_nodes(["market", "news"])
+        self.assertEqual(nodes[:5], [SETUP_NODE, "Market Analyst", "tools_market", "News Analyst", "tools_news"])
+        self.assertEqual(nodes[-1], FINALIZE_NODE)
+
+
+class TrackerEstimateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.model = LatencyModel()
+        self.model.record_run(run_durations(analyst_seconds=300.0), "dashscope", "qwen-plus", 3)
+        self.patches = [
+            patch.dict(os.environ, {'REDIS_ENABLED': 'false'}),
+            patch.object(latency_model, '_latency_model', self.model),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_async_tracker_uses_learned_durations(self):
+        from web.utils.async_progress_tracker import AsyncProgressTracker
+
+        tracker = AsyncProgressTracker("eta_test", ["market"], 3, "dashscope", llm_model="qwen-plus")
+        self.assertAlmostEqual(tracker.estimated_duration, sum(run_durations(analyst_seconds=300.0).values()))
+        analyst_step = next(s for s in tracker.analysis_steps if s["name"] == "📊 市场分析")
+        self.assertAlmostEqual(analyst_step["expected_seconds"], 320.0)
+        # 分析师步骤耗时最长，权重也最大
+        self.assertEqual(max(tracker.analysis_steps, key=lambda s: s["weight"]), analyst_step)
+
+        # 进入分析师步骤时，剩余 = 分析师步骤 + 之后所有步骤
+        index = tracker.analysis_steps.index(analyst_step)
+        tracker.current_step = index
+        tracker._step_started_at = tracker.start_time + 10.0
+        later = sum(s["expected_seconds"] for s in tracker.analysis_steps[index:])
+        remaining = tracker._estimate_remaining_time(0.1, 10.0)
+        self.assertAlmostEqual(remaining, later, delta=1.0)
+
+
+class QueueWaitEstimateTest(unittest.TestCase):
+
+    def make_queue(self, **kwargs):
+        queue = JobQueue(handler=lambda job, check: None, backend=InProcessJobBackend(), max_workers=2,
+                         estimator=lambda payload: payload["seconds"], **kwargs)
+        queue._ensure_workers = lambda: None  # 不启动工作线程，只测试估算
+        return queue
+
+    def test_wait_simulates_workers(self):
+        queue = self.make_queue()
+        for i, seconds in enumerate([100, 300, 50]):
+            queue.submit({"seconds": seconds}, job_id=f"job{i}", user_id=f"user{i}")
+        # 两个工作线程空闲：job0、job1立即开始，job2在job0结束后开始
+        self.assertEqual(queue.estimate_wait("job0"), 0)
+        self.assertEqual(queue.estimate_wait("job1"), 0)
+        self.assertEqual(queue.estimate_wait("job2"), 100)
+        # 新提交的任务在job2（100+50）结束后开始
+        self.assertEqual(queue.estimate_wait(), 150)
+        self.assertEqual(queue.estimate_wait("missing"), 0)
+
+        # 运行中的任务只计剩余时间
+        job = queue.backend.pop(0.1)
+        job.started_at = time.time() - 40
+        self.assertAlmostEqual(queue.estimate_wait("job2"), 60, delta=1)
+
+    def test_admission_rejects_long_waits(self):
+        queue = self.make_queue(max_wait_seconds=200)
+        queue.submit({"seconds": 300}, job_id="a")
+        queue.submit({"seconds": 100}, job_id="b")
+        queue.submit({"seconds": 150}, job_id="c", user_id="other")
+        with self.assertRaises(WaitTooLongError):
+            queue.submit({"seconds": 10}, job_id="d", user_id="third")
+        # 高优先级任务排在所有普通任务前面，等待时间在上限内
+        queue.submit({"seconds": 10}, job_id="e", user_id="third", priority="high")
+        self.assertEqual(queue.get_job("e").estimated_seconds, 10)
+
+
+def benchmark_estimates(runs: int = 500, lookups: int = 20000):
+    """学习耗时与每次预测耗时（预测在每次进度更新时调用）"""
+    model = LatencyModel()
+    start = time.perf_counter()
+    for i in range(runs):
+        model.record_run(run_durations(analyst_seconds=80 + i % 40), "dashscope", "qwen-plus", 1 + i % 3)
+    record = (time.perf_counter() - start) / runs
+
+    analysts = ["market", "news", "fundamentals"]
+    start = time.perf_counter()
+    for i in range(lookups):
+        model.predict_total(analysts, "dashscope", "qwen-plus", 1 + i % 3)
+    predict = (time.perf_counter() - start) / lookups
+    print(f"⏱️ 记录一次分析 {record * 1e6:.0f}µs，预测总耗时 {predict * 1e6:.1f}µs")
+
+    # 学习后的预测误差 vs 原经验表
+    legacy = LatencyModel().predict_total(["market"], "dashscope", "qwen-plus", 2)
+    learned = model.predict_total(["market"], "dashscope", "qwen-plus", 2)
+    actual = sum(run_durations(analyst_seconds=100).values())
+    print(f"📏 单分析师深度2: 实际约{actual:.0f}s，经验表{legacy:.0f}s，耗时模型{learned:.0f}s")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_estimates()
+    else:
+        unittest.main()
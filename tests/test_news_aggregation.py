@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时新闻并发聚合测试
+使用本地模拟新闻服务验证并发请求、单源截止时间、整体截止时间以及近似去重，
+直接运行本文件可对比串行与并发聚合的耗时
+"""
+
+import sys
+import os
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_news_server import FakeNewsServer
+from tradingagents.dataflows.news_dedup import minhash, estimate_similarity, deduplicate
+from tradingagents.dataflows.realtime_news_utils import RealtimeNewsAggregator, NewsItem
+
+API_KEYS = {
+    'FINNHUB_API_KEY': 'test',
+    'ALPHA_VANTAGE_API_KEY': 'test',
+    'NEWSAPI_KEY': 'test',
+}
+
+
+def make_item(title, content="", source="test"):
+    return NewsItem(title, content, source, datetime.now(), "", "low", 0.5)
+
+
+class TestNewsDedup(unittest.TestCase):
+    """近似去重测试"""
+
+    def test_similarity_estimate(self):
+        a = minhash("Apple beats earnings expectations as iPhone sales surge in China")
+        b = minhash("APPLE BEATS EARNINGS EXPECTATIONS, AS IPHONE SALES SURGE IN CHINA!")
+        c = minhash("Tesla recalls vehicles over software issue in autopilot system")
+        self.assertEqual(estimate_similarity(a, b), 1.0)
+        self.assertLess(estimate_similarity(a, c), 0.2)
+
+    def test_reprint_with_suffix_removed(self):
+        body = "贵州茅台发布三季度报告，营业收入同比增长15%，净利润同比增长13%，直销渠道占比继续提升。"
+        items = [
+            make_item("贵州茅台三季度营收同比增长15%", body, "财联社"),
+            make_item("贵州茅台：三季度营收同比增长15%", body + "（来源：新浪财经）", "新浪财经"),
+            make_item("宁德时代发布新一代钠离子电池产品", "宁德时代在发布会上展示了新一代电池。", "东方财富"),
+        ]
+        unique = deduplicate(items, key=lambda n: f"{n.title} {n.content}")
+        self.assertEqual([n.source for n in unique], ["财联社", "东方财富"])
+
+
+class TestConcurrentAggregation(unittest.TestCase):
+    """并发聚合测试（本地模拟新闻服务）"""
+
+    def setUp(self):
+        self.env = patch.dict(os.environ, API_KEYS)
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+
+    def test_sources_fetched_concurrently_and_deduplicated(self):
+        delays = {'finnhub': 0.4, 'alpha_vantage': 0.4, 'newsapi': 0.4}
+        with FakeNewsServer(delays=delays, articles_per_source=20) as server:
+            aggregator = RealtimeNewsAggregator(news_urls=server.news_urls, total_deadline=5)
+            start = time.perf_counter()
+            news = aggregator.get_realtime_stock_news("AAPL", hours_back=24)
+            elapsed = time.perf_counter() - start
+
+        # 三个源并发，耗时接近单个源的延迟而不是三者之和
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual({name: s["status"] for name, s in aggregator.last_fetch_stats.items()},
+                         {'finnhub': 'ok', 'alpha_vantage': 'ok', 'newsapi': 'ok', 'chinese_finance': 'ok'})
+        # 三个源返回相同的新闻，每5条中有1条转载，去重后只剩原始的16条
+        self.assertEqual(len(news), 16)
+        self.assertTrue(all(n.source == "Fake Newswire" for n in news))
+
+    def test_slow_source_skipped_at_deadlines(self):
+        delays = {'finnhub': 0.1, 'alpha_vantage': 3, 'newsapi': 3}
+        with FakeNewsServer(delays=delays) as server:
+            aggregator = RealtimeNewsAggregator(
+                news_urls=server.news_urls,
+                source_timeouts={'alpha_vantage': 0.3},
+                total_deadline=0.8,
+            )
+            start = time.perf_counter()
+            news = aggregator.get_realtime_stock_news("AAPL", hours_back=24)
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(aggregator.last_fetch_stats['finnhub']['status'], 'ok')
+        # 单源超时：请求失败后返回空结果
+        self.assertEqual(aggregator.last_fetch_stats['alpha_vantage']['count'], 0)
+        # 整体截止：未返回的源被忽略
+        self.assertEqual(aggregator.last_fetch_stats['newsapi']['status'], 'timeout')
+        self.assertGreater(len(news), 0)
+
+
+def benchmark_aggregation(delay: float = 0.8):
+    """对比串行与并发聚合的耗时"""
+    delays = {'finnhub': delay, 'alpha_vantage': delay, 'newsapi': delay}
+    with patch.dict(os.environ, API_KEYS), FakeNewsServer(delays=delays, articles_per_source=50) as server:
+        aggregator = RealtimeNewsAggregator(news_urls=server.news_urls, total_deadline=10)
+
+        start = time.perf_counter()
+        serial = []
+        for _, fetch in aggregator._get_news_sources():
+            serial.extend(fetch("AAPL", 24))
+        serial_unique = aggregator._deduplicate_news(serial)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent_news = aggregator.get_realtime_stock_news("AAPL", 24)
+        concurrent_time = time.perf_counter() - start
+
+    print(f"\n📊 新闻聚合基准测试 (3个源, 每源延迟{delay}s, 每源50条)")
+    print(f"  串行:  {serial_time:.2f}s, 原始{len(serial)}条, 去重后{len(serial_unique)}条")
+    print(f"  并发:  {concurrent_time:.2f}s, 去重后{len(concurrent_news)}条")
+
+
+if __name__ == '__main__':
+    benchmark_aggregation()
+    unittest.main()
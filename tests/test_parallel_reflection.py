@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发反思与批量记忆写入测试
+使用模拟LLM和模拟记忆验证反思并发执行、每个嵌入后端只做一次批量嵌入、每个记忆只写入一次
+"""
+
+import sys
+import os
+import time
+import threading
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.graph.reflection import Reflector, REFLECTION_COMPONENTS
+from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+LLM_DELAY = 0.2
+
+
+class FakeLLM:
+    """每次调用固定耗时的模拟LLM"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages):
+        with self._lock:
+            self.calls += 1
+        time.sleep(LLM_DELAY)
+        return SimpleNamespace(content=f"lesson for {messages[1][1][:20]}")
+
+
+class FakeMemory:
+    """记录嵌入请求和写入次数的模拟记忆"""
+
+    embedding_calls = []
+
+    def __init__(self, signature=("openai", "text-embedding-3-small", None)):
+        self.embedding_signature = signature
+        self.writes = []
+
+    def get_embeddings(self, texts):
+        FakeMemory.embedding_calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    def add_situations(self, situations_and_advice, embeddings=None):
+        self.writes.append((list(situations_and_advice), embeddings))
+
+
+def make_state(ticker):
+    return {
+        "market_report": f"{ticker} market",
+        "sentiment_report": f"{ticker} sentiment",
+        "news_report": f"{ticker} news",
+        "fundamentals_report": f"{ticker} fundamentals",
+        "investment_debate_state": {"bull_history": "bull", "bear_history": "bear", "judge_decision": "buy"},
+        "trader_investment_plan": "plan",
+        "risk_debate_state": {"judge_decision": "hold"},
+    }
+
+
+class TestParallelReflection(unittest.TestCase):
+    """并发反思测试"""
+
+    def setUp(self):
+        FakeMemory.embedding_calls = []
+        self.llm = FakeLLM()
+        self.reflector = Reflector(self.llm)
+        self.memories = {name: FakeMemory() for _, name, _ in REFLECTION_COMPONENTS}
+
+    def test_reflect_all_runs_concurrently(self):
+        start = time.perf_counter()
+        written = self.reflector.reflect_all(make_state("AAPL"), 1000, self.memories)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(self.llm.calls, 5)
+        self.assertLess(elapsed, LLM_DELAY * 3)
+        self.assertEqual(written, {name: 1 for name in self.memories})
+        # 五个记忆使用同一嵌入后端，情况文本相同，只需一次嵌入请求
+        self.assertEqual(len(FakeMemory.embedding_calls), 1)
+        self.assertEqual(len(FakeMemory.embedding_calls[0]), 1)
+        for memory in self.memories.values():
+            self.assertEqual(len(memory.writes), 1)
+
+    def test_batch_groups_by_embedding_backend(self):
+        self.memories["risk_manager_memory"] = FakeMemory(signature=("dashscope", "text-embedding-v3", None))
+        self.memories["trader_memory"] = None
+        outcomes = [(make_state(ticker), 100) for ticker in ("AAPL", "MSFT", "000001", "600519")]
+
+        written = self.reflector.reflect_batch(outcomes, self.memories, max_workers=16)
+
+        self.assertEqual(self.llm.calls, 16)
+        self.assertNotIn("trader_memory", written)
+        self.assertEqual(set(written.values()), {4})
+        # 两个嵌入后端各一次请求，每次4条不同的情况文本
+        self.assertEqual(sorted(len(call) for call in FakeMemory.embedding_calls), [4, 4])
+        pairs, embeddings = self.memories["bull_memory"].writes[0]
+        self.assertEqual(len(pairs), 4)
+        self.assertEqual(embeddings, [[float(len(situation))] for situation, _ in pairs])
+
+    def test_failed_reflection_skipped(self):
+        self.llm.invoke = MagicMock(side_effect=RuntimeError("rate limited"))
+        written = self.reflector.reflect_all(make_state("AAPL"), -50, self.memories)
+        self.assertEqual(written, {})
+        self.assertEqual(FakeMemory.embedding_calls, [])
+
+
+class TestStateLog(unittest.TestCase):
+    """决策状态日志测试：跨运行保留，批量反思按股票读取一次"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def make_graph(ticker):
+        """只带日志和反思所需属性的图（不初始化LLM）"""
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+        graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+        graph.ticker = ticker
+        graph.log_states_dict = {}
+        for _, name, _ in REFLECTION_COMPONENTS:
+            setattr(graph, name, FakeMemory())
+        graph.reflector = MagicMock()
+        graph.reflector.reflect_batch.side_effect = lambda states, memories, max_workers: {"count": len(states)}
+        return graph
+
+    @staticmethod
+    def final_state(ticker, trade_date):
+        state = make_state(ticker)
+        state.update({
+            "company_of_interest": ticker, "trade_date": trade_date,
+            "investment_debate_state": {"turns": [], "current_response": "", "judge_decision": "buy"},
+            "risk_debate_state": {"turns": [], "judge_decision": "hold"},
+            "investment_plan": "plan", "final_trade_decision": "买入",
+        })
+        return state
+
+    def test_runs_merge_into_existing_log(self):
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+        # 两次独立运行（两个图实例）各记录一个交易日
+        self.make_graph("AAPL")._log_state("2024-01-02", self.final_state("AAPL", "2024-01-02"))
+        self.make_graph("AAPL")._log_state("2024-01-03", self.final_state("AAPL", "2024-01-03"))
+
+        self.assertEqual(set(TradingAgentsGraph.load_state_log("AAPL")), {"2024-01-02", "2024-01-03"})
+        state = TradingAgentsGraph.load_logged_state("AAPL", "2024-01-02")
+        self.assertEqual(state["trader_investment_plan"], "plan")
+
+    def test_batch_reads_each_log_once(self):
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+        for trade_date in ("2024-01-02", "2024-01-03", "2024-01-04"):
+            self.make_graph("AAPL")._log_state(trade_date, self.final_state("AAPL", trade_date))
+        self.make_graph("MSFT")._log_state("2024-01-02", self.final_state("MSFT", "2024-01-02"))
+
+        graph = self.make_graph("AAPL")
+        outcomes = [("AAPL", "2024-01-02", 10), ("AAPL", "2024-01-03", -5), ("AAPL", "2024-01-04", 3),
+                    ("MSFT", "2024-01-02", 1), ("MSFT", "2024-02-01", 1)]
+        with patch.object(TradingAgentsGraph, 'load_state_log',
+                          side_effect=TradingAgentsGraph.load_state_log) as load:
+            result = graph.reflect_and_remember_batch(outcomes)
+
+        self.assertEqual(result, {"count": 4})
+        self.assertEqual(sorted(call.args[0] for call in load.call_args_list), ["AAPL", "MSFT"])
+
+
+class TestBatchedEmbeddings(unittest.TestCase):
+    """FinancialSituationMemory批量嵌入测试"""
+
+    def make_memory(self):
+        memory = object.__new__(FinancialSituationMemory)
+        memory.llm_provider = "openai"
+        memory.embedding = "text-embedding-3-small"
+        memory.config = {"backend_url": "https://api.openai.com/v1"}
+        memory.client = MagicMock()
+        memory.client.embeddings.create.side_effect = lambda model, input: SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)]
+        )
+        memory.situation_collection = MagicMock()
+        memory.situation_collection.count.return_value = 3
+        memory._write_lock = threading.Lock()
+        return memory
+
+    def test_duplicate_texts_requested_once_in_batches(self):
+        memory = self.make_memory()
+        texts = [f"situation {i % 12}" for i in range(24)]
+        vectors = memory.get_embeddings(texts)
+
+        self.assertEqual(len(vectors), 24)
+        self.assertEqual(vectors[0], vectors[12])
+        # 12条不同文本，按每批10条分两次请求
+        self.assertEqual(memory.client.embeddings.create.call_count, 2)
+
+    def test_add_situations_single_write(self):
+        memory = self.make_memory()
+        memory.add_situations([("a", "rec a"), ("bb", "rec b")])
+
+        memory.client.embeddings.create.assert_called_once()
+        memory.situation_collection.add.assert_called_once()
+        kwargs = memory.situation_collection.add.call_args.kwargs
+        self.assertEqual(kwargs["ids"], ["3", "4"])
+        self.assertEqual(kwargs["embeddings"], [[1.0], [2.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度推送测试
+验证增量计算、进程内广播、Redis发布/订阅（fakeredis作为本地Redis替身），
+以及几百个页面同时订阅时每个页面只读取一次快照
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from web.utils import async_progress_tracker
+from web.utils.async_progress_tracker import AsyncProgressTracker
+from tradingagents.utils import latency_model
+from tradingagents.utils.latency_model import LatencyModel
+from web.utils.progress_bus import (
+    InProcessProgressBus, RedisProgressBus, ProgressWatcher, compute_delta, apply_delta
+)
+
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+class SnapshotStore:
+    """记录快照读取次数的存储替身"""
+
+    def __init__(self):
+        self.snapshots = {}
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def load(self, analysis_id):
+        with self._lock:
+            self.reads += 1
+        snapshot = self.snapshots.get(analysis_id)
+        return dict(snapshot) if snapshot else None
+
+
+class FakePublisher:
+    """模拟AsyncProgressTracker：保存快照并发布增量"""
+
+    def __init__(self, bus, store, analysis_id="analysis_1"):
+        self.bus, self.store, self.analysis_id = bus, store, analysis_id
+        self.seq = 0
+        self.state = {}
+
+    def update(self, **fields):
+        new_state = {**self.state, **fields}
+        self.seq += 1
+        new_state['event_seq'] = self.seq
+        event = {'seq': self.seq, 'type': 'delta' if self.state else 'snapshot', **compute_delta(self.state, new_state)}
+        self.store.snapshots[self.analysis_id] = new_state
+        self.bus.publish(self.analysis_id, event)
+        self.state = new_state
+
+
+class TestDelta(unittest.TestCase):
+    """增量计算测试"""
+
+    def test_only_changed_fields(self):
+        old = {'status': 'running', 'progress_percentage': 10.0, 'steps': [1, 2], 'tmp': 1}
+        new = {'status': 'running', 'progress_percentage': 20.0, 'steps': [1, 2]}
+        delta = compute_delta(old, new)
+        self.assertEqual(delta, {'set': {'progress_percentage': 20.0}, 'unset': ['tmp']})
+        self.assertEqual(apply_delta(dict(old), delta), new)
+        self.assertEqual(compute_delta(new, dict(new)), {})
+
+
+class TestInProcessBus(unittest.TestCase):
+    """进程内广播测试"""
+
+    def setUp(self):
+        self.bus = InProcessProgressBus()
+        self.store = SnapshotStore()
+        self.publisher = FakePublisher(self.bus, self.store)
+
+    def test_watcher_applies_deltas_without_storage_reads(self):
+        self.publisher.update(status='running', progress_percentage=0.0, steps=['a'] * 10)
+        watcher = ProgressWatcher("analysis_1", self.bus, self.store.load)
+        self.assertEqual(self.store.reads, 1)
+
+        for pct in (10.0, 20.0, 30.0):
+            self.publisher.update(progress_percentage=pct)
+        self.assertTrue(watcher.poll())
+        self.assertEqual(watcher.state, self.publisher.state)
+        self.assertFalse(watcher.poll())
+        self.assertEqual(self.store.reads, 1)
+
+        self.publisher.update(status='completed', progress_percentage=100.0)
+        watcher.poll()
+        self.assertTrue(watcher.finished)
+        watcher.close()
+        self.assertEqual(self.bus.subscriber_count(), 0)
+
+    def test_gap_triggers_snapshot_reload(self):
+        self.publisher.update(status='running', progress_percentage=0.0)
+        watcher = ProgressWatcher("analysis_1", self.bus, self.store.load)
+        # 模拟一条事件丢失
+        self.publisher.seq += 1
+        self.publisher.update(progress_percentage=50.0)
+        watcher.poll()
+        self.assertEqual(self.store.reads, 2)
+        self.assertEqual(watcher.state, self.publisher.state)
+
+    def test_poll_waits_for_push(self):
+        self.publisher.update(status='running', progress_percentage=0.0)
+        watcher = ProgressWatcher("analysis_1", self.bus, self.store.load)
+        threading.Timer(0.1, self.publisher.update, kwargs={'progress_percentage': 5.0}).start()
+        start = time.perf_counter()
+        self.assertTrue(watcher.poll(timeout=5))
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+class TestTrackerPublishing(unittest.TestCase):
+    """AsyncProgressTracker推送测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.bus = InProcessProgressBus()
+        self.patches = [
+            patch.dict(os.environ, {'REDIS_ENABLED': 'false'}),
+            patch.object(async_progress_tracker, 'get_progress_bus', return_value=self.bus),
+            patch.object(latency_model, '_latency_model', LatencyModel()),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_tracker_pushes_deltas(self):
+        tracker = AsyncProgressTracker("push_test", ["market"], 1, "dashscope")
+        watcher = ProgressWatcher("push_test", self.bus)
+        subscription = self.bus.subscribe("push_test")
+
+        tracker.update_progress("📊 [模块开始] market_analyst - 股票: 000001")
+        tracker.mark_completed("✅ 分析完成")
+
+        events = subscription.get_events()
+        self.assertTrue(events)
+        # 增量不重复发送步骤列表
+        self.assertTrue(all('steps' not in event.get('set', {}) for event in events))
+        watcher.poll()
+        self.assertEqual(watcher.state['status'], 'completed')
+        self.assertEqual(watcher.state['event_seq'], tracker.progress_data['event_seq'])
+
+
+class TestEmptyProgressDisplay(unittest.TestCase):
+    """没有进度数据时的自动刷新测试"""
+
+    def setUp(self):
+        from web.components import async_progress_display
+        self.module = async_progress_display
+        self.st = MagicMock()
+        self.st.session_state = {}
+        self.st.button.return_value = False
+        self.st.checkbox.return_value = True
+        self.st.columns.return_value = (MagicMock(), MagicMock())
+        self.watcher = MagicMock(state={})
+        self.wait = MagicMock()
+        self.status = 'not_found'
+        self.patches = [
+            patch.object(async_progress_display, 'st', self.st),
+            # 显示函数内部还会 import streamlit as st
+            patch.dict(sys.modules, {'streamlit': self.st}),
+            patch.object(async_progress_display, 'get_progress_watcher', return_value=self.watcher),
+            patch.object(async_progress_display, 'wait_for_progress_push', self.wait),
+            patch('web.utils.thread_tracker.check_analysis_status', side_effect=lambda _: self.status),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def render(self, times):
+        for _ in range(times):
+            self.module.display_static_progress_with_controls("missing_id")
+
+    def test_unknown_analysis_stops_rerunning(self):
+        self.st.session_state["progress_watcher_missing_id"] = self.watcher
+        self.render(10)
+        self.assertEqual(self.wait.call_count, self.module.MAX_EMPTY_PROGRESS_WAITS)
+        self.st.warning.assert_called()
+        self.watcher.close.assert_called_once()
+        self.assertNotIn("progress_watcher_missing_id", self.st.session_state)
+
+    def test_running_analysis_keeps_waiting(self):
+        self.status = 'running'
+        self.render(10)
+        self.assertEqual(self.wait.call_count, 10)
+        self.st.warning.assert_not_called()
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE, "fakeredis未安装")
+class TestRedisBusLoad(unittest.TestCase):
+    """Redis发布/订阅负载测试"""
+
+    WATCHERS = 300
+    UPDATES = 50
+
+    def test_hundreds_of_watchers(self):
+        bus = RedisProgressBus(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+        store = SnapshotStore()
+        publisher = FakePublisher(bus, store)
+        publisher.update(status='running', progress_percentage=0.0, steps=['step'] * 10)
+
+        watchers = [ProgressWatcher("analysis_1", bus, store.load) for _ in range(self.WATCHERS)]
+        self.assertEqual(bus.subscriber_count("analysis_1"), self.WATCHERS)
+
+        def watch(watcher):
+            deadline = time.time() + 20
+            while not watcher.finished and time.time() < deadline:
+                watcher.poll(timeout=0.5)
+
+        threads = [threading.Thread(target=watch, args=(w,)) for w in watchers]
+        for t in threads:
+            t.start()
+
+        start = time.perf_counter()
+        for i in range(1, self.UPDATES):
+            publisher.update(progress_percentage=i * 2.0, last_message=f"step {i}")
+        publisher.update(status='completed', progress_percentage=100.0)
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        bus.close()
+
+        self.assertTrue(all(w.state == publisher.state for w in watchers))
+        # 每个页面只在订阅时读取一次快照，其余全部来自推送
+        self.assertEqual(store.reads, self.WATCHERS)
+        print(f"\n📊 {self.WATCHERS}个订阅者 × {self.UPDATES}次更新: {elapsed:.2f}s, 存储读取{store.reads}次")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源共享执行器测试
+验证截止时间、超时后名额与泄漏指标、线程数有界、卡死数据源的快速失败、SDK代理，以及截止时间的协作式检查
+"""
+
+import sys
+import os
+import time
+import threading
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils.provider_executor import (
+    ProviderExecutor, ProviderCallTimeout, ProviderBusyError, check_deadline, remaining_time
+)
+from tradingagents.utils import tracing
+
+
+class FakeSdk:
+    """模拟阻塞的数据源SDK"""
+
+    version = "1.0"
+
+    def __init__(self, release: threading.Event = None):
+        self.release = release or threading.Event()
+        self.calls = 0
+
+    def daily(self, ts_code, start_date=None):
+        self.calls += 1
+        return f"{ts_code}:{start_date}"
+
+    def hang(self):
+        self.release.wait(5)
+        return "late"
+
+    def fail(self):
+        raise ValueError("接口错误")
+
+
+class ProviderExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.sdk = FakeSdk(self.release)
+        self.executor = ProviderExecutor(max_workers=4, per_provider_limit=2, default_timeout=5)
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown(wait=True)
+
+    def test_call_returns_result_and_errors(self):
+        self.assertEqual(self.executor.call("tushare", self.sdk.daily, "000001.SZ", start_date="20240101"),
+                         "000001.SZ:20240101")
+        with self.assertRaises(ValueError):
+            self.executor.call("tushare", self.sdk.fail)
+        stats = self.executor.metrics()["tushare"]
+        self.assertEqual((stats["completed"], stats["failed"], stats["in_flight"]), (1, 1, 0))
+
+    def test_timeout_marks_call_leaked_until_it_finishes(self):
+        start = time.monotonic()
+        with self.assertRaises(ProviderCallTimeout):
+            self.executor.call("akshare", self.sdk.hang, timeout=0.1)
+        self.assertLess(time.monotonic() - start, 1)
+        stats = self.executor.metrics()["akshare"]
+        self.assertEqual((stats["timed_out"], stats["leaked"], stats["in_flight"]), (1, 1, 1))
+
+        self.release.set()
+        for _ in range(100):
+            if self.executor.metrics()["akshare"]["in_flight"] == 0:
+                break
+            time.sleep(0.01)
+        stats = self.executor.metrics()["akshare"]
+        self.assertEqual((stats["leaked"], stats["leaked_total"], stats["late_completed"]), (0, 1, 1))
+
+    def test_stuck_provider_fails_fast_without_blocking_others(self):
+        for _ in range(2):
+            with self.assertRaises(ProviderCallTimeout):
+                self.executor.call("tdx", self.sdk.hang, timeout=0.05)
+
+        start = time.monotonic()
+        with self.assertRaises(ProviderBusyError):
+            self.executor.call("tdx", self.sdk.daily, "000001", timeout=2)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        # 其它数据源不受影响
+        self.assertEqual(self.executor.call("baostock", self.sdk.daily, "sh.600000"), "sh.600000:None")
+
+    def test_threads_bounded_under_concurrency(self):
+        executor = ProviderExecutor(max_workers=3, per_provider_limit=3, default_timeout=5)
+        # 只统计本执行器执行中的fetch，不受全局执行器或其它测试遗留线程的影响
+        lock = threading.Lock()
+        state = {"in_flight": 0, "peak": 0}
+        worker_threads = set()
+
+        def fetch(i):
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+                worker_threads.add(threading.get_ident())
+            time.sleep(0.02)
+            with lock:
+                state["in_flight"] -= 1
+            return i
+
+        results = []
+        callers = [threading.Thread(target=lambda i=i: results.append(executor.call("yfinance", fetch, i)))
+                   for i in range(30)]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+        executor.shutdown(wait=True)
+        self.assertEqual(sorted(results), list(range(30)))
+        self.assertLessEqual(state["peak"], 3)
+        self.assertLessEqual(len(worker_threads), 3)
+
+    def test_timeout_arg_receives_remaining_time(self):
+        seen = {}
+        self.executor.call("yfinance", lambda timeout: seen.setdefault("timeout", timeout),
+                           timeout=2, timeout_arg="timeout")
+        self.assertTrue(0 < seen["timeout"] <= 2)
+
+    def test_guarded_api_routes_methods(self):
+        api = self.executor.guard(self.sdk, "tushare", timeout=0.1)
+        self.assertEqual(api.daily("600519.SH"), "600519.SH:None")
+        self.assertEqual(api.version, "1.0")
+        self.assertEqual(api.daily.__name__, "daily")
+        with self.assertRaises(ProviderCallTimeout):
+            api.hang()
+        self.assertEqual(self.executor.metrics()["tushare"]["completed"], 1)
+
+    def test_cooperative_deadline(self):
+        self.assertIsNone(remaining_time())
+
+        def paged_fetch():
+            pages = 0
+            while True:
+                check_deadline()
+                pages += 1
+                time.sleep(0.01)
+
+        with self.assertRaises(ProviderCallTimeout):
+            self.executor.call("akshare", paged_fetch, timeout=0.05)
+        # 协作退出的调用很快结束，不再占用线程
+        for _ in range(100):
+            if self.executor.metrics()["akshare"]["in_flight"] == 0:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.executor.metrics()["akshare"]["in_flight"], 0)
+
+    def test_spans_inside_call_keep_parent(self):
+        with patch.object(tracing, '_tracer', tracing.Tracer(buffer_size=100)):
+            def fetch():
+                with tracing.span("parse") as inner:
+                    return inner
+
+            with tracing.start_trace("analysis") as root:
+                inner = self.executor.call("tushare", fetch)
+            call_span = next(s for s in tracing.get_tracer().get_spans(root.trace_id) if s.kind == "http")
+            self.assertEqual(inner.trace_id, root.trace_id)
+            self.assertEqual(inner.parent_id, call_span.span_id)
+            self.assertEqual(call_span.parent_id, root.span_id)
+
+
+def benchmark_provider_calls(calls: int = 200, latency: float = 0.01, hung: int = 20):
+    """每次调用新建线程+join vs 共享执行器；以及上游卡死时两种方式的存活线程数"""
+    def fetch():
+        time.sleep(latency)
+        return 1
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        result = [None]
+        thread = threading.Thread(target=lambda: result.__setitem__(0, fetch()), daemon=True)
+        thread.start()
+        thread.join(timeout=60)
+    per_thread = (time.perf_counter() - start) / calls
+
+    executor = ProviderExecutor(max_workers=16, per_provider_limit=4, default_timeout=60)
+    start = time.perf_counter()
+    for _ in range(calls):
+        executor.call("akshare", fetch)
+    shared = (time.perf_counter() - start) / calls
+    print(f"⚙️ {calls}次调用: 每次新建线程 {per_thread * 1000:.2f}ms，共享执行器 {shared * 1000:.2f}ms")
+
+    release = threading.Event()
+    before = threading.active_count()
+    for _ in range(hung):
+        thread = threading.Thread(target=lambda: release.wait(10), daemon=True)
+        thread.start()
+        thread.join(timeout=0.01)
+    ad_hoc = threading.active_count() - before
+
+    before = threading.active_count()
+    rejected = 0
+    for _ in range(hung):
+        try:
+            executor.call("tushare", lambda: release.wait(10), timeout=0.01)
+        except ProviderCallTimeout:
+            pass
+        except ProviderBusyError:
+            rejected += 1
+    bounded = threading.active_count() - before
+    release.set()
+    executor.shutdown(wait=True)
+    print(f"🧵 上游卡死{hung}次调用: 临时线程残留 {ad_hoc} 个，共享执行器残留 {bounded} 个（快速拒绝 {rejected} 次）")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_provider_calls()
+    else:
+        unittest.main()
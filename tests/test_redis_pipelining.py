@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis连接池与管道化访问测试
+验证共享连接池复用、缓存查找只需一次GET、以及进度索引替代KEYS扫描
+（使用fakeredis作为本地Redis替身，未安装时跳过）
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+from tradingagents.config import redis_pool
+from tradingagents.dataflows.db_cache_manager import DatabaseCacheManager
+from tradingagents.utils import latency_model
+from tradingagents.utils.latency_model import LatencyModel
+
+
+class CountingRedis:
+    """记录命令调用次数的Redis代理"""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if callable(attr):
+            def wrapper(*args, **kwargs):
+                self.calls.append(name)
+                return attr(*args, **kwargs)
+            return wrapper
+        return attr
+
+
+class TestRedisPool(unittest.TestCase):
+    """共享连接池测试"""
+
+    def tearDown(self):
+        redis_pool.close_all_pools()
+
+    def test_clients_share_pool(self):
+        a = redis_pool.get_redis_client("redis://localhost:6379/0")
+        b = redis_pool.get_redis_client("redis://localhost:6379/0")
+        c = redis_pool.get_redis_client("redis://localhost:6379/0", decode_responses=False)
+        self.assertIs(a.connection_pool, b.connection_pool)
+        self.assertIsNot(a.connection_pool, c.connection_pool)
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE, "fakeredis未安装")
+class TestDatabaseCacheLookup(unittest.TestCase):
+    """缓存查找往返次数测试"""
+
+    def test_find_then_load_uses_single_get(self):
+        with patch.object(DatabaseCacheManager, '_init_mongodb'), \
+             patch.object(DatabaseCacheManager, '_init_redis'):
+            manager = DatabaseCacheManager()
+        manager.redis_client = CountingRedis(fakeredis.FakeRedis())
+
+        df = pd.DataFrame({'close': [1.0, 2.0, 3.0]})
+        manager.save_stock_data("000001", df, "2024-01-01", "2024-01-31", "tushare")
+        manager.redis_client.calls.clear()
+
+        cache_key = manager.find_cached_stock_data("000001", "2024-01-01", "2024-01-31", "tushare")
+        data = manager.load_stock_data(cache_key)
+
+        pd.testing.assert_frame_equal(data, df)
+        self.assertEqual(manager.redis_client.calls, ['get'])
+
+    def test_save_after_prefetch_loads_new_data(self):
+        with patch.object(DatabaseCacheManager, '_init_mongodb'), \
+             patch.object(DatabaseCacheManager, '_init_redis'):
+            manager = DatabaseCacheManager()
+        manager.redis_client = CountingRedis(fakeredis.FakeRedis())
+
+        old_df = pd.DataFrame({'close': [1.0, 2.0]})
+        new_df = pd.DataFrame({'close': [3.0, 4.0, 5.0]})
+        manager.save_stock_data("000001", old_df, "2024-01-01", "2024-01-31", "tushare")
+
+        # 查找暂存了旧数据，随后写入新数据，加载应返回新数据
+        cache_key = manager.find_cached_stock_data("000001", "2024-01-01", "2024-01-31", "tushare")
+        self.assertEqual(manager.save_stock_data("000001", new_df, "2024-01-01", "2024-01-31", "tushare"), cache_key)
+        pd.testing.assert_frame_equal(manager.load_stock_data(cache_key), new_df)
+
+        manager.find_cached_stock_data("000001", "2024-01-01", "2024-01-31", "tushare")
+        manager.clear_old_cache()
+        self.assertEqual(len(manager._prefetched), 0)
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE, "fakeredis未安装")
+class TestProgressIndex(unittest.TestCase):
+    """进度索引测试"""
+
+    def setUp(self):
+        from web.utils import async_progress_tracker
+        self.module = async_progress_tracker
+        self.fake = CountingRedis(fakeredis.FakeRedis(decode_responses=True))
+        self.patches = [
+            patch.object(async_progress_tracker, 'get_redis_client', return_value=self.fake),
+            patch.dict(os.environ, {'REDIS_ENABLED': 'true'}),
+            patch.object(latency_model, '_latency_model', LatencyModel()),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_latest_analysis_from_sorted_set(self):
+        tracker_a = self.module.AsyncProgressTracker("analysis_a", ['market'], 1, 'dashscope')
+        time.sleep(0.01)
+        tracker_b = self.module.AsyncProgressTracker("analysis_b", ['market'], 1, 'dashscope')
+        self.assertTrue(tracker_a.use_redis and tracker_b.use_redis)
+
+        self.assertEqual(self.module.get_latest_analysis_id(), "analysis_b")
+
+        time.sleep(0.01)
+        tracker_a.update_progress("📊 [模块开始] market_analyst")
+        self.assertEqual(self.module.get_latest_analysis_id(), "analysis_a")
+        self.assertNotIn('keys', self.fake.calls)
+
+        # 进度键过期后，索引中的条目被清理
+        self.fake.delete("progress:analysis_a")
+        self.assertEqual(self.module.get_latest_analysis_id(), "analysis_b")
+        self.assertIsNone(self.fake.zscore(self.module.PROGRESS_INDEX_KEY, "analysis_a"))
+
+        self.assertEqual(self.module.get_progress_by_id("analysis_b")['analysis_id'], "analysis_b")
+
+
+if __name__ == '__main__':
+    unittest.main()
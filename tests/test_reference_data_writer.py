@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+参考数据批量写入测试
+验证内容哈希变化检测（忽略updated_at）、无序bulk_write批量upsert、写入统计，
+以及StockDataService缓存股票列表走批量写入（mongomock）
+"""
+
+import sys
+import os
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows.reference_data_writer import HASH_FIELD, content_hash
+
+try:
+    import mongomock
+    from tradingagents.dataflows.reference_data_writer import ReferenceDataWriter, PYMONGO_AVAILABLE
+    MONGOMOCK_AVAILABLE = PYMONGO_AVAILABLE
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+def mongomock_bulk_compat():
+    """mongomock 4.x的批量写入不接受新版pymongo UpdateOne传入的sort参数，测试时忽略该参数"""
+    import inspect
+    from unittest.mock import patch
+    builder = mongomock.collection.BulkOperationBuilder
+    if 'sort' in inspect.signature(builder.add_update).parameters:
+        return patch.object(builder, 'add_update', builder.add_update)
+    original = builder.add_update
+
+    def add_update(self, *args, sort=None, **kwargs):
+        return original(self, *args, **kwargs)
+    return patch.object(builder, 'add_update', add_update)
+
+
+def make_universe(count: int, name_suffix: str = ""):
+    """模拟通达信降级返回的全市场股票列表"""
+    now = datetime.now().isoformat()
+    return [{'code': f"{600000 + i:06d}", 'name': f"股票{i}{name_suffix}", 'market': '上海证券交易所',
+             'category': '沪市主板', 'source': 'tdx_api', 'updated_at': now} for i in range(count)]
+
+
+class ContentHashTest(unittest.TestCase):
+
+    def test_hash_ignores_volatile_fields_and_order(self):
+        a = {'code': '000001', 'name': '平安银行', 'updated_at': '2025-01-01'}
+        b = {'name': '平安银行', 'code': '000001', 'updated_at': '2025-06-01', HASH_FIELD: 'x', '_id': 1}
+        self.assertEqual(content_hash(a), content_hash(b))
+        self.assertNotEqual(content_hash(a), content_hash({**a, 'name': '平安银行A'}))
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock未安装")
+class ReferenceDataWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        compat = mongomock_bulk_compat()
+        compat.start()
+        self.addCleanup(compat.stop)
+        self.collection = mongomock.MongoClient().db['stock_basic_info']
+        self.writer = ReferenceDataWriter(self.collection, batch_size=40)
+
+    def test_only_changed_rows_written(self):
+        stats = self.writer.upsert_many(make_universe(100))
+        self.assertEqual((stats['inserted'], stats['updated'], stats['unchanged'], stats['batches']), (100, 0, 0, 3))
+        self.assertEqual(self.collection.count_documents({}), 100)
+
+        # 再次刷新：只有updated_at变化，不写入，库中的updated_at保持不变
+        before = self.collection.find_one({'code': '600000'})['updated_at']
+        stats = self.writer.upsert_many(make_universe(100))
+        self.assertEqual((stats['inserted'], stats['updated'], stats['unchanged'], stats['batches']), (0, 0, 100, 0))
+        self.assertEqual(self.collection.find_one({'code': '600000'})['updated_at'], before)
+
+        universe = make_universe(102)
+        for doc in universe[:3]:
+            doc['name'] += "(ST)"
+        stats = self.writer.upsert_many(universe)
+        self.assertEqual((stats['inserted'], stats['updated'], stats['unchanged']), (2, 3, 97))
+        self.assertEqual(self.collection.find_one({'code': '600001'})['name'], "股票1(ST)")
+
+    def test_legacy_rows_without_hash_rewritten_once(self):
+        self.collection.insert_many([{k: v for k, v in doc.items()} for doc in make_universe(5)])
+        self.assertEqual(self.writer.upsert_many(make_universe(5))['updated'], 5)
+        self.assertEqual(self.writer.upsert_many(make_universe(5))['unchanged'], 5)
+        self.assertEqual(self.collection.count_documents({}), 5)
+
+    def test_duplicates_and_missing_keys(self):
+        docs = make_universe(3) + [{'code': '600000', 'name': '改名'}, {'name': '无代码'}]
+        stats = self.writer.upsert_many(docs)
+        self.assertEqual((stats['total'], stats['skipped'], stats['inserted']), (5, 1, 3))
+        self.assertEqual(self.collection.find_one({'code': '600000'})['name'], '改名')
+
+    def test_stock_data_service_uses_bulk_writer(self):
+        try:
+            from tradingagents.dataflows.stock_data_service import StockDataService
+        except ImportError as e:
+            self.skipTest(f"stock_data_service不可导入: {e}")
+        service = StockDataService.__new__(StockDataService)
+        service._reference_writer = None
+        client = mongomock.MongoClient()
+        service.db_manager = MagicMock()
+        service.db_manager.get_mongodb_client.return_value = client
+        service.db_manager.mongodb_config = {"database": "tradingagents"}
+
+        self.assertTrue(service._cache_to_mongodb(make_universe(10)))
+        self.assertTrue(service._cache_to_mongodb(make_universe(1, "X")[0]))
+        collection = client['tradingagents']['stock_basic_info']
+        self.assertEqual(collection.count_documents({}), 10)
+        self.assertEqual(collection.find_one({'code': '600000'})['name'], "股票0X")
+
+        service.db_manager.get_mongodb_client.return_value = None
+        self.assertFalse(StockDataService._cache_to_mongodb(service, make_universe(1)))
+
+
+def benchmark_reference_refresh(count: int = 5000):
+    """5000只股票刷新：逐条update_one vs 哈希检测 + bulk_write（首次全量、无变化、1%变化）
+
+    设置 MONGODB_CONNECTION_STRING 时连接本地mongod，否则使用mongomock
+    """
+    connection_string = os.getenv("MONGODB_CONNECTION_STRING")
+    if connection_string:
+        import pymongo
+        client, backend = pymongo.MongoClient(connection_string, serverSelectionTimeoutMS=3000), "mongod"
+    else:
+        mongomock_bulk_compat().start()
+        client, backend = mongomock.MongoClient(), "mongomock"
+    db = client['tradingagents_benchmark']
+
+    def per_row(collection, docs):
+        for doc in docs:
+            collection.update_one({'code': doc['code']}, {'$set': doc}, upsert=True)
+
+    changed = make_universe(count)
+    for doc in changed[:count // 100]:
+        doc['name'] += "(ST)"
+
+    print(f"\n📦 {count}只股票刷新（{backend}）")
+    try:
+        for label, docs in (("首次全量", make_universe(count)), ("无变化", make_universe(count)), ("1%变化", changed)):
+            legacy, bulk = db['legacy'], db['bulk']
+            start = time.perf_counter()
+            per_row(legacy, docs)
+            legacy_ms = (time.perf_counter() - start) * 1000
+            stats = ReferenceDataWriter(bulk).upsert_many(docs)
+            print(f"  {label}: 逐条update_one {legacy_ms:.0f} ms ({count}次往返) -> 批量写入 {stats['elapsed'] * 1000:.0f} ms "
+                  f"(新增{stats['inserted']} 更新{stats['updated']} 未变化{stats['unchanged']}, {stats['batches']}批)")
+    finally:
+        client.drop_database('tradingagents_benchmark')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_reference_refresh()
+    else:
+        unittest.main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报告导出服务测试
+验证按内容缓存（内存/磁盘）、记住可用PDF引擎、后台渲染的去重与非阻塞状态、失败重试、磁盘淘汰和预渲染
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.config.config_manager import ConfigManager
+from web.utils import report_export_service
+from web.utils.report_export_service import ReportExportService, artifact_key
+
+
+class FakeExporter:
+    """模拟ReportExporter：只有weasyprint能生成PDF，每次转换耗时render_seconds"""
+
+    PDF_ENGINES = [('wkhtmltopdf', ''), ('weasyprint', ''), (None, '')]
+
+    def __init__(self, render_seconds=0.0, working_engine='weasyprint'):
+        self.pandoc_available = True
+        self.render_seconds = render_seconds
+        self.working_engine = working_engine
+        self.release = threading.Event()
+        self.release.set()
+        self.conversions = 0
+        self.attempts = []
+        self.fail_docx = False
+
+    def generate_markdown_report(self, results):
+        return f"# {results['stock_symbol']}\n\n{results.get('body', '')}\n*报告生成时间: {results['generated_at']}*"
+
+    def _work(self):
+        self.release.wait(5)
+        time.sleep(self.render_seconds)
+        self.conversions += 1
+
+    def markdown_to_docx(self, md_content):
+        if self.fail_docx:
+            raise Exception("Pandoc不可用")
+        self._work()
+        return b"DOCX:" + md_content.encode('utf-8')
+
+    def markdown_to_pdf(self, md_content, engines=None):
+        for engine in engines:
+            self.attempts.append(engine)
+            time.sleep(self.render_seconds)
+            if engine == self.working_engine:
+                self._work()
+                return b"PDF:" + md_content.encode('utf-8'), engine
+        raise Exception("PDF生成失败")
+
+
+def make_results(symbol="000001", body="正文"):
+    return {'stock_symbol': symbol, 'body': body, 'generated_at': '2025-01-01 10:00:00', 'success': True}
+
+
+class ReportExportServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.exporter = FakeExporter()
+        self.service = self.make_service()
+
+    def tearDown(self):
+        self.exporter.release.set()
+        self.service.shutdown(wait=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def make_service(self, **kwargs):
+        return ReportExportService(exporter=self.exporter, cache_dir=self.cache_dir, max_workers=2, **kwargs)
+
+    def test_default_cache_dir(self):
+        custom = os.path.join(self.cache_dir, "custom")
+        with patch.dict(os.environ, {'REPORT_CACHE_DIR': custom}):
+            self.assertEqual(report_export_service.default_cache_dir(), custom)
+        with patch.dict(os.environ, {'REPORT_CACHE_DIR': ''}), \
+                patch.object(ConfigManager, 'get_data_dir', return_value=self.cache_dir):
+            self.assertEqual(report_export_service.default_cache_dir(), os.path.join(self.cache_dir, "report_cache"))
+
+    def test_repeated_downloads_hit_cache(self):
+        results = make_results()
+        self.assertIsNone(self.service.get(results, 'docx'))
+        first = self.service.render(results, 'docx', timeout=5)
+        self.assertEqual(self.service.render(results, 'docx', timeout=5), first)
+        self.assertEqual(self.service.get(results, 'docx'), first)
+        self.assertEqual(self.exporter.conversions, 1)
+
+        # 新进程（新服务实例）从磁盘读取
+        other = self.make_service()
+        self.assertEqual(other.get(results, 'docx'), first)
+        other.shutdown()
+        self.assertEqual(self.exporter.conversions, 1)
+
+        # 内容或格式不同则是不同的产物
+        self.service.render(make_results(body="新内容"), 'docx', timeout=5)
+        self.assertEqual(self.exporter.conversions, 2)
+        md = self.exporter.generate_markdown_report(results)
+        self.assertNotEqual(artifact_key(md, 'docx'), artifact_key(md, 'pdf'))
+
+    def test_remembers_working_pdf_engine(self):
+        self.service.render(make_results(body="a"), 'pdf', timeout=5)
+        self.assertEqual(self.exporter.attempts, ['wkhtmltopdf', 'weasyprint'])
+
+        self.exporter.attempts.clear()
+        self.service.render(make_results(body="b"), 'pdf', timeout=5)
+        self.assertEqual(self.exporter.attempts, ['weasyprint'])
+
+        # 引擎记录持久化，重启后仍优先使用
+        other = self.make_service()
+        self.assertEqual(other.pdf_engines()[0], 'weasyprint')
+        other.shutdown()
+
+        # pandoc默认引擎也能被记住
+        self.exporter.working_engine = None
+        self.service.render(make_results(body="c"), 'pdf', timeout=5)
+        self.assertIsNone(self.service.pdf_engines()[0])
+
+    def test_status_is_non_blocking_and_renders_once(self):
+        self.exporter.release.clear()
+        results = make_results()
+
+        start = time.monotonic()
+        futures = [self.service.submit(results, 'docx') for _ in range(5)]
+        status = self.service.status(results, 'docx')
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(status['state'], 'rendering')
+        self.assertTrue(all(f is futures[0] for f in futures))
+
+        self.exporter.release.set()
+        futures[0].result(timeout=5)
+        status = self.service.status(results, 'docx')
+        self.assertEqual(status['state'], 'ready')
+        self.assertTrue(status['content'].startswith(b"DOCX:"))
+        self.assertEqual(self.exporter.conversions, 1)
+
+    def test_failure_reported_and_retried(self):
+        self.exporter.fail_docx = True
+        results = make_results()
+        self.assertEqual(self.service.status(results, 'docx')['state'], 'missing')
+        with self.assertRaises(Exception):
+            self.service.render(results, 'docx', timeout=5)
+        status = self.service.status(results, 'docx')
+        self.assertEqual((status['state'], status['error']), ('failed', "Pandoc不可用"))
+
+        self.exporter.fail_docx = False
+        self.service.render(results, 'docx', timeout=5)
+        self.assertEqual(self.service.status(results, 'docx')['state'], 'ready')
+
+    def test_disk_eviction(self):
+        service = self.make_service(max_items=3, memory_items=1)
+        for i in range(5):
+            service.render(make_results(body=str(i)), 'docx', timeout=5)
+            time.sleep(0.01)
+        service.shutdown(wait=True)
+        files = [f for f in os.listdir(self.cache_dir) if f.endswith('.docx')]
+        self.assertEqual(len(files), 3)
+        self.assertIsNone(service.get(make_results(body="0"), 'docx'))
+        self.assertIsNotNone(service.get(make_results(body="4"), 'docx'))
+
+    def test_prerender(self):
+        results = make_results()
+        futures = self.service.prerender(results)
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(self.service.status(results, 'docx')['state'], 'ready')
+        self.assertEqual(self.service.status(results, 'pdf')['state'], 'ready')
+
+        self.exporter.pandoc_available = False
+        self.assertEqual(self.service.prerender(make_results(body="x")), [])
+        self.assertEqual(self.service.prerender({'success': False}), [])
+
+
+def benchmark_report_export(downloads: int = 20, render_seconds: float = 0.2):
+    """每次点击都重新转换 vs 内容缓存；引擎试错次数"""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        exporter = FakeExporter(render_seconds=render_seconds)
+        results = make_results()
+        md = exporter.generate_markdown_report(results)
+
+        start = time.perf_counter()
+        for _ in range(3):
+            exporter.markdown_to_pdf(md, engines=[e for e, _ in exporter.PDF_ENGINES])
+        uncached = (time.perf_counter() - start) / 3
+
+        service = ReportExportService(exporter=exporter, cache_dir=cache_dir, max_workers=2)
+        start = time.perf_counter()
+        service.prerender(results)[1].result()
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(downloads):
+            service.status(results, 'pdf')
+        cached = (time.perf_counter() - start) / downloads
+        print(f"📄 PDF导出: 每次重新转换 {uncached * 1000:.0f}ms，首次渲染(逐个试引擎) {first * 1000:.0f}ms，"
+              f"缓存命中 {cached * 1e6:.0f}µs")
+
+        exporter.attempts.clear()
+        start = time.perf_counter()
+        service.render(make_results(body="另一份报告"), 'pdf')
+        remembered = time.perf_counter() - start
+        print(f"📌 记住引擎后新报告渲染 {remembered * 1000:.0f}ms，尝试引擎 {exporter.attempts}")
+        service.shutdown(wait=True)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_report_export()
+    else:
+        unittest.main()
@@ -208,7 +208,8 @@ def test_risk_assessment_integration():
         if 'risk_debate_state' in state:
             print("✅ 发现风险评估数据")
             
-            risk_debate = state['risk_debate_state']
+            from tradingagents.utils.debate_history import RISK_SPEAKERS, history_views
+            risk_debate = {**history_views(state['risk_debate_state'], RISK_SPEAKERS), **state['risk_debate_state']}
             components = ['risky_history', 'safe_history', 'neutral_history', 'judge_decision']
             
             for component in components:
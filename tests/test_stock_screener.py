@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全市场选股筛选引擎测试
+使用本地生成的全市场快照分区，验证向量化指标与逐只计算一致、筛选条件、打分排序和停牌处理
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tests.benchmarks.fakes import make_price_frame, make_yfinance_frame
+from tradingagents.dataflows.tushare_universe import TushareUniverseStore
+from tradingagents.dataflows.stock_screener import (
+    StockScreener, ScreenCriteria, compute_indicators, bars_from_price_frames, candidates_to_symbols
+)
+
+
+def build_universe(store, stock_count=30, start="2024-01-01", end="2024-06-28"):
+    """按交易日分区写入合成的全市场日线和股票基本信息"""
+    codes = [f"{600000 + i:06d}.SH" for i in range(stock_count)]
+    frames = []
+    for code in codes:
+        frame = make_price_frame(code, start, end)
+        frames.append(pd.DataFrame({
+            'ts_code': code,
+            'trade_date': frame['date'].str.replace('-', ''),
+            'close': frame['close'],
+            'pct_chg': frame['close'].pct_change().fillna(0) * 100,
+            'vol': frame['volume'].astype(float),
+            'amount': frame['volume'] * frame['close'] / 1000,
+        }))
+    bars = pd.concat(frames, ignore_index=True)
+    for trade_date, day in bars.groupby('trade_date'):
+        store._write_frame(day.sort_values('ts_code').reset_index(drop=True), store._partition_path(trade_date))
+
+    names = [f"股票{i}" for i in range(stock_count)]
+    names[1] = "*ST样本"
+    store._write_frame(pd.DataFrame({
+        'ts_code': codes, 'symbol': [c[:6] for c in codes], 'name': names,
+        'area': '上海', 'industry': ['银行', '电子'] * (stock_count // 2), 'market': '主板', 'list_date': '20000101',
+    }), store.stock_basic_path)
+    return bars
+
+
+class TestStockScreener(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = TushareUniverseStore(store_dir=self.tmp_dir)
+        self.bars = build_universe(self.store)
+        self.screener = StockScreener(store=self.store, lookback=120)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_window_reads_latest_partitions(self):
+        window = self.store.get_market_window(lookback=10, columns=['ts_code', 'trade_date', 'close'])
+        self.assertEqual(window['trade_date'].nunique(), 10)
+        self.assertEqual(window['trade_date'].max(), '20240628')
+        self.assertEqual(list(window.columns), ['ts_code', 'trade_date', 'close'])
+
+    def test_vectorized_matches_single_stock(self):
+        indicators = compute_indicators(self.bars)
+        code = '600007.SH'
+        close = self.bars[self.bars['ts_code'] == code].set_index('trade_date')['close']
+        vol = self.bars[self.bars['ts_code'] == code].set_index('trade_date')['vol']
+
+        dif = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        dea = dif.ewm(span=9, adjust=False).mean()
+        delta = close.diff()
+        gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+        loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+
+        row = indicators.loc[code]
+        self.assertAlmostEqual(row['macd_hist'], (dif.iloc[-1] - dea.iloc[-1]) * 2)
+        self.assertAlmostEqual(row['rsi'], 100 - 100 / (1 + gain / loss))
+        self.assertAlmostEqual(row['momentum'], close.iloc[-1] / close.iloc[-21] - 1)
+        self.assertAlmostEqual(row['volume_ratio'], vol.iloc[-1] / vol.iloc[-21:-1].mean())
+
+    def test_filters_and_ranking(self):
+        criteria = ScreenCriteria(min_momentum=0.0, max_rsi=80, top_n=5)
+        candidates = self.screener.screen(criteria)
+
+        self.assertLessEqual(len(candidates), 5)
+        self.assertTrue((candidates['momentum'] >= 0).all())
+        self.assertTrue((candidates['rsi'] <= 80).all())
+        self.assertTrue(candidates['score'].is_monotonic_decreasing)
+        self.assertIn('name', candidates.columns)
+
+    def test_macd_state_filter(self):
+        indicators = self.screener.get_indicators(ScreenCriteria())
+        state = indicators['macd_state'].iloc[0]
+        candidates = self.screener.screen(ScreenCriteria(macd_state=state, top_n=0))
+        self.assertEqual(set(candidates['macd_state']), {state})
+        self.assertEqual(len(candidates), (indicators['macd_state'] == state).sum() -
+                         int(indicators.loc['600001.SH', 'macd_state'] == state))
+        with self.assertRaises(ValueError):
+            self.screener.screen(ScreenCriteria(macd_state='sideways'))
+
+    def test_volume_spike_ranks_first(self):
+        spike = self.bars.copy()
+        last = spike['trade_date'] == '20240628'
+        spike.loc[last & (spike['ts_code'] == '600010.SH'), 'vol'] *= 8
+        criteria = ScreenCriteria(min_volume_ratio=4, weights={'volume_ratio': 1.0})
+        candidates = StockScreener(store=self.store).screen(criteria, bars=spike)
+        self.assertEqual(candidates['ts_code'].tolist(), ['600010.SH'])
+
+    def test_macd_score_is_price_normalised(self):
+        scaled = self.bars.copy()
+        scaled.loc[scaled['ts_code'] == '600010.SH', 'close'] *= 100
+        original, rescaled = compute_indicators(self.bars), compute_indicators(scaled)
+        self.assertAlmostEqual(rescaled.loc['600010.SH', 'macd_hist'], original.loc['600010.SH', 'macd_hist'] * 100)
+        self.assertAlmostEqual(rescaled.loc['600010.SH', 'macd_hist_pct'], original.loc['600010.SH', 'macd_hist_pct'])
+
+        criteria = ScreenCriteria(top_n=0)
+        ranks = [StockScreener(store=self.store).screen(criteria, bars=bars)['ts_code'].tolist()
+                 for bars in (self.bars, scaled)]
+        self.assertEqual(ranks[0], ranks[1])
+
+    def test_st_excluded_and_suspended_skipped(self):
+        suspended = self.bars[~((self.bars['ts_code'] == '600002.SH') & (self.bars['trade_date'] == '20240628'))]
+        indicators = compute_indicators(suspended)
+        self.assertNotIn('600002.SH', indicators.index)
+
+        candidates = self.screener.screen(ScreenCriteria(top_n=0))
+        self.assertNotIn('600001.SH', candidates['ts_code'].tolist())
+        included = self.screener.screen(ScreenCriteria(top_n=0, exclude_st=False))
+        self.assertIn('600001.SH', included['ts_code'].tolist())
+
+    def test_indicators_cached_per_end_date(self):
+        first = self.screener.get_indicators(ScreenCriteria())
+        self.assertIs(self.screener.get_indicators(ScreenCriteria()), first)
+        earlier = self.screener.get_indicators(ScreenCriteria(), end_date='2024-06-27')
+        self.assertEqual(earlier['trade_date'].iloc[0], '20240627')
+
+    def test_price_frames_and_symbols(self):
+        frames = {symbol: make_yfinance_frame(symbol, "2024-01-01", "2024-06-28") for symbol in ("AAPL", "MSFT")}
+        candidates = StockScreener(store=self.store).screen(ScreenCriteria(), bars=bars_from_price_frames(frames))
+        self.assertEqual(set(candidates['ts_code']), {"AAPL", "MSFT"})
+        self.assertEqual(candidates_to_symbols(pd.DataFrame({'ts_code': ['000001.SZ', 'AAPL']})), ['000001', 'AAPL'])
+
+
+def benchmark_screening(stock_count: int = 5000, days: int = 120):
+    """全市场规模（5000只 × 120个交易日）的指标计算和筛选耗时"""
+    dates = pd.bdate_range("2024-01-01", periods=days).strftime('%Y%m%d')
+    codes = [f"{i:06d}.SZ" for i in range(stock_count)]
+    rng = np.random.RandomState(7)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, stock_count)), axis=0))
+    bars = pd.DataFrame({
+        'ts_code': np.tile(codes, days),
+        'trade_date': np.repeat(dates, stock_count),
+        'close': close.ravel(),
+        'vol': rng.randint(1_000, 100_000, days * stock_count).astype(float),
+    })
+    start = time.perf_counter()
+    indicators = compute_indicators(bars)
+    computed = time.perf_counter() - start
+    screener = StockScreener(store=None)
+    candidates = screener.screen(ScreenCriteria(min_momentum=0.05, macd_state='bullish'), bars=bars)
+    print(f"📈 {stock_count}只 × {days}日: 指标 {computed * 1000:.0f}ms，"
+          f"含筛选 {(time.perf_counter() - start) * 1000:.0f}ms，候选 {len(candidates)}/{len(indicators)}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_screening()
+    else:
+        unittest.main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股票检索索引测试
+验证代码前缀、名称子串、拼音首字母、分面过滤、排序，以及从MongoDB（mongomock）增量刷新和从全市场快照加载
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows import stock_search_index
+from tradingagents.dataflows.stock_search_index import (
+    StockSearchIndex, MongoStockSource, SnapshotStockSource, infer_market, infer_category
+)
+from tradingagents.dataflows.tushare_universe import TushareUniverseStore
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+STOCKS = [
+    ('000001', '平安银行', 'payh'),
+    ('601318', '中国平安', 'zgpa'),
+    ('600519', '贵州茅台', 'gzmt'),
+    ('600036', '招商银行', 'zsyh'),
+    ('300750', '宁德时代', 'ndsd'),
+    ('688981', '中芯国际', 'zxgj'),
+    ('600000', '浦发银行', 'pfyh'),
+]
+
+
+def make_records(updated_at='2024-01-01T00:00:00'):
+    return [{'code': code, 'name': name, 'pinyin': pinyin, 'market': infer_market(code),
+             'category': infer_category(code), 'updated_at': updated_at}
+            for code, name, pinyin in STOCKS]
+
+
+class SearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = StockSearchIndex()
+        self.index.load_records(make_records())
+
+    def codes(self, keyword, **kwargs):
+        return [r['code'] for r in self.index.search(keyword, **kwargs)]
+
+    def test_code_prefix(self):
+        self.assertEqual(self.codes('600'), ['600000', '600036', '600519'])
+        self.assertEqual(self.codes('600519'), ['600519'])
+        self.assertEqual(self.codes('600519.SH'), ['600519'])
+        self.assertEqual(self.codes('9'), [])
+
+    def test_name_substring_ranking(self):
+        # 名称前缀优先于名称包含
+        self.assertEqual(self.codes('平安'), ['000001', '601318'])
+        self.assertEqual(self.codes('银行'), ['000001', '600000', '600036'])
+        self.assertEqual(self.codes('茅'), ['600519'])
+        self.assertEqual(self.codes('贵州茅台'), ['600519'])
+        self.assertEqual(self.codes('茅台酒'), [])
+
+    def test_pinyin_initials(self):
+        self.assertEqual(self.codes('GZMT'), ['600519'])
+        self.assertEqual(self.codes('yh'), ['000001', '600000', '600036'])
+        self.assertEqual(self.codes('zg'), ['601318'])
+
+    def test_facets_and_limit(self):
+        self.assertEqual(self.codes('银行', market='深圳'), ['000001'])
+        self.assertEqual(self.codes('6', category='科创板'), ['688981'])
+        self.assertEqual(len(self.index.search('银行', limit=2)), 2)
+        self.assertEqual(self.index.facet_counts()['market'], {'深圳': 2, '上海': 5})
+
+    def test_get_and_contains(self):
+        self.assertEqual(self.index.get('000001.SZ')['name'], '平安银行')
+        self.assertTrue(self.index.contains('300750'))
+        self.assertFalse(self.index.contains('999999'))
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock未安装")
+class MongoSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mongomock.MongoClient().db.stock_basic_info
+        self.collection.insert_many(make_records())
+        self.index = StockSearchIndex(MongoStockSource(self.collection), refresh_interval=3600)
+
+    def test_incremental_refresh(self):
+        self.assertEqual(self.index.search('茅台')[0]['code'], '600519')
+        self.assertNotIn('_id', self.index.get('600519'))
+
+        self.collection.update_one({'code': '600519'}, {'$set': {'name': '贵州茅台酒', 'updated_at': '2024-02-01'}})
+        self.collection.insert_one({'code': '002594', 'name': '比亚迪', 'pinyin': 'byd', 'market': '深圳',
+                                    'category': '深市主板', 'updated_at': '2024-02-01'})
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.get('600519')['name'], '贵州茅台酒')
+        self.assertEqual([r['code'] for r in self.index.search('byd')], ['002594'])
+        self.assertEqual(len(self.index), len(STOCKS) + 1)
+
+        # 没有变化时不重建
+        self.assertFalse(self.index.refresh())
+
+    def test_deletion_triggers_full_reload(self):
+        self.index.ensure_fresh()
+        self.collection.delete_one({'code': '000001'})
+        self.assertTrue(self.index.refresh())
+        self.assertIsNone(self.index.get('000001'))
+
+    def test_lookups_do_not_query_database(self):
+        self.index.ensure_fresh()
+        calls = []
+        original_find = self.collection.find
+        self.collection.find = lambda *args, **kwargs: calls.append(args) or original_find(*args, **kwargs)
+        for keyword in ('600', '平安', 'gzmt'):
+            self.index.search(keyword)
+        self.index.get('000001')
+        self.assertEqual(calls, [])
+
+    def test_watermark_stays_none_without_updated_at(self):
+        self.collection.update_many({}, {'$unset': {'updated_at': ''}})
+        self.index.ensure_fresh()
+        self.assertIsNone(self.index.get_stats()['watermark'])
+
+        # 之后带updated_at的文档仍能被拉取
+        self.collection.insert_one({'code': '002594', 'name': '比亚迪', 'updated_at': '2024-02-01'})
+        self.assertTrue(self.index.refresh())
+        self.assertIsNotNone(self.index.get('002594'))
+
+
+class SnapshotSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = TushareUniverseStore(store_dir=self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_basic(self, rows):
+        self.store._write_frame(pd.DataFrame(rows, columns=['ts_code', 'symbol', 'name', 'area', 'industry',
+                                                            'market', 'list_date']), self.store.stock_basic_path)
+
+    def test_load_and_reload_on_change(self):
+        self.write_basic([('000001.SZ', '000001', '平安银行', '深圳', '银行', '主板', '19910403')])
+        index = StockSearchIndex(SnapshotStockSource(self.store))
+        self.assertEqual(index.get('000001')['industry'], '银行')
+        self.assertEqual(index.get('000001')['market'], '深圳')
+        self.assertFalse(index.refresh())
+
+        self.write_basic([('000001.SZ', '000001', '平安银行', '深圳', '银行', '主板', '19910403'),
+                          ('600519.SH', '600519', '贵州茅台', '贵州', '白酒', '主板', '20010827')])
+        os.utime(self.store.stock_basic_path, (time.time() + 5, time.time() + 5))
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.search('茅台')[0]['category'], '沪市主板')
+
+
+class GlobalIndexTest(unittest.TestCase):
+
+    class StaticSource:
+        """首次返回全量记录的数据源"""
+        name = 'static'
+
+        def fetch(self, watermark, known_count):
+            return (make_records(), True, 1) if watermark is None else ([], False, watermark)
+
+    def test_source_rediscovered_after_refresh_interval(self):
+        source = self.StaticSource()
+        with patch.object(stock_search_index, '_stock_search_index', None), \
+                patch.object(stock_search_index, '_default_source', side_effect=[None, source]) as discover, \
+                patch.dict(os.environ, {'STOCK_INDEX_REFRESH_SECONDS': '3600'}):
+            index = stock_search_index.get_stock_search_index()
+            self.assertIsNone(index.get('000001'))
+            # 间隔未到时不重复探测
+            self.assertIs(stock_search_index.get_stock_search_index(), index)
+            self.assertEqual(discover.call_count, 1)
+
+            index.refresh_interval = 0
+            self.assertIs(stock_search_index.get_stock_search_index(), index)
+            self.assertEqual(discover.call_count, 2)
+            self.assertEqual(index.get('000001')['name'], '平安银行')
+
+
+class ListedStockValidationTest(unittest.TestCase):
+
+    def test_unlisted_code_rejected_without_fetching(self):
+        from tradingagents.utils.stock_utils import StockUtils
+        from tradingagents.utils.stock_validator import StockDataPreparer
+        index = StockSearchIndex()
+        index.load_records(make_records())
+        with patch.object(stock_search_index, 'get_stock_search_index', return_value=index), \
+                patch('tradingagents.dataflows.interface.get_china_stock_info_unified') as fetch_info:
+            self.assertTrue(StockUtils.is_listed_china_stock('600519.SH'))
+            result = StockDataPreparer().prepare_stock_data('999999', 'A股', analysis_date='2024-01-02')
+        self.assertFalse(result.is_valid)
+        self.assertIn('不存在', result.error_message)
+        fetch_info.assert_not_called()
+
+    def test_empty_index_cannot_decide(self):
+        from tradingagents.utils.stock_utils import StockUtils
+        with patch.object(stock_search_index, 'get_stock_search_index', return_value=StockSearchIndex()):
+            self.assertIsNone(StockUtils.is_listed_china_stock('600519'))
+
+
+def benchmark_search(stock_count: int = 5000, lookups: int = 20000):
+    """全市场规模索引的构建耗时与单次查询耗时"""
+    names = ['平安', '银行', '科技', '医药', '电子', '能源', '新材', '控股', '股份', '集团']
+    records = [{'code': f"{(600000 if i % 2 else 0) + i:06d}",
+                'name': names[i % 10] + names[(i // 10) % 10] + names[(i // 100) % 10],
+                'pinyin': 'abcdefghij'[i % 10] + 'abcdefghij'[(i // 10) % 10]} for i in range(stock_count)]
+    index = StockSearchIndex()
+    start = time.perf_counter()
+    index.load_records(records)
+    build = time.perf_counter() - start
+
+    keywords = ['600', '平安', '银行科技', 'ab', '000123', '集团']
+    start = time.perf_counter()
+    for i in range(lookups):
+        index.search(keywords[i % len(keywords)], limit=10)
+    per_lookup = (time.perf_counter() - start) / lookups
+    print(f"🔎 {stock_count}只股票: 构建 {build * 1000:.0f}ms，每次查询 {per_lookup * 1e6:.1f}µs")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_search()
+    else:
+        unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调用链追踪测试
+验证span嵌套关系、异常记录、JSONL导出、LLM回调以及火焰图报告
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import uuid
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.utils import tracing
+from tradingagents.utils.tracing import (
+    Tracer, JSONLExporter, TracingCallbackHandler,
+    span, start_trace, traced, trace_node,
+    load_spans, summarize_by_kind, format_flame,
+)
+
+
+class TracingTestCase(unittest.TestCase):
+    """使用独立Tracer的测试基类"""
+
+    def setUp(self):
+        self.tracer = Tracer(buffer_size=100)
+        self.patcher = patch.object(tracing, '_tracer', self.tracer)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+
+class TestSpans(TracingTestCase):
+    """span嵌套与记录测试"""
+
+    def test_nested_spans_share_trace(self):
+        @traced("cache.find", kind="cache")
+        def find():
+            return "hit"
+
+        node = trace_node("Market Analyst", lambda state: find())
+
+        with start_trace("analysis", trace_id="analysis_1"):
+            with span("tool", kind="tool"):
+                self.assertEqual(node({}), "hit")
+
+        spans = {s.name: s for s in self.tracer.get_spans("analysis_1")}
+        self.assertEqual(set(spans), {"analysis", "tool", "Market Analyst", "cache.find"})
+        self.assertIsNone(spans["analysis"].parent_id)
+        self.assertEqual(spans["tool"].parent_id, spans["analysis"].span_id)
+        self.assertEqual(spans["Market Analyst"].parent_id, spans["tool"].span_id)
+        self.assertEqual(spans["cache.find"].parent_id, spans["Market Analyst"].span_id)
+        self.assertIsNone(tracing.get_current_span())
+
+    def test_error_recorded(self):
+        with self.assertRaises(ValueError):
+            with span("tushare.daily", kind="http"):
+                raise ValueError("boom")
+
+        recorded = self.tracer.get_spans()[0]
+        self.assertEqual(recorded.status, "error")
+        self.assertIn("boom", recorded.error)
+        self.assertIsNotNone(recorded.duration)
+
+    def test_disabled_tracer_records_nothing(self):
+        self.tracer.enabled = False
+        with span("x") as current:
+            self.assertIsNone(current)
+        self.assertEqual(self.tracer.get_spans(), [])
+
+    def test_ring_buffer_bounded(self):
+        tracer = Tracer(buffer_size=3)
+        with patch.object(tracing, '_tracer', tracer):
+            for i in range(10):
+                with span(f"s{i}"):
+                    pass
+        self.assertEqual([s.name for s in tracer.get_spans()], ["s7", "s8", "s9"])
+
+    def test_llm_callback_attaches_to_current_span(self):
+        handler = TracingCallbackHandler()
+        run_id = uuid.uuid4()
+
+        class Response:
+            llm_output = {"token_usage": {"prompt_tokens": 100, "completion_tokens": 20}}
+
+        with start_trace("analysis", trace_id="analysis_llm"):
+            with span("Bull Researcher", kind="node") as node:
+                handler.on_chat_model_start({"kwargs": {"model_name": "qwen-plus"}}, [], run_id=run_id)
+                handler.on_llm_end(Response(), run_id=run_id)
+
+        llm = [s for s in self.tracer.get_spans("analysis_llm") if s.kind == "llm"][0]
+        self.assertEqual(llm.name, "llm/qwen-plus")
+        self.assertEqual(llm.parent_id, node.span_id)
+        self.assertEqual(llm.attributes["input_tokens"], 100)
+
+
+class TestReport(TracingTestCase):
+    """JSONL导出与报告测试"""
+
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "traces.jsonl")
+        self.tracer.add_exporter(JSONLExporter(self.path))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_export_and_flame_report(self):
+        with start_trace("analysis", trace_id="analysis_2", symbol="000001"):
+            for _ in range(2):
+                with span("get_stock_market_data_unified", kind="tool"):
+                    with span("tushare.daily", kind="http"):
+                        pass
+
+        spans = load_spans(self.path)
+        self.assertEqual(len(spans), 5)
+        self.assertTrue(all(s["trace_id"] == "analysis_2" for s in spans))
+
+        # 附加一条损坏的行，读取时应被忽略
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("{broken\n")
+        self.assertEqual(len(load_spans(self.path)), 5)
+
+        report = format_flame(spans)
+        lines = report.splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("[analysis] analysis", lines[0])
+        self.assertIn("[tool] get_stock_market_data_unified ×2", lines[1])
+        self.assertIn("    [http] tushare.daily ×2", lines[2])
+
+        summary = summarize_by_kind(spans)
+        self.assertEqual(summary["http"]["count"], 2)
+        total_self = sum(item["self"] for item in summary.values())
+        root = [s for s in spans if s["parent_id"] is None][0]
+        self.assertAlmostEqual(total_self, root["duration"], places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
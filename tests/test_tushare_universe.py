@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tushare全市场快照存储测试
+使用本地模拟的Tushare接口，验证按交易日批量刷新和单只股票查询
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows.tushare_universe import TushareUniverseStore
+from tradingagents.dataflows.tushare_utils import TushareProvider
+
+
+CODES = ['000001.SZ', '600000.SH', '300750.SZ']
+TRADE_DATES = ['20240102', '20240103', '20240104']
+
+
+class FakeTushareApi:
+    """模拟的Tushare pro接口，记录调用次数"""
+
+    def __init__(self):
+        self.calls = []
+
+    def stock_basic(self, **kwargs):
+        self.calls.append(('stock_basic', kwargs))
+        return pd.DataFrame({
+            'ts_code': CODES,
+            'symbol': [c.split('.')[0] for c in CODES],
+            'name': ['平安银行', '浦发银行', '宁德时代'],
+            'area': ['深圳', '上海', '福建'],
+            'industry': ['银行', '银行', '电气设备'],
+            'market': ['主板', '主板', '创业板'],
+            'list_date': ['19910403', '19991110', '20180611'],
+        })
+
+    def trade_cal(self, **kwargs):
+        self.calls.append(('trade_cal', kwargs))
+        dates = ['20240101'] + TRADE_DATES
+        return pd.DataFrame({'cal_date': dates, 'is_open': [0, 1, 1, 1]})
+
+    def daily(self, **kwargs):
+        self.calls.append(('daily', kwargs))
+        trade_date = kwargs['trade_date']
+        day = TRADE_DATES.index(trade_date)
+        return pd.DataFrame({
+            'ts_code': CODES,
+            'trade_date': [trade_date] * len(CODES),
+            'open': [10.0 + day, 8.0 + day, 200.0 + day],
+            'close': [10.5 + day, 8.5 + day, 201.0 + day],
+            'vol': [1000.0, 2000.0, 3000.0],
+        })
+
+
+class TestTushareUniverseStore(unittest.TestCase):
+    """全市场快照存储测试类"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.provider = TushareProvider(token='', enable_cache=False, bulk_mode=True)
+        self.provider.api = FakeTushareApi()
+        self.provider.connected = True
+        self.store = TushareUniverseStore(store_dir=self.tmp_dir, provider=self.provider)
+        self.provider._universe_store = self.store
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_refresh_range_uses_trade_date_endpoints(self):
+        """全市场刷新只按交易日调用接口"""
+        stats = self.store.refresh_range('2024-01-01', '2024-01-04')
+
+        # stock_basic + trade_cal + 每个交易日一次daily
+        self.assertEqual(stats['api_calls'], 2 + len(TRADE_DATES))
+        self.assertEqual(stats['partitions_written'], len(TRADE_DATES))
+        self.assertTrue(all('ts_code' not in kwargs for name, kwargs in self.provider.api.calls))
+
+        # 再次刷新时跳过已存在的分区
+        stats = self.store.refresh_range('2024-01-01', '2024-01-04')
+        self.assertEqual(stats['partitions_skipped'], len(TRADE_DATES))
+        self.assertEqual(stats['partitions_written'], 0)
+
+    def test_per_symbol_queries_served_from_store(self):
+        """单只股票查询由本地快照提供，不再调用API"""
+        self.store.refresh_range('20240101', '20240104')
+        calls_before = len(self.provider.api.calls)
+
+        data = self.provider.get_stock_daily('600000', '2024-01-02', '2024-01-04')
+        self.assertEqual(len(data), 3)
+        self.assertEqual(set(data['ts_code']), {'600000.SH'})
+        self.assertTrue(data['trade_date'].is_monotonic_increasing)
+
+        info = self.provider.get_stock_info('300750')
+        self.assertEqual(info['name'], '宁德时代')
+        self.assertEqual(info['ts_code'], '300750.SZ')
+
+        self.assertEqual(len(self.provider.api.calls), calls_before)
+
+    def test_uncovered_range_returns_none(self):
+        """快照未覆盖的区间返回None，由调用方回退到API"""
+        self.store.refresh_range('20240101', '20240104')
+        self.assertIsNone(self.store.get_stock_daily('000001.SZ', '20231201', '20240104'))
+        self.assertIsNone(self.store.get_stock_info('688981.SH'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Token使用统计的存储端聚合测试
+验证本地账本和MongoDB（mongomock）返回一致的按日序列、按模型汇总、记录计数和分页明细，
+以及ConfigManager按存储后端路由
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.config.config_manager import ConfigManager, UsageRecord
+from tradingagents.config.usage_ledger import UsageLedger
+
+try:
+    import mongomock
+    from tradingagents.config import mongodb_storage
+    MONGOMOCK_AVAILABLE = mongodb_storage.MONGODB_AVAILABLE
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+def make_records():
+    """今天3条、2天前1条、40天前1条（按时间升序，与实际写入顺序一致）"""
+    now = datetime.now().replace(hour=12)
+    specs = [(0, "dashscope", "qwen-turbo", 0.01), (0, "dashscope", "qwen-plus", 0.05),
+             (0, "deepseek", "deepseek-chat", 0.02), (2, "dashscope", "qwen-turbo", 0.03),
+             (40, "dashscope", "qwen-turbo", 1.0)]
+    return [UsageRecord((now - timedelta(days=days, minutes=i)).isoformat(), provider, model,
+                        1000, 200, cost, f"s{i}", "stock_analysis")
+            for i, (days, provider, model, cost) in reversed(list(enumerate(specs)))]
+
+
+class UsageAnalyticsContract:
+    """两种存储后端共用的断言"""
+
+    def test_daily_series(self):
+        daily = self.store_daily(30)
+        self.assertEqual([d["requests"] for d in daily], [1, 3])
+        self.assertAlmostEqual(daily[-1]["cost"], 0.08)
+        self.assertEqual(daily[-1]["input_tokens"], 3000)
+        self.assertEqual(daily[-1]["date"], datetime.now().strftime('%Y-%m-%d'))
+
+    def test_model_statistics(self):
+        models = self.store_models(30)
+        self.assertEqual([(m["provider"], m["model_name"]) for m in models],
+                         [("dashscope", "qwen-plus"), ("dashscope", "qwen-turbo"), ("deepseek", "deepseek-chat")])
+        self.assertEqual(models[1]["requests"], 2)
+        self.assertEqual(len(self.store_models(365)), 3)
+        self.assertAlmostEqual(sum(m["cost"] for m in self.store_models(365)), 1.11)
+
+    def test_count_and_page(self):
+        self.assertEqual(self.store_count(1), 3)
+        self.assertEqual(self.store_count(30), 4)
+        self.assertEqual(self.store_count(None), 5)
+        newest = self.store_page(30, 2, 0)
+        second = self.store_page(30, 2, 2)
+        self.assertEqual([r.session_id for r in newest], ["s1", "s0"])
+        self.assertEqual([r.session_id for r in second], ["s3", "s2"])
+
+
+class TestLedgerAnalytics(UsageAnalyticsContract, unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        with patch.dict(os.environ, {"USE_MONGODB_STORAGE": "false"}):
+            self.manager = ConfigManager(self.temp_dir)
+        for record in make_records():
+            self.manager.usage_ledger.append(record)
+        self.store_daily = self.manager.get_daily_usage
+        self.store_models = self.manager.get_model_statistics
+        self.store_count = self.manager.count_usage_records
+        self.store_page = lambda days, limit, offset: self.manager.load_usage_records(days, limit, offset)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock未安装")
+class TestMongoAnalytics(UsageAnalyticsContract, unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        with patch.dict(os.environ, {"USE_MONGODB_STORAGE": "false"}):
+            self.manager = ConfigManager(self.temp_dir)
+        with patch.object(mongodb_storage, 'MongoClient', mongomock.MongoClient):
+            self.manager.mongodb_storage = mongodb_storage.MongoDBStorage("mongodb://localhost:27017/")
+        for record in make_records():
+            self.manager.mongodb_storage.save_usage_record(record)
+        self.store_daily = self.manager.get_daily_usage
+        self.store_models = self.manager.get_model_statistics
+        self.store_count = self.manager.count_usage_records
+        self.store_page = lambda days, limit, offset: self.manager.load_usage_records(days, limit, offset)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_statistics_use_natural_days(self):
+        stats = self.manager.get_usage_statistics(1)
+        self.assertEqual(stats["total_requests"], 3)
+        self.assertEqual(stats["provider_stats"]["dashscope"]["requests"], 2)
+        # 本地账本不参与
+        self.assertEqual(self.manager.usage_ledger.count_records(), 0)
+
+
+def benchmark_usage_dashboard(sizes=(20000, 200000), days: int = 30):
+    """仪表盘一次加载的耗时：旧方式（加载明细后在Python中聚合）vs 存储端聚合 + 分页"""
+    import pandas as pd
+
+    print("\n📊 Token统计页面加载耗时（本地账本）")
+    for size in sizes:
+        temp_dir = tempfile.mkdtemp()
+        try:
+            ledger = UsageLedger(os.path.join(temp_dir, "usage.db"), max_records=0)
+            now = datetime.now()
+            rows = [ledger._record_row(UsageRecord((now - timedelta(minutes=i * 7)).isoformat(), "dashscope",
+                                                   f"qwen-{i % 4}", 1000, 200, 0.01, f"s{i}", "stock_analysis"))
+                    for i in reversed(range(size))]
+            conn = ledger._get_connection()
+            with conn:
+                ledger._insert(conn, rows)
+
+            start = time.perf_counter()
+            records = [UsageRecord(**item) for item in ledger.load_records(days=days)]
+            frame = pd.DataFrame([{'date': datetime.fromisoformat(r.timestamp).date(), 'cost': r.cost,
+                                   'tokens': r.input_tokens + r.output_tokens} for r in records])
+            frame.groupby('date').agg({'cost': 'sum', 'tokens': 'sum'})
+            legacy_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            ledger.get_statistics(days)
+            ledger.get_model_statistics(days)
+            ledger.get_daily_usage(days)
+            ledger.count_records(days)
+            ledger.load_records(days=days, limit=20)
+            pushed_ms = (time.perf_counter() - start) * 1000
+            print(f"  {size:>7}条记录（{days}天内{len(records)}条）: 明细+pandas {legacy_ms:.1f} ms -> 存储端聚合 {pushed_ms:.1f} ms")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_usage_dashboard()
+    else:
+        unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地使用账本测试
+验证追加写、按日汇总统计、旧版usage.json导入、明细裁剪以及定价缓存失效
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tradingagents.config import usage_ledger
+from tradingagents.config.config_manager import ConfigManager, PricingConfig, UsageRecord
+from tradingagents.config.usage_ledger import UsageLedger
+
+
+def make_record(days_ago=0, provider="dashscope", cost=0.01, session_id="s1"):
+    timestamp = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    return UsageRecord(timestamp, provider, "qwen-turbo", 1000, 200, cost, session_id, "stock_analysis")
+
+
+class TestUsageLedger(unittest.TestCase):
+    """账本测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "usage.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_statistics_from_daily_rollups(self):
+        ledger = UsageLedger(self.db_path)
+        ledger.append(make_record(0, "dashscope", 0.01))
+        ledger.append(make_record(0, "deepseek", 0.02, session_id="s2"))
+        ledger.append(make_record(3, "dashscope", 0.04))
+        ledger.append(make_record(40, "dashscope", 1.0))
+
+        today = ledger.get_statistics(1)
+        self.assertEqual(today["total_requests"], 2)
+        self.assertAlmostEqual(today["total_cost"], 0.03)
+
+        month = ledger.get_statistics(30)
+        self.assertEqual(month["total_requests"], 3)
+        self.assertEqual(month["provider_stats"]["dashscope"]["requests"], 2)
+        self.assertEqual(month["total_input_tokens"], 3000)
+
+        daily = ledger.get_daily_usage(30)
+        self.assertEqual([d["requests"] for d in daily], [1, 2])
+
+        self.assertAlmostEqual(ledger.get_session_cost("s1"), 1.05)
+        self.assertEqual(len(ledger.load_records(days=30)), 3)
+        self.assertEqual(ledger.load_records(limit=1)[0]["cost"], 1.0)
+
+    def test_trim_keeps_rollups(self):
+        ledger = UsageLedger(self.db_path, max_records=5)
+        with patch.object(usage_ledger, '_TRIM_INTERVAL', 10):
+            for _ in range(20):
+                ledger.append(make_record())
+        self.assertLessEqual(len(ledger.load_records()), 10)
+        self.assertEqual(ledger.get_statistics(1)["total_requests"], 20)
+
+    def test_legacy_json_import(self):
+        legacy_file = os.path.join(self.temp_dir, "usage.json")
+        with open(legacy_file, 'w', encoding='utf-8') as f:
+            json.dump([asdict(make_record(1)), asdict(make_record(0))], f)
+
+        ledger = UsageLedger(self.db_path, legacy_file=legacy_file)
+        self.assertEqual(len(ledger.load_records()), 2)
+        self.assertFalse(os.path.exists(legacy_file))
+        self.assertTrue(os.path.exists(legacy_file + ".migrated"))
+
+        ledger.clear()
+        self.assertEqual(ledger.get_statistics(30)["total_requests"], 0)
+
+
+class TestConfigManagerLedger(unittest.TestCase):
+    """ConfigManager本地存储测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        with patch.dict(os.environ, {"USE_MONGODB_STORAGE": "false"}):
+            self.manager = ConfigManager(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_ledger_created_on_first_use(self):
+        db_file = os.path.join(self.temp_dir, "usage.db")
+        self.assertFalse(os.path.exists(db_file))
+        self.manager.get_usage_statistics(1)
+        self.assertTrue(os.path.exists(db_file))
+
+    def test_add_usage_record_and_statistics(self):
+        for _ in range(3):
+            self.manager.add_usage_record("dashscope", "qwen-turbo", 1000, 1000, "session_a")
+
+        stats = self.manager.get_usage_statistics(1)
+        self.assertEqual(stats["total_requests"], 3)
+        self.assertAlmostEqual(stats["total_cost"], 3 * (0.002 + 0.006))
+        self.assertEqual(len(self.manager.load_usage_records()), 3)
+
+        self.manager.save_usage_records([])
+        self.assertEqual(self.manager.get_usage_statistics(1)["total_requests"], 0)
+
+    def test_pricing_cached_until_file_changes(self):
+        with patch('builtins.open', wraps=open) as mock_open:
+            for _ in range(5):
+                self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 0)
+            pricing_reads = [c for c in mock_open.call_args_list if str(c.args[0]).endswith("pricing.json")]
+        self.assertLessEqual(len(pricing_reads), 1)
+
+        self.manager.save_pricing([PricingConfig("dashscope", "qwen-turbo", 1.0, 1.0, "CNY")])
+        self.assertEqual(self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 0), 1.0)
+
+
+def benchmark_ledger(records: int = 200000):
+    """写入耗时与统计查询耗时基准测试"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        ledger = UsageLedger(os.path.join(temp_dir, "usage.db"), max_records=0)
+        rows = [make_record(days_ago=i % 365) for i in range(records)]
+        conn = ledger._get_connection()
+        with conn:
+            ledger._insert(conn, [ledger._record_row(r) for r in rows])
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            ledger.append(make_record())
+        append_ms = (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ledger.get_statistics(365)
+        stats_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n📊 使用账本基准测试 ({records}条记录)")
+        print(f"  单条追加: {append_ms:.3f} ms")
+        print(f"  一年统计: {stats_ms:.2f} ms")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    benchmark_ledger()
+    unittest.main()
@@ -3,11 +3,14 @@
 使用统一工具自动识别股票类型并调用相应数据源
 """
 
+from typing import Optional
+
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import AIMessage
 
 # 导入分析模块日志装饰器
 from tradingagents.utils.tool_logging import log_analyst_module
+from tradingagents.utils.context_compression import ContextCompressor
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -78,7 +81,8 @@ def _get_company_name_for_fundamentals(ticker: str, market_info: dict) -> str:
         return f"股票{ticker}"
 
 
-def create_fundamentals_analyst(llm, toolkit):
+def create_fundamentals_analyst(llm, toolkit, context_compressor: Optional[ContextCompressor] = None):
+    compressor = context_compressor or ContextCompressor()
     @log_analyst_module("fundamentals")
     def fundamentals_analyst_node(state):
         logger.debug(f"📊 [DEBUG] ===== 基本面分析师节点开始 =====")
@@ -347,6 +351,9 @@ def create_fundamentals_analyst(llm, toolkit):
                 combined_data = f"统一基本面分析工具调用失败: {e}"
                 logger.debug(f"📊 [DEBUG] 统一工具调用异常: {e}")
             
+            # 工具原始输出按token预算压缩后再嵌入提示词
+            combined_data = compressor.compress_text(str(combined_data), "fundamentals")
+
             currency_info = f"{market_info['currency_name']}（{market_info['currency_symbol']}）"
             
             # 生成基于真实数据的分析报告
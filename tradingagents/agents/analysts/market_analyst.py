@@ -4,9 +4,11 @@ from langchain import hub
 import time
 import json
 import traceback
+from typing import Optional
 
 # 导入分析模块日志装饰器
 from tradingagents.utils.tool_logging import log_analyst_module
+from tradingagents.utils.context_compression import ContextCompressor
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -260,7 +262,8 @@ def create_market_analyst_react(llm, toolkit):
     return market_analyst_react_node
 
 
-def create_market_analyst(llm, toolkit):
+def create_market_analyst(llm, toolkit, context_compressor: Optional[ContextCompressor] = None):
+    compressor = context_compressor or ContextCompressor()
 
     def market_analyst_node(state):
         logger.debug(f"📈 [DEBUG] ===== 市场分析师节点开始 =====")
@@ -434,6 +437,9 @@ def create_market_analyst(llm, toolkit):
                     )
                     tool_messages.append(tool_message)
 
+                # 工具原始输出（长表格、逐日指标）按token预算压缩后再交给LLM
+                compressor.compress_tool_messages(tool_messages, "market")
+
                 # 基于工具结果生成完整分析报告
                 analysis_prompt = f"""现在请基于上述工具获取的数据，生成详细的技术分析报告。
 
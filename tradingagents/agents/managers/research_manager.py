@@ -1,14 +1,19 @@
 import time
 import json
+from typing import Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.debate_history import DebateWindow
 
 
-def create_research_manager(llm, memory):
+def create_research_manager(llm, memory, debate_window: Optional[DebateWindow] = None):
+    window = debate_window or DebateWindow()
+
     def research_manager_node(state) -> dict:
-        history = state["investment_debate_state"].get("history", "")
+        # 辩论历史：更早发言的摘要 + 最近若干条原文
+        history = window.prompt_history(state["investment_debate_state"])
         market_research_report = state["market_report"]
         sentiment_report = state["sentiment_report"]
         news_report = state["news_report"]
@@ -70,9 +75,8 @@ def create_research_manager(llm, memory):
 
         new_investment_debate_state = {
             "judge_decision": response.content,
-            "history": investment_debate_state.get("history", ""),
-            "bear_history": investment_debate_state.get("bear_history", ""),
-            "bull_history": investment_debate_state.get("bull_history", ""),
+            "turns": investment_debate_state.get("turns", []),
+            "summary": investment_debate_state.get("summary", ""),
             "current_response": response.content,
             "count": investment_debate_state["count"],
         }
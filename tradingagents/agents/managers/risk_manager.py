@@ -1,17 +1,22 @@
 import time
 import json
+from typing import Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.debate_history import DebateWindow
 
 
-def create_risk_manager(llm, memory):
+def create_risk_manager(llm, memory, debate_window: Optional[DebateWindow] = None):
+    window = debate_window or DebateWindow()
+
     def risk_manager_node(state) -> dict:
 
         company_name = state["company_of_interest"]
 
-        history = state["risk_debate_state"]["history"]
+        # 辩论历史：更早发言的摘要 + 最近若干条原文
+        history = window.prompt_history(state["risk_debate_state"])
         risk_debate_state = state["risk_debate_state"]
         market_research_report = state["market_report"]
         news_report = state["news_report"]
@@ -57,10 +62,8 @@ def create_risk_manager(llm, memory):
 
         new_risk_debate_state = {
             "judge_decision": response.content,
-            "history": risk_debate_state["history"],
-            "risky_history": risk_debate_state["risky_history"],
-            "safe_history": risk_debate_state["safe_history"],
-            "neutral_history": risk_debate_state["neutral_history"],
+            "turns": risk_debate_state.get("turns", []),
+            "summary": risk_debate_state.get("summary", ""),
             "latest_speaker": "Judge",
             "current_risky_response": risk_debate_state["current_risky_response"],
             "current_safe_response": risk_debate_state["current_safe_response"],
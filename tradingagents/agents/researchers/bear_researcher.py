@@ -1,17 +1,24 @@
 from langchain_core.messages import AIMessage
 import time
 import json
+from typing import Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.context_compression import ContextCompressor, compress_state_reports
+from tradingagents.utils.debate_history import DebateWindow
 
 
-def create_bear_researcher(llm, memory):
+def create_bear_researcher(llm, memory, debate_window: Optional[DebateWindow] = None,
+                           context_compressor: Optional[ContextCompressor] = None):
+    window = debate_window or DebateWindow()
+    compressor = context_compressor or ContextCompressor()
+
     def bear_node(state) -> dict:
         investment_debate_state = state["investment_debate_state"]
-        history = investment_debate_state.get("history", "")
-        bear_history = investment_debate_state.get("bear_history", "")
+        # 辩论历史：更早发言的摘要 + 最近若干条原文
+        history = window.prompt_history(investment_debate_state)
 
         current_response = investment_debate_state.get("current_response", "")
         market_research_report = state["market_report"]
@@ -43,6 +50,10 @@ def create_bear_researcher(llm, memory):
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
 
+        # 报告按token预算压缩后嵌入提示词（每轮辩论都会重复嵌入）
+        market_research_report, sentiment_report, news_report, fundamentals_report = \
+            compress_state_reports(state, "bear", compressor)
+
         prompt = f"""你是一位看跌分析师，负责论证不投资股票 {company_name} 的理由。
 
 ⚠️ 重要提醒：当前分析的是 {market_info['market_name']}，所有价格和估值请使用 {currency}（{currency_symbol}）作为单位。
@@ -77,9 +88,7 @@ def create_bear_researcher(llm, memory):
         argument = f"Bear Analyst: {response.content}"
 
         new_investment_debate_state = {
-            "history": history + "\n" + argument,
-            "bear_history": bear_history + "\n" + argument,
-            "bull_history": investment_debate_state.get("bull_history", ""),
+            **window.append(investment_debate_state, "Bear Analyst", response.content),
             "current_response": argument,
             "count": investment_debate_state["count"] + 1,
         }
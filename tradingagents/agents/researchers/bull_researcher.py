@@ -1,19 +1,26 @@
 from langchain_core.messages import AIMessage
 import time
 import json
+from typing import Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.context_compression import ContextCompressor, compress_state_reports
+from tradingagents.utils.debate_history import DebateWindow
 
 
-def create_bull_researcher(llm, memory):
+def create_bull_researcher(llm, memory, debate_window: Optional[DebateWindow] = None,
+                           context_compressor: Optional[ContextCompressor] = None):
+    window = debate_window or DebateWindow()
+    compressor = context_compressor or ContextCompressor()
+
     def bull_node(state) -> dict:
         logger.debug(f"🐂 [DEBUG] ===== 看涨研究员节点开始 =====")
 
         investment_debate_state = state["investment_debate_state"]
-        history = investment_debate_state.get("history", "")
-        bull_history = investment_debate_state.get("bull_history", "")
+        # 辩论历史：更早发言的摘要 + 最近若干条原文
+        history = window.prompt_history(investment_debate_state)
 
         current_response = investment_debate_state.get("current_response", "")
         market_research_report = state["market_report"]
@@ -54,6 +61,10 @@ def create_bull_researcher(llm, memory):
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
 
+        # 报告按token预算压缩后嵌入提示词（每轮辩论都会重复嵌入）
+        market_research_report, sentiment_report, news_report, fundamentals_report = \
+            compress_state_reports(state, "bull", compressor)
+
         prompt = f"""你是一位看涨分析师，负责为股票 {company_name} 的投资建立强有力的论证。
 
 ⚠️ 重要提醒：当前分析的是 {'中国A股' if is_china else '海外股票'}，所有价格和估值请使用 {currency}（{currency_symbol}）作为单位。
@@ -86,9 +97,7 @@ def create_bull_researcher(llm, memory):
         argument = f"Bull Analyst: {response.content}"
 
         new_investment_debate_state = {
-            "history": history + "\n" + argument,
-            "bull_history": bull_history + "\n" + argument,
-            "bear_history": investment_debate_state.get("bear_history", ""),
+            **window.append(investment_debate_state, "Bull Analyst", response.content),
             "current_response": argument,
             "count": investment_debate_state["count"] + 1,
         }
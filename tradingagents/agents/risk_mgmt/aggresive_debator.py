@@ -1,16 +1,23 @@
 import time
 import json
+from typing import Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.context_compression import ContextCompressor, compress_state_reports
+from tradingagents.utils.debate_history import DebateWindow
 
 
-def create_risky_debator(llm):
+def create_risky_debator(llm, debate_window: Optional[DebateWindow] = None,
+                         context_compressor: Optional[ContextCompressor] = None):
+    window = debate_window or DebateWindow()
+    compressor = context_compressor or ContextCompressor()
+
     def risky_node(state) -> dict:
         risk_debate_state = state["risk_debate_state"]
-        history = risk_debate_state.get("history", "")
-        risky_history = risk_debate_state.get("risky_history", "")
+        # 辩论历史：更早发言的摘要 + 最近若干条原文
+        history = window.prompt_history(risk_debate_state)
 
         current_safe_response = risk_debate_state.get("current_safe_response", "")
         current_neutral_response = risk_debate_state.get("current_neutral_response", "")
@@ -22,6 +29,10 @@ def create_risky_debator(llm):
 
         trader_decision = state["trader_investment_plan"]
 
+        # 报告按token预算压缩后嵌入提示词（每轮辩论都会重复嵌入）
+        market_research_report, sentiment_report, news_report, fundamentals_report = \
+            compress_state_reports(state, "risky", compressor)
+
         prompt = f"""作为激进风险分析师，您的职责是积极倡导高回报、高风险的投资机会，强调大胆策略和竞争优势。在评估交易员的决策或计划时，请重点关注潜在的上涨空间、增长潜力和创新收益——即使这些伴随着较高的风险。使用提供的市场数据和情绪分析来加强您的论点，并挑战对立观点。具体来说，请直接回应保守和中性分析师提出的每个观点，用数据驱动的反驳和有说服力的推理进行反击。突出他们的谨慎态度可能错过的关键机会，或者他们的假设可能过于保守的地方。以下是交易员的决策：
 
 {trader_decision}
@@ -41,10 +52,7 @@ def create_risky_debator(llm):
         argument = f"Risky Analyst: {response.content}"
 
         new_risk_debate_state = {
-            "history": history + "\n" + argument,
-            "risky_history": risky_history + "\n" + argument,
-            "safe_history": risk_debate_state.get("safe_history", ""),
-            "neutral_history": risk_debate_state.get("neutral_history", ""),
+            **window.append(risk_debate_state, "Risky Analyst", response.content),
             "latest_speaker": "Risky",
             "current_risky_response": argument,
             "current_safe_response": risk_debate_state.get("current_safe_response", ""),
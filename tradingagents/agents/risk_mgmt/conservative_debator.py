@@ -1,17 +1,24 @@
 from langchain_core.messages import AIMessage
 import time
 import json
+from typing import Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.context_compression import ContextCompressor, compress_state_reports
+from tradingagents.utils.debate_history import DebateWindow
 
 
-def create_safe_debator(llm):
+def create_safe_debator(llm, debate_window: Optional[DebateWindow] = None,
+                        context_compressor: Optional[ContextCompressor] = None):
+    window = debate_window or DebateWindow()
+    compressor = context_compressor or ContextCompressor()
+
     def safe_node(state) -> dict:
         risk_debate_state = state["risk_debate_state"]
-        history = risk_debate_state.get("history", "")
-        safe_history = risk_debate_state.get("safe_history", "")
+        # 辩论历史：更早发言的摘要 + 最近若干条原文
+        history = window.prompt_history(risk_debate_state)
 
         current_risky_response = risk_debate_state.get("current_risky_response", "")
         current_neutral_response = risk_debate_state.get("current_neutral_response", "")
@@ -23,6 +30,10 @@ def create_safe_debator(llm):
 
         trader_decision = state["trader_investment_plan"]
 
+        # 报告按token预算压缩后嵌入提示词（每轮辩论都会重复嵌入）
+        market_research_report, sentiment_report, news_report, fundamentals_report = \
+            compress_state_reports(state, "safe", compressor)
+
         prompt = f"""作为安全/保守风险分析师，您的主要目标是保护资产、最小化波动性，并确保稳定、可靠的增长。您优先考虑稳定性、安全性和风险缓解，仔细评估潜在损失、经济衰退和市场波动。在评估交易员的决策或计划时，请批判性地审查高风险要素，指出决策可能使公司面临不当风险的地方，以及更谨慎的替代方案如何能够确保长期收益。以下是交易员的决策：
 
 {trader_decision}
@@ -42,10 +53,7 @@ def create_safe_debator(llm):
         argument = f"Safe Analyst: {response.content}"
 
         new_risk_debate_state = {
-            "history": history + "\n" + argument,
-            "risky_history": risk_debate_state.get("risky_history", ""),
-            "safe_history": safe_history + "\n" + argument,
-            "neutral_history": risk_debate_state.get("neutral_history", ""),
+            **window.append(risk_debate_state, "Safe Analyst", response.content),
             "latest_speaker": "Safe",
             "current_risky_response": risk_debate_state.get(
                 "current_risky_response", ""
@@ -1,16 +1,23 @@
 import time
 import json
+from typing import Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.context_compression import ContextCompressor, compress_state_reports
+from tradingagents.utils.debate_history import DebateWindow
 
 
-def create_neutral_debator(llm):
+def create_neutral_debator(llm, debate_window: Optional[DebateWindow] = None,
+                           context_compressor: Optional[ContextCompressor] = None):
+    window = debate_window or DebateWindow()
+    compressor = context_compressor or ContextCompressor()
+
     def neutral_node(state) -> dict:
         risk_debate_state = state["risk_debate_state"]
-        history = risk_debate_state.get("history", "")
-        neutral_history = risk_debate_state.get("neutral_history", "")
+        # 辩论历史：更早发言的摘要 + 最近若干条原文
+        history = window.prompt_history(risk_debate_state)
 
         current_risky_response = risk_debate_state.get("current_risky_response", "")
         current_safe_response = risk_debate_state.get("current_safe_response", "")
@@ -22,6 +29,10 @@ def create_neutral_debator(llm):
 
         trader_decision = state["trader_investment_plan"]
 
+        # 报告按token预算压缩后嵌入提示词（每轮辩论都会重复嵌入）
+        market_research_report, sentiment_report, news_report, fundamentals_report = \
+            compress_state_reports(state, "neutral", compressor)
+
         prompt = f"""作为中性风险分析师，您的角色是提供平衡的视角，权衡交易员决策或计划的潜在收益和风险。您优先考虑全面的方法，评估上行和下行风险，同时考虑更广泛的市场趋势、潜在的经济变化和多元化策略。以下是交易员的决策：
 
 {trader_decision}
@@ -41,10 +52,7 @@ def create_neutral_debator(llm):
         argument = f"Neutral Analyst: {response.content}"
 
         new_risk_debate_state = {
-            "history": history + "\n" + argument,
-            "risky_history": risk_debate_state.get("risky_history", ""),
-            "safe_history": risk_debate_state.get("safe_history", ""),
-            "neutral_history": neutral_history + "\n" + argument,
+            **window.append(risk_debate_state, "Neutral Analyst", response.content),
             "latest_speaker": "Neutral",
             "current_risky_response": risk_debate_state.get(
                 "current_risky_response", ""
@@ -1,4 +1,4 @@
-from typing import Annotated, Sequence
+from typing import Annotated, List, Sequence
 from datetime import date, timedelta, datetime
 from typing_extensions import TypedDict, Optional
 from langchain_openai import ChatOpenAI
@@ -11,15 +11,17 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
+# 辩论发言记录：{"speaker": 发言者, "content": 发言内容}，按发言顺序追加
+# 各发言者的历史由 tradingagents.utils.debate_history 按需派生，提示词只嵌入摘要 + 最近窗口
+class DebateTurn(TypedDict):
+    speaker: Annotated[str, "Speaker of the turn"]
+    content: Annotated[str, "Argument made in the turn"]
+
+
 # Researcher team state
 class InvestDebateState(TypedDict):
-    bull_history: Annotated[
-        str, "Bullish Conversation history"
-    ]  # Bullish Conversation history
-    bear_history: Annotated[
-        str, "Bearish Conversation history"
-    ]  # Bullish Conversation history
-    history: Annotated[str, "Conversation history"]  # Conversation history
+    turns: Annotated[List[DebateTurn], "Append-only debate turns"]  # Conversation turns
+    summary: Annotated[str, "Rolling summary of turns outside the prompt window"]
     current_response: Annotated[str, "Latest response"]  # Last response
     judge_decision: Annotated[str, "Final judge decision"]  # Last response
     count: Annotated[int, "Length of the current conversation"]  # Conversation length
@@ -27,16 +29,8 @@ class InvestDebateState(TypedDict):
 
 # Risk management team state
 class RiskDebateState(TypedDict):
-    risky_history: Annotated[
-        str, "Risky Agent's Conversation history"
-    ]  # Conversation history
-    safe_history: Annotated[
-        str, "Safe Agent's Conversation history"
-    ]  # Conversation history
-    neutral_history: Annotated[
-        str, "Neutral Agent's Conversation history"
-    ]  # Conversation history
-    history: Annotated[str, "Conversation history"]  # Conversation history
+    turns: Annotated[List[DebateTurn], "Append-only debate turns"]  # Conversation turns
+    summary: Annotated[str, "Rolling summary of turns outside the prompt window"]
     latest_speaker: Annotated[str, "Analyst that spoke last"]
     current_risky_response: Annotated[
         str, "Latest response by the risky analyst"
@@ -1,16 +1,16 @@
-import chromadb
-from chromadb.config import Settings
 from openai import OpenAI
-import dashscope
-from dashscope import TextEmbedding
 import os
 import threading
 from typing import Dict, Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.provider_registry import lazy_import
 logger = get_logger("agents.utils.memory")
 
+# ChromaDB和DashScope在首次使用记忆时才导入
+dashscope = lazy_import("dashscope")
+
 
 class ChromaDBManager:
     """单例ChromaDB管理器，避免并发创建集合的冲突"""
@@ -30,6 +30,9 @@ class ChromaDBManager:
 
     def __init__(self):
         if not self._initialized:
+            import chromadb
+            from chromadb.config import Settings
+
             try:
                 # 使用更兼容的ChromaDB配置
                 settings = Settings(
@@ -78,8 +81,12 @@ class ChromaDBManager:
 
 
 class FinancialSituationMemory:
+    # 单次批量嵌入请求的最大文本数（DashScope text-embedding-v3上限为10）
+    EMBEDDING_BATCH_SIZE = 10
+
     def __init__(self, name, config):
         self.config = config
+        self._write_lock = threading.Lock()
         self.llm_provider = config.get("llm_provider", "openai").lower()
 
         # 根据LLM提供商选择嵌入模型和客户端
@@ -231,7 +238,7 @@ class FinancialSituationMemory:
                     return [0.0] * 1024  # 返回空向量
 
                 # 尝试调用DashScope API
-                response = TextEmbedding.call(
+                response = dashscope.TextEmbedding.call(
                     model=self.embedding,
                     input=text
                 )
@@ -338,28 +345,91 @@ class FinancialSituationMemory:
             )
             return response.data[0].embedding
 
-    def add_situations(self, situations_and_advice):
-        """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
+    def _uses_dashscope_embedding(self) -> bool:
+        return (self.llm_provider == "dashscope" or
+                self.llm_provider == "alibaba" or
+                (self.llm_provider == "google" and self.client is None) or
+                (self.llm_provider == "deepseek" and self.client is None))
 
-        situations = []
-        advice = []
-        ids = []
-        embeddings = []
-
-        offset = self.situation_collection.count()
+    @property
+    def embedding_signature(self) -> tuple:
+        """嵌入后端标识，标识相同的记忆可以共用同一批嵌入向量"""
+        if self.client == "DISABLED":
+            return ("disabled",)
+        return (self.llm_provider, self.embedding, self.config.get("backend_url"))
+
+    def _request_embeddings(self, texts):
+        """一次请求获取多条文本的嵌入向量，失败时抛出异常"""
+        if self._uses_dashscope_embedding():
+            if not getattr(dashscope, 'api_key', None):
+                raise RuntimeError("DashScope API密钥未设置")
+            response = dashscope.TextEmbedding.call(model=self.embedding, input=texts)
+            if response.status_code != 200:
+                raise RuntimeError(f"DashScope API错误: {response.code} - {response.message}")
+            items = sorted(response.output['embeddings'], key=lambda item: item.get('text_index', 0))
+            return [item['embedding'] for item in items]
+
+        if self.client is None:
+            raise RuntimeError("嵌入客户端未初始化")
+        response = self.client.embeddings.create(model=self.embedding, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def get_embeddings(self, texts):
+        """
+        批量获取嵌入向量
+
+        相同文本只请求一次，按EMBEDDING_BATCH_SIZE分批调用嵌入接口；
+        批量请求失败时逐条调用get_embedding降级，保证返回数量与输入一致
+        """
+        texts = list(texts)
+        unique_texts = list(dict.fromkeys(texts))
+        if not unique_texts:
+            return []
 
-        for i, (situation, recommendation) in enumerate(situations_and_advice):
-            situations.append(situation)
-            advice.append(recommendation)
-            ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+        if self.client == "DISABLED":
+            return [[0.0] * 1024 for _ in texts]
 
-        self.situation_collection.add(
-            documents=situations,
-            metadatas=[{"recommendation": rec} for rec in advice],
-            embeddings=embeddings,
-            ids=ids,
-        )
+        vectors = {}
+        for start in range(0, len(unique_texts), self.EMBEDDING_BATCH_SIZE):
+            chunk = unique_texts[start:start + self.EMBEDDING_BATCH_SIZE]
+            try:
+                chunk_vectors = self._request_embeddings(chunk)
+                if len(chunk_vectors) != len(chunk):
+                    raise RuntimeError(f"返回{len(chunk_vectors)}条向量，期望{len(chunk)}条")
+                vectors.update(zip(chunk, chunk_vectors))
+                logger.debug(f"✅ 批量embedding成功: {len(chunk)}条")
+            except Exception as e:
+                logger.warning(f"⚠️ 批量embedding失败，逐条重试: {e}")
+                for text in chunk:
+                    vectors[text] = self.get_embedding(text)
+
+        return [vectors[text] for text in texts]
+
+    def add_situations(self, situations_and_advice, embeddings=None):
+        """
+        Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)
+
+        embeddings: 可选，预先计算好的嵌入向量（与situations_and_advice一一对应），
+            未提供时批量请求一次嵌入接口
+        """
+        situations_and_advice = list(situations_and_advice)
+        if not situations_and_advice:
+            return
+
+        situations = [situation for situation, _ in situations_and_advice]
+        advice = [recommendation for _, recommendation in situations_and_advice]
+        if embeddings is None:
+            embeddings = self.get_embeddings(situations)
+
+        # 计算id与写入需要原子完成，避免并发写入时id冲突
+        with self._write_lock:
+            offset = self.situation_collection.count()
+            self.situation_collection.add(
+                documents=situations,
+                metadatas=[{"recommendation": rec} for rec in advice],
+                embeddings=list(embeddings),
+                ids=[str(offset + i) for i in range(len(situations))],
+            )
 
     def get_memories(self, current_situation, n_matches=1):
         """Find matching recommendations using embeddings"""
@@ -30,6 +30,27 @@ except ImportError as e:
     logger.warning(f"⚠️ 股票数据服务不可用: {e}")
     SERVICE_AVAILABLE = False
 
+try:
+    from tradingagents.dataflows.stock_search_index import get_stock_search_index
+
+    SEARCH_INDEX_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"⚠️ 股票检索索引不可用: {e}")
+    SEARCH_INDEX_AVAILABLE = False
+
+
+def _get_loaded_search_index():
+    """获取已加载数据的股票检索索引，不可用或为空时返回None"""
+    if not SEARCH_INDEX_AVAILABLE:
+        return None
+    try:
+        index = get_stock_search_index()
+        index.ensure_fresh()
+        return index if len(index) > 0 else None
+    except Exception as e:
+        logger.error(f"⚠️ 股票检索索引加载失败: {e}")
+        return None
+
 def get_stock_info(stock_code: str) -> Dict[str, Any]:
     """
     获取单个股票的基础信息
@@ -135,6 +156,11 @@ def search_stocks(keyword: str) -> List[Dict[str, Any]]:
         >>> for stock in results:
         logger.info(f"{stock["code']}: {stock['name']}")
     """
+    # 优先使用常驻内存的检索索引（代码前缀、名称子串、拼音首字母），不访问数据库
+    index = _get_loaded_search_index()
+    if index is not None:
+        return index.search(keyword, limit=None)
+
     all_stocks = get_all_stocks()
     
     if not all_stocks or (len(all_stocks) == 1 and 'error' in all_stocks[0]):
@@ -167,6 +193,18 @@ def get_market_summary() -> Dict[str, Any]:
         >>> summary = get_market_summary()
         logger.info(f"沪市股票数量: {summary["shanghai_count']}")
     """
+    index = _get_loaded_search_index()
+    if index is not None:
+        facets = index.facet_counts()
+        return {
+            'total_count': len(index),
+            'shanghai_count': facets['market'].get('上海', 0),
+            'shenzhen_count': facets['market'].get('深圳', 0),
+            'category_stats': facets['category'],
+            'data_source': index.get_stats()['source'] or 'unknown',
+            'updated_at': datetime.now().isoformat()
+        }
+
     all_stocks = get_all_stocks()
     
     if not all_stocks or (len(all_stocks) == 1 and 'error' in all_stocks[0]):
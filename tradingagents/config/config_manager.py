@@ -6,6 +6,7 @@
 
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
@@ -19,6 +20,8 @@ from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .usage_ledger import UsageLedger
+
 try:
     from .mongodb_storage import MongoDBStorage
     MONGODB_AVAILABLE = True
@@ -73,6 +76,12 @@ class ConfigManager:
         self.pricing_file = self.config_dir / "pricing.json"
         self.usage_file = self.config_dir / "usage.json"
         self.settings_file = self.config_dir / "settings.json"
+        self.usage_db_file = self.config_dir / "usage.db"
+
+        # JSON配置文件的内存缓存: {路径: (mtime_ns, 数据)}，文件修改后自动失效
+        self._json_cache: Dict[Path, Any] = {}
+        self._pricing_index: Dict[tuple, PricingConfig] = {}
+        self._pricing_index_mtime = None
 
         # 加载.env文件（保持向后兼容）
         self._load_env_file()
@@ -83,6 +92,34 @@ class ConfigManager:
 
         self._init_default_configs()
 
+        # 本地使用账本（MongoDB不可用时的存储），首次使用时才创建usage.db
+        self._usage_ledger: Optional[UsageLedger] = None
+        self._usage_ledger_lock = threading.Lock()
+
+    @property
+    def usage_ledger(self) -> UsageLedger:
+        """本地使用账本，首次访问时创建usage.db并导入旧版usage.json"""
+        if self._usage_ledger is None:
+            with self._usage_ledger_lock:
+                if self._usage_ledger is None:
+                    self._usage_ledger = UsageLedger(
+                        self.usage_db_file,
+                        legacy_file=self.usage_file,
+                        max_records=self.load_settings().get("max_usage_records", 10000)
+                    )
+        return self._usage_ledger
+
+    def _read_json_cached(self, path: Path) -> Any:
+        """读取JSON文件，按文件mtime缓存解析结果"""
+        mtime = path.stat().st_mtime_ns
+        cached = self._json_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._json_cache[path] = (mtime, data)
+        return data
+
     def _load_env_file(self):
         """加载.env文件（保持向后兼容）"""
         # 尝试从项目根目录加载.env文件
@@ -267,12 +304,26 @@ class ConfigManager:
     def load_pricing(self) -> List[PricingConfig]:
         """加载定价配置"""
         try:
-            with open(self.pricing_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_json_cached(self.pricing_file)
             return [PricingConfig(**item) for item in data]
         except Exception as e:
             logger.error(f"加载定价配置失败: {e}")
             return []
+
+    def _get_pricing_index(self) -> Dict[tuple, PricingConfig]:
+        """按(供应商, 模型)索引的定价表，定价文件修改后重建"""
+        try:
+            mtime = self.pricing_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is None or mtime != self._pricing_index_mtime:
+            index = {}
+            for pricing in self.load_pricing():
+                # 与原先的线性查找一致：同名配置以第一条为准
+                index.setdefault((pricing.provider, pricing.model_name), pricing)
+            self._pricing_index = index
+            self._pricing_index_mtime = mtime
+        return self._pricing_index
     
     def save_pricing(self, pricing: List[PricingConfig]):
         """保存定价配置"""
@@ -282,25 +333,49 @@ class ConfigManager:
                 json.dump(data, f, ensure_ascii=False, indent=2)
         except Exception as e:
             logger.error(f"保存定价配置失败: {e}")
+        finally:
+            # 同一时钟刻度内的连续写入mtime可能不变，保存后主动失效缓存
+            self._json_cache.pop(self.pricing_file, None)
+            self._pricing_index_mtime = None
     
-    def load_usage_records(self) -> List[UsageRecord]:
-        """加载使用记录"""
+    def _mongodb_connected(self) -> bool:
+        return bool(self.mongodb_storage and self.mongodb_storage.is_connected())
+
+    def load_usage_records(self, days: Optional[int] = None, limit: Optional[int] = None,
+                           offset: int = 0) -> List[UsageRecord]:
+        """
+        加载使用记录（按时间升序），过滤和分页在存储端完成
+
+        Args:
+            days: 只加载最近days个自然日的记录
+            limit: 只加载最新的limit条记录
+            offset: 跳过最新的offset条记录（与limit配合分页）
+        """
+        if self._mongodb_connected():
+            records = self.mongodb_storage.load_usage_records(
+                limit=limit if limit is not None else 0, days=days, skip=offset)
+            return list(reversed(records))
         try:
-            if not self.usage_file.exists():
-                return []
-            with open(self.usage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [UsageRecord(**item) for item in data]
+            return [UsageRecord(**item)
+                    for item in self.usage_ledger.load_records(days=days, limit=limit, offset=offset)]
         except Exception as e:
             logger.error(f"加载使用记录失败: {e}")
             return []
+
+    def count_usage_records(self, days: Optional[int] = None) -> int:
+        """时间范围内的使用记录数（用于分页）"""
+        if self._mongodb_connected():
+            return self.mongodb_storage.count_usage_records(days)
+        try:
+            return self.usage_ledger.count_records(days)
+        except Exception as e:
+            logger.error(f"统计使用记录数失败: {e}")
+            return 0
     
     def save_usage_records(self, records: List[UsageRecord]):
-        """保存使用记录"""
+        """用给定记录替换本地账本内容（传入空列表即清空）"""
         try:
-            data = [asdict(record) for record in records]
-            with open(self.usage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.usage_ledger.replace_all(records)
         except Exception as e:
             logger.error(f"保存使用记录失败: {e}")
     
@@ -329,34 +404,29 @@ class ConfigManager:
             else:
                 logger.error(f"⚠️ MongoDB保存失败，回退到JSON文件存储")
         
-        # 回退到JSON文件存储
-        records = self.load_usage_records()
-        records.append(record)
-        
-        # 限制记录数量
-        settings = self.load_settings()
-        max_records = settings.get("max_usage_records", 10000)
-        if len(records) > max_records:
-            records = records[-max_records:]
-        
-        self.save_usage_records(records)
+        # 回退到本地账本（追加写，不需要读取已有记录）
+        try:
+            self.usage_ledger.max_records = self.load_settings().get("max_usage_records", 10000)
+            self.usage_ledger.append(record)
+        except Exception as e:
+            logger.error(f"保存使用记录失败: {e}")
         return record
     
     def calculate_cost(self, provider: str, model_name: str, input_tokens: int, output_tokens: int) -> float:
         """计算使用成本"""
-        pricing_configs = self.load_pricing()
+        pricing_index = self._get_pricing_index()
 
-        for pricing in pricing_configs:
-            if pricing.provider == provider and pricing.model_name == model_name:
-                input_cost = (input_tokens / 1000) * pricing.input_price_per_1k
-                output_cost = (output_tokens / 1000) * pricing.output_price_per_1k
-                total_cost = input_cost + output_cost
-                return round(total_cost, 6)
+        pricing = pricing_index.get((provider, model_name))
+        if pricing:
+            input_cost = (input_tokens / 1000) * pricing.input_price_per_1k
+            output_cost = (output_tokens / 1000) * pricing.output_price_per_1k
+            total_cost = input_cost + output_cost
+            return round(total_cost, 6)
 
         # 只在找不到配置时输出调试信息
         logger.warning(f"⚠️ [calculate_cost] 未找到匹配的定价配置: {provider}/{model_name}")
         logger.debug(f"⚠️ [calculate_cost] 可用的配置:")
-        for pricing in pricing_configs:
+        for pricing in pricing_index.values():
             logger.debug(f"⚠️ [calculate_cost]   - {pricing.provider}/{pricing.model_name}")
 
         return 0.0
@@ -364,8 +434,8 @@ class ConfigManager:
     def load_settings(self) -> Dict[str, Any]:
         """加载设置，合并.env中的配置"""
         try:
-            with open(self.settings_file, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
+            # 返回副本，调用方可能修改后再保存
+            settings = dict(self._read_json_cached(self.settings_file))
         except Exception as e:
             logger.error(f"加载设置失败: {e}")
             settings = {}
@@ -414,6 +484,8 @@ class ConfigManager:
                 json.dump(settings, f, ensure_ascii=False, indent=2)
         except Exception as e:
             logger.error(f"保存设置失败: {e}")
+        finally:
+            self._json_cache.pop(self.settings_file, None)
     
     def get_enabled_models(self) -> List[ModelConfig]:
         """获取启用的模型"""
@@ -429,7 +501,11 @@ class ConfigManager:
         return None
     
     def get_usage_statistics(self, days: int = 30) -> Dict[str, Any]:
-        """获取使用统计"""
+        """
+        获取使用统计
+
+        本地账本按自然日统计：days=1表示今天，days=30表示包含今天在内的最近30天
+        """
         # 优先使用MongoDB获取统计
         if self.mongodb_storage and self.mongodb_storage.is_connected():
             try:
@@ -445,52 +521,38 @@ class ConfigManager:
             except Exception as e:
                 logger.error(f"⚠️ MongoDB统计获取失败，回退到JSON文件: {e}")
         
-        # 回退到JSON文件统计
-        records = self.load_usage_records()
-        
-        # 过滤最近N天的记录
-        from datetime import datetime, timedelta
+        # 回退到本地账本的按日汇总
+        return self.usage_ledger.get_statistics(days)
+
+    def get_daily_usage(self, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        获取按日汇总的使用量，用于趋势图（MongoDB聚合管道或本地账本的按日汇总表）
+
+        Returns:
+            List[Dict]: [{"date", "cost", "requests", "input_tokens", "output_tokens"}, ...]
+        """
+        if self._mongodb_connected():
+            return self.mongodb_storage.get_daily_usage(days)
+        try:
+            return self.usage_ledger.get_daily_usage(days)
+        except Exception as e:
+            logger.error(f"获取按日使用量失败: {e}")
+            return []
 
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        recent_records = []
-        for record in records:
-            try:
-                record_date = datetime.fromisoformat(record.timestamp)
-                if record_date >= cutoff_date:
-                    recent_records.append(record)
-            except:
-                continue
-        
-        # 统计数据
-        total_cost = sum(record.cost for record in recent_records)
-        total_input_tokens = sum(record.input_tokens for record in recent_records)
-        total_output_tokens = sum(record.output_tokens for record in recent_records)
-        
-        # 按供应商统计
-        provider_stats = {}
-        for record in recent_records:
-            if record.provider not in provider_stats:
-                provider_stats[record.provider] = {
-                    "cost": 0,
-                    "input_tokens": 0,
-                    "output_tokens": 0,
-                    "requests": 0
-                }
-            provider_stats[record.provider]["cost"] += record.cost
-            provider_stats[record.provider]["input_tokens"] += record.input_tokens
-            provider_stats[record.provider]["output_tokens"] += record.output_tokens
-            provider_stats[record.provider]["requests"] += 1
-        
-        return {
-            "period_days": days,
-            "total_cost": round(total_cost, 4),
-            "total_input_tokens": total_input_tokens,
-            "total_output_tokens": total_output_tokens,
-            "total_requests": len(recent_records),
-            "provider_stats": provider_stats,
-            "records_count": len(recent_records)
-        }
+    def get_model_statistics(self, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        获取按(供应商, 模型)汇总的使用量（按成本降序）
+
+        Returns:
+            List[Dict]: [{"provider", "model_name", "cost", "requests", "input_tokens", "output_tokens"}, ...]
+        """
+        if self._mongodb_connected():
+            return self.mongodb_storage.get_model_statistics(days)
+        try:
+            return self.usage_ledger.get_model_statistics(days)
+        except Exception as e:
+            logger.error(f"获取模型使用量失败: {e}")
+            return []
     
     def get_data_dir(self) -> str:
         """获取数据目录路径"""
@@ -586,9 +648,7 @@ class TokenTracker:
 
     def get_session_cost(self, session_id: str) -> float:
         """获取会话成本"""
-        records = self.config_manager.load_usage_records()
-        session_cost = sum(record.cost for record in records if record.session_id == session_id)
-        return session_cost
+        return self.config_manager.usage_ledger.get_session_cost(session_id)
 
     def estimate_cost(self, provider: str, model_name: str, estimated_input_tokens: int,
                      estimated_output_tokens: int) -> float:
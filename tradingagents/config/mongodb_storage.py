@@ -5,7 +5,7 @@ MongoDB存储适配器
 """
 
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import asdict
 from .config_manager import UsageRecord
@@ -97,6 +97,17 @@ class MongoDBStorage:
         except Exception as e:
             logger.error(f"创建MongoDB索引失败: {e}")
     
+    @staticmethod
+    def _cutoff(days: int) -> str:
+        """统计窗口起始日期（与本地账本一致：最近days个自然日，含今天）
+
+        timestamp为ISO格式字符串，按日期前缀比较即可命中timestamp索引
+        """
+        return (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime('%Y-%m-%d')
+
+    def _range_match(self, days: Optional[int]) -> Dict[str, Any]:
+        return {'timestamp': {'$gte': self._cutoff(days)}} if days else {}
+
     def is_connected(self) -> bool:
         """检查是否连接到MongoDB"""
         return self._connected
@@ -126,28 +137,18 @@ class MongoDBStorage:
             logger.error(f"保存记录到MongoDB失败: {e}")
             return False
     
-    def load_usage_records(self, limit: int = 10000, days: int = None) -> List[UsageRecord]:
-        """从MongoDB加载使用记录"""
+    def load_usage_records(self, limit: int = 10000, days: int = None, skip: int = 0) -> List[UsageRecord]:
+        """从MongoDB加载使用记录（按时间倒序，可用skip/limit分页）"""
         if not self._connected:
             return []
         
         try:
-            # 构建查询条件
-            query = {}
-            if days:
-                from datetime import timedelta
-                cutoff_date = datetime.now() - timedelta(days=days)
-                query['timestamp'] = {'$gte': cutoff_date.isoformat()}
-            
-            # 查询记录，按时间倒序
-            cursor = self.collection.find(query).sort('timestamp', -1).limit(limit)
+            # 查询记录，按时间倒序；时间范围过滤和分页都在服务端完成
+            cursor = (self.collection.find(self._range_match(days), {'_id': 0, '_created_at': 0})
+                      .sort('timestamp', -1).skip(skip).limit(limit))
             
             records = []
             for doc in cursor:
-                # 移除MongoDB特有的字段
-                doc.pop('_id', None)
-                doc.pop('_created_at', None)
-                
                 # 转换为UsageRecord对象
                 try:
                     record = UsageRecord(**doc)
@@ -168,16 +169,9 @@ class MongoDBStorage:
             return {}
         
         try:
-            from datetime import timedelta
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
             # 聚合查询
             pipeline = [
-                {
-                    '$match': {
-                        'timestamp': {'$gte': cutoff_date.isoformat()}
-                    }
-                },
+                {'$match': self._range_match(days)},
                 {
                     '$group': {
                         '_id': None,
@@ -219,16 +213,9 @@ class MongoDBStorage:
             return {}
         
         try:
-            from datetime import timedelta
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
             # 按供应商聚合
             pipeline = [
-                {
-                    '$match': {
-                        'timestamp': {'$gte': cutoff_date.isoformat()}
-                    }
-                },
+                {'$match': self._range_match(days)},
                 {
                     '$group': {
                         '_id': '$provider',
@@ -258,6 +245,76 @@ class MongoDBStorage:
             logger.error(f"获取供应商统计失败: {e}")
             return {}
     
+    def count_usage_records(self, days: int = None) -> int:
+        """时间范围内的记录数"""
+        if not self._connected:
+            return 0
+        
+        try:
+            return self.collection.count_documents(self._range_match(days))
+        except Exception as e:
+            logger.error(f"统计MongoDB记录数失败: {e}")
+            return 0
+    
+    def get_daily_usage(self, days: int = 30) -> List[Dict[str, Any]]:
+        """按日聚合的成本、请求数和token（按日期升序）"""
+        if not self._connected:
+            return []
+        
+        try:
+            pipeline = [
+                {'$match': self._range_match(days)},
+                {
+                    '$group': {
+                        '_id': {'$substr': ['$timestamp', 0, 10]},
+                        'cost': {'$sum': '$cost'},
+                        'requests': {'$sum': 1},
+                        'input_tokens': {'$sum': '$input_tokens'},
+                        'output_tokens': {'$sum': '$output_tokens'}
+                    }
+                },
+                {'$sort': {'_id': 1}}
+            ]
+            return [
+                {'date': result['_id'], 'cost': result.get('cost', 0), 'requests': result.get('requests', 0),
+                 'input_tokens': result.get('input_tokens', 0), 'output_tokens': result.get('output_tokens', 0)}
+                for result in self.collection.aggregate(pipeline)
+            ]
+            
+        except Exception as e:
+            logger.error(f"获取MongoDB按日统计失败: {e}")
+            return []
+    
+    def get_model_statistics(self, days: int = 30) -> List[Dict[str, Any]]:
+        """按(供应商, 模型)聚合的统计（按成本降序）"""
+        if not self._connected:
+            return []
+        
+        try:
+            pipeline = [
+                {'$match': self._range_match(days)},
+                {
+                    '$group': {
+                        '_id': {'provider': '$provider', 'model_name': '$model_name'},
+                        'cost': {'$sum': '$cost'},
+                        'requests': {'$sum': 1},
+                        'input_tokens': {'$sum': '$input_tokens'},
+                        'output_tokens': {'$sum': '$output_tokens'}
+                    }
+                },
+                {'$sort': {'cost': -1}}
+            ]
+            return [
+                {'provider': result['_id']['provider'], 'model_name': result['_id']['model_name'],
+                 'cost': result.get('cost', 0), 'requests': result.get('requests', 0),
+                 'input_tokens': result.get('input_tokens', 0), 'output_tokens': result.get('output_tokens', 0)}
+                for result in self.collection.aggregate(pipeline)
+            ]
+            
+        except Exception as e:
+            logger.error(f"获取MongoDB模型统计失败: {e}")
+            return []
+    
     def cleanup_old_records(self, days: int = 90) -> int:
         """清理旧记录"""
         if not self._connected:
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+共享Redis连接池
+进程内按连接参数复用ConnectionPool，避免每次调用都新建Redis客户端和TCP连接
+"""
+
+import os
+import threading
+from urllib.parse import quote
+from typing import Dict, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+_pools: Dict[Tuple, "redis.ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+
+def is_redis_enabled() -> bool:
+    """检查REDIS_ENABLED环境变量"""
+    return os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
+
+
+def _build_url_from_env() -> str:
+    """根据REDIS_HOST/REDIS_PORT/REDIS_PASSWORD/REDIS_DB环境变量构建连接URL"""
+    host = os.getenv('REDIS_HOST', 'localhost')
+    port = int(os.getenv('REDIS_PORT', 6379))
+    password = os.getenv('REDIS_PASSWORD', None)
+    db = int(os.getenv('REDIS_DB', 0))
+    auth = f":{quote(password, safe='')}@" if password else ""
+    return f"redis://{auth}{host}:{port}/{db}"
+
+
+def get_redis_client(url: Optional[str] = None, db: Optional[int] = None,
+                     decode_responses: bool = True) -> Optional["redis.Redis"]:
+    """
+    获取使用共享连接池的Redis客户端
+
+    Args:
+        url: Redis连接URL，默认由REDIS_*环境变量构建
+        db: 数据库编号，覆盖URL中的设置
+        decode_responses: 是否将响应解码为字符串（二进制缓存数据需设为False）
+
+    Returns:
+        redis.Redis: 客户端实例（创建成本很低，连接由连接池复用）；redis未安装时返回None
+    """
+    if not REDIS_AVAILABLE:
+        return None
+
+    url = url or _build_url_from_env()
+    pool_key = (url, db, decode_responses)
+
+    pool = _pools.get(pool_key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(pool_key)
+            if pool is None:
+                kwargs = {
+                    'decode_responses': decode_responses,
+                    'socket_timeout': 5,
+                    'socket_connect_timeout': 5,
+                    'health_check_interval': 30,
+                    'max_connections': int(os.getenv('REDIS_MAX_CONNECTIONS', 50)),
+                }
+                if db is not None:
+                    kwargs['db'] = db
+                pool = redis.ConnectionPool.from_url(url, **kwargs)
+                _pools[pool_key] = pool
+                logger.debug(f"🔗 创建Redis连接池: db={db}, decode_responses={decode_responses}")
+
+    return redis.Redis(connection_pool=pool)
+
+
+def close_all_pools():
+    """断开所有连接池中的连接（进程退出或测试清理时使用）"""
+    with _pools_lock:
+        for pool in _pools.values():
+            try:
+                pool.disconnect()
+            except Exception as e:
+                logger.debug(f"⚠️ 关闭Redis连接池失败: {e}")
+        _pools.clear()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+本地Token使用账本
+基于SQLite（WAL模式）的追加写账本，替代每次调用都整体读写的usage.json
+
+- 写入: 一次INSERT + 一次按(日期, 供应商, 模型)的汇总UPSERT，在同一事务内完成，成本为O(1)
+- 统计: 直接读取按日预聚合的汇总表，与明细记录数量无关（总计、按供应商、按模型、按日序列）
+- 明细: 按日期索引过滤、分页读取，仪表盘只取当前页
+- 明细只保留最近 max_records 条（汇总表保留完整历史）
+- 首次使用时自动导入旧版usage.json
+"""
+
+import json
+import sqlite3
+import threading
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    day TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    session_id TEXT,
+    analysis_type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_usage_records_day ON usage_records(day);
+CREATE INDEX IF NOT EXISTS idx_usage_records_session ON usage_records(session_id);
+
+CREATE TABLE IF NOT EXISTS usage_daily (
+    day TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (day, provider, model_name)
+);
+"""
+
+_UPSERT_DAILY = """
+INSERT INTO usage_daily (day, provider, model_name, requests, input_tokens, output_tokens, cost)
+VALUES (?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT(day, provider, model_name) DO UPDATE SET
+    requests = requests + 1,
+    input_tokens = input_tokens + excluded.input_tokens,
+    output_tokens = output_tokens + excluded.output_tokens,
+    cost = cost + excluded.cost
+"""
+
+# 每写入多少条检查一次明细保留数量
+_TRIM_INTERVAL = 500
+
+
+class UsageLedger:
+    """SQLite追加写使用账本"""
+
+    def __init__(self, db_path: str, legacy_file: Optional[str] = None, max_records: int = 10000):
+        """
+        初始化账本
+
+        Args:
+            db_path: SQLite数据库文件路径
+            legacy_file: 旧版usage.json路径，账本为空时自动导入
+            max_records: 保留的明细记录数（按日汇总不受影响）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_records = max_records
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._appends_since_trim = 0
+
+        conn = self._get_connection()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+        if legacy_file:
+            self._import_legacy_file(Path(legacy_file))
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """每个线程使用独立连接（WAL模式下读写互不阻塞）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _record_row(record) -> tuple:
+        data = asdict(record) if not isinstance(record, dict) else record
+        timestamp = data['timestamp']
+        return (timestamp, timestamp[:10], data['provider'], data['model_name'],
+                int(data['input_tokens']), int(data['output_tokens']), float(data['cost']),
+                data.get('session_id'), data.get('analysis_type'))
+
+    def _insert(self, conn: sqlite3.Connection, rows: List[tuple]):
+        conn.executemany(
+            "INSERT INTO usage_records (timestamp, day, provider, model_name, input_tokens, "
+            "output_tokens, cost, session_id, analysis_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.executemany(_UPSERT_DAILY, [(r[1], r[2], r[3], r[4], r[5], r[6]) for r in rows])
+
+    def _import_legacy_file(self, legacy_file: Path):
+        """导入旧版usage.json（仅在账本为空时执行），导入后重命名原文件"""
+        if not legacy_file.exists():
+            return
+        conn = self._get_connection()
+        if conn.execute("SELECT 1 FROM usage_records LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            rows = [self._record_row(item) for item in data]
+            with self._write_lock, conn:
+                self._insert(conn, rows)
+            legacy_file.rename(legacy_file.with_suffix('.json.migrated'))
+            logger.info(f"✅ 已将{len(rows)}条使用记录从{legacy_file.name}导入本地账本")
+        except Exception as e:
+            logger.error(f"❌ 导入旧版使用记录失败: {e}")
+
+    def append(self, record):
+        """追加一条使用记录（UsageRecord）"""
+        row = self._record_row(record)
+        conn = self._get_connection()
+        with self._write_lock:
+            with conn:
+                self._insert(conn, [row])
+            self._appends_since_trim += 1
+            if self._appends_since_trim >= _TRIM_INTERVAL:
+                self._appends_since_trim = 0
+                self._trim(conn)
+
+    def _trim(self, conn: sqlite3.Connection):
+        """删除超出保留数量的旧明细"""
+        if not self.max_records:
+            return
+        with conn:
+            conn.execute(
+                "DELETE FROM usage_records WHERE id <= "
+                "(SELECT MAX(id) FROM usage_records) - ?", (self.max_records,)
+            )
+
+    def clear(self):
+        """清空所有明细和汇总"""
+        conn = self._get_connection()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM usage_records")
+            conn.execute("DELETE FROM usage_daily")
+
+    def replace_all(self, records: List[Any]):
+        """用给定记录整体替换账本内容（兼容旧的save_usage_records接口）"""
+        rows = [self._record_row(r) for r in records]
+        conn = self._get_connection()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM usage_records")
+            conn.execute("DELETE FROM usage_daily")
+            self._insert(conn, rows)
+
+    @staticmethod
+    def _cutoff_day(days: int) -> str:
+        """统计窗口起始日期：最近days个自然日（含今天）"""
+        return (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime('%Y-%m-%d')
+
+    def load_records(self, days: Optional[int] = None, limit: Optional[int] = None,
+                     offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        读取明细记录（按时间升序）
+
+        Args:
+            days: 只返回最近days个自然日的记录
+            limit: 只返回最新的limit条记录
+            offset: 跳过最新的offset条记录（与limit配合分页）
+        """
+        sql = ("SELECT timestamp, provider, model_name, input_tokens, output_tokens, cost, "
+               "session_id, analysis_type FROM usage_records")
+        params = []
+        if days is not None:
+            sql += " WHERE day >= ?"
+            params.append(self._cutoff_day(days))
+        sql += " ORDER BY id DESC"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit if limit is not None else -1, offset])
+
+        columns = ("timestamp", "provider", "model_name", "input_tokens", "output_tokens",
+                   "cost", "session_id", "analysis_type")
+        rows = self._get_connection().execute(sql, params).fetchall()
+        return [dict(zip(columns, row)) for row in reversed(rows)]
+
+    def get_statistics(self, days: int = 30) -> Dict[str, Any]:
+        """从按日汇总表计算统计信息，返回格式与ConfigManager.get_usage_statistics一致"""
+        rows = self._get_connection().execute(
+            "SELECT provider, SUM(cost), SUM(input_tokens), SUM(output_tokens), SUM(requests) "
+            "FROM usage_daily WHERE day >= ? GROUP BY provider",
+            (self._cutoff_day(days),)
+        ).fetchall()
+
+        provider_stats = {
+            provider: {"cost": cost, "input_tokens": input_tokens,
+                       "output_tokens": output_tokens, "requests": requests}
+            for provider, cost, input_tokens, output_tokens, requests in rows
+        }
+        total_requests = sum(item["requests"] for item in provider_stats.values())
+        return {
+            "period_days": days,
+            "total_cost": round(sum(item["cost"] for item in provider_stats.values()), 4),
+            "total_input_tokens": sum(item["input_tokens"] for item in provider_stats.values()),
+            "total_output_tokens": sum(item["output_tokens"] for item in provider_stats.values()),
+            "total_requests": total_requests,
+            "provider_stats": provider_stats,
+            "records_count": total_requests
+        }
+
+    def count_records(self, days: Optional[int] = None) -> int:
+        """明细记录数（使用日期索引）"""
+        if days is None:
+            return self._get_connection().execute("SELECT COUNT(*) FROM usage_records").fetchone()[0]
+        return self._get_connection().execute(
+            "SELECT COUNT(*) FROM usage_records WHERE day >= ?", (self._cutoff_day(days),)
+        ).fetchone()[0]
+
+    def get_model_statistics(self, days: int = 30) -> List[Dict[str, Any]]:
+        """按(供应商, 模型)汇总的成本、token和请求数（按成本降序）"""
+        rows = self._get_connection().execute(
+            "SELECT provider, model_name, SUM(cost), SUM(requests), SUM(input_tokens), SUM(output_tokens) "
+            "FROM usage_daily WHERE day >= ? GROUP BY provider, model_name ORDER BY SUM(cost) DESC",
+            (self._cutoff_day(days),)
+        ).fetchall()
+        return [
+            {"provider": provider, "model_name": model_name, "cost": cost, "requests": requests,
+             "input_tokens": input_tokens, "output_tokens": output_tokens}
+            for provider, model_name, cost, requests, input_tokens, output_tokens in rows
+        ]
+
+    def get_daily_usage(self, days: int = 30) -> List[Dict[str, Any]]:
+        """按日汇总的成本和请求数（按日期升序）"""
+        rows = self._get_connection().execute(
+            "SELECT day, SUM(cost), SUM(requests), SUM(input_tokens), SUM(output_tokens) "
+            "FROM usage_daily WHERE day >= ? GROUP BY day ORDER BY day",
+            (self._cutoff_day(days),)
+        ).fetchall()
+        return [
+            {"date": day, "cost": cost, "requests": requests,
+             "input_tokens": input_tokens, "output_tokens": output_tokens}
+            for day, cost, requests, input_tokens, output_tokens in rows
+        ]
+
+    def get_session_cost(self, session_id: str) -> float:
+        """获取会话总成本（使用session_id索引）"""
+        row = self._get_connection().execute(
+            "SELECT COALESCE(SUM(cost), 0) FROM usage_records WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0]
@@ -1,63 +1,26 @@
-# 导入基础模块
-from .finnhub_utils import get_data_in_range
-from .googlenews_utils import getNewsData
-from .reddit_utils import fetch_top_from_category
+# 数据源模块在首次访问时才导入，导入本包不会加载yfinance/Tushare/AKShare等SDK
+import importlib
+
+from tradingagents.utils.provider_registry import get_data_providers
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
-# 尝试导入yfinance相关模块，如果失败则跳过
-try:
-    from .yfin_utils import YFinanceUtils
-    YFINANCE_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ yfinance模块不可用: {e}")
-    YFinanceUtils = None
-    YFINANCE_AVAILABLE = False
-
-try:
-    from .stockstats_utils import StockstatsUtils
-    STOCKSTATS_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ stockstats模块不可用: {e}")
-    StockstatsUtils = None
-    STOCKSTATS_AVAILABLE = False
+# 基础工具: 名称 -> 注册表中的提供者
+_LAZY_PROVIDERS = {
+    "get_data_in_range": "finnhub_data",
+    "getNewsData": "google_news",
+    "fetch_top_from_category": "reddit",
+    "YFinanceUtils": "yfin_utils",
+    "StockstatsUtils": "stockstats_utils",
+}
 
-from .interface import (
-
-    # News and sentiment functions
-    get_finnhub_news,
-    get_finnhub_company_insider_sentiment,
-    get_finnhub_company_insider_transactions,
-    get_google_news,
-    get_reddit_global_news,
-    get_reddit_company_news,
-    # Financial statements functions
-    get_simfin_balance_sheet,
-    get_simfin_cashflow,
-    get_simfin_income_statements,
-    # Technical analysis functions
-    get_stock_stats_indicators_window,
-    get_stockstats_indicator,
-    # Market data functions
-    get_YFin_data_window,
-    get_YFin_data,
-    # Tushare data functions
-    get_china_stock_data_tushare,
-    search_china_stocks_tushare,
-    get_china_stock_fundamentals_tushare,
-    get_china_stock_info_tushare,
-    # Unified China data functions (recommended)
-    get_china_stock_data_unified,
-    get_china_stock_info_unified,
-    switch_china_data_source,
-    get_current_china_data_source,
-    # Hong Kong stock functions
-    get_hk_stock_data_unified,
-    get_hk_stock_info_unified,
-    get_stock_data_by_market,
-)
+# 可用性标志: 名称 -> 注册表中的提供者
+_AVAILABILITY_FLAGS = {
+    "YFINANCE_AVAILABLE": "yfin_utils",
+    "STOCKSTATS_AVAILABLE": "stockstats_utils",
+}
 
 __all__ = [
     # News and sentiment functions
@@ -92,3 +55,20 @@ __all__ = [
     "get_hk_stock_info_unified",
     "get_stock_data_by_market",
 ]
+
+
+def __getattr__(name):
+    providers = get_data_providers()
+    if name in _LAZY_PROVIDERS:
+        try:
+            return providers.get(_LAZY_PROVIDERS[name])
+        except ImportError:
+            # 与原先的导入行为保持一致：不可用的工具类为None
+            if name in ("YFinanceUtils", "StockstatsUtils"):
+                return None
+            raise
+    if name in _AVAILABILITY_FLAGS:
+        return providers.is_available(_AVAILABILITY_FLAGS[name])
+    if name in __all__:
+        return getattr(importlib.import_module(".interface", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
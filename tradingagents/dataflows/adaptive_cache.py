@@ -4,6 +4,7 @@
 根据数据库可用性自动选择最佳缓存策略
 """
 
+import io
 import os
 import json
 import pickle
@@ -15,6 +16,7 @@ from typing import Any, Dict, Optional, Union
 import pandas as pd
 
 from ..config.database_manager import get_database_manager
+from .cache_codec import CODEC_FORMAT, encode, decode, is_encoded
 
 class AdaptiveCacheSystem:
     """自适应缓存系统"""
@@ -111,14 +113,13 @@ class AdaptiveCacheSystem:
             return False
         
         try:
-            cache_data = {
-                'data': data,
+            cache_meta = {
                 'metadata': metadata,
                 'timestamp': datetime.now().isoformat(),
                 'backend': 'redis'
             }
             
-            serialized_data = pickle.dumps(cache_data)
+            serialized_data = encode(data, cache_meta)
             redis_client.setex(cache_key, ttl_seconds, serialized_data)
             
             self.logger.debug(f"Redis缓存保存成功: {cache_key}")
@@ -139,7 +140,12 @@ class AdaptiveCacheSystem:
             if not serialized_data:
                 return None
             
-            cache_data = pickle.loads(serialized_data)
+            if is_encoded(serialized_data):
+                data, cache_data = decode(serialized_data)
+                cache_data['data'] = data
+            else:
+                # 兼容旧版pickle格式
+                cache_data = pickle.loads(serialized_data)
             
             # 转换时间戳
             if isinstance(cache_data['timestamp'], str):
@@ -162,13 +168,9 @@ class AdaptiveCacheSystem:
             db = mongodb_client.tradingagents
             collection = db.cache
             
-            # 序列化数据
-            if isinstance(data, pd.DataFrame):
-                serialized_data = data.to_json()
-                data_type = 'dataframe'
-            else:
-                serialized_data = pickle.dumps(data).hex()
-                data_type = 'pickle'
+            # 序列化数据（二进制编码，DataFrame使用Arrow IPC）
+            serialized_data = encode(data)
+            data_type = CODEC_FORMAT
             
             cache_doc = {
                 '_id': cache_key,
@@ -208,9 +210,11 @@ class AdaptiveCacheSystem:
                 collection.delete_one({'_id': cache_key})
                 return None
             
-            # 反序列化数据
-            if doc['data_type'] == 'dataframe':
-                data = pd.read_json(doc['data'])
+            # 反序列化数据（兼容旧版JSON/pickle格式）
+            if doc['data_type'] == CODEC_FORMAT:
+                data, _ = decode(doc['data'])
+            elif doc['data_type'] == 'dataframe':
+                data = pd.read_json(io.StringIO(doc['data']))
             else:
                 data = pickle.loads(bytes.fromhex(doc['data']))
             
@@ -11,6 +11,7 @@ import warnings
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
+from tradingagents.utils.provider_executor import get_provider_executor, ProviderCallTimeout
 warnings.filterwarnings('ignore')
 
 class AKShareProvider:
@@ -20,7 +21,8 @@ class AKShareProvider:
         """初始化AKShare提供器"""
         try:
             import akshare as ak
-            self.ak = ak
+            # 所有AKShare调用经由共享执行器，带截止时间和并发上限
+            self.ak = get_provider_executor().guard(ak, "akshare")
             self.connected = True
 
             # 设置更长的超时时间
@@ -141,42 +143,18 @@ class AKShareProvider:
             start_date_formatted = start_date.replace('-', '') if start_date else "20240101"
             end_date_formatted = end_date.replace('-', '') if end_date else "20241231"
 
-            # 使用AKShare获取港股历史数据（带超时保护）
-            import threading
-
-            result = [None]
-            exception = [None]
-
-            def fetch_hist_data():
-                try:
-                    result[0] = self.ak.stock_hk_hist(
-                        symbol=hk_symbol,
-                        period="daily",
-                        start_date=start_date_formatted,
-                        end_date=end_date_formatted,
-                        adjust=""
-                    )
-                except Exception as e:
-                    exception[0] = e
-
-            # 启动线程
-            thread = threading.Thread(target=fetch_hist_data)
-            thread.daemon = True
-            thread.start()
-
-            # 等待60秒
-            thread.join(timeout=60)
-
-            if thread.is_alive():
-                # 超时了
-                logger.warning(f"⚠️ AKShare港股历史数据获取超时（60秒）: {symbol}")
-                raise Exception(f"AKShare港股历史数据获取超时（60秒）: {symbol}")
-            elif exception[0]:
-                # 有异常
-                raise exception[0]
-            else:
-                # 成功
-                data = result[0]
+            # 使用AKShare获取港股历史数据（经由共享执行器，带截止时间）
+            try:
+                data = self.ak.stock_hk_hist(
+                    symbol=hk_symbol,
+                    period="daily",
+                    start_date=start_date_formatted,
+                    end_date=end_date_formatted,
+                    adjust=""
+                )
+            except ProviderCallTimeout:
+                logger.warning(f"⚠️ AKShare港股历史数据获取超时: {symbol}")
+                raise
 
             if not data.empty:
                 # 数据预处理
@@ -233,38 +211,11 @@ class AKShareProvider:
             logger.info(f"🇭🇰 AKShare获取港股信息: {hk_symbol}")
 
             # 尝试获取港股实时行情数据来获取基本信息
-            # 使用线程超时包装（兼容Windows）
-            import threading
-            import time
-
-
-            result = [None]
-            exception = [None]
-
-            def fetch_data():
-                try:
-                    result[0] = self.ak.stock_hk_spot_em()
-                except Exception as e:
-                    exception[0] = e
-
-            # 启动线程
-            thread = threading.Thread(target=fetch_data)
-            thread.daemon = True
-            thread.start()
-
-            # 等待60秒
-            thread.join(timeout=60)
-
-            if thread.is_alive():
-                # 超时了
-                logger.warning(f"⚠️ AKShare港股信息获取超时（60秒），使用备用方案")
-                raise Exception("AKShare港股信息获取超时（60秒）")
-            elif exception[0]:
-                # 有异常
-                raise exception[0]
-            else:
-                # 成功
-                spot_data = result[0]
+            try:
+                spot_data = self.ak.stock_hk_spot_em()
+            except ProviderCallTimeout:
+                logger.warning(f"⚠️ AKShare港股信息获取超时，使用备用方案")
+                raise
 
             # 查找对应的股票信息
             if not spot_data.empty:
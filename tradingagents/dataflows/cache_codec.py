@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+缓存数据编解码器
+为Redis/MongoDB缓存提供版本化的紧凑二进制格式，替代多层JSON嵌套和pickle
+
+帧格式:
+    b'TAC' | 版本号(1字节) | 头部长度(4字节, 大端) | 头部(JSON) | 数据体
+
+- DataFrame: Arrow IPC流（zstd压缩，需要pyarrow），不可用时退化为压缩的pickle
+- 文本: UTF-8编码，超过阈值时压缩（zstd优先，否则zlib）
+- 其他对象: 压缩的pickle
+
+旧格式（JSON字符串、pickle）不带帧头，可通过 is_encoded() 识别后按原方式解码。
+"""
+
+import io
+import json
+import zlib
+import pickle
+import struct
+from typing import Any, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+CODEC_MAGIC = b'TAC'
+CODEC_VERSION = 1
+# MongoDB文档中 data_format 字段的取值
+CODEC_FORMAT = f"tac_v{CODEC_VERSION}"
+
+# 小于该长度的文本不压缩，压缩收益抵不上开销
+COMPRESS_THRESHOLD = 512
+
+_HEADER_LEN = struct.Struct('>I')
+_PREFIX_LEN = len(CODEC_MAGIC) + 1 + _HEADER_LEN.size
+
+
+def _compress(body: bytes) -> Tuple[bytes, str]:
+    """压缩数据体，返回(数据, 压缩算法)"""
+    if len(body) < COMPRESS_THRESHOLD:
+        return body, "none"
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=3).compress(body), "zstd"
+    return zlib.compress(body, 6), "zlib"
+
+
+def _decompress(body: bytes, compression: str) -> bytes:
+    """按头部记录的算法解压数据体"""
+    if compression == "none":
+        return body
+    if compression == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise ValueError("缓存数据使用zstd压缩，但zstandard未安装")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if compression == "zlib":
+        return zlib.decompress(body)
+    raise ValueError(f"不支持的压缩算法: {compression}")
+
+
+def _encode_dataframe(df: pd.DataFrame) -> Tuple[bytes, str, str]:
+    """编码DataFrame，返回(数据体, 编码方式, 压缩算法)"""
+    if ARROW_AVAILABLE:
+        try:
+            table = pa.Table.from_pandas(df)
+            sink = pa.BufferOutputStream()
+            options = pa.ipc.IpcWriteOptions(compression='zstd')
+            with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes(), "arrow_ipc", "none"
+        except Exception as e:
+            # 混合类型的object列等Arrow无法表示的情况，退化为pickle
+            logger.debug(f"Arrow编码失败，使用pickle: {e}")
+
+    body, compression = _compress(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+    return body, "pickle", compression
+
+
+def is_encoded(raw: Union[bytes, str, None]) -> bool:
+    """判断数据是否为本编解码器生成的二进制格式"""
+    return isinstance(raw, (bytes, bytearray, memoryview)) and bytes(raw[:len(CODEC_MAGIC)]) == CODEC_MAGIC
+
+
+def encode(data: Any, meta: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    编码缓存数据
+
+    Args:
+        data: DataFrame、字符串或任意可pickle的对象
+        meta: 随数据保存的元数据（需可JSON序列化）
+
+    Returns:
+        bytes: 带版本帧头的二进制数据
+    """
+    if isinstance(data, pd.DataFrame):
+        kind = "dataframe"
+        body, encoding, compression = _encode_dataframe(data)
+    elif isinstance(data, str):
+        kind = "text"
+        encoding = "utf8"
+        body, compression = _compress(data.encode('utf-8'))
+    else:
+        kind = "object"
+        encoding = "pickle"
+        body, compression = _compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+    header = {
+        "kind": kind,
+        "encoding": encoding,
+        "compression": compression,
+        "meta": meta or {},
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode('utf-8')
+    return b''.join([
+        CODEC_MAGIC,
+        bytes([CODEC_VERSION]),
+        _HEADER_LEN.pack(len(header_bytes)),
+        header_bytes,
+        body,
+    ])
+
+
+def decode(raw: Union[bytes, bytearray, memoryview]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    解码缓存数据
+
+    Args:
+        raw: encode() 生成的二进制数据
+
+    Returns:
+        Tuple: (数据, 元数据)
+
+    Raises:
+        ValueError: 数据不是本格式或版本不受支持
+    """
+    if not is_encoded(raw):
+        raise ValueError("不是有效的缓存编码数据")
+
+    raw = memoryview(raw)
+    version = raw[len(CODEC_MAGIC)]
+    if version > CODEC_VERSION:
+        raise ValueError(f"不支持的缓存编码版本: {version}")
+
+    (header_len,) = _HEADER_LEN.unpack(raw[len(CODEC_MAGIC) + 1:_PREFIX_LEN])
+    header = json.loads(bytes(raw[_PREFIX_LEN:_PREFIX_LEN + header_len]).decode('utf-8'))
+    body = raw[_PREFIX_LEN + header_len:]
+
+    encoding = header["encoding"]
+    if encoding == "arrow_ipc":
+        if not ARROW_AVAILABLE:
+            raise ValueError("缓存数据为Arrow格式，但pyarrow未安装")
+        with pa.ipc.open_stream(pa.py_buffer(body)) as reader:
+            data = reader.read_all().to_pandas()
+    else:
+        payload = _decompress(bytes(body), header["compression"])
+        if encoding == "utf8":
+            data = payload.decode('utf-8')
+        elif encoding == "pickle":
+            data = pickle.loads(payload)
+        else:
+            raise ValueError(f"不支持的缓存数据编码: {encoding}")
+
+    return data, header.get("meta", {})
+
+
+def read_legacy_dataframe_json(data: str) -> pd.DataFrame:
+    """解码旧版 to_json(orient='records') 格式的DataFrame"""
+    return pd.read_json(io.StringIO(data), orient='records')
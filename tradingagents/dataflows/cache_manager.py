@@ -15,6 +15,7 @@ import hashlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.tracing import traced
 logger = get_logger('agents')
 
 
@@ -55,11 +56,13 @@ class StockDataCache:
         self.cache_config = {
             'us_stock_data': {
                 'ttl_hours': 2,  # 美股数据缓存2小时（考虑到API限制）
+                'stale_grace_hours': 6,  # 过期后6小时内仍可先返回旧数据，并在后台刷新
                 'max_files': 1000,
                 'description': '美股历史数据'
             },
             'china_stock_data': {
                 'ttl_hours': 1,  # A股数据缓存1小时（实时性要求高）
+                'stale_grace_hours': 4,  # 过期后4小时内仍可先返回旧数据，并在后台刷新
                 'max_files': 1000,
                 'description': 'A股历史数据'
             },
@@ -190,6 +193,34 @@ class StockDataCache:
 
         return is_valid
     
+    def get_ttl_hours(self, symbol: str, data_type: str = 'stock_data') -> float:
+        """获取指定市场和数据类型的缓存TTL（小时）"""
+        cache_type = f"{self._determine_market_type(symbol)}_{data_type}"
+        return self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
+
+    def get_stale_grace_hours(self, symbol: str, data_type: str = 'stock_data') -> float:
+        """获取过期数据的宽限期（小时），宽限期内可先返回旧数据再后台刷新"""
+        cache_type = f"{self._determine_market_type(symbol)}_{data_type}"
+        return self.cache_config.get(cache_type, {}).get('stale_grace_hours', 0)
+
+    def get_cache_age_hours(self, cache_key: str) -> Optional[float]:
+        """获取缓存条目的存在时长（小时），缓存不存在时返回None"""
+        metadata = self._load_metadata(cache_key)
+        if not metadata or 'cached_at' not in metadata:
+            return None
+        age = datetime.now() - datetime.fromisoformat(metadata['cached_at'])
+        return age.total_seconds() / 3600
+
+    @staticmethod
+    def covers_date_range(metadata: Dict[str, Any], start_date: str = None, end_date: str = None) -> bool:
+        """缓存条目的日期范围是否覆盖请求范围（日期为YYYY-MM-DD字符串，未指定的端点不限制）"""
+        cached_start, cached_end = metadata.get('start_date'), metadata.get('end_date')
+        if start_date and (not cached_start or str(cached_start) > str(start_date)):
+            return False
+        if end_date and (not cached_end or str(cached_end) < str(end_date)):
+            return False
+        return True
+
     def save_stock_data(self, symbol: str, data: Union[pd.DataFrame, str],
                        start_date: str = None, end_date: str = None,
                        data_source: str = "unknown") -> str:
@@ -241,6 +272,7 @@ class StockDataCache:
         logger.info(f"💾 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
+    @traced("file_cache.load_stock_data", kind="cache")
     def load_stock_data(self, cache_key: str) -> Optional[Union[pd.DataFrame, str]]:
         """从缓存加载股票数据"""
         metadata = self._load_metadata(cache_key)
@@ -261,6 +293,7 @@ class StockDataCache:
             logger.error(f"⚠️ 加载缓存数据失败: {e}")
             return None
     
+    @traced("file_cache.find_cached_stock_data", kind="cache")
     def find_cached_stock_data(self, symbol: str, start_date: str = None,
                               end_date: str = None, data_source: str = None,
                               max_age_hours: int = None) -> Optional[str]:
@@ -297,7 +330,7 @@ class StockDataCache:
             logger.info(f"🎯 找到精确匹配的{desc}: {symbol} -> {search_key}")
             return search_key
 
-        # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
+        # 如果没有精确匹配，查找部分匹配（相同股票代码、日期范围覆盖请求范围的其他缓存）
         for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
             try:
                 with open(metadata_file, 'r', encoding='utf-8') as f:
@@ -306,7 +339,8 @@ class StockDataCache:
                 if (metadata.get('symbol') == symbol and
                     metadata.get('data_type') == 'stock_data' and
                     metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
+                    (data_source is None or metadata.get('data_source') == data_source) and
+                    self.covers_date_range(metadata, start_date, end_date)):
 
                     cache_key = metadata_file.stem.replace('_meta', '')
                     if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+缓存后台刷新与开盘前预热
+- BackgroundRefresher: 过期缓存先返回旧数据，由后台线程池刷新（stale-while-revalidate）
+- CacheWarmupScheduler: 每个交易日开盘前预热自选股列表的行情缓存
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class BackgroundRefresher:
+    """后台缓存刷新器 - 同一个键同时只有一个刷新任务"""
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-refresh")
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, func: Callable, *args, **kwargs) -> bool:
+        """
+        提交后台刷新任务
+
+        Args:
+            key: 刷新任务的唯一标识（如 symbol+日期区间）
+            func: 刷新函数
+
+        Returns:
+            bool: 是否提交了新任务（已有同键任务在执行时返回False）
+        """
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+
+        def run():
+            try:
+                func(*args, **kwargs)
+                logger.info(f"🔄 后台缓存刷新完成: {key}")
+            except Exception as e:
+                logger.warning(f"⚠️ 后台缓存刷新失败: {key} - {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.discard(key)
+
+        self._executor.submit(run)
+        return True
+
+    def in_flight(self) -> int:
+        """正在执行的刷新任务数"""
+        with self._lock:
+            return len(self._in_flight)
+
+
+class CacheWarmupScheduler:
+    """开盘前缓存预热调度器"""
+
+    def __init__(self, watchlist: List[str], warmup_time: str = "09:00",
+                 lookback_days: int = 365, provider=None):
+        """
+        初始化预热调度器
+
+        Args:
+            watchlist: 需要预热的股票代码列表（A股6位代码）
+            warmup_time: 每个交易日的预热时间（HH:MM，本地时间）
+            lookback_days: 预热的历史数据天数
+            provider: 数据提供器，默认为OptimizedChinaDataProvider全局实例
+        """
+        self.watchlist = [s.strip() for s in watchlist if s.strip()]
+        self.warmup_hour, self.warmup_minute = (int(x) for x in warmup_time.split(':'))
+        self.lookback_days = lookback_days
+        self._provider = provider
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _get_provider(self):
+        if self._provider is None:
+            from .optimized_china_data import get_optimized_china_data_provider
+            self._provider = get_optimized_china_data_provider()
+        return self._provider
+
+    def next_run_time(self, now: datetime = None) -> datetime:
+        """计算下一次预热时间（跳过周末）"""
+        now = now or datetime.now()
+        run_at = now.replace(hour=self.warmup_hour, minute=self.warmup_minute, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        while run_at.weekday() >= 5:
+            run_at += timedelta(days=1)
+        return run_at
+
+    def run_once(self) -> Dict[str, bool]:
+        """立即预热一次自选股列表，返回每只股票是否成功"""
+        provider = self._get_provider()
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=self.lookback_days)).strftime('%Y-%m-%d')
+
+        logger.info(f"🔥 开始预热缓存: {len(self.watchlist)}只股票 ({start_date} 到 {end_date})")
+        results = {}
+        for symbol in self.watchlist:
+            if self._stop_event.is_set():
+                break
+            try:
+                results[symbol] = provider.refresh_stock_data(symbol, start_date, end_date)
+            except Exception as e:
+                logger.warning(f"⚠️ 预热缓存失败: {symbol} - {e}")
+                results[symbol] = False
+
+        logger.info(f"✅ 缓存预热完成: 成功{sum(results.values())}/{len(results)}")
+        return results
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            run_at = self.next_run_time()
+            wait_seconds = (run_at - datetime.now()).total_seconds()
+            logger.info(f"⏰ 下次缓存预热时间: {run_at.strftime('%Y-%m-%d %H:%M')}")
+            if self._stop_event.wait(timeout=max(wait_seconds, 0)):
+                break
+            self.run_once()
+
+    def start(self):
+        """在后台守护线程中启动调度"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="cache-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止调度"""
+        self._stop_event.set()
+
+
+# 全局实例
+_background_refresher = None
+_warmup_scheduler = None
+_init_lock = threading.Lock()
+
+
+def get_background_refresher() -> BackgroundRefresher:
+    """获取全局后台刷新器"""
+    global _background_refresher
+    if _background_refresher is None:
+        with _init_lock:
+            if _background_refresher is None:
+                _background_refresher = BackgroundRefresher()
+    return _background_refresher
+
+
+def start_cache_warmup_scheduler() -> Optional[CacheWarmupScheduler]:
+    """
+    根据环境变量启动开盘前缓存预热（每个进程只启动一次）
+
+    环境变量:
+        CACHE_WARMUP_ENABLED: 是否启用（true/false）
+        CACHE_WARMUP_WATCHLIST: 自选股代码，逗号分隔
+        CACHE_WARMUP_TIME: 预热时间，默认09:00
+        CACHE_WARMUP_LOOKBACK_DAYS: 预热的历史天数，默认365
+    """
+    global _warmup_scheduler
+    if os.getenv('CACHE_WARMUP_ENABLED', 'false').lower() != 'true':
+        return None
+
+    with _init_lock:
+        if _warmup_scheduler is None:
+            watchlist = os.getenv('CACHE_WARMUP_WATCHLIST', '').split(',')
+            _warmup_scheduler = CacheWarmupScheduler(
+                watchlist=watchlist,
+                warmup_time=os.getenv('CACHE_WARMUP_TIME', '09:00'),
+                lookback_days=int(os.getenv('CACHE_WARMUP_LOOKBACK_DAYS', 365))
+            )
+            if not _warmup_scheduler.watchlist:
+                logger.warning("⚠️ 缓存预热已启用，但CACHE_WARMUP_WATCHLIST为空")
+            _warmup_scheduler.start()
+            logger.info(f"🔥 缓存预热调度已启动: {len(_warmup_scheduler.watchlist)}只股票")
+    return _warmup_scheduler
@@ -19,6 +19,10 @@ warnings.filterwarnings('ignore')
 from tradingagents.utils.logging_init import setup_dataflow_logging
 logger = setup_dataflow_logging()
 
+# 导入调用链追踪
+from tradingagents.utils.tracing import span
+from tradingagents.utils.provider_executor import get_provider_executor
+
 
 class ChinaDataSource(Enum):
     """中国股票数据源枚举"""
@@ -325,17 +329,18 @@ class DataSourceManager:
 
         try:
             # 根据数据源调用相应的获取方法
-            if self.current_source == ChinaDataSource.TUSHARE:
-                logger.info(f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}'")
-                result = self._get_tushare_data(symbol, start_date, end_date)
-            elif self.current_source == ChinaDataSource.AKSHARE:
-                result = self._get_akshare_data(symbol, start_date, end_date)
-            elif self.current_source == ChinaDataSource.BAOSTOCK:
-                result = self._get_baostock_data(symbol, start_date, end_date)
-            elif self.current_source == ChinaDataSource.TDX:
-                result = self._get_tdx_data(symbol, start_date, end_date)
-            else:
-                result = f"❌ 不支持的数据源: {self.current_source.value}"
+            with span(f"{self.current_source.value}.get_stock_data", kind="data_source", symbol=symbol):
+                if self.current_source == ChinaDataSource.TUSHARE:
+                    logger.info(f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}'")
+                    result = self._get_tushare_data(symbol, start_date, end_date)
+                elif self.current_source == ChinaDataSource.AKSHARE:
+                    result = self._get_akshare_data(symbol, start_date, end_date)
+                elif self.current_source == ChinaDataSource.BAOSTOCK:
+                    result = self._get_baostock_data(symbol, start_date, end_date)
+                elif self.current_source == ChinaDataSource.TDX:
+                    result = self._get_tdx_data(symbol, start_date, end_date)
+                else:
+                    result = f"❌ 不支持的数据源: {self.current_source.value}"
 
             # 记录详细的输出结果
             duration = time.time() - start_time
@@ -654,7 +659,7 @@ class DataSourceManager:
             import akshare as ak
 
             # 尝试获取个股信息
-            stock_info = ak.stock_individual_info_em(symbol=symbol)
+            stock_info = get_provider_executor().call("akshare", ak.stock_individual_info_em, symbol=symbol)
 
             if stock_info is not None and not stock_info.empty:
                 # 转换为字典格式
@@ -692,27 +697,28 @@ class DataSourceManager:
             else:
                 bs_code = f"sz.{symbol}"
 
-            # 登录BaoStock
-            lg = bs.login()
-            if lg.error_code != '0':
-                logger.error(f"❌ [股票信息] BaoStock登录失败: {lg.error_msg}")
-                return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'baostock'}
-
-            # 查询股票基本信息
-            rs = bs.query_stock_basic(code=bs_code)
-            if rs.error_code != '0':
-                bs.logout()
-                logger.error(f"❌ [股票信息] BaoStock查询失败: {rs.error_msg}")
+            def query_basic():
+                # BaoStock的会话是进程级的，登录-查询-登出作为一次执行器调用完成
+                lg = bs.login()
+                if lg.error_code != '0':
+                    logger.error(f"❌ [股票信息] BaoStock登录失败: {lg.error_msg}")
+                    return None
+                try:
+                    rs = bs.query_stock_basic(code=bs_code)
+                    if rs.error_code != '0':
+                        logger.error(f"❌ [股票信息] BaoStock查询失败: {rs.error_msg}")
+                        return None
+                    rows = []
+                    while (rs.error_code == '0') & rs.next():
+                        rows.append(rs.get_row_data())
+                    return rows
+                finally:
+                    bs.logout()
+
+            data_list = get_provider_executor().call("baostock", query_basic)
+            if data_list is None:
                 return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'baostock'}
 
-            # 解析结果
-            data_list = []
-            while (rs.error_code == '0') & rs.next():
-                data_list.append(rs.get_row_data())
-
-            # 登出
-            bs.logout()
-
             if data_list:
                 # BaoStock返回格式: [code, code_name, ipoDate, outDate, type, status]
                 info = {'symbol': symbol, 'source': 'baostock'}
@@ -8,14 +8,20 @@ import os
 import json
 import pickle
 import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Tuple, Union
 import pandas as pd
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .cache_codec import CODEC_FORMAT, encode, decode, is_encoded, read_legacy_dataframe_json
+from tradingagents.config.redis_pool import get_redis_client
+from tradingagents.utils.tracing import traced
+
 # MongoDB
 try:
     from pymongo import MongoClient
@@ -67,6 +73,12 @@ class DatabaseCacheManager:
         self.mongodb_client = None
         self.mongodb_db = None
         self.redis_client = None
+
+        # find_cached_stock_data 查到的数据暂存，供紧接着的 load_stock_data 直接使用，
+        # 避免 exists()+get() 或两次 find_one 的重复往返
+        self._prefetched: "OrderedDict[str, tuple]" = OrderedDict()
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_max = 64
         
         self._init_mongodb()
         self._init_redis()
@@ -106,12 +118,11 @@ class DatabaseCacheManager:
             return
         
         try:
-            self.redis_client = redis.from_url(
+            # 使用共享连接池，缓存数据为二进制编码
+            self.redis_client = get_redis_client(
                 self.redis_url,
                 db=self.redis_db,
-                socket_timeout=5,
-                socket_connect_timeout=5,
-                decode_responses=True
+                decode_responses=False
             )
             # 测试连接
             self.redis_client.ping()
@@ -169,6 +180,51 @@ class DatabaseCacheManager:
         
         cache_key = hashlib.md5(params_str.encode()).hexdigest()[:16]
         return f"{data_type}:{symbol}:{cache_key}"
+
+    @staticmethod
+    def _decode_redis_payload(raw: Union[bytes, str]) -> Tuple[Any, Dict[str, Any]]:
+        """解码Redis缓存数据，兼容旧版JSON格式"""
+        if is_encoded(raw):
+            return decode(raw)
+
+        # 旧版格式: json.dumps({"data": ..., "data_format": ...})
+        data_dict = json.loads(raw)
+        data = data_dict.pop("data")
+        if data_dict.get("data_format") == "dataframe_json":
+            data = read_legacy_dataframe_json(data)
+        return data, data_dict
+
+    def _stash_prefetched(self, cache_key: str, source: str, payload: Any):
+        """暂存查找阶段已取回的数据"""
+        with self._prefetch_lock:
+            self._prefetched[cache_key] = (source, payload)
+            self._prefetched.move_to_end(cache_key)
+            while len(self._prefetched) > self._prefetch_max:
+                self._prefetched.popitem(last=False)
+
+    def _pop_prefetched(self, cache_key: str) -> Optional[tuple]:
+        """取出暂存的数据（只使用一次）"""
+        with self._prefetch_lock:
+            return self._prefetched.pop(cache_key, None)
+
+    def _discard_prefetched(self, cache_key: str = None):
+        """缓存写入或清理后丢弃暂存的旧数据，cache_key为None时全部丢弃"""
+        with self._prefetch_lock:
+            if cache_key is None:
+                self._prefetched.clear()
+            else:
+                self._prefetched.pop(cache_key, None)
+
+    @staticmethod
+    def _decode_mongodb_data(doc: Dict[str, Any]) -> Any:
+        """解码MongoDB文档中的数据，兼容旧版JSON格式"""
+        data_format = doc.get("data_format")
+        if data_format == CODEC_FORMAT:
+            data, _ = decode(doc["data"])
+            return data
+        if data_format == "dataframe_json":
+            return read_legacy_dataframe_json(doc["data"])
+        return doc["data"]
     
     def save_stock_data(self, symbol: str, data: Union[pd.DataFrame, str],
                        start_date: str = None, end_date: str = None,
@@ -215,13 +271,11 @@ class DatabaseCacheManager:
             "updated_at": datetime.utcnow()
         }
         
-        # 处理数据格式
-        if isinstance(data, pd.DataFrame):
-            doc["data"] = data.to_json(orient='records', date_format='iso')
-            doc["data_format"] = "dataframe_json"
-        else:
-            doc["data"] = str(data)
-            doc["data_format"] = "text"
+        # 处理数据格式（二进制编码，DataFrame使用Arrow IPC）
+        if not isinstance(data, pd.DataFrame):
+            data = str(data)
+        doc["data"] = encode(data)
+        doc["data_format"] = CODEC_FORMAT
         
         # 保存到MongoDB（持久化）
         if self.mongodb_db is not None:
@@ -235,9 +289,7 @@ class DatabaseCacheManager:
         # 保存到Redis（快速缓存，6小时过期）
         if self.redis_client:
             try:
-                redis_data = {
-                    "data": doc["data"],
-                    "data_format": doc["data_format"],
+                redis_meta = {
                     "symbol": symbol,
                     "data_source": data_source,
                     "created_at": doc["created_at"].isoformat()
@@ -245,29 +297,31 @@ class DatabaseCacheManager:
                 self.redis_client.setex(
                     cache_key,
                     6 * 3600,  # 6小时过期
-                    json.dumps(redis_data, ensure_ascii=False)
+                    encode(data, redis_meta)
                 )
                 logger.info(f"⚡ 股票数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ Redis缓存失败: {e}")
+
+        # 查找阶段暂存的是写入前的旧数据，之后的加载应读取刚写入的数据
+        self._discard_prefetched(cache_key)
         
         return cache_key
     
+    @traced("db_cache.load_stock_data", kind="cache")
     def load_stock_data(self, cache_key: str) -> Optional[Union[pd.DataFrame, str]]:
         """从Redis或MongoDB加载股票数据"""
+        prefetched = self._pop_prefetched(cache_key)
+        source, payload = prefetched if prefetched else (None, None)
         
         # 首先尝试从Redis加载（更快）
-        if self.redis_client:
+        if self.redis_client and source != "mongodb":
             try:
-                redis_data = self.redis_client.get(cache_key)
+                redis_data = payload if source == "redis" else self.redis_client.get(cache_key)
                 if redis_data:
-                    data_dict = json.loads(redis_data)
+                    data, _ = self._decode_redis_payload(redis_data)
                     logger.info(f"⚡ 从Redis加载数据: {cache_key}")
-                    
-                    if data_dict["data_format"] == "dataframe_json":
-                        return pd.read_json(data_dict["data"], orient='records')
-                    else:
-                        return data_dict["data"]
+                    return data
             except Exception as e:
                 logger.error(f"⚠️ Redis加载失败: {e}")
         
@@ -275,17 +329,16 @@ class DatabaseCacheManager:
         if self.mongodb_db is not None:
             try:
                 collection = self.mongodb_db.stock_data
-                doc = collection.find_one({"_id": cache_key})
+                doc = payload if source == "mongodb" else collection.find_one({"_id": cache_key})
                 
                 if doc:
                     logger.info(f"💾 从MongoDB加载数据: {cache_key}")
+                    data = self._decode_mongodb_data(doc)
                     
-                    # 同时更新到Redis缓存
+                    # 同时更新到Redis缓存（旧版数据在此转为二进制格式）
                     if self.redis_client:
                         try:
-                            redis_data = {
-                                "data": doc["data"],
-                                "data_format": doc["data_format"],
+                            redis_meta = {
                                 "symbol": doc["symbol"],
                                 "data_source": doc["data_source"],
                                 "created_at": doc["created_at"].isoformat()
@@ -293,22 +346,20 @@ class DatabaseCacheManager:
                             self.redis_client.setex(
                                 cache_key,
                                 6 * 3600,
-                                json.dumps(redis_data, ensure_ascii=False)
+                                encode(data, redis_meta)
                             )
                             logger.info(f"⚡ 数据已同步到Redis缓存")
                         except Exception as e:
                             logger.error(f"⚠️ Redis同步失败: {e}")
                     
-                    if doc["data_format"] == "dataframe_json":
-                        return pd.read_json(doc["data"], orient='records')
-                    else:
-                        return doc["data"]
+                    return data
                         
             except Exception as e:
                 logger.error(f"⚠️ MongoDB加载失败: {e}")
         
         return None
     
+    @traced("db_cache.find_cached_stock_data", kind="cache")
     def find_cached_stock_data(self, symbol: str, start_date: str = None,
                               end_date: str = None, data_source: str = None,
                               max_age_hours: int = 6) -> Optional[str]:
@@ -320,10 +371,16 @@ class DatabaseCacheManager:
                                            end_date=end_date,
                                            source=data_source)
         
-        # 检查Redis中是否有精确匹配
-        if self.redis_client and self.redis_client.exists(exact_key):
-            logger.info(f"⚡ Redis中找到精确匹配: {symbol} -> {exact_key}")
-            return exact_key
+        # 检查Redis中是否有精确匹配（单次GET，数据暂存供load_stock_data使用）
+        if self.redis_client:
+            try:
+                redis_data = self.redis_client.get(exact_key)
+                if redis_data:
+                    self._stash_prefetched(exact_key, "redis", redis_data)
+                    logger.info(f"⚡ Redis中找到精确匹配: {symbol} -> {exact_key}")
+                    return exact_key
+            except Exception as e:
+                logger.error(f"⚠️ Redis查询失败: {e}")
         
         # 检查MongoDB中的匹配项
         if self.mongodb_db is not None:
@@ -347,6 +404,7 @@ class DatabaseCacheManager:
                 
                 if doc:
                     cache_key = doc["_id"]
+                    self._stash_prefetched(cache_key, "mongodb", doc)
                     logger.info(f"💾 MongoDB中找到匹配: {symbol} -> {cache_key}")
                     return cache_key
                     
@@ -390,8 +448,7 @@ class DatabaseCacheManager:
         # 保存到Redis（24小时过期）
         if self.redis_client:
             try:
-                redis_data = {
-                    "data": news_data,
+                redis_meta = {
                     "symbol": symbol,
                     "data_source": data_source,
                     "created_at": doc["created_at"].isoformat()
@@ -399,7 +456,7 @@ class DatabaseCacheManager:
                 self.redis_client.setex(
                     cache_key,
                     24 * 3600,  # 24小时过期
-                    json.dumps(redis_data, ensure_ascii=False)
+                    encode(news_data, redis_meta)
                 )
                 logger.info(f"⚡ 新闻数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
@@ -441,8 +498,7 @@ class DatabaseCacheManager:
         # 保存到Redis（24小时过期）
         if self.redis_client:
             try:
-                redis_data = {
-                    "data": fundamentals_data,
+                redis_meta = {
                     "symbol": symbol,
                     "data_source": data_source,
                     "analysis_date": analysis_date,
@@ -451,7 +507,7 @@ class DatabaseCacheManager:
                 self.redis_client.setex(
                     cache_key,
                     24 * 3600,  # 24小时过期
-                    json.dumps(redis_data, ensure_ascii=False)
+                    encode(fundamentals_data, redis_meta)
                 )
                 logger.info(f"⚡ 基本面数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
@@ -508,6 +564,7 @@ class DatabaseCacheManager:
                 logger.error(f"⚠️ MongoDB清理失败: {e}")
 
         # Redis会自动过期，不需要手动清理
+        self._discard_prefetched()
         logger.info(f"🧹 总共清理了 {cleared_count} 条过期记录")
         return cleared_count
 
@@ -13,6 +13,7 @@ import os
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
+from tradingagents.utils.provider_executor import get_provider_executor
 
 
 
@@ -71,10 +72,12 @@ class HKStockProvider:
                     
                     # 使用yfinance获取数据
                     ticker = yf.Ticker(symbol)
-                    data = ticker.history(
+                    data = get_provider_executor().call(
+                        "yfinance", ticker.history,
                         start=start_date,
                         end=end_date,
-                        timeout=self.timeout
+                        timeout=self.timeout,
+                        timeout_arg="timeout"
                     )
                     
                     if not data.empty:
@@ -128,7 +131,7 @@ class HKStockProvider:
             self._wait_for_rate_limit()
             
             ticker = yf.Ticker(symbol)
-            info = ticker.info
+            info = get_provider_executor().call("yfinance", lambda: ticker.info, timeout=self.timeout)
             
             if info and 'symbol' in info:
                 return {
@@ -179,7 +182,9 @@ class HKStockProvider:
             ticker = yf.Ticker(symbol)
             
             # 获取最新的历史数据（1天）
-            data = ticker.history(period="1d", timeout=self.timeout)
+            data = get_provider_executor().call(
+                "yfinance", ticker.history, period="1d", timeout=self.timeout, timeout_arg="timeout"
+            )
             
             if not data.empty:
                 latest = data.iloc[-1]
@@ -1,66 +1,44 @@
 from typing import Annotated, Dict
 import time
 import os
-from .reddit_utils import fetch_top_from_category
-from .chinese_finance_utils import get_chinese_social_sentiment
-from .googlenews_utils import *
-from .finnhub_utils import get_data_in_range
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_dataflow_logging
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.provider_registry import get_data_providers, lazy_import
+from tradingagents.utils.provider_executor import get_provider_executor
 logger = get_logger('agents')
 logger = setup_dataflow_logging()
 
-# 导入港股工具
-try:
-    from .hk_stock_utils import get_hk_stock_data, get_hk_stock_info
-    HK_STOCK_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ 港股工具不可用: {e}")
-    HK_STOCK_AVAILABLE = False
-
-# 导入AKShare港股工具
-try:
-    from .akshare_utils import get_hk_stock_data_akshare, get_hk_stock_info_akshare
-    AKSHARE_HK_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ AKShare港股工具不可用: {e}")
-    AKSHARE_HK_AVAILABLE = False
-
-# 尝试导入yfinance相关模块，如果失败则跳过
-try:
-    from .yfin_utils import *
-    YFIN_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ yfinance工具不可用: {e}")
-    YFIN_AVAILABLE = False
-
-try:
-    from .stockstats_utils import *
-    STOCKSTATS_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ stockstats工具不可用: {e}")
-    STOCKSTATS_AVAILABLE = False
+# 数据源工具（yfinance、stockstats、港股、AKShare、新闻抓取等）在首次调用时才导入
+_providers = get_data_providers()
+
+# 兼容旧代码直接导入的可用性标志，访问时才检查依赖
+_AVAILABILITY_FLAGS = {
+    "HK_STOCK_AVAILABLE": "hk_stock_data",
+    "AKSHARE_HK_AVAILABLE": "akshare_hk_data",
+    "YFIN_AVAILABLE": "yfin_utils",
+    "STOCKSTATS_AVAILABLE": "stockstats_utils",
+    "YF_AVAILABLE": "yfinance",
+}
+
+
+def __getattr__(name):
+    if name in _AVAILABILITY_FLAGS:
+        return _providers.is_available(_AVAILABILITY_FLAGS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 from dateutil.relativedelta import relativedelta
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 import os
-import pandas as pd
 from tqdm import tqdm
-from openai import OpenAI
-
-# 尝试导入yfinance，如果失败则设置为None
-try:
-    import yfinance as yf
-    YF_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"⚠️ yfinance库不可用: {e}")
-    yf = None
-    YF_AVAILABLE = False
+
+pd = lazy_import("pandas")
 from .config import get_config, set_config, DATA_DIR
 
 
@@ -88,7 +66,7 @@ def get_finnhub_news(
     before = start_date - relativedelta(days=look_back_days)
     before = before.strftime("%Y-%m-%d")
 
-    result = get_data_in_range(ticker, before, curr_date, "news_data", DATA_DIR)
+    result = _providers.get("finnhub_data")(ticker, before, curr_date, "news_data", DATA_DIR)
 
     if len(result) == 0:
         error_msg = f"⚠️ 无法获取{ticker}的新闻数据 ({before} 到 {curr_date})\n"
@@ -134,7 +112,7 @@ def get_finnhub_company_insider_sentiment(
     before = date_obj - relativedelta(days=look_back_days)
     before = before.strftime("%Y-%m-%d")
 
-    data = get_data_in_range(ticker, before, curr_date, "insider_senti", DATA_DIR)
+    data = _providers.get("finnhub_data")(ticker, before, curr_date, "insider_senti", DATA_DIR)
 
     if len(data) == 0:
         return ""
@@ -175,7 +153,7 @@ def get_finnhub_company_insider_transactions(
     before = date_obj - relativedelta(days=look_back_days)
     before = before.strftime("%Y-%m-%d")
 
-    data = get_data_in_range(ticker, before, curr_date, "insider_trans", DATA_DIR)
+    data = _providers.get("finnhub_data")(ticker, before, curr_date, "insider_trans", DATA_DIR)
 
     if len(data) == 0:
         return ""
@@ -337,6 +315,11 @@ def get_simfin_income_statements(
     )
 
 
+def get_chinese_social_sentiment(ticker: str, curr_date: str) -> str:
+    """中国社交媒体和财经平台情绪分析（首次调用时加载chinese_finance_utils）"""
+    return _providers.get("chinese_social_sentiment")(ticker, curr_date)
+
+
 def get_google_news(
     query: Annotated[str, "Query to search with"],
     curr_date: Annotated[str, "Curr date in yyyy-mm-dd format"],
@@ -348,7 +331,7 @@ def get_google_news(
     before = start_date - relativedelta(days=look_back_days)
     before = before.strftime("%Y-%m-%d")
 
-    news_results = getNewsData(query, before, curr_date)
+    news_results = _providers.get("google_news")(query, before, curr_date)
 
     news_str = ""
 
@@ -390,7 +373,7 @@ def get_reddit_global_news(
 
     while curr_date <= start_date:
         curr_date_str = curr_date.strftime("%Y-%m-%d")
-        fetch_result = fetch_top_from_category(
+        fetch_result = _providers.get("reddit")(
             "global_news",
             curr_date_str,
             max_limit_per_day,
@@ -447,7 +430,7 @@ def get_reddit_company_news(
 
     while curr_date <= start_date:
         curr_date_str = curr_date.strftime("%Y-%m-%d")
-        fetch_result = fetch_top_from_category(
+        fetch_result = _providers.get("reddit")(
             "company_news",
             curr_date_str,
             max_limit_per_day,
@@ -623,7 +606,7 @@ def get_stockstats_indicator(
     curr_date = curr_date.strftime("%Y-%m-%d")
 
     try:
-        indicator_value = StockstatsUtils.get_stock_stats(
+        indicator_value = _providers.get("stockstats_utils").get_stock_stats(
             symbol,
             indicator,
             curr_date,
@@ -686,8 +669,9 @@ def get_YFin_data_online(
     end_date: Annotated[str, "End date in yyyy-mm-dd format"],
 ):
     # 检查yfinance是否可用
-    if not YF_AVAILABLE or yf is None:
+    if not _providers.is_available("yfinance"):
         return "yfinance库不可用，无法获取美股数据"
+    yf = _providers.get("yfinance")
 
     datetime.strptime(start_date, "%Y-%m-%d")
     datetime.strptime(end_date, "%Y-%m-%d")
@@ -696,7 +680,9 @@ def get_YFin_data_online(
     ticker = yf.Ticker(symbol.upper())
 
     # Fetch historical data for the specified date range
-    data = ticker.history(start=start_date, end=end_date)
+    data = get_provider_executor().call(
+        "yfinance", ticker.history, start=start_date, end=end_date, timeout_arg="timeout"
+    )
 
     # Check if data is empty
     if data.empty:
@@ -762,7 +748,7 @@ def get_YFin_data(
 
 def get_stock_news_openai(ticker, curr_date):
     config = get_config()
-    client = OpenAI(base_url=config["backend_url"])
+    client = _providers.get("openai")(base_url=config["backend_url"])
 
     response = client.responses.create(
         model=config["quick_think_llm"],
@@ -797,7 +783,7 @@ def get_stock_news_openai(ticker, curr_date):
 
 def get_global_news_openai(curr_date):
     config = get_config()
-    client = OpenAI(base_url=config["backend_url"])
+    client = _providers.get("openai")(base_url=config["backend_url"])
 
     response = client.responses.create(
         model=config["quick_think_llm"],
@@ -1013,7 +999,7 @@ def get_fundamentals_openai(ticker, curr_date):
         
         logger.debug(f"📊 [DEBUG] 尝试使用OpenAI获取 {ticker} 的基本面数据...")
         
-        client = OpenAI(base_url=config["backend_url"])
+        client = _providers.get("openai")(base_url=config["backend_url"])
 
         response = client.responses.create(
             model=config["quick_think_llm"],
@@ -1383,10 +1369,10 @@ def get_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str
         logger.info(f"🇭🇰 获取港股数据: {symbol}")
 
         # 优先使用AKShare港股数据（国内数据源，港股支持更好，更稳定）
-        if AKSHARE_HK_AVAILABLE:
+        if _providers.is_available("akshare_hk_data"):
             try:
                 logger.info(f"🔄 优先使用AKShare获取港股数据: {symbol}")
-                result = get_hk_stock_data_akshare(symbol, start_date, end_date)
+                result = _providers.get("akshare_hk_data")(symbol, start_date, end_date)
                 if result and "❌" not in result:
                     logger.info(f"✅ AKShare港股数据获取成功: {symbol}")
                     return result
@@ -1396,10 +1382,10 @@ def get_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str
                 logger.error(f"⚠️ AKShare港股数据获取失败: {e}")
 
         # 备用方案1：使用Yahoo Finance港股工具
-        if HK_STOCK_AVAILABLE:
+        if _providers.is_available("hk_stock_data"):
             try:
                 logger.info(f"🔄 使用Yahoo Finance备用方案获取港股数据: {symbol}")
-                result = get_hk_stock_data(symbol, start_date, end_date)
+                result = _providers.get("hk_stock_data")(symbol, start_date, end_date)
                 if result and "❌" not in result:
                     logger.info(f"✅ Yahoo Finance港股数据获取成功: {symbol}")
                     return result
@@ -1440,10 +1426,10 @@ def get_hk_stock_info_unified(symbol: str) -> Dict:
     """
     try:
         # 优先使用AKShare（国内数据源，港股支持更好）
-        if AKSHARE_HK_AVAILABLE:
+        if _providers.is_available("akshare_hk_data"):
             try:
                 logger.info(f"🔄 优先使用AKShare获取港股信息: {symbol}")
-                result = get_hk_stock_info_akshare(symbol)
+                result = _providers.get("akshare_hk_info")(symbol)
                 if result and 'error' not in result and not result.get('name', '').startswith('港股'):
                     logger.info(f"✅ AKShare成功获取港股信息: {symbol} -> {result.get('name', 'N/A')}")
                     return result
@@ -1453,10 +1439,10 @@ def get_hk_stock_info_unified(symbol: str) -> Dict:
                 logger.error(f"⚠️ AKShare港股信息获取失败: {e}")
 
         # 备用方案1：使用Yahoo Finance港股工具
-        if HK_STOCK_AVAILABLE:
+        if _providers.is_available("hk_stock_data"):
             try:
                 logger.info(f"🔄 使用Yahoo Finance备用方案获取港股信息: {symbol}")
-                result = get_hk_stock_info(symbol)
+                result = _providers.get("hk_stock_info")(symbol)
                 if result and 'error' not in result and not result.get('name', '').startswith('港股'):
                     logger.info(f"✅ Yahoo Finance成功获取港股信息: {symbol} -> {result.get('name', 'N/A')}")
                     return result
@@ -1716,7 +1702,7 @@ def get_index_technical_indicators(ts_code: str, start_date: str = None, end_dat
             return f"❌ 无法获取指数{ts_code}数据，无法计算技术指标"
         
         # 计算技术指标
-        if STOCKSTATS_AVAILABLE:
+        if _providers.is_available("stockstats_utils"):
             try:
                 from .stockstats_utils import calculate_technical_indicators
                 
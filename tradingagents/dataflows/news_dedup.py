@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+新闻近似去重
+基于标题+正文的字符shingle计算MinHash签名，估计的Jaccard相似度达到阈值即视为同一新闻
+
+- 字符级shingle对中英文都适用，不依赖分词
+- 签名切成若干段建立LSH倒排索引，每条新闻只与同段桶中的候选比较，整体接近线性
+- 新闻普遍较短，SimHash在百字级文本上对少量改动过于敏感，因此使用MinHash
+"""
+
+import re
+import hashlib
+from typing import Callable, Dict, List, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+NUM_PERM = 64
+# LSH分段：16段×4行，相似度0.7的两条新闻成为候选的概率约99%
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+# 视为重复的Jaccard相似度阈值
+DEFAULT_THRESHOLD = 0.7
+# 参与签名计算的正文长度，转载稿常在结尾追加不同的来源说明
+BODY_CHARS = 300
+
+_NORMALIZE_RE = re.compile(r"[\W_]+", re.UNICODE)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    """小写并去除标点和空白"""
+    return _NORMALIZE_RE.sub("", (text or "").lower())
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """字符级shingle集合"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(text: str, shingle_size: int = 3) -> np.ndarray:
+    """计算文本的MinHash签名（NUM_PERM个32位哈希的最小值）"""
+    items = shingles(normalize_text(text), shingle_size)
+    if not items:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in items),
+        dtype=np.uint64, count=len(items)
+    )
+    # 向量化计算所有置换: (a*h + b) mod p，截断到32位
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """由签名估计Jaccard相似度"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def news_text(title: str, content: str = "") -> str:
+    """参与签名计算的新闻文本：标题 + 正文前BODY_CHARS个字符"""
+    return f"{title} {(content or '')[:BODY_CHARS]}"
+
+
+def deduplicate(items: Sequence[T], key: Callable[[T], str],
+                threshold: float = DEFAULT_THRESHOLD) -> List[T]:
+    """
+    近似去重，保留每组重复中最先出现的一条
+
+    Args:
+        items: 待去重的条目（调用方按优先级排好序）
+        key: 取条目文本的函数
+        threshold: 视为重复的Jaccard相似度
+
+    Returns:
+        List: 去重后的条目，保持原有顺序
+    """
+    buckets: Dict[tuple, List[int]] = {}
+    kept_signatures: List[np.ndarray] = []
+    unique: List[T] = []
+
+    for item in items:
+        signature = minhash(key(item))
+        bands = [(i, signature[i * LSH_ROWS:(i + 1) * LSH_ROWS].tobytes()) for i in range(LSH_BANDS)]
+
+        candidates = {idx for band in bands for idx in buckets.get(band, ())}
+        if any(estimate_similarity(signature, kept_signatures[idx]) >= threshold for idx in candidates):
+            continue
+
+        index = len(kept_signatures)
+        kept_signatures.append(signature)
+        for band in bands:
+            buckets.setdefault(band, []).append(index)
+        unique.append(item)
+
+    return unique
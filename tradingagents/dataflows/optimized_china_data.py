@@ -57,37 +57,18 @@ class OptimizedChinaDataProvider:
         
         # 检查缓存（除非强制刷新）
         if not force_refresh:
-            cache_key = self.cache.find_cached_stock_data(
-                symbol=symbol,
-                start_date=start_date,
-                end_date=end_date,
-                data_source="tdx"
-            )
-            
-            if cache_key:
-                cached_data = self.cache.load_stock_data(cache_key)
-                if cached_data:
-                    logger.info(f"⚡ 从缓存加载A股数据: {symbol}")
-                    return cached_data
+            cached_data = self._get_cached_stock_data(symbol, start_date, end_date)
+            if cached_data:
+                return cached_data
         
         # 缓存未命中，从Tushare数据接口获取
         logger.info(f"🌐 从Tushare数据接口获取数据: {symbol}")
         
         try:
-            # API限制处理
-            self._wait_for_rate_limit()
-            
-            # 调用统一数据源接口（默认Tushare，支持备用数据源）
-            from .data_source_manager import get_china_stock_data_unified
-
-            formatted_data = get_china_stock_data_unified(
-                symbol=symbol,
-                start_date=start_date,
-                end_date=end_date
-            )
+            formatted_data = self._fetch_and_cache(symbol, start_date, end_date)
 
             # 检查是否获取成功
-            if "❌" in formatted_data or "错误" in formatted_data:
+            if formatted_data is None:
                 logger.error(f"❌ 数据源API调用失败: {symbol}")
                 # 尝试从旧缓存获取数据
                 old_cache = self._try_get_old_cache(symbol, start_date, end_date)
@@ -98,15 +79,6 @@ class OptimizedChinaDataProvider:
                 # 生成备用数据
                 return self._generate_fallback_data(symbol, start_date, end_date, "数据源API调用失败")
             
-            # 保存到缓存
-            self.cache.save_stock_data(
-                symbol=symbol,
-                data=formatted_data,
-                start_date=start_date,
-                end_date=end_date,
-                data_source="unified"  # 使用统一数据源标识
-            )
-            
             logger.info(f"✅ A股数据获取成功: {symbol}")
             return formatted_data
             
@@ -122,6 +94,83 @@ class OptimizedChinaDataProvider:
             
             # 生成备用数据
             return self._generate_fallback_data(symbol, start_date, end_date, error_msg)
+
+    def _get_cached_stock_data(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
+        """
+        查找缓存（stale-while-revalidate）
+        
+        TTL内的缓存直接返回；超过TTL但仍在宽限期内的缓存也直接返回，
+        同时提交后台刷新任务，避免请求线程等待数据源
+        """
+        ttl_hours = self.cache.get_ttl_hours(symbol)
+        grace_hours = self.cache.get_stale_grace_hours(symbol)
+
+        cache_key = self.cache.find_cached_stock_data(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            data_source="unified",
+            max_age_hours=ttl_hours + grace_hours
+        )
+        if not cache_key:
+            return None
+
+        cached_data = self.cache.load_stock_data(cache_key)
+        if not cached_data:
+            return None
+
+        age_hours = self.cache.get_cache_age_hours(cache_key)
+        if age_hours is not None and age_hours > ttl_hours:
+            from .cache_refresher import get_background_refresher
+            submitted = get_background_refresher().submit(
+                f"china_stock_data:{symbol}:{start_date}:{end_date}",
+                self.refresh_stock_data, symbol, start_date, end_date
+            )
+            logger.info(f"♻️ 返回过期{age_hours:.1f}小时的缓存数据: {symbol}"
+                        f"{'，已提交后台刷新' if submitted else '，后台刷新进行中'}")
+        else:
+            logger.info(f"⚡ 从缓存加载A股数据: {symbol}")
+        return cached_data
+
+    def _fetch_and_cache(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
+        """从数据源获取数据并写入缓存，获取失败时返回None"""
+        # API限制处理
+        self._wait_for_rate_limit()
+
+        # 调用统一数据源接口（默认Tushare，支持备用数据源）
+        from .data_source_manager import get_china_stock_data_unified
+
+        formatted_data = get_china_stock_data_unified(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date
+        )
+
+        if "❌" in formatted_data or "错误" in formatted_data:
+            return None
+
+        # 保存到缓存
+        self.cache.save_stock_data(
+            symbol=symbol,
+            data=formatted_data,
+            start_date=start_date,
+            end_date=end_date,
+            data_source="unified"  # 使用统一数据源标识
+        )
+        return formatted_data
+
+    def refresh_stock_data(self, symbol: str, start_date: str, end_date: str) -> bool:
+        """
+        刷新A股数据缓存（供后台刷新和开盘前预热使用）
+        
+        Returns:
+            bool: 是否刷新成功
+        """
+        formatted_data = self._fetch_and_cache(symbol, start_date, end_date)
+        if formatted_data is None:
+            logger.warning(f"⚠️ 刷新A股数据缓存失败: {symbol}")
+            return False
+        return True
     
     def get_fundamentals_data(self, symbol: str, force_refresh: bool = False) -> str:
         """
@@ -583,7 +632,7 @@ class OptimizedChinaDataProvider:
     def _try_get_old_cache(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
         """尝试获取过期的缓存数据作为备用"""
         try:
-            # 查找任何相关的缓存，不考虑TTL
+            # 查找日期范围覆盖请求的相关缓存，不考虑TTL
             for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
                 try:
                     import json
@@ -593,7 +642,8 @@ class OptimizedChinaDataProvider:
                     
                     if (metadata.get('symbol') == symbol and 
                         metadata.get('data_type') == 'stock_data' and
-                        metadata.get('market_type') == 'china'):
+                        metadata.get('market_type') == 'china' and
+                        self.cache.covers_date_range(metadata, start_date, end_date)):
                         
                         cache_key = metadata_file.stem.replace('_meta', '')
                         cached_data = self.cache.load_stock_data(cache_key)
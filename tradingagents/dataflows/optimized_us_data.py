@@ -17,6 +17,7 @@ from .config import get_config
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
+from tradingagents.utils.provider_executor import get_provider_executor
 
 
 class OptimizedUSDataProvider:
@@ -132,7 +133,9 @@ class OptimizedUSDataProvider:
 
                         self._wait_for_rate_limit()
                         ticker = yf.Ticker(symbol)  # 港股代码保持原格式
-                        data = ticker.history(start=start_date, end=end_date)
+                        data = get_provider_executor().call(
+                            "yfinance", ticker.history, start=start_date, end=end_date, timeout_arg="timeout"
+                        )
 
                         if not data.empty:
                             formatted_data = self._format_stock_data(symbol, data, start_date, end_date)
@@ -147,7 +150,9 @@ class OptimizedUSDataProvider:
 
                     # 获取数据
                     ticker = yf.Ticker(symbol.upper())
-                    data = ticker.history(start=start_date, end=end_date)
+                    data = get_provider_executor().call(
+                        "yfinance", ticker.history, start=start_date, end=end_date, timeout_arg="timeout"
+                    )
 
                     if data.empty:
                         error_msg = f"未找到股票 '{symbol}' 在 {start_date} 到 {end_date} 期间的数据"
@@ -6,17 +6,48 @@
 
 import requests
 import json
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 import time
 import os
 from dataclasses import dataclass
 
+from .news_dedup import deduplicate, news_text
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.tracing import span
 logger = get_logger('agents')
 
 
+# 各新闻源的请求地址（测试和离线基准测试时可替换为本地服务）
+DEFAULT_NEWS_URLS = {
+    'finnhub': "https://finnhub.io/api/v1/company-news",
+    'alpha_vantage': "https://www.alphavantage.co/query",
+    'newsapi': "https://newsapi.org/v2/everything",
+}
+
+# 单个新闻源的截止时间（秒），超时的源直接放弃
+DEFAULT_SOURCE_TIMEOUT = 5.0
+# 整体截止时间（秒），到时返回已到达的结果
+DEFAULT_TOTAL_DEADLINE = 8.0
+
+_news_executor = None
+_news_executor_lock = threading.Lock()
+
+
+def _get_news_executor() -> ThreadPoolExecutor:
+    """新闻抓取共享线程池（超时的请求在后台自然结束，不阻塞调用方）"""
+    global _news_executor
+    if _news_executor is None:
+        with _news_executor_lock:
+            if _news_executor is None:
+                _news_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news-fetch")
+    return _news_executor
+
 
 @dataclass
 class NewsItem:
@@ -33,7 +64,17 @@ class NewsItem:
 class RealtimeNewsAggregator:
     """实时新闻聚合器"""
     
-    def __init__(self):
+    def __init__(self, news_urls: Optional[Dict[str, str]] = None,
+                 source_timeouts: Optional[Dict[str, float]] = None,
+                 total_deadline: Optional[float] = None):
+        """
+        初始化新闻聚合器
+
+        Args:
+            news_urls: 覆盖各新闻源的请求地址（如指向本地模拟服务）
+            source_timeouts: 按新闻源覆盖截止时间（秒），默认读取NEWS_SOURCE_TIMEOUT
+            total_deadline: 整体截止时间（秒），默认读取NEWS_TOTAL_DEADLINE
+        """
         self.headers = {
             'User-Agent': 'TradingAgents-CN/1.0'
         }
@@ -42,31 +83,78 @@ class RealtimeNewsAggregator:
         self.finnhub_key = os.getenv('FINNHUB_API_KEY')
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.newsapi_key = os.getenv('NEWSAPI_KEY')
+
+        # 请求地址与截止时间
+        self.news_urls = {**DEFAULT_NEWS_URLS, **(news_urls or {})}
+        self.default_source_timeout = float(os.getenv('NEWS_SOURCE_TIMEOUT', DEFAULT_SOURCE_TIMEOUT))
+        self.source_timeouts = source_timeouts or {}
+        self.total_deadline = total_deadline if total_deadline is not None else \
+            float(os.getenv('NEWS_TOTAL_DEADLINE', DEFAULT_TOTAL_DEADLINE))
+
+        # 最近一次聚合的各源状态: {源名称: {"status": ok/error/timeout, "count": 新闻条数}}
+        self.last_fetch_stats: Dict[str, Dict] = {}
+
+    def _source_timeout(self, source: str) -> float:
+        return self.source_timeouts.get(source, self.default_source_timeout)
+
+    def _get_news_sources(self) -> List[Tuple[str, Callable]]:
+        """启用的新闻源，按优先级排列：专业API > 新闻API > 中文财经源"""
+        sources = []
+        if self.finnhub_key:
+            sources.append(('finnhub', self._get_finnhub_realtime_news))
+        if self.alpha_vantage_key:
+            sources.append(('alpha_vantage', self._get_alpha_vantage_news))
+        if self.newsapi_key:
+            sources.append(('newsapi', self._get_newsapi_news))
+        sources.append(('chinese_finance', self._get_chinese_finance_news))
+        return sources
         
     def get_realtime_stock_news(self, ticker: str, hours_back: int = 6) -> List[NewsItem]:
         """
         获取实时股票新闻
-        优先级：专业API > 新闻API > 搜索引擎
-        """
-        all_news = []
-        
-        # 1. FinnHub实时新闻 (最高优先级)
-        finnhub_news = self._get_finnhub_realtime_news(ticker, hours_back)
-        all_news.extend(finnhub_news)
-        
-        # 2. Alpha Vantage新闻
-        av_news = self._get_alpha_vantage_news(ticker, hours_back)
-        all_news.extend(av_news)
-        
-        # 3. NewsAPI (如果配置了)
-        if self.newsapi_key:
-            newsapi_news = self._get_newsapi_news(ticker, hours_back)
-            all_news.extend(newsapi_news)
-        
-        # 4. 中文财经新闻源
-        chinese_news = self._get_chinese_finance_news(ticker, hours_back)
-        all_news.extend(chinese_news)
         
+        所有新闻源并发请求，每个源有独立的截止时间；到达整体截止时间后
+        只使用已返回的结果，总耗时约等于最慢的有效源而不是各源耗时之和。
+        去重时同一新闻保留优先级最高的源：专业API > 新闻API > 中文财经源
+        """
+        sources = self._get_news_sources()
+        executor = _get_news_executor()
+        start_time = time.perf_counter()
+
+        def run_source(name: str, fetch: Callable) -> List[NewsItem]:
+            with span(f"news.{name}", kind="http", ticker=ticker):
+                return fetch(ticker, hours_back)
+
+        futures = {}
+        for name, fetch in sources:
+            # 复制上下文，使各源的span挂在当前调用链下
+            ctx = contextvars.copy_context()
+            futures[executor.submit(ctx.run, run_source, name, fetch)] = name
+
+        done, not_done = wait(futures, timeout=self.total_deadline)
+
+        results: Dict[str, List[NewsItem]] = {}
+        self.last_fetch_stats = {}
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result() or []
+                self.last_fetch_stats[name] = {"status": "ok", "count": len(results[name])}
+            except Exception as e:
+                logger.error(f"❌ 新闻源{name}获取失败: {e}")
+                self.last_fetch_stats[name] = {"status": "error", "count": 0}
+
+        for future in not_done:
+            future.cancel()
+            name = futures[future]
+            self.last_fetch_stats[name] = {"status": "timeout", "count": 0}
+            logger.warning(f"⏰ 新闻源{name}超过整体截止时间{self.total_deadline:.1f}s，已忽略")
+
+        elapsed = time.perf_counter() - start_time
+        all_news = [item for name, _ in sources for item in results.get(name, [])]
+        logger.info(f"📰 新闻聚合完成: {ticker}, {len(done)}/{len(sources)}个源返回, "
+                    f"{len(all_news)}条新闻, 耗时{elapsed:.2f}s")
+
         # 去重和排序
         unique_news = self._deduplicate_news(all_news)
         return sorted(unique_news, key=lambda x: x.publish_time, reverse=True)
@@ -82,7 +170,7 @@ class RealtimeNewsAggregator:
             start_time = end_time - timedelta(hours=hours_back)
             
             # FinnHub API调用
-            url = "https://finnhub.io/api/v1/company-news"
+            url = self.news_urls['finnhub']
             params = {
                 'symbol': ticker,
                 'from': start_time.strftime('%Y-%m-%d'),
@@ -90,7 +178,8 @@ class RealtimeNewsAggregator:
                 'token': self.finnhub_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers,
+                                    timeout=self._source_timeout('finnhub'))
             response.raise_for_status()
             
             news_data = response.json()
@@ -127,7 +216,7 @@ class RealtimeNewsAggregator:
             return []
         
         try:
-            url = "https://www.alphavantage.co/query"
+            url = self.news_urls['alpha_vantage']
             params = {
                 'function': 'NEWS_SENTIMENT',
                 'tickers': ticker,
@@ -135,7 +224,8 @@ class RealtimeNewsAggregator:
                 'limit': 50
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers,
+                                    timeout=self._source_timeout('alpha_vantage'))
             response.raise_for_status()
             
             data = response.json()
@@ -186,7 +276,7 @@ class RealtimeNewsAggregator:
             
             query = f"{ticker} OR {company_names.get(ticker, ticker)}"
             
-            url = "https://newsapi.org/v2/everything"
+            url = self.news_urls['newsapi']
             params = {
                 'q': query,
                 'language': 'en',
@@ -195,7 +285,8 @@ class RealtimeNewsAggregator:
                 'apiKey': self.newsapi_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers,
+                                    timeout=self._source_timeout('newsapi'))
             response.raise_for_status()
             
             data = response.json()
@@ -205,7 +296,8 @@ class RealtimeNewsAggregator:
                 # 解析时间
                 time_str = item.get('publishedAt', '')
                 try:
-                    publish_time = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
+                    # 转为本地时间的naive datetime，便于与其他源的新闻一起排序
+                    publish_time = datetime.fromisoformat(time_str.replace('Z', '+00:00')).astimezone().replace(tzinfo=None)
                 except:
                     continue
                 
@@ -310,18 +402,12 @@ class RealtimeNewsAggregator:
         return 0.3  # 默认相关性
     
     def _deduplicate_news(self, news_items: List[NewsItem]) -> List[NewsItem]:
-        """去重新闻"""
-        seen_titles = set()
-        unique_news = []
-        
-        for item in news_items:
-            # 简单的标题去重
-            title_key = item.title.lower().strip()
-            if title_key not in seen_titles and len(title_key) > 10:
-                seen_titles.add(title_key)
-                unique_news.append(item)
-        
-        return unique_news
+        """
+        去重新闻：基于标题+正文字符shingle的MinHash签名，经LSH分桶后比较估计的Jaccard相似度，
+        可识别不同来源转载时标题标点、大小写或结尾来源说明不同的同一新闻
+        """
+        valid_news = [item for item in news_items if len(item.title.strip()) > 10]
+        return deduplicate(valid_news, key=lambda item: news_text(item.title, item.content))
     
     def format_news_report(self, news_items: List[NewsItem], ticker: str) -> str:
         """格式化新闻报告"""
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+参考数据批量写入
+股票列表等参考数据（stock_basic_info）刷新时按主键批量upsert到MongoDB：
+
+- 每条文档按内容计算哈希（不含updated_at等易变字段），与库中已存的哈希比较，只写入新增或内容变化的文档
+- 变化的文档按批次以无序bulk_write提交，一次往返写入整批，单条失败不影响同批其他文档
+- 未变化的文档不写入，updated_at保持为内容最后一次变化的时间，依赖updated_at增量拉取的
+  检索索引（stock_search_index）因此只会拉取真正变化的股票
+- 返回写入统计：总数、新增、更新、未变化、失败数、批次数和耗时
+
+用法:
+    writer = ReferenceDataWriter(db['stock_basic_info'], key='code')
+    stats = writer.upsert_many(stock_list)
+"""
+
+import json
+import time
+import hashlib
+from typing import Any, Dict, Iterable, List, Sequence
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+    PYMONGO_AVAILABLE = True
+except ImportError:
+    PYMONGO_AVAILABLE = False
+
+# 不参与内容哈希的字段（每次刷新都会变化）
+VOLATILE_FIELDS = ('updated_at',)
+# 文档中保存内容哈希的字段
+HASH_FIELD = '_content_hash'
+# 每批bulk_write的文档数
+DEFAULT_BATCH_SIZE = 1000
+
+
+def content_hash(doc: Dict[str, Any], exclude: Sequence[str] = VOLATILE_FIELDS) -> str:
+    """文档内容哈希（字段顺序无关，忽略易变字段、_id和哈希字段本身）"""
+    content = {k: v for k, v in doc.items() if k not in exclude and k not in ('_id', HASH_FIELD)}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ReferenceDataWriter:
+    """按内容哈希检测变化、以无序bulk_write批量upsert参考数据"""
+
+    def __init__(self, collection, key: str = 'code', batch_size: int = DEFAULT_BATCH_SIZE,
+                 volatile_fields: Sequence[str] = VOLATILE_FIELDS):
+        """
+        Args:
+            collection: pymongo集合
+            key: 文档主键字段
+            batch_size: 每批写入的文档数
+            volatile_fields: 不参与变化检测的字段
+        """
+        if not PYMONGO_AVAILABLE:
+            raise ImportError("pymongo is not installed. Please install it with: pip install pymongo")
+        self.collection = collection
+        self.key = key
+        self.batch_size = max(int(batch_size), 1)
+        self.volatile_fields = tuple(volatile_fields)
+        self._index_ready = False
+
+    def _ensure_index(self):
+        """主键索引：变化检测的批量查询和upsert的匹配条件都依赖它"""
+        if self._index_ready:
+            return
+        try:
+            self.collection.create_index(self.key)
+        except Exception as e:
+            logger.warning(f"⚠️ 创建{self.key}索引失败: {e}")
+        self._index_ready = True
+
+    def _existing_hashes(self, keys: List[Any]) -> Dict[Any, str]:
+        cursor = self.collection.find({self.key: {'$in': keys}}, {self.key: 1, HASH_FIELD: 1, '_id': 0})
+        return {doc[self.key]: doc.get(HASH_FIELD) for doc in cursor}
+
+    def _write_batch(self, docs: List[Dict[str, Any]], stats: Dict[str, Any]):
+        """写入一批文档中内容变化的部分"""
+        hashes = {doc[self.key]: content_hash(doc, self.volatile_fields) for doc in docs}
+        existing = self._existing_hashes(list(hashes))
+        operations = [
+            UpdateOne({self.key: doc[self.key]}, {'$set': {**doc, HASH_FIELD: hashes[doc[self.key]]}}, upsert=True)
+            for doc in docs if existing.get(doc[self.key]) != hashes[doc[self.key]]
+        ]
+        stats['unchanged'] += len(docs) - len(operations)
+        if not operations:
+            return
+
+        stats['batches'] += 1
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            stats['inserted'] += result.upserted_count
+            stats['updated'] += result.modified_count
+        except BulkWriteError as e:
+            details = e.details or {}
+            stats['inserted'] += details.get('nUpserted', 0)
+            stats['updated'] += details.get('nModified', 0)
+            stats['failed'] += len(details.get('writeErrors', []))
+            logger.error(f"❌ 参考数据批量写入部分失败: {len(details.get('writeErrors', []))}条")
+
+    def upsert_many(self, docs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        批量upsert参考数据，只写入新增或内容变化的文档
+
+        Returns:
+            Dict: total、inserted、updated、unchanged、failed、skipped（缺少主键）、batches、elapsed
+        """
+        start = time.perf_counter()
+        stats = {'total': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0,
+                 'skipped': 0, 'batches': 0, 'elapsed': 0.0}
+
+        # 同一主键出现多次时以最后一条为准
+        unique: Dict[Any, Dict[str, Any]] = {}
+        for doc in docs:
+            stats['total'] += 1
+            if doc.get(self.key) in (None, ''):
+                stats['skipped'] += 1
+                continue
+            unique[doc[self.key]] = doc
+
+        self._ensure_index()
+        pending = list(unique.values())
+        for offset in range(0, len(pending), self.batch_size):
+            self._write_batch(pending[offset:offset + self.batch_size], stats)
+
+        stats['elapsed'] = round(time.perf_counter() - start, 4)
+        return stats
@@ -86,7 +86,17 @@ def search_stocks_by_name(name: str) -> List[Dict[str, Any]]:
         >>> for stock in results:
         logger.info(f"{stock['code']}: {stock['name']}")
     """
-    # 这个功能需要MongoDB支持，暂时通过原有方式实现
+    # 优先使用常驻内存的股票检索索引
+    try:
+        from .stock_search_index import get_stock_search_index
+
+        index = get_stock_search_index()
+        index.ensure_fresh()
+        if len(index) > 0:
+            return index.search(name, limit=None)
+    except Exception as e:
+        logger.error(f"⚠️ 股票检索索引不可用: {e}")
+
     try:
         from ..examples.stock_query_examples import EnhancedStockQueryService
 
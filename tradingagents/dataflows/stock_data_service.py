@@ -14,6 +14,9 @@ import logging
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .stock_search_index import infer_market, infer_category
+from .reference_data_writer import ReferenceDataWriter
+
 try:
     from tradingagents.config.database_manager import get_database_manager
     DATABASE_MANAGER_AVAILABLE = True
@@ -49,6 +52,7 @@ class StockDataService:
     def __init__(self):
         self.db_manager = None
         self.tdx_provider = None
+        self._reference_writer = None
         self._init_services()
     
     def _init_services(self):
@@ -180,32 +184,22 @@ class StockDataService:
             return None
     
     def _cache_to_mongodb(self, data: Any) -> bool:
-        """将数据缓存到MongoDB"""
-        if not self.db_manager or not self.db_manager.mongodb_db:
+        """将数据缓存到MongoDB（按内容哈希只写入变化的记录，批量提交）"""
+        mongodb_client = self.db_manager.get_mongodb_client() if self.db_manager else None
+        if not mongodb_client:
             return False
         
         try:
-            collection = self.db_manager.mongodb_db['stock_basic_info']
-            
-            if isinstance(data, list):
-                # 批量插入
-                for item in data:
-                    collection.update_one(
-                        {'code': item['code']},
-                        {'$set': item},
-                        upsert=True
-                    )
-                logger.info(f"💾 已缓存{len(data)}条记录到MongoDB")
-            elif isinstance(data, dict):
-                # 单条插入
-                collection.update_one(
-                    {'code': data['code']},
-                    {'$set': data},
-                    upsert=True
-                )
-                logger.info(f"💾 已缓存股票{data['code']}到MongoDB")
+            if self._reference_writer is None:
+                db = mongodb_client[self.db_manager.mongodb_config["database"]]
+                self._reference_writer = ReferenceDataWriter(db['stock_basic_info'])
             
-            return True
+            docs = data if isinstance(data, list) else [data]
+            stats = self._reference_writer.upsert_many(docs)
+            logger.info(f"💾 股票基础信息写入MongoDB: 共{stats['total']}条，新增{stats['inserted']}，"
+                        f"更新{stats['updated']}，未变化{stats['unchanged']}，失败{stats['failed']}，"
+                        f"{stats['batches']}批，耗时{stats['elapsed']:.2f}s")
+            return stats['failed'] == 0
             
         except Exception as e:
             logger.error(f"缓存到MongoDB失败: {e}")
@@ -231,27 +225,11 @@ class StockDataService:
     
     def _get_market_name(self, stock_code: str) -> str:
         """根据股票代码判断市场"""
-        if stock_code.startswith(('60', '68', '90')):
-            return '上海'
-        elif stock_code.startswith(('00', '30', '20')):
-            return '深圳'
-        else:
-            return '未知'
+        return infer_market(stock_code)
     
     def _get_stock_category(self, stock_code: str) -> str:
         """根据股票代码判断类别"""
-        if stock_code.startswith('60'):
-            return '沪市主板'
-        elif stock_code.startswith('68'):
-            return '科创板'
-        elif stock_code.startswith('00'):
-            return '深市主板'
-        elif stock_code.startswith('30'):
-            return '创业板'
-        elif stock_code.startswith('20'):
-            return '深市B股'
-        else:
-            return '其他'
+        return infer_category(stock_code)
     
     def get_stock_data_with_fallback(self, stock_code: str, start_date: str, end_date: str) -> str:
         """
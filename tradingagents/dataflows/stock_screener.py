@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+全市场选股筛选引擎
+把本地全市场日线快照一次性读成宽表（交易日 × 股票代码），在一次向量化计算中
+得到所有股票的动量、放量倍数、MACD和RSI状态，再按筛选条件过滤并打分排序。
+
+筛选结果可以直接转换为股票代码列表，交给批量分析流程逐只做深度分析。
+"""
+
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+MACD_STATES = ('golden_cross', 'dead_cross', 'bullish', 'bearish')
+
+BAR_COLUMNS = ['ts_code', 'trade_date', 'close', 'pct_chg', 'vol', 'amount']
+
+# macd_hist以价格为单位，打分使用按收盘价归一化的macd_hist_pct，高价股不会因价格高而占优
+DEFAULT_SCORE_WEIGHTS = {'momentum': 0.4, 'volume_ratio': 0.3, 'macd_hist_pct': 0.3}
+
+
+@dataclass
+class ScreenCriteria:
+    """筛选条件，值为None的条件不参与过滤"""
+    momentum_window: int = 20                 # 动量回看交易日数
+    min_momentum: Optional[float] = None      # 区间涨幅下限，0.05表示+5%
+    max_momentum: Optional[float] = None
+    volume_window: int = 20                   # 放量倍数的均量窗口（不含当日）
+    min_volume_ratio: Optional[float] = None  # 当日成交量 / 前N日均量
+    macd_state: Optional[str] = None          # golden_cross / dead_cross / bullish / bearish
+    min_rsi: Optional[float] = None
+    max_rsi: Optional[float] = None
+    min_amount: Optional[float] = None        # 当日成交额下限（与数据源单位一致，Tushare为千元）
+    min_history: int = 30                     # 窗口内至少需要的交易日数
+    exclude_st: bool = True                   # 排除名称含ST的股票
+    top_n: int = 50
+    weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_SCORE_WEIGHTS))
+
+
+def _pivot(bars: pd.DataFrame, column: str) -> pd.DataFrame:
+    """长表 -> 宽表（行为交易日，列为股票代码）"""
+    return bars.pivot(index='trade_date', columns='ts_code', values=column).sort_index()
+
+
+def compute_indicators(bars: pd.DataFrame, momentum_window: int = 20,
+                       volume_window: int = 20) -> pd.DataFrame:
+    """
+    向量化计算全部股票在最后一个交易日的技术指标
+
+    Args:
+        bars: 长表格式的日线，至少包含 ts_code、trade_date、close、vol 列
+        momentum_window: 动量回看交易日数
+        volume_window: 放量倍数的均量窗口
+
+    Returns:
+        DataFrame: 以ts_code为索引，每只股票一行；最后一个交易日停牌的股票不在结果中
+    """
+    if bars is None or bars.empty:
+        return pd.DataFrame()
+
+    close = _pivot(bars, 'close')
+    vol = _pivot(bars, 'vol')
+    traded = close.notna()
+
+    # 停牌日沿用最近收盘价，使均线和动量在交易日历上对齐
+    close = close.ffill()
+
+    ema_fast = close.ewm(span=12, adjust=False).mean()
+    ema_slow = close.ewm(span=26, adjust=False).mean()
+    dif = ema_fast - ema_slow
+    dea = dif.ewm(span=9, adjust=False).mean()
+    hist = (dif - dea) * 2
+
+    # Wilder平滑的RSI14
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    last_gain, last_loss = gain.iloc[-1], loss.iloc[-1]
+    rsi = 100 - 100 / (1 + last_gain / last_loss.replace(0, np.nan))
+    rsi = rsi.where(last_loss > 0, 100.0)
+
+    last_close = close.iloc[-1]
+    if len(close) > momentum_window:
+        momentum = last_close / close.iloc[-1 - momentum_window] - 1
+    else:
+        momentum = pd.Series(np.nan, index=close.columns)
+
+    previous_vol = vol.iloc[-1 - volume_window:-1].mean()
+    volume_ratio = vol.iloc[-1] / previous_vol.replace(0, np.nan)
+
+    last_hist = hist.iloc[-1]
+    prev_hist = hist.iloc[-2] if len(hist) > 1 else pd.Series(np.nan, index=hist.columns)
+    macd_state = np.select(
+        [(last_hist > 0) & (prev_hist <= 0), (last_hist < 0) & (prev_hist >= 0), last_hist > 0],
+        ['golden_cross', 'dead_cross', 'bullish'],
+        default='bearish'
+    )
+
+    result = pd.DataFrame({
+        'trade_date': close.index[-1],
+        'close': last_close,
+        'momentum': momentum,
+        'volume_ratio': volume_ratio,
+        'macd_dif': dif.iloc[-1],
+        'macd_dea': dea.iloc[-1],
+        'macd_hist': last_hist,
+        'macd_hist_pct': last_hist / last_close.replace(0, np.nan),
+        'macd_state': macd_state,
+        'rsi': rsi,
+        'history': traded.sum(),
+    })
+    for column in ('pct_chg', 'amount'):
+        if column in bars.columns:
+            result[column] = _pivot(bars, column).iloc[-1]
+
+    result.index.name = 'ts_code'
+    return result[traded.iloc[-1]]
+
+
+def apply_criteria(indicators: pd.DataFrame, criteria: ScreenCriteria,
+                   stock_basic: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """按筛选条件过滤指标表，并按加权分位数打分排序"""
+    if indicators.empty:
+        return indicators
+
+    mask = indicators['history'] >= criteria.min_history
+    bounds = [
+        ('momentum', criteria.min_momentum, criteria.max_momentum),
+        ('volume_ratio', criteria.min_volume_ratio, None),
+        ('rsi', criteria.min_rsi, criteria.max_rsi),
+        ('amount', criteria.min_amount, None),
+    ]
+    for column, lower, upper in bounds:
+        if lower is not None:
+            mask &= indicators[column] >= lower
+        if upper is not None:
+            mask &= indicators[column] <= upper
+    if criteria.macd_state:
+        if criteria.macd_state not in MACD_STATES:
+            raise ValueError(f"不支持的MACD状态: {criteria.macd_state}，可选: {', '.join(MACD_STATES)}")
+        mask &= indicators['macd_state'] == criteria.macd_state
+
+    candidates = indicators[mask].copy()
+
+    if stock_basic is not None and not stock_basic.empty:
+        for column in ('name', 'industry'):
+            if column in stock_basic.columns:
+                candidates[column] = stock_basic[column].reindex(candidates.index)
+        if criteria.exclude_st and 'name' in candidates.columns:
+            candidates = candidates[~candidates['name'].fillna('').str.contains('ST')]
+
+    # 打分：各指标在候选集中的分位数加权求和，对量纲不敏感
+    candidates['score'] = 0.0
+    for column, weight in criteria.weights.items():
+        if column in candidates.columns and weight:
+            candidates['score'] += candidates[column].rank(pct=True).fillna(0) * weight
+
+    candidates = candidates.sort_values('score', ascending=False)
+    if criteria.top_n:
+        candidates = candidates.head(criteria.top_n)
+    return candidates.reset_index()
+
+
+def bars_from_price_frames(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    把按股票代码组织的单只行情（如美股yfinance缓存）转换为筛选引擎使用的长表
+
+    支持 date/Date 列或日期索引，以及 close/Close、volume/Volume 列
+    """
+    rows = []
+    for symbol, frame in frames.items():
+        if frame is None or frame.empty:
+            continue
+        frame = frame.rename(columns=str.lower)
+        if 'date' not in frame.columns:
+            frame = frame.reset_index().rename(columns=str.lower)
+        rows.append(pd.DataFrame({
+            'ts_code': symbol,
+            'trade_date': pd.to_datetime(frame['date']).dt.strftime('%Y%m%d'),
+            'close': frame['close'].values,
+            'vol': frame['volume'].values,
+        }))
+    if not rows:
+        return pd.DataFrame(columns=['ts_code', 'trade_date', 'close', 'vol'])
+    return pd.concat(rows, ignore_index=True)
+
+
+def candidates_to_symbols(candidates: pd.DataFrame) -> List[str]:
+    """把筛选结果转换为分析流程使用的股票代码（000001.SZ -> 000001）"""
+    if candidates is None or candidates.empty:
+        return []
+    return [code.split('.')[0] for code in candidates['ts_code']]
+
+
+class StockScreener:
+    """全市场选股筛选器 - 读取Tushare全市场快照，缓存最近一次的指标表"""
+
+    def __init__(self, store=None, lookback: int = 120):
+        """
+        Args:
+            store: TushareUniverseStore实例，默认取全局实例
+            lookback: 读取的交易日数量（需覆盖MACD的预热期和动量窗口）
+        """
+        self._store = store
+        self.lookback = lookback
+        self._lock = threading.Lock()
+        self._cache_key: Optional[Tuple] = None
+        self._indicators: Optional[pd.DataFrame] = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            from .tushare_universe import get_tushare_universe_store
+            self._store = get_tushare_universe_store()
+        return self._store
+
+    def _latest_partition(self) -> Optional[str]:
+        dates = sorted(p.stem for p in self.store.daily_dir.glob(f"*.{self.store.file_ext}"))
+        return dates[-1] if dates else None
+
+    def get_indicators(self, criteria: ScreenCriteria, end_date: str = None) -> pd.DataFrame:
+        """获取全市场指标表，同一截止日和窗口参数的结果在内存中复用"""
+        end_date = end_date.replace('-', '') if end_date else self._latest_partition()
+        if end_date is None:
+            logger.warning("⚠️ 全市场快照为空，请先运行 scripts/maintenance/refresh_tushare_universe.py")
+            return pd.DataFrame()
+
+        key = (end_date, criteria.momentum_window, criteria.volume_window)
+        with self._lock:
+            if self._cache_key == key and self._indicators is not None:
+                return self._indicators
+
+            start = time.time()
+            bars = self.store.get_market_window(end_date, self.lookback, columns=BAR_COLUMNS)
+            load_time = time.time() - start
+            indicators = compute_indicators(bars, criteria.momentum_window, criteria.volume_window)
+            logger.info(f"📈 全市场指标计算完成: {len(indicators)}只股票, "
+                        f"读取{load_time:.2f}s, 计算{time.time() - start - load_time:.2f}s")
+
+            self._cache_key, self._indicators = key, indicators
+            return indicators
+
+    def screen(self, criteria: ScreenCriteria = None, end_date: str = None,
+               bars: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        执行筛选
+
+        Args:
+            criteria: 筛选条件，默认为不过滤、按综合得分排序
+            end_date: 截止交易日，默认为快照中最新的交易日
+            bars: 直接传入的长表日线（如美股行情），传入时不读取Tushare快照
+
+        Returns:
+            DataFrame: 按score降序排列的候选股票
+        """
+        criteria = criteria or ScreenCriteria()
+        if bars is not None:
+            indicators = compute_indicators(bars, criteria.momentum_window, criteria.volume_window)
+            stock_basic = None
+        else:
+            indicators = self.get_indicators(criteria, end_date)
+            stock_basic = self.store.get_stock_basic()
+
+        candidates = apply_criteria(indicators, criteria, stock_basic)
+        logger.info(f"🔎 筛选完成: {len(indicators)}只股票中选出{len(candidates)}只")
+        return candidates
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取最近一次指标计算的信息"""
+        return {
+            'cached_end_date': self._cache_key[0] if self._cache_key else None,
+            'stock_count': 0 if self._indicators is None else len(self._indicators),
+            'lookback': self.lookback,
+        }
+
+
+# 全局筛选器实例
+_stock_screener = None
+
+def get_stock_screener() -> StockScreener:
+    """获取全局全市场选股筛选器实例"""
+    global _stock_screener
+    if _stock_screener is None:
+        _stock_screener = StockScreener()
+    return _stock_screener
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+常驻内存的股票检索索引
+从MongoDB的stock_basic_info集合或本地Tushare全市场快照加载一次股票列表，建立：
+- 代码前缀字典树：输入 "6005" 即可列出 600500~600509 等
+- 名称n-gram倒排索引：名称任意子串匹配（"平安"、"茅台"）
+- 拼音首字母索引：pypinyin可用时支持 "payh" -> 平安银行
+- 市场/类别分面：按 上海/深圳、沪市主板/创业板 等过滤
+
+数据源变化时（MongoDB按updated_at增量拉取、快照按文件修改时间）在后台线程重建索引并整体替换，
+查询始终只读内存，耗时为微秒级，不访问数据库。
+"""
+
+import os
+import time
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 拼音首字母为可选功能
+try:
+    from pypinyin import lazy_pinyin, Style
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+
+def infer_market(code: str) -> str:
+    """根据股票代码判断市场"""
+    if code.startswith(('60', '68', '90')):
+        return '上海'
+    elif code.startswith(('00', '30', '20')):
+        return '深圳'
+    else:
+        return '未知'
+
+
+def infer_category(code: str) -> str:
+    """根据股票代码判断类别"""
+    if code.startswith('60'):
+        return '沪市主板'
+    elif code.startswith('68'):
+        return '科创板'
+    elif code.startswith('00'):
+        return '深市主板'
+    elif code.startswith('30'):
+        return '创业板'
+    elif code.startswith('20'):
+        return '深市B股'
+    else:
+        return '其他'
+
+
+def pinyin_initials(name: str) -> str:
+    """名称的拼音首字母（小写），pypinyin不可用时返回空字符串"""
+    if not PYPINYIN_AVAILABLE or not name:
+        return ''
+    return ''.join(lazy_pinyin(name, style=Style.FIRST_LETTER, errors='default')).lower()
+
+
+def _normalize_code(keyword: str) -> str:
+    """000001.SZ / SZ000001 -> 000001"""
+    keyword = keyword.strip().upper()
+    if '.' in keyword:
+        keyword = keyword.split('.')[0]
+    if keyword[:2] in ('SH', 'SZ', 'BJ') and keyword[2:].isdigit():
+        keyword = keyword[2:]
+    return keyword
+
+
+def _grams(text: str) -> Iterable[str]:
+    """单字和相邻两字的n-gram"""
+    for i, char in enumerate(text):
+        yield char
+        if i + 1 < len(text):
+            yield text[i:i + 2]
+
+
+# ===== 数据源 =====
+
+class MongoStockSource:
+    """stock_basic_info集合：首次全量加载，之后只拉取updated_at更新过的文档"""
+
+    name = 'mongodb'
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def fetch(self, watermark: Any, known_count: int) -> Tuple[List[Dict], bool, Any]:
+        """
+        Returns:
+            (记录列表, 是否为全量, 新的水位)
+        """
+        projection = {'_id': 0}
+        full = watermark is None or self.collection.estimated_document_count() < known_count
+        if full:
+            docs = list(self.collection.find({}, projection))
+        else:
+            docs = list(self.collection.find({'updated_at': {'$gt': watermark}}, projection))
+        stamps = [d.get('updated_at') for d in docs if d.get('updated_at')]
+        # 没有任何文档带updated_at时水位保持None，下次仍全量加载
+        new_watermark = max(stamps) if stamps else watermark
+        return docs, full, new_watermark
+
+
+class SnapshotStockSource:
+    """Tushare全市场快照的stock_basic文件，文件修改时间变化时全量重新加载"""
+
+    name = 'tushare_snapshot'
+
+    def __init__(self, store):
+        self.store = store
+
+    def fetch(self, watermark: Any, known_count: int) -> Tuple[List[Dict], bool, Any]:
+        path = self.store.stock_basic_path
+        if not path.exists():
+            return [], False, watermark
+        mtime = path.stat().st_mtime
+        if mtime == watermark:
+            return [], False, watermark
+
+        basic = self.store.get_stock_basic()
+        records = []
+        for row in basic.to_dict('records'):
+            code = str(row.get('symbol') or row['ts_code'].split('.')[0])
+            records.append({
+                'code': code,
+                'name': row.get('name', ''),
+                'market': infer_market(code),
+                'category': infer_category(code),
+                'industry': row.get('industry', ''),
+                'area': row.get('area', ''),
+                'source': self.name,
+            })
+        return records, True, mtime
+
+
+# ===== 索引 =====
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.ids: List[int] = []
+
+
+class _IndexData:
+    """一次构建出的只读索引结构，刷新时整体替换"""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = sorted(records, key=lambda r: r['code'])
+        self.by_code: Dict[str, int] = {}
+        self.trie = _TrieNode()
+        self.names: List[str] = []
+        self.initials: List[str] = []
+        self.name_grams: Dict[str, List[int]] = {}
+        self.initial_grams: Dict[str, List[int]] = {}
+        self.facets: Dict[str, Dict[str, set]] = {'market': {}, 'category': {}}
+
+        for idx, record in enumerate(self.records):
+            code = record['code']
+            self.by_code[code] = idx
+
+            node = self.trie
+            node.ids.append(idx)
+            for char in code:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.append(idx)
+
+            name = str(record.get('name') or '').lower()
+            initials = str(record.get('pinyin') or pinyin_initials(name)).lower()
+            self.names.append(name)
+            self.initials.append(initials)
+            for gram in set(_grams(name)):
+                self.name_grams.setdefault(gram, []).append(idx)
+            for gram in set(_grams(initials)):
+                self.initial_grams.setdefault(gram, []).append(idx)
+
+            for facet, values in self.facets.items():
+                values.setdefault(record.get(facet) or '未知', set()).add(idx)
+
+    def prefix_ids(self, prefix: str) -> List[int]:
+        node = self.trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+    @staticmethod
+    def substring_ids(query: str, grams: Dict[str, List[int]], texts: List[str]) -> List[int]:
+        """用最短的n-gram倒排列表做候选，再校验完整子串"""
+        if len(query) == 1:
+            return grams.get(query, [])
+        postings = [grams.get(query[i:i + 2], []) for i in range(len(query) - 1)]
+        shortest = min(postings, key=len)
+        if len(query) == 2:
+            return shortest
+        return [idx for idx in shortest if query in texts[idx]]
+
+
+class StockSearchIndex:
+    """股票检索索引 - 常驻内存，后台增量刷新"""
+
+    def __init__(self, source=None, refresh_interval: float = None):
+        """
+        Args:
+            source: 数据源（MongoStockSource / SnapshotStockSource），为None时索引为空
+            refresh_interval: 检查数据源变化的最小间隔（秒），
+                              默认读取 STOCK_INDEX_REFRESH_SECONDS 环境变量，默认300
+        """
+        if refresh_interval is None:
+            refresh_interval = float(os.getenv('STOCK_INDEX_REFRESH_SECONDS', '300'))
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self._data = _IndexData([])
+        self._watermark = None
+        self._loaded = False
+        self._last_check = 0.0
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+
+    # ------------------------------------------------------------------
+    # 加载与刷新
+    # ------------------------------------------------------------------
+
+    def load_records(self, records: Iterable[Dict[str, Any]]):
+        """直接用记录列表构建索引（替换现有内容）"""
+        records = [dict(r) for r in records if r.get('code')]
+        self._data = _IndexData(records)
+        self._loaded = True
+        self._last_check = time.time()
+
+    def refresh(self) -> bool:
+        """
+        检查数据源变化，有变化时合并并重建索引
+
+        Returns:
+            bool: 索引内容是否发生变化
+        """
+        if self.source is None:
+            return False
+        with self._refresh_lock:
+            start = time.time()
+            try:
+                docs, full, watermark = self.source.fetch(self._watermark, len(self._data.records))
+            except Exception as e:
+                logger.error(f"⚠️ 股票检索索引刷新失败({self.source.name}): {e}")
+                self._last_check = time.time()
+                return False
+
+            self._last_check = time.time()
+            changed = full or bool(docs)
+            if changed:
+                if full:
+                    records = docs
+                else:
+                    merged = {r['code']: r for r in self._data.records}
+                    for doc in docs:
+                        merged[doc['code']] = {**merged.get(doc['code'], {}), **doc}
+                    records = list(merged.values())
+                self.load_records(records)
+                logger.info(f"🔎 股票检索索引{'加载' if full else '增量更新'}完成: "
+                            f"{len(self._data.records)}只股票 (变更{len(docs)}条, {time.time() - start:.3f}s, {self.source.name})")
+            self._watermark = watermark
+            self._loaded = True
+            return changed
+
+    def ensure_fresh(self):
+        """首次使用时同步加载；之后按间隔在后台线程检查变化，查询不等待"""
+        if not self._loaded:
+            self.refresh()
+            return
+        if self.source is None or self._refreshing or time.time() - self._last_check < self.refresh_interval:
+            return
+
+        self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, name="stock-index-refresh", daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._data.records)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """按代码精确查找（支持 000001.SZ 格式）"""
+        self.ensure_fresh()
+        data = self._data
+        idx = data.by_code.get(_normalize_code(code))
+        return data.records[idx] if idx is not None else None
+
+    def contains(self, code: str) -> bool:
+        return self.get(code) is not None
+
+    def search(self, keyword: str, market: str = None, category: str = None,
+               limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """
+        搜索股票：代码前缀、名称子串、拼音首字母
+
+        排序：代码完全匹配 > 名称完全匹配 > 代码前缀 > 名称前缀 > 拼音首字母前缀 > 名称包含 > 拼音首字母包含
+
+        Args:
+            keyword: 关键词
+            market: 市场过滤（上海/深圳）
+            category: 类别过滤（沪市主板/创业板/...）
+            limit: 最多返回条数，None表示不限制
+        """
+        self.ensure_fresh()
+        data = self._data
+        query = (keyword or '').strip().lower()
+        if not query:
+            return []
+
+        allowed = None
+        for facet, value in (('market', market), ('category', category)):
+            if value:
+                ids = data.facets[facet].get(value, set())
+                allowed = ids if allowed is None else allowed & ids
+
+        # 按排序档位依次给出候选；倒排列表和前缀列表本身按代码有序，凑够limit条即可停止
+        code_query = _normalize_code(query)
+        is_code = code_query.isdigit()
+        exact_code = [data.by_code[code_query]] if code_query in data.by_code else []
+        code_prefix = data.prefix_ids(code_query) if is_code else []
+
+        name_ids = data.substring_ids(query, data.name_grams, data.names)
+        initial_ids = []
+        if query.isascii() and query.isalpha():
+            initial_ids = data.substring_ids(query, data.initial_grams, data.initials)
+
+        tiers = [
+            exact_code,
+            (idx for idx in name_ids if data.names[idx] == query),
+            code_prefix,
+            (idx for idx in name_ids if data.names[idx].startswith(query)),
+            (idx for idx in initial_ids if data.initials[idx].startswith(query)),
+            name_ids,
+            initial_ids,
+        ]
+
+        results, seen = [], set()
+        for ids in tiers:
+            for idx in ids:
+                if idx in seen or (allowed is not None and idx not in allowed):
+                    continue
+                seen.add(idx)
+                results.append(data.records[idx])
+                if limit and len(results) >= limit:
+                    return results
+        return results
+
+    def facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """各分面的股票数量"""
+        self.ensure_fresh()
+        return {facet: {value: len(ids) for value, ids in values.items()}
+                for facet, values in self._data.facets.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'stock_count': len(self),
+            'source': self.source.name if self.source else None,
+            'watermark': self._watermark,
+            'last_check': self._last_check,
+            'pinyin_enabled': PYPINYIN_AVAILABLE,
+        }
+
+
+def _default_source():
+    """优先使用MongoDB，其次是本地Tushare全市场快照"""
+    try:
+        from tradingagents.config.database_manager import get_database_manager
+        db_manager = get_database_manager()
+        if db_manager.is_mongodb_available():
+            client = db_manager.get_mongodb_client()
+            collection = client[db_manager.mongodb_config["database"]]['stock_basic_info']
+            return MongoStockSource(collection)
+    except Exception as e:
+        logger.debug(f"股票检索索引: MongoDB不可用 ({e})")
+
+    try:
+        from .tushare_universe import get_tushare_universe_store
+        store = get_tushare_universe_store()
+        if store.stock_basic_path.exists():
+            return SnapshotStockSource(store)
+    except Exception as e:
+        logger.debug(f"股票检索索引: 全市场快照不可用 ({e})")
+
+    logger.warning("⚠️ 股票检索索引没有可用的数据源（MongoDB或Tushare全市场快照）")
+    return None
+
+
+# 全局索引实例
+_stock_search_index = None
+_index_lock = threading.Lock()
+_last_source_discovery = 0.0
+
+def get_stock_search_index() -> StockSearchIndex:
+    """获取全局股票检索索引实例；没有可用数据源时按刷新间隔重新探测"""
+    global _stock_search_index, _last_source_discovery
+    index = _stock_search_index
+    if index is not None and (index.source is not None
+                              or time.time() - _last_source_discovery < index.refresh_interval):
+        return index
+
+    with _index_lock:
+        if _stock_search_index is None:
+            _last_source_discovery = time.time()
+            _stock_search_index = StockSearchIndex(source=_default_source())
+        elif (_stock_search_index.source is None
+              and time.time() - _last_source_discovery >= _stock_search_index.refresh_interval):
+            _last_source_discovery = time.time()
+            _stock_search_index.source = _default_source()
+    return _stock_search_index
@@ -4,6 +4,7 @@ from stockstats import wrap
 from typing import Annotated
 import os
 from .config import get_config
+from tradingagents.utils.provider_executor import get_provider_executor
 
 
 class StockstatsUtils:
@@ -62,8 +63,11 @@ class StockstatsUtils:
                 data = pd.read_csv(data_file)
                 data["Date"] = pd.to_datetime(data["Date"])
             else:
-                data = yf.download(
+                data = get_provider_executor().call(
+                    "yfinance",
+                    yf.download,
                     symbol,
+                    timeout_arg="timeout",
                     start=start_date,
                     end=end_date,
                     multi_level_index=False,
@@ -13,6 +13,7 @@ import warnings
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
+from tradingagents.utils.provider_executor import get_provider_executor
 warnings.filterwarnings('ignore')
 
 # 导入数据库管理器
@@ -89,7 +90,8 @@ class TongDaXinDataProvider:
 
             # 尝试连接可用服务器
             logger.debug(f"🔍 [DEBUG] 创建Tushare数据接口实例...")
-            self.api = TdxHq_API()
+            # 行情服务器调用经由共享执行器，服务器无响应时不会无限阻塞
+            self.api = get_provider_executor().guard(TdxHq_API(), "tdx")
             logger.debug(f"🔍 [DEBUG] 开始尝试连接服务器...")
 
             for i, server in enumerate(working_servers):
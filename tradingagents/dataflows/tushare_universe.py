@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Tushare全市场数据快照存储
+使用按交易日批量接口（daily(trade_date=...)、单次stock_basic）刷新全市场数据，
+以按日期分区的本地列式文件保存，并为单只股票的查询提供本地读取服务。
+
+一次全市场夜间刷新只需要几十次API调用，而不是逐只股票调用的约5000次。
+"""
+
+import os
+import json
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 列式存储优先使用Parquet（需要pyarrow），不可用时退化为pickle
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    logger.warning("⚠️ pyarrow未安装，全市场快照将使用pickle格式存储")
+
+
+STOCK_BASIC_FIELDS = 'ts_code,symbol,name,area,industry,market,list_date'
+
+
+class TushareUniverseStore:
+    """Tushare全市场快照存储 - 按交易日分区的列式存储"""
+
+    def __init__(self, store_dir: str = None, provider=None):
+        """
+        初始化全市场快照存储
+
+        Args:
+            store_dir: 存储目录，默认为 TUSHARE_UNIVERSE_DIR 环境变量或
+                       tradingagents/dataflows/data_cache/tushare_universe
+            provider: TushareProvider实例，刷新数据时使用，默认取全局实例
+        """
+        if store_dir is None:
+            store_dir = os.getenv('TUSHARE_UNIVERSE_DIR')
+        if store_dir is None:
+            store_dir = Path(__file__).parent / "data_cache" / "tushare_universe"
+
+        self.store_dir = Path(store_dir)
+        self.daily_dir = self.store_dir / "daily"
+        self.daily_dir.mkdir(parents=True, exist_ok=True)
+
+        self.file_ext = "parquet" if PARQUET_AVAILABLE else "pkl"
+        self.stock_basic_path = self.store_dir / f"stock_basic.{self.file_ext}"
+        self.trade_cal_path = self.store_dir / f"trade_cal.{self.file_ext}"
+        self.manifest_path = self.store_dir / "manifest.json"
+
+        self._provider = provider
+        self._lock = threading.RLock()
+
+        # 内存索引：股票基本信息按ts_code索引，交易日历为有序列表
+        self._stock_basic_index: Optional[pd.DataFrame] = None
+        self._stock_basic_mtime: Optional[float] = None
+        self._open_dates: Optional[List[str]] = None
+        self._cal_range = ('', '')
+        self._trade_cal_mtime: Optional[float] = None
+
+        logger.info(f"📁 Tushare全市场快照存储初始化完成: {self.store_dir} (格式: {self.file_ext})")
+
+    # ------------------------------------------------------------------
+    # 文件读写
+    # ------------------------------------------------------------------
+
+    def _write_frame(self, df: pd.DataFrame, path: Path, row_group_size: int = None):
+        """原子写入DataFrame到列式文件"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        if PARQUET_AVAILABLE:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pq.write_table(table, tmp_path, row_group_size=row_group_size)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _read_frame(self, path: Path, ts_code: str = None, columns: List[str] = None) -> pd.DataFrame:
+        """读取列式文件，Parquet格式下按ts_code下推过滤、只读取需要的列"""
+        if PARQUET_AVAILABLE:
+            filters = [('ts_code', '==', ts_code)] if ts_code else None
+            return pq.read_table(path, filters=filters, columns=columns).to_pandas()
+
+        df = pd.read_pickle(path)
+        if ts_code:
+            df = df[df['ts_code'] == ts_code]
+        if columns:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+
+    def _partition_path(self, trade_date: str) -> Path:
+        """获取交易日分区文件路径"""
+        return self.daily_dir / f"{trade_date}.{self.file_ext}"
+
+    def _update_manifest(self, **kwargs):
+        """更新清单文件（记录最近刷新时间等）"""
+        manifest = self.get_manifest()
+        manifest.update(kwargs)
+        manifest['updated_at'] = datetime.now().isoformat()
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    def get_manifest(self) -> Dict[str, Any]:
+        """读取清单文件"""
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"⚠️ 读取全市场快照清单失败: {e}")
+            return {}
+
+    @staticmethod
+    def _normalize_date(date: str) -> str:
+        """统一日期格式为YYYYMMDD"""
+        return str(date).replace('-', '')
+
+    def _get_provider(self):
+        """获取Tushare提供器"""
+        if self._provider is None:
+            from .tushare_utils import get_tushare_provider
+            self._provider = get_tushare_provider()
+        return self._provider
+
+    # ------------------------------------------------------------------
+    # 批量刷新
+    # ------------------------------------------------------------------
+
+    def refresh_stock_basic(self) -> int:
+        """
+        刷新全部上市股票的基本信息（单次stock_basic调用）
+
+        Returns:
+            int: 写入的股票数量
+        """
+        provider = self._get_provider()
+        if not provider.connected:
+            logger.error("❌ Tushare未连接，无法刷新股票基本信息")
+            return 0
+
+        logger.info("🔄 批量刷新全市场股票基本信息...")
+        data = provider.api.stock_basic(exchange='', list_status='L', fields=STOCK_BASIC_FIELDS)
+        if data is None or data.empty:
+            logger.warning("⚠️ Tushare返回空的股票基本信息")
+            return 0
+
+        data = data.sort_values('ts_code').reset_index(drop=True)
+        with self._lock:
+            self._write_frame(data, self.stock_basic_path)
+            self._stock_basic_index = None
+        self._update_manifest(stock_basic_refreshed_at=datetime.now().isoformat(), stock_count=len(data))
+        logger.info(f"✅ 全市场股票基本信息已保存: {len(data)}条")
+        return len(data)
+
+    def refresh_trade_calendar(self, start_date: str, end_date: str) -> List[str]:
+        """
+        刷新交易日历，并与本地已保存的日历合并
+
+        Returns:
+            List[str]: 区间内的交易日（YYYYMMDD）
+        """
+        provider = self._get_provider()
+        start_date = self._normalize_date(start_date)
+        end_date = self._normalize_date(end_date)
+
+        cal = provider.api.trade_cal(exchange='SSE', start_date=start_date, end_date=end_date,
+                                     fields='cal_date,is_open')
+        if cal is None or cal.empty:
+            logger.warning(f"⚠️ Tushare返回空的交易日历: {start_date} - {end_date}")
+            return []
+
+        cal = cal[['cal_date', 'is_open']].copy()
+        cal['cal_date'] = cal['cal_date'].astype(str)
+        cal['is_open'] = cal['is_open'].astype(int)
+
+        with self._lock:
+            if self.trade_cal_path.exists():
+                existing = self._read_frame(self.trade_cal_path)
+                cal = pd.concat([existing, cal]).drop_duplicates('cal_date', keep='last')
+            cal = cal.sort_values('cal_date').reset_index(drop=True)
+            self._write_frame(cal, self.trade_cal_path)
+            self._open_dates = None
+
+        in_range = cal[(cal['cal_date'] >= start_date) & (cal['cal_date'] <= end_date) & (cal['is_open'] == 1)]
+        return in_range['cal_date'].tolist()
+
+    def refresh_daily(self, trade_date: str) -> int:
+        """
+        刷新单个交易日的全市场日线（单次daily(trade_date=...)调用）
+
+        Returns:
+            int: 写入的记录数
+        """
+        provider = self._get_provider()
+        trade_date = self._normalize_date(trade_date)
+
+        data = provider.api.daily(trade_date=trade_date)
+        if data is None or data.empty:
+            logger.warning(f"⚠️ Tushare返回空的全市场日线: {trade_date}")
+            return 0
+
+        # 按ts_code排序，Parquet行组统计信息可以让按代码过滤跳过无关行组
+        data = data.sort_values('ts_code').reset_index(drop=True)
+        data['trade_date'] = data['trade_date'].astype(str)
+        self._write_frame(data, self._partition_path(trade_date), row_group_size=512)
+        logger.debug(f"💾 全市场日线已保存: {trade_date} ({len(data)}条)")
+        return len(data)
+
+    def refresh_range(self, start_date: str, end_date: str = None, force: bool = False) -> Dict[str, Any]:
+        """
+        刷新区间内的全市场数据，已存在的交易日分区默认跳过
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期，默认为今天
+            force: 是否强制覆盖已存在的分区
+
+        Returns:
+            Dict: 刷新统计（API调用次数、写入分区数、记录数）
+        """
+        provider = self._get_provider()
+        stats = {'api_calls': 0, 'partitions_written': 0, 'partitions_skipped': 0, 'rows': 0}
+        if not provider.connected:
+            logger.error("❌ Tushare未连接，无法刷新全市场数据")
+            return stats
+
+        end_date = self._normalize_date(end_date or datetime.now().strftime('%Y%m%d'))
+        start_date = self._normalize_date(start_date)
+        logger.info(f"🔄 批量刷新全市场数据: {start_date} - {end_date}")
+
+        self.refresh_stock_basic()
+        stats['api_calls'] += 1
+
+        trade_dates = self.refresh_trade_calendar(start_date, end_date)
+        stats['api_calls'] += 1
+
+        for trade_date in trade_dates:
+            if not force and self._partition_path(trade_date).exists():
+                stats['partitions_skipped'] += 1
+                continue
+            try:
+                rows = self.refresh_daily(trade_date)
+                stats['api_calls'] += 1
+                if rows:
+                    stats['partitions_written'] += 1
+                    stats['rows'] += rows
+            except Exception as e:
+                logger.error(f"❌ 刷新{trade_date}全市场日线失败: {e}")
+
+        self._update_manifest(daily_refreshed_at=datetime.now().isoformat(), last_refresh_stats=stats)
+        logger.info(f"✅ 全市场数据刷新完成: API调用{stats['api_calls']}次, "
+                    f"写入{stats['partitions_written']}个交易日, 跳过{stats['partitions_skipped']}个")
+        return stats
+
+    def refresh_latest(self, lookback_days: int = 10, force: bool = False) -> Dict[str, Any]:
+        """夜间刷新：补齐最近lookback_days天内缺失的交易日"""
+        start_date = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y%m%d')
+        return self.refresh_range(start_date, force=force)
+
+    # ------------------------------------------------------------------
+    # 单只股票查询
+    # ------------------------------------------------------------------
+
+    def _load_stock_basic_index(self) -> Optional[pd.DataFrame]:
+        """加载（并在文件变化时重新加载）按ts_code索引的股票基本信息"""
+        if not self.stock_basic_path.exists():
+            return None
+        mtime = self.stock_basic_path.stat().st_mtime
+        with self._lock:
+            if self._stock_basic_index is None or self._stock_basic_mtime != mtime:
+                df = self._read_frame(self.stock_basic_path)
+                self._stock_basic_index = df.set_index('ts_code', drop=False)
+                self._stock_basic_mtime = mtime
+            return self._stock_basic_index
+
+    def _load_open_dates(self) -> Optional[List[str]]:
+        """加载本地交易日历中的开市日期"""
+        if not self.trade_cal_path.exists():
+            return None
+        mtime = self.trade_cal_path.stat().st_mtime
+        with self._lock:
+            if self._open_dates is None or self._trade_cal_mtime != mtime:
+                cal = self._read_frame(self.trade_cal_path)
+                self._open_dates = sorted(cal.loc[cal['is_open'] == 1, 'cal_date'].astype(str).tolist())
+                self._cal_range = (cal['cal_date'].min(), cal['cal_date'].max())
+                self._trade_cal_mtime = mtime
+            return self._open_dates
+
+    def get_stock_info(self, ts_code: str) -> Optional[Dict[str, Any]]:
+        """
+        从本地快照获取股票基本信息
+
+        Returns:
+            Dict: 股票基本信息，不在快照中时返回None
+        """
+        index = self._load_stock_basic_index()
+        if index is None or ts_code not in index.index:
+            return None
+        info = index.loc[ts_code]
+        return {field: info.get(field, '') for field in STOCK_BASIC_FIELDS.split(',')}
+
+    def covers(self, start_date: str, end_date: str) -> bool:
+        """检查本地快照是否完整覆盖指定区间的所有交易日"""
+        open_dates = self._load_open_dates()
+        if not open_dates:
+            return False
+        start_date = self._normalize_date(start_date)
+        end_date = self._normalize_date(end_date)
+        cal_start, cal_end = self._cal_range
+        if start_date < cal_start or end_date > cal_end:
+            return False
+        return all(self._partition_path(d).exists() for d in open_dates if start_date <= d <= end_date)
+
+    def get_stock_daily(self, ts_code: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """
+        从本地快照读取单只股票的日线数据
+
+        Returns:
+            DataFrame: 与TushareProvider.get_stock_daily格式一致的日线数据；
+                       快照未完整覆盖该区间时返回None，由调用方回退到API
+        """
+        start_date = self._normalize_date(start_date)
+        end_date = self._normalize_date(end_date)
+        if not self.covers(start_date, end_date):
+            return None
+
+        trade_dates = [d for d in self._open_dates if start_date <= d <= end_date]
+        frames = [self._read_frame(self._partition_path(d), ts_code=ts_code) for d in trade_dates]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+
+        data = pd.concat(frames, ignore_index=True)
+        data = data.sort_values('trade_date')
+        data['trade_date'] = pd.to_datetime(data['trade_date'])
+        return data.reset_index(drop=True)
+
+    def get_market_daily(self, trade_date: str) -> pd.DataFrame:
+        """读取某个交易日的全市场日线"""
+        path = self._partition_path(self._normalize_date(trade_date))
+        if not path.exists():
+            return pd.DataFrame()
+        return self._read_frame(path)
+
+    def get_market_window(self, end_date: str = None, lookback: int = 60,
+                          columns: List[str] = None) -> pd.DataFrame:
+        """
+        读取截至end_date最近lookback个已落盘交易日的全市场日线，拼接为一张长表
+
+        Args:
+            end_date: 截止日期，默认为最新的分区
+            lookback: 交易日数量
+            columns: 只读取的列，默认读取全部列
+
+        Returns:
+            DataFrame: 按(trade_date, ts_code)排序的全市场日线，trade_date为YYYYMMDD字符串
+        """
+        trade_dates = sorted(p.stem for p in self.daily_dir.glob(f"*.{self.file_ext}"))
+        if end_date:
+            end_date = self._normalize_date(end_date)
+            trade_dates = [d for d in trade_dates if d <= end_date]
+        trade_dates = trade_dates[-lookback:] if lookback else trade_dates
+        if not trade_dates:
+            return pd.DataFrame()
+
+        frames = [self._read_frame(self._partition_path(d), columns=columns) for d in trade_dates]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+
+        data = pd.concat(frames, ignore_index=True)
+        data['trade_date'] = data['trade_date'].astype(str)
+        return data
+
+    def get_stock_basic(self) -> Optional[pd.DataFrame]:
+        """获取全部股票基本信息（按ts_code索引），快照不存在时返回None"""
+        return self._load_stock_basic_index()
+
+
+# 全局存储实例
+_universe_store = None
+
+def get_tushare_universe_store() -> TushareUniverseStore:
+    """获取全局Tushare全市场快照存储实例"""
+    global _universe_store
+    if _universe_store is None:
+        _universe_store = TushareUniverseStore()
+    return _universe_store
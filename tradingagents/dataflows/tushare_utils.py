@@ -20,6 +20,10 @@ warnings.filterwarnings('ignore')
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 
+# 导入调用链追踪
+from tradingagents.utils.tracing import span
+from tradingagents.utils.provider_executor import get_provider_executor
+
 # 导入缓存管理器
 try:
     from .cache_manager import get_cache
@@ -40,17 +44,24 @@ except ImportError:
 class TushareProvider:
     """Tushare数据提供器"""
     
-    def __init__(self, token: str = None, enable_cache: bool = True):
+    def __init__(self, token: str = None, enable_cache: bool = True, bulk_mode: bool = None):
         """
         初始化Tushare提供器
         
         Args:
             token: Tushare API token
             enable_cache: 是否启用缓存
+            bulk_mode: 是否优先从全市场快照读取（默认读取TUSHARE_BULK_MODE环境变量）
         """
         self.connected = False
         self.enable_cache = enable_cache and CACHE_AVAILABLE
         self.api = None
+
+        # 全市场快照模式：单只股票查询优先从本地按日期分区的快照读取
+        if bulk_mode is None:
+            bulk_mode = os.getenv('TUSHARE_BULK_MODE', 'false').lower() == 'true'
+        self.bulk_mode = bulk_mode
+        self._universe_store = None
         
         # 初始化缓存管理器
         self.cache_manager = None
@@ -75,7 +86,8 @@ class TushareProvider:
         if TUSHARE_AVAILABLE:
             try:
                 ts.set_token(token)
-                self.api = ts.pro_api()
+                # 所有Tushare接口调用经由共享执行器，带截止时间和并发上限
+                self.api = get_provider_executor().guard(ts.pro_api(), "tushare")
                 self.connected = True
                 logger.info("✅ Tushare API连接成功")
             except Exception as e:
@@ -164,7 +176,7 @@ class TushareProvider:
         logger.info(f"🔍 [Tushare详细日志] 连接状态: {self.connected}")
         logger.info(f"🔍 [Tushare详细日志] API对象: {type(self.api).__name__ if self.api else 'None'}")
 
-        if not self.connected:
+        if not self.connected and not self.bulk_mode:
             logger.error(f"❌ [Tushare详细日志] Tushare未连接，无法获取数据")
             return pd.DataFrame()
 
@@ -192,6 +204,15 @@ class TushareProvider:
                 start_date = start_date.replace('-', '')
                 logger.info(f"🔍 [Tushare详细日志] 开始日期转换: '{original_start}' -> '{start_date}'")
 
+            # 全市场快照模式：快照完整覆盖该区间时直接返回，不调用API
+            if self.bulk_mode:
+                data = self._get_daily_from_universe(ts_code, start_date, end_date)
+                if data is not None:
+                    return data
+                if not self.connected:
+                    logger.error(f"❌ 全市场快照未覆盖{ts_code} ({start_date} 到 {end_date})，且Tushare未连接")
+                    return pd.DataFrame()
+
             logger.info(f"🔄 从Tushare获取{ts_code}数据 ({start_date} 到 {end_date})...")
             logger.info(f"🔍 [股票代码追踪] 调用 Tushare API daily，传入参数: ts_code='{ts_code}', start_date='{start_date}', end_date='{end_date}'")
 
@@ -201,11 +222,12 @@ class TushareProvider:
 
             # 获取日线数据
             try:
-                data = self.api.daily(
-                    ts_code=ts_code,
-                    start_date=start_date,
-                    end_date=end_date
-                )
+                with span("tushare.daily", kind="http", ts_code=ts_code):
+                    data = self.api.daily(
+                        ts_code=ts_code,
+                        start_date=start_date,
+                        end_date=end_date
+                    )
                 api_duration = time.time() - api_start_time
                 logger.info(f"🔍 [Tushare详细日志] API调用完成，耗时: {api_duration:.3f}秒")
 
@@ -285,7 +307,7 @@ class TushareProvider:
         Returns:
             Dict: 股票基本信息
         """
-        if not self.connected:
+        if not self.connected and not self.bulk_mode:
             return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'unknown'}
         
         try:
@@ -293,6 +315,18 @@ class TushareProvider:
             ts_code = self._normalize_symbol(symbol)
             logger.info(f"🔍 [股票代码追踪] _normalize_symbol 返回结果: '{ts_code}'")
 
+            # 全市场快照模式：优先从本地股票基本信息快照读取
+            if self.bulk_mode:
+                store = self.get_universe_store()
+                info = store.get_stock_info(ts_code) if store else None
+                if info:
+                    logger.debug(f"📦 从全市场快照获取股票信息: {ts_code}")
+                    info.update({'symbol': symbol, 'source': 'tushare'})
+                    return info
+
+            if not self.connected:
+                return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'unknown'}
+
             # 获取股票基本信息
             logger.info(f"🔍 [股票代码追踪] 调用 Tushare API stock_basic，传入参数: ts_code='{ts_code}'")
             basic_info = self.api.stock_basic(
@@ -323,6 +357,31 @@ class TushareProvider:
             logger.error(f"❌ 获取{symbol}股票信息失败: {e}")
             return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'unknown'}
     
+    def get_universe_store(self):
+        """获取全市场快照存储（按需创建）"""
+        if self._universe_store is None:
+            try:
+                from .tushare_universe import TushareUniverseStore
+                self._universe_store = TushareUniverseStore(provider=self)
+            except Exception as e:
+                logger.warning(f"⚠️ 全市场快照存储初始化失败: {e}")
+                self.bulk_mode = False
+        return self._universe_store
+
+    def _get_daily_from_universe(self, ts_code: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """从全市场快照读取日线数据，快照未覆盖该区间时返回None"""
+        store = self.get_universe_store()
+        if store is None:
+            return None
+        try:
+            data = store.get_stock_daily(ts_code, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"⚠️ 读取全市场快照失败，回退到API: {e}")
+            return None
+        if data is not None:
+            logger.info(f"📦 从全市场快照获取{ts_code}数据: {len(data)}条")
+        return data
+
     def get_financial_data(self, symbol: str, period: str = "20231231") -> Dict:
         """
         获取财务数据
@@ -688,6 +747,26 @@ def get_tushare_provider() -> TushareProvider:
     return _tushare_provider
 
 
+def refresh_tushare_universe(start_date: str = None, end_date: str = None, lookback_days: int = 10) -> Dict:
+    """
+    刷新Tushare全市场快照（适合夜间定时任务）
+
+    Args:
+        start_date: 开始日期，为空时只补齐最近lookback_days天
+        end_date: 结束日期，默认为今天
+        lookback_days: 未指定开始日期时的回看天数
+
+    Returns:
+        Dict: 刷新统计
+    """
+    store = get_tushare_provider().get_universe_store()
+    if store is None:
+        return {}
+    if start_date is None:
+        return store.refresh_latest(lookback_days)
+    return store.refresh_range(start_date, end_date)
+
+
 def get_china_stock_data_tushare(symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
     """
     获取中国股票数据的便捷函数（Tushare数据源）
@@ -7,6 +7,7 @@ import pandas as pd
 from functools import wraps
 
 from .utils import save_output, SavePathType, decorate_all_methods
+from tradingagents.utils.provider_executor import get_provider_executor
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -51,7 +52,9 @@ class YFinanceUtils:
         # add one day to the end_date so that the data range is inclusive
         end_date = pd.to_datetime(end_date) + pd.DateOffset(days=1)
         end_date = end_date.strftime("%Y-%m-%d")
-        stock_data = ticker.history(start=start_date, end=end_date)
+        stock_data = get_provider_executor().call(
+            "yfinance", ticker.history, start=start_date, end=end_date, timeout_arg="timeout"
+        )
         # save_output(stock_data, f"Stock data for {ticker.ticker}", save_path)
         return stock_data
 
@@ -60,7 +63,7 @@ class YFinanceUtils:
     ) -> dict:
         """Fetches and returns latest stock information."""
         ticker = symbol
-        stock_info = ticker.info
+        stock_info = get_provider_executor().call("yfinance", lambda: ticker.info)
         return stock_info
 
     def get_company_info(
@@ -69,7 +72,7 @@ class YFinanceUtils:
     ) -> DataFrame:
         """Fetches and returns company information as a DataFrame."""
         ticker = symbol
-        info = ticker.info
+        info = get_provider_executor().call("yfinance", lambda: ticker.info)
         company_info = {
             "Company Name": info.get("shortName", "N/A"),
             "Industry": info.get("industry", "N/A"),
@@ -89,7 +92,7 @@ class YFinanceUtils:
     ) -> DataFrame:
         """Fetches and returns the latest dividends data as a DataFrame."""
         ticker = symbol
-        dividends = ticker.dividends
+        dividends = get_provider_executor().call("yfinance", lambda: ticker.dividends)
         if save_path:
             dividends.to_csv(save_path)
             logger.info(f"Dividends for {ticker.ticker} saved to {save_path}")
@@ -98,25 +101,25 @@ class YFinanceUtils:
     def get_income_stmt(symbol: Annotated[str, "ticker symbol"]) -> DataFrame:
         """Fetches and returns the latest income statement of the company as a DataFrame."""
         ticker = symbol
-        income_stmt = ticker.financials
+        income_stmt = get_provider_executor().call("yfinance", lambda: ticker.financials)
         return income_stmt
 
     def get_balance_sheet(symbol: Annotated[str, "ticker symbol"]) -> DataFrame:
         """Fetches and returns the latest balance sheet of the company as a DataFrame."""
         ticker = symbol
-        balance_sheet = ticker.balance_sheet
+        balance_sheet = get_provider_executor().call("yfinance", lambda: ticker.balance_sheet)
         return balance_sheet
 
     def get_cash_flow(symbol: Annotated[str, "ticker symbol"]) -> DataFrame:
         """Fetches and returns the latest cash flow statement of the company as a DataFrame."""
         ticker = symbol
-        cash_flow = ticker.cashflow
+        cash_flow = get_provider_executor().call("yfinance", lambda: ticker.cashflow)
         return cash_flow
 
     def get_analyst_recommendations(symbol: Annotated[str, "ticker symbol"]) -> tuple:
         """Fetches the latest analyst recommendations and returns the most common recommendation and its count."""
         ticker = symbol
-        recommendations = ticker.recommendations
+        recommendations = get_provider_executor().call("yfinance", lambda: ticker.recommendations)
         if recommendations.empty:
             return None, 0  # No recommendations available
 
@@ -16,9 +16,22 @@ DEFAULT_CONFIG = {
     # Debate and discussion settings
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
+    # 论点收敛（本轮新内容比例低于阈值且各方立场不变）时提前结束辩论，至少进行min_*轮
+    "debate_early_stop": True,
+    "min_debate_rounds": 2,
+    "min_risk_discuss_rounds": 2,
+    "debate_novelty_threshold": 0.35,
+    # 辩论提示词只嵌入最近N条发言原文，更早的发言按token上限压缩为滚动摘要
+    "debate_window_turns": 4,
+    "debate_summary_turn_tokens": 200,
+    "debate_summary_max_tokens": 1500,
     "max_recur_limit": 100,
     # Tool settings
     "online_tools": True,
+    # Context compression settings (工具输出和报告进入提示词前按token预算压缩)
+    "context_compression": True,
+    "context_lookback_rows": 30,
+    "context_token_budgets": {},  # 按智能体覆盖默认预算，如 {"market": 3000, "bull": 5000}
 
     # Note: Database and cache configuration is now managed by .env file and config.database_manager
     # No database/cache settings in default config to avoid configuration conflicts
@@ -1,19 +1,87 @@
 # TradingAgents/graph/conditional_logic.py
 
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from tradingagents.agents.utils.agent_states import AgentState
+from tradingagents.utils.debate_convergence import DebateConvergence
+from tradingagents.utils.debate_history import INVEST_SPEAKERS, RISK_SPEAKERS, speaker_turns
+from tradingagents.utils.tracing import span
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+# 当前分析的辩论统计；按调用上下文隔离，同一图上的并发propagate互不干扰
+_debate_stats: ContextVar = ContextVar("debate_stats", default=None)
+
+
+@contextmanager
+def collect_debate_stats():
+    """
+    收集一次分析中辩论的结束情况（轮数、节省的轮数、收敛指标）
+
+    Yields:
+        list: 该上下文内结束的每场辩论一条记录
+    """
+    stats = []
+    token = _debate_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _debate_stats.reset(token)
+
 
 class ConditionalLogic:
     """Handles conditional logic for determining graph flow."""
 
-    def __init__(self, max_debate_rounds=1, max_risk_discuss_rounds=1):
-        """Initialize with configuration parameters."""
+    def __init__(self, max_debate_rounds=1, max_risk_discuss_rounds=1, early_stop=True,
+                 min_debate_rounds=2, min_risk_discuss_rounds=2, novelty_threshold=0.35, embedder=None):
+        """
+        Initialize with configuration parameters.
+
+        Args:
+            max_debate_rounds / max_risk_discuss_rounds: 辩论最多进行的轮数
+            early_stop: 论点收敛（新颖度低且立场稳定）时是否提前结束辩论
+            min_debate_rounds / min_risk_discuss_rounds: 提前结束前至少进行的轮数
+            novelty_threshold: 本轮新颖度低于该值视为没有新论点
+            embedder: 可选的本地嵌入函数，默认使用词汇相似度
+        """
         self.max_debate_rounds = max_debate_rounds
         self.max_risk_discuss_rounds = max_risk_discuss_rounds
+        self.early_stop = early_stop
+        self.invest_convergence = DebateConvergence(min_debate_rounds, novelty_threshold, embedder)
+        self.risk_convergence = DebateConvergence(min_risk_discuss_rounds, novelty_threshold, embedder)
+
+    def _record_debate_end(self, debate: str, rounds: int, max_rounds: int, assessment: dict = None):
+        early = assessment is not None
+        record = {
+            "debate": debate,
+            "rounds": rounds,
+            "max_rounds": max_rounds,
+            "rounds_saved": max_rounds - rounds,
+            "early_stop": early,
+            "novelty": assessment["novelty"] if early else {},
+            "stances": assessment["stances"] if early else {},
+        }
+        stats = _debate_stats.get()
+        if stats is not None:
+            stats.append(record)
+        if early:
+            logger.info(f"⏹️ [辩论收敛] {debate}辩论第{rounds}轮后论点收敛，提前结束（节省{record['rounds_saved']}轮），"
+                        f"新颖度: {record['novelty']}, 立场: {record['stances']}")
+        with span(f"debate.{debate}", kind="internal", rounds=rounds, max_rounds=max_rounds,
+                  rounds_saved=record["rounds_saved"], early_stop=early):
+            pass
+
+    def _converged(self, debate_state, speakers, convergence: DebateConvergence, turns_per_round: int) -> dict:
+        """在完整轮次结束时判断辩论是否收敛，收敛时返回评估结果"""
+        count = debate_state["count"]
+        if not self.early_stop or count == 0 or count % turns_per_round:
+            return None
+        assessment = convergence.assess(
+            {speaker: speaker_turns(debate_state, speaker) for speaker in speakers})
+        return assessment if assessment["converged"] else None
 
     def should_continue_market(self, state: AgentState):
         """Determine if market analysis should continue."""
@@ -58,9 +126,15 @@ class ConditionalLogic:
     def should_continue_debate(self, state: AgentState) -> str:
         """Determine if debate should continue."""
 
+        debate_state = state["investment_debate_state"]
         if (
-            state["investment_debate_state"]["count"] >= 2 * self.max_debate_rounds
+            debate_state["count"] >= 2 * self.max_debate_rounds
         ):  # 3 rounds of back-and-forth between 2 agents
+            self._record_debate_end("investment", debate_state["count"] // 2, self.max_debate_rounds)
+            return "Research Manager"
+        assessment = self._converged(debate_state, INVEST_SPEAKERS, self.invest_convergence, 2)
+        if assessment:
+            self._record_debate_end("investment", assessment["rounds"], self.max_debate_rounds, assessment)
             return "Research Manager"
         if state["investment_debate_state"]["current_response"].startswith("Bull"):
             return "Bear Researcher"
@@ -68,9 +142,15 @@ class ConditionalLogic:
 
     def should_continue_risk_analysis(self, state: AgentState) -> str:
         """Determine if risk analysis should continue."""
+        debate_state = state["risk_debate_state"]
         if (
-            state["risk_debate_state"]["count"] >= 3 * self.max_risk_discuss_rounds
+            debate_state["count"] >= 3 * self.max_risk_discuss_rounds
         ):  # 3 rounds of back-and-forth between 3 agents
+            self._record_debate_end("risk", debate_state["count"] // 3, self.max_risk_discuss_rounds)
+            return "Risk Judge"
+        assessment = self._converged(debate_state, RISK_SPEAKERS, self.risk_convergence, 3)
+        if assessment:
+            self._record_debate_end("risk", assessment["rounds"], self.max_risk_discuss_rounds, assessment)
             return "Risk Judge"
         if state["risk_debate_state"]["latest_speaker"].startswith("Risky"):
             return "Safe Analyst"
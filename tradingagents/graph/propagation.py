@@ -28,11 +28,12 @@ class Propagator:
             "company_of_interest": company_name,
             "trade_date": str(trade_date),
             "investment_debate_state": InvestDebateState(
-                {"history": "", "current_response": "", "count": 0}
+                {"turns": [], "summary": "", "current_response": "", "count": 0}
             ),
             "risk_debate_state": RiskDebateState(
                 {
-                    "history": "",
+                    "turns": [],
+                    "summary": "",
                     "current_risky_response": "",
                     "current_safe_response": "",
                     "current_neutral_response": "",
@@ -45,9 +46,14 @@ class Propagator:
             "news_report": "",
         }
 
-    def get_graph_args(self) -> Dict[str, Any]:
-        """Get arguments for the graph invocation."""
+    def get_graph_args(self, stream_mode: str = "values") -> Dict[str, Any]:
+        """Get arguments for the graph invocation.
+
+        stream_mode="values" yields the full accumulated state after every node;
+        stream_mode="updates" yields only {node_name: delta}, which lets streaming
+        consumers (e.g. the CLI) process just what each node changed.
+        """
         return {
-            "stream_mode": "values",
+            "stream_mode": stream_mode,
             "config": {"recursion_limit": self.max_recur_limit},
         }
@@ -1,12 +1,27 @@
 # TradingAgents/graph/reflection.py
 
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Sequence, Tuple
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.tracing import span
+from tradingagents.utils.debate_history import speaker_history
 logger = get_logger("default")
 
+# 需要反思的角色: (角色名, 记忆名称, 从状态中取出该角色输出的函数)
+REFLECTION_COMPONENTS = (
+    ("BULL", "bull_memory", lambda state: speaker_history(state["investment_debate_state"], "Bull Analyst")),
+    ("BEAR", "bear_memory", lambda state: speaker_history(state["investment_debate_state"], "Bear Analyst")),
+    ("TRADER", "trader_memory", lambda state: state["trader_investment_plan"]),
+    ("INVEST JUDGE", "invest_judge_memory", lambda state: state["investment_debate_state"]["judge_decision"]),
+    ("RISK JUDGE", "risk_manager_memory", lambda state: state["risk_debate_state"]["judge_decision"]),
+)
+
+# 并发反思的默认线程数
+DEFAULT_REFLECTION_WORKERS = 8
+
 
 class Reflector:
     """Handles reflection on decisions and updating memory."""
@@ -77,7 +92,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
     def reflect_bull_researcher(self, current_state, returns_losses, bull_memory):
         """Reflect on bull researcher's analysis and update memory."""
         situation = self._extract_current_situation(current_state)
-        bull_debate_history = current_state["investment_debate_state"]["bull_history"]
+        bull_debate_history = speaker_history(current_state["investment_debate_state"], "Bull Analyst")
 
         result = self._reflect_on_component(
             "BULL", bull_debate_history, situation, returns_losses
@@ -87,7 +102,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
     def reflect_bear_researcher(self, current_state, returns_losses, bear_memory):
         """Reflect on bear researcher's analysis and update memory."""
         situation = self._extract_current_situation(current_state)
-        bear_debate_history = current_state["investment_debate_state"]["bear_history"]
+        bear_debate_history = speaker_history(current_state["investment_debate_state"], "Bear Analyst")
 
         result = self._reflect_on_component(
             "BEAR", bear_debate_history, situation, returns_losses
@@ -123,3 +138,74 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "RISK JUDGE", judge_decision, situation, returns_losses
         )
         risk_manager_memory.add_situations([(situation, result)])
+
+    def reflect_all(self, current_state, returns_losses, memories: Dict[str, Any],
+                    max_workers: int = len(REFLECTION_COMPONENTS)) -> Dict[str, int]:
+        """并发完成一次决策中所有角色的反思，并批量写入各自的记忆"""
+        return self.reflect_batch([(current_state, returns_losses)], memories, max_workers)
+
+    def reflect_batch(self, outcomes: Sequence[Tuple[Dict[str, Any], Any]], memories: Dict[str, Any],
+                      max_workers: int = DEFAULT_REFLECTION_WORKERS) -> Dict[str, int]:
+        """
+        批量反思多次决策的结果
+
+        所有(决策, 角色)的反思LLM调用并发执行；完成后每个记忆只做一次批量嵌入和一次写入，
+        使用相同嵌入后端的记忆共用同一批嵌入向量（各角色的市场情况文本相同）
+
+        Args:
+            outcomes: [(最终状态, 收益), ...]
+            memories: 记忆名称到FinancialSituationMemory的映射，值为None的角色跳过
+            max_workers: 并发的LLM调用数
+
+        Returns:
+            Dict[str, int]: 每个记忆写入的条数
+        """
+        tasks = []
+        for state, returns_losses in outcomes:
+            situation = self._extract_current_situation(state)
+            for component, memory_name, get_report in REFLECTION_COMPONENTS:
+                if memories.get(memory_name) is None:
+                    continue
+                tasks.append((memory_name, component, get_report(state), situation, returns_losses))
+
+        pending: Dict[str, List[Tuple[str, str]]] = {name: [] for _, name, _ in REFLECTION_COMPONENTS}
+        with span("reflection.batch", kind="internal", decisions=len(outcomes), reflections=len(tasks)):
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="reflection") as executor:
+                futures = {
+                    executor.submit(self._reflect_on_component, component, report, situation, returns_losses):
+                        (memory_name, component, situation)
+                    for memory_name, component, report, situation, returns_losses in tasks
+                }
+                for future in as_completed(futures):
+                    memory_name, component, situation = futures[future]
+                    try:
+                        pending[memory_name].append((situation, future.result()))
+                    except Exception as e:
+                        logger.error(f"❌ [反思] {component}反思失败: {e}")
+
+            written = self._write_memories(pending, memories)
+
+        logger.info(f"🧠 [反思] 完成{len(outcomes)}次决策的反思，写入记忆: {written}")
+        return written
+
+    def _write_memories(self, pending: Dict[str, List[Tuple[str, str]]],
+                        memories: Dict[str, Any]) -> Dict[str, int]:
+        """按嵌入后端分组批量计算嵌入向量，再逐个记忆一次性写入"""
+        written = {}
+        groups: Dict[tuple, List[str]] = {}
+        for memory_name, pairs in pending.items():
+            if pairs:
+                groups.setdefault(memories[memory_name].embedding_signature, []).append(memory_name)
+
+        for memory_names in groups.values():
+            texts = list(dict.fromkeys(situation for name in memory_names for situation, _ in pending[name]))
+            vectors = dict(zip(texts, memories[memory_names[0]].get_embeddings(texts)))
+            for name in memory_names:
+                pairs = pending[name]
+                try:
+                    memories[name].add_situations(pairs, embeddings=[vectors[situation] for situation, _ in pairs])
+                    written[name] = len(pairs)
+                except Exception as e:
+                    logger.error(f"❌ [反思] 写入{name}失败: {e}")
+
+        return written
@@ -10,6 +10,9 @@ from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
 
 from .conditional_logic import ConditionalLogic
+from tradingagents.utils.tracing import trace_node
+from tradingagents.utils.context_compression import ContextCompressor, compress_tool_node
+from tradingagents.utils.debate_history import DebateWindow
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -33,6 +36,8 @@ class GraphSetup:
         conditional_logic: ConditionalLogic,
         config: Dict[str, Any] = None,
         react_llm = None,
+        debate_window: DebateWindow = None,
+        context_compressor: ContextCompressor = None,
     ):
         """Initialize with required components."""
         self.quick_thinking_llm = quick_thinking_llm
@@ -47,6 +52,9 @@ class GraphSetup:
         self.conditional_logic = conditional_logic
         self.config = config or {}
         self.react_llm = react_llm
+        # 辩论历史窗口和上下文压缩器属于本图实例，多个图并发运行时互不影响
+        self.debate_window = debate_window or DebateWindow.from_config(self.config)
+        self.context_compressor = context_compressor or ContextCompressor.from_config(self.config)
 
     def setup_graph(
         self, selected_analysts=["market", "social", "news", "fundamentals"]
@@ -90,7 +98,7 @@ class GraphSetup:
 
             # 所有LLM都使用标准分析师
             analyst_nodes["market"] = create_market_analyst(
-                self.quick_thinking_llm, self.toolkit
+                self.quick_thinking_llm, self.toolkit, self.context_compressor
             )
             delete_nodes["market"] = create_msg_delete()
             tool_nodes["market"] = self.tool_nodes["market"]
@@ -131,29 +139,29 @@ class GraphSetup:
 
             # 所有LLM都使用标准分析师（包含强制工具调用机制）
             analyst_nodes["fundamentals"] = create_fundamentals_analyst(
-                self.quick_thinking_llm, self.toolkit
+                self.quick_thinking_llm, self.toolkit, self.context_compressor
             )
             delete_nodes["fundamentals"] = create_msg_delete()
             tool_nodes["fundamentals"] = self.tool_nodes["fundamentals"]
 
         # Create researcher and manager nodes
         bull_researcher_node = create_bull_researcher(
-            self.quick_thinking_llm, self.bull_memory
+            self.quick_thinking_llm, self.bull_memory, self.debate_window, self.context_compressor
         )
         bear_researcher_node = create_bear_researcher(
-            self.quick_thinking_llm, self.bear_memory
+            self.quick_thinking_llm, self.bear_memory, self.debate_window, self.context_compressor
         )
         research_manager_node = create_research_manager(
-            self.deep_thinking_llm, self.invest_judge_memory
+            self.deep_thinking_llm, self.invest_judge_memory, self.debate_window
         )
         trader_node = create_trader(self.quick_thinking_llm, self.trader_memory)
 
         # Create risk analysis nodes
-        risky_analyst = create_risky_debator(self.quick_thinking_llm)
-        neutral_analyst = create_neutral_debator(self.quick_thinking_llm)
-        safe_analyst = create_safe_debator(self.quick_thinking_llm)
+        risky_analyst = create_risky_debator(self.quick_thinking_llm, self.debate_window, self.context_compressor)
+        neutral_analyst = create_neutral_debator(self.quick_thinking_llm, self.debate_window, self.context_compressor)
+        safe_analyst = create_safe_debator(self.quick_thinking_llm, self.debate_window, self.context_compressor)
         risk_manager_node = create_risk_manager(
-            self.deep_thinking_llm, self.risk_manager_memory
+            self.deep_thinking_llm, self.risk_manager_memory, self.debate_window
         )
 
         # Create workflow
@@ -161,21 +169,28 @@ class GraphSetup:
 
         # Add analyst nodes to the graph
         for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
+            node_name = f"{analyst_type.capitalize()} Analyst"
+            workflow.add_node(node_name, trace_node(node_name, node))
             workflow.add_node(
                 f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
             )
-            workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
+            # 工具结果写回消息前按分析师的token预算压缩
+            tools_name = f"tools_{analyst_type}"
+            workflow.add_node(tools_name, trace_node(tools_name, compress_tool_node(tool_nodes[analyst_type], analyst_type, self.context_compressor)))
 
         # Add other nodes
-        workflow.add_node("Bull Researcher", bull_researcher_node)
-        workflow.add_node("Bear Researcher", bear_researcher_node)
-        workflow.add_node("Research Manager", research_manager_node)
-        workflow.add_node("Trader", trader_node)
-        workflow.add_node("Risky Analyst", risky_analyst)
-        workflow.add_node("Neutral Analyst", neutral_analyst)
-        workflow.add_node("Safe Analyst", safe_analyst)
-        workflow.add_node("Risk Judge", risk_manager_node)
+        other_nodes = {
+            "Bull Researcher": bull_researcher_node,
+            "Bear Researcher": bear_researcher_node,
+            "Research Manager": research_manager_node,
+            "Trader": trader_node,
+            "Risky Analyst": risky_analyst,
+            "Neutral Analyst": neutral_analyst,
+            "Safe Analyst": safe_analyst,
+            "Risk Judge": risk_manager_node,
+        }
+        for node_name, node in other_nodes.items():
+            workflow.add_node(node_name, trace_node(node_name, node))
 
         # Define edges
         # Start with the first analyst
@@ -1,12 +1,61 @@
 # TradingAgents/graph/signal_processing.py
 
+import re
+
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统和图处理模块日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_graph_module
+from tradingagents.utils.decision_extractor import DecisionExtractor, DECISION_FIELDS, record_decision
 logger = get_logger("graph.signal_processing")
 
+# 从LLM响应/完整文本中补充提取目标价格的模式（模块加载时编译）
+_TARGET_PRICE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'目标价[位格]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',  # 目标价位: 45.50
+    r'目标[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 目标: 45.50
+    r'价格[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 价格: 45.50
+    r'价位[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 价位: 45.50
+    r'合理[价位格]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)', # 合理价位: 45.50
+    r'估值[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 估值: 45.50
+    r'[¥\$](\d+(?:\.\d+)?)',                      # ¥45.50 或 $190
+    r'(\d+(?:\.\d+)?)元',                         # 45.50元
+    r'(\d+(?:\.\d+)?)美元',                       # 190美元
+    r'建议[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',        # 建议: 45.50
+    r'预期[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',        # 预期: 45.50
+    r'看[到至]\s*[¥\$]?(\d+(?:\.\d+)?)',          # 看到45.50
+    r'上涨[到至]\s*[¥\$]?(\d+(?:\.\d+)?)',        # 上涨到45.50
+    r'(\d+(?:\.\d+)?)\s*[¥\$]',                  # 45.50¥
+)]
+
+_SIMPLE_PRICE_PATTERNS = [re.compile(p) for p in (
+    r'目标价[位格]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',  # 目标价位: 45.50
+    r'\*\*目标价[位格]?\*\*[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',  # **目标价位**: 45.50
+    r'目标[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 目标: 45.50
+    r'价格[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 价格: 45.50
+    r'[¥\$](\d+(?:\.\d+)?)',                      # ¥45.50 或 $190
+    r'(\d+(?:\.\d+)?)元',                         # 45.50元
+)]
+
+_CURRENT_PRICE_PATTERNS = [re.compile(p) for p in (
+    r'当前价[格位]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
+    r'现价[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
+    r'股价[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
+    r'价格[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
+)]
+
+_PERCENTAGE_PATTERNS = [re.compile(p) for p in (
+    r'上涨\s*(\d+(?:\.\d+)?)%',
+    r'涨幅\s*(\d+(?:\.\d+)?)%',
+    r'增长\s*(\d+(?:\.\d+)?)%',
+    r'(\d+(?:\.\d+)?)%\s*的?上涨',
+)]
+
+_JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+_BUY = re.compile(r'买入|BUY', re.IGNORECASE)
+_SELL = re.compile(r'卖出|SELL', re.IGNORECASE)
+_HOLD = re.compile(r'持有|HOLD', re.IGNORECASE)
+
 
 class SignalProcessor:
     """Processes trading signals to extract actionable decisions."""
@@ -14,6 +63,7 @@ class SignalProcessor:
     def __init__(self, quick_thinking_llm: ChatOpenAI):
         """Initialize with an LLM for processing."""
         self.quick_thinking_llm = quick_thinking_llm
+        self.decision_extractor = DecisionExtractor()
 
     @log_graph_module("signal_processing")
     def process_signal(self, full_signal: str, stock_symbol: str = None) -> dict:
@@ -40,6 +90,16 @@ class SignalProcessor:
         logger.info(f"🔍 [SignalProcessor] 处理信号: 股票={stock_symbol}, 市场={market_info['market_name']}, 货币={currency}",
                    extra={'stock_symbol': stock_symbol, 'market': market_info['market_name'], 'currency': currency})
 
+        # 快速路径：报告按模板给出了明确的建议和目标价时直接解析，不再调用LLM
+        extracted = self.decision_extractor.extract(full_signal)
+        if self.decision_extractor.is_confident(extracted):
+            result = {field: extracted[field] for field in DECISION_FIELDS}
+            logger.info(f"⚡ [SignalProcessor] 规则解析命中（解析置信度 {extracted['parse_confidence']:.2f}），跳过LLM: {result}",
+                       extra={'action': result['action'], 'target_price': result['target_price'],
+                             'confidence': result['confidence'], 'stock_symbol': stock_symbol})
+            return result
+        logger.info(f"🔍 [SignalProcessor] 规则解析置信度不足（{extracted['parse_confidence']:.2f}，{extracted['matched']}），使用LLM提取")
+
         messages = [
             (
                 "system",
@@ -77,10 +137,9 @@ class SignalProcessor:
 
             # 尝试解析JSON响应
             import json
-            import re
 
             # 提取JSON部分
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
+            json_match = _JSON_OBJECT.search(response)
             if json_match:
                 json_text = json_match.group()
                 logger.debug(f"🔍 [SignalProcessor] 提取的JSON: {json_text}")
@@ -107,30 +166,12 @@ class SignalProcessor:
                     reasoning = decision_data.get('reasoning', '')
                     full_text = f"{reasoning} {full_signal}"  # 扩大搜索范围
                     
-                    # 增强的价格匹配模式
-                    price_patterns = [
-                        r'目标价[位格]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',  # 目标价位: 45.50
-                        r'目标[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 目标: 45.50
-                        r'价格[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 价格: 45.50
-                        r'价位[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 价位: 45.50
-                        r'合理[价位格]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)', # 合理价位: 45.50
-                        r'估值[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 估值: 45.50
-                        r'[¥\$](\d+(?:\.\d+)?)',                      # ¥45.50 或 $190
-                        r'(\d+(?:\.\d+)?)元',                         # 45.50元
-                        r'(\d+(?:\.\d+)?)美元',                       # 190美元
-                        r'建议[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',        # 建议: 45.50
-                        r'预期[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',        # 预期: 45.50
-                        r'看[到至]\s*[¥\$]?(\d+(?:\.\d+)?)',          # 看到45.50
-                        r'上涨[到至]\s*[¥\$]?(\d+(?:\.\d+)?)',        # 上涨到45.50
-                        r'(\d+(?:\.\d+)?)\s*[¥\$]',                  # 45.50¥
-                    ]
-                    
-                    for pattern in price_patterns:
-                        price_match = re.search(pattern, full_text, re.IGNORECASE)
+                    for pattern in _TARGET_PRICE_PATTERNS:
+                        price_match = pattern.search(full_text)
                         if price_match:
                             try:
                                 target_price = float(price_match.group(1))
-                                logger.debug(f"🔍 [SignalProcessor] 从文本中提取到目标价格: {target_price} (模式: {pattern})")
+                                logger.debug(f"🔍 [SignalProcessor] 从文本中提取到目标价格: {target_price} (模式: {pattern.pattern})")
                                 break
                             except (ValueError, IndexError):
                                 continue
@@ -167,6 +208,7 @@ class SignalProcessor:
                 logger.info(f"🔍 [SignalProcessor] 处理结果: {result}",
                            extra={'action': result['action'], 'target_price': result['target_price'],
                                  'confidence': result['confidence'], 'stock_symbol': stock_symbol})
+                record_decision(full_signal, result)
                 return result
             else:
                 # 如果无法解析JSON，使用简单的文本提取
@@ -179,46 +221,30 @@ class SignalProcessor:
 
     def _smart_price_estimation(self, text: str, action: str, is_china: bool) -> float:
         """智能价格推算方法"""
-        import re
-        
         # 尝试从文本中提取当前价格和涨跌幅信息
         current_price = None
         percentage_change = None
-        
+
         # 提取当前价格
-        current_price_patterns = [
-            r'当前价[格位]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
-            r'现价[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
-            r'股价[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
-            r'价格[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
-        ]
-        
-        for pattern in current_price_patterns:
-            match = re.search(pattern, text)
+        for pattern in _CURRENT_PRICE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 try:
                     current_price = float(match.group(1))
                     break
                 except ValueError:
                     continue
-        
+
         # 提取涨跌幅信息
-        percentage_patterns = [
-            r'上涨\s*(\d+(?:\.\d+)?)%',
-            r'涨幅\s*(\d+(?:\.\d+)?)%',
-            r'增长\s*(\d+(?:\.\d+)?)%',
-            r'(\d+(?:\.\d+)?)%\s*的?上涨',
-        ]
-        
-        for pattern in percentage_patterns:
-            match = re.search(pattern, text)
+        for pattern in _PERCENTAGE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 try:
                     percentage_change = float(match.group(1)) / 100
                     break
                 except ValueError:
                     continue
-        
+
         # 基于动作和信息推算目标价
         if current_price and percentage_change:
             if action == '买入':
@@ -244,30 +270,19 @@ class SignalProcessor:
 
     def _extract_simple_decision(self, text: str) -> dict:
         """简单的决策提取方法作为备用"""
-        import re
-
         # 提取动作
         action = '持有'  # 默认
-        if re.search(r'买入|BUY', text, re.IGNORECASE):
+        if _BUY.search(text):
             action = '买入'
-        elif re.search(r'卖出|SELL', text, re.IGNORECASE):
+        elif _SELL.search(text):
             action = '卖出'
-        elif re.search(r'持有|HOLD', text, re.IGNORECASE):
+        elif _HOLD.search(text):
             action = '持有'
 
         # 尝试提取目标价格（使用增强的模式）
         target_price = None
-        price_patterns = [
-            r'目标价[位格]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',  # 目标价位: 45.50
-            r'\*\*目标价[位格]?\*\*[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',  # **目标价位**: 45.50
-            r'目标[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 目标: 45.50
-            r'价格[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',         # 价格: 45.50
-            r'[¥\$](\d+(?:\.\d+)?)',                      # ¥45.50 或 $190
-            r'(\d+(?:\.\d+)?)元',                         # 45.50元
-        ]
-
-        for pattern in price_patterns:
-            price_match = re.search(pattern, text)
+        for pattern in _SIMPLE_PRICE_PATTERNS:
+            price_match = pattern.search(text)
             if price_match:
                 try:
                     target_price = float(price_match.group(1))
@@ -3,13 +3,10 @@
 import os
 from pathlib import Path
 import json
+import threading
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from tradingagents.llm_adapters import ChatDashScope, ChatDashScopeOpenAI
 
 from langgraph.prebuilt import ToolNode
 
@@ -29,14 +26,24 @@ from tradingagents.agents.utils.agent_states import (
     RiskDebateState,
 )
 from tradingagents.dataflows.interface import set_config
+from tradingagents.utils.tracing import attach_llm_tracing, span
+from tradingagents.utils.provider_registry import get_llm_adapters
+from tradingagents.utils.context_compression import ContextCompressor
+from tradingagents.utils.debate_history import (
+    INVEST_SPEAKERS, RISK_SPEAKERS, DebateWindow, history_views
+)
 
-from .conditional_logic import ConditionalLogic
+from .conditional_logic import ConditionalLogic, collect_debate_stats
 from .setup import GraphSetup
 from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
 
 
+# 同一进程内多个图写同一股票的状态日志时串行化读-合并-写
+_state_log_lock = threading.Lock()
+
+
 class TradingAgentsGraph:
     """Main class that orchestrates the trading agents framework."""
 
@@ -58,6 +65,9 @@ class TradingAgentsGraph:
 
         # Update the interface's config
         set_config(self.config)
+        # 上下文压缩器和辩论历史窗口按本图配置创建，传入分析师和辩论节点
+        self.context_compressor = ContextCompressor.from_config(self.config)
+        self.debate_window = DebateWindow.from_config(self.config)
 
         # Create necessary directories
         os.makedirs(
@@ -65,14 +75,18 @@ class TradingAgentsGraph:
             exist_ok=True,
         )
 
-        # Initialize LLMs
+        # Initialize LLMs（LLM SDK按所选提供商延迟导入）
+        llm_adapters = get_llm_adapters()
         if self.config["llm_provider"].lower() == "openai" or self.config["llm_provider"] == "ollama" or self.config["llm_provider"] == "openrouter":
+            ChatOpenAI = llm_adapters.get("openai")
             self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
             self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
         elif self.config["llm_provider"].lower() == "anthropic":
+            ChatAnthropic = llm_adapters.get("anthropic")
             self.deep_thinking_llm = ChatAnthropic(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
             self.quick_thinking_llm = ChatAnthropic(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
         elif self.config["llm_provider"].lower() == "google":
+            ChatGoogleGenerativeAI = llm_adapters.get("google")
             google_api_key = os.getenv('GOOGLE_API_KEY')
             self.deep_thinking_llm = ChatGoogleGenerativeAI(
                 model=self.config["deep_think_llm"],
@@ -92,6 +106,7 @@ class TradingAgentsGraph:
               "阿里百炼" in self.config["llm_provider"]):
             # 使用 OpenAI 兼容适配器，支持原生 Function Calling
             logger.info(f"🔧 使用阿里百炼 OpenAI 兼容适配器 (支持原生工具调用)")
+            ChatDashScopeOpenAI = llm_adapters.get("dashscope_openai")
             self.deep_thinking_llm = ChatDashScopeOpenAI(
                 model=self.config["deep_think_llm"],
                 temperature=0.1,
@@ -105,8 +120,7 @@ class TradingAgentsGraph:
         elif (self.config["llm_provider"].lower() == "deepseek" or
               "deepseek" in self.config["llm_provider"].lower()):
             # DeepSeek V3配置 - 使用支持token统计的适配器
-            from tradingagents.llm_adapters.deepseek_adapter import ChatDeepSeek
-
+            ChatDeepSeek = llm_adapters.get("deepseek")
 
             deepseek_api_key = os.getenv('DEEPSEEK_API_KEY')
             if not deepseek_api_key:
@@ -134,6 +148,9 @@ class TradingAgentsGraph:
         else:
             raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
         
+        # 记录每次LLM调用的耗时span
+        attach_llm_tracing(self.deep_thinking_llm, self.quick_thinking_llm)
+
         self.toolkit = Toolkit(config=self.config)
 
         # Initialize memories (如果启用)
@@ -157,7 +174,13 @@ class TradingAgentsGraph:
         self.tool_nodes = self._create_tool_nodes()
 
         # Initialize components
-        self.conditional_logic = ConditionalLogic()
+        # 辩论轮数上限保持默认值，这里只接入提前结束的配置
+        self.conditional_logic = ConditionalLogic(
+            early_stop=self.config.get("debate_early_stop", True),
+            min_debate_rounds=self.config.get("min_debate_rounds", 2),
+            min_risk_discuss_rounds=self.config.get("min_risk_discuss_rounds", 2),
+            novelty_threshold=self.config.get("debate_novelty_threshold", 0.35),
+        )
         self.graph_setup = GraphSetup(
             self.quick_thinking_llm,
             self.deep_thinking_llm,
@@ -171,6 +194,8 @@ class TradingAgentsGraph:
             self.conditional_logic,
             self.config,
             getattr(self, 'react_llm', None),
+            debate_window=self.debate_window,
+            context_compressor=self.context_compressor,
         )
 
         self.propagator = Propagator()
@@ -252,31 +277,33 @@ class TradingAgentsGraph:
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
         args = self.propagator.get_graph_args()
 
-        if self.debug:
-            # Debug mode with tracing
-            trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
-                if len(chunk["messages"]) == 0:
-                    pass
-                else:
-                    chunk["messages"][-1].pretty_print()
-                    trace.append(chunk)
-
-            final_state = trace[-1]
-        else:
-            # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
+        with collect_debate_stats() as debate_stats, \
+                span("graph.propagate", kind="internal", symbol=company_name, trade_date=str(trade_date)):
+            if self.debug:
+                # Debug mode with tracing
+                trace = []
+                for chunk in self.graph.stream(init_agent_state, **args):
+                    if len(chunk["messages"]) == 0:
+                        pass
+                    else:
+                        chunk["messages"][-1].pretty_print()
+                        trace.append(chunk)
+
+                final_state = trace[-1]
+            else:
+                # Standard mode without tracing
+                final_state = self.graph.invoke(init_agent_state, **args)
 
         # Store current state for reflection
         self.curr_state = final_state
 
         # Log state
-        self._log_state(trade_date, final_state)
+        self._log_state(trade_date, final_state, debate_stats)
 
         # Return decision and processed signal
         return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
 
-    def _log_state(self, trade_date, final_state):
+    def _log_state(self, trade_date, final_state, debate_stats=None):
         """Log the final state to a JSON file."""
         self.log_states_dict[str(trade_date)] = {
             "company_of_interest": final_state["company_of_interest"],
@@ -286,9 +313,7 @@ class TradingAgentsGraph:
             "news_report": final_state["news_report"],
             "fundamentals_report": final_state["fundamentals_report"],
             "investment_debate_state": {
-                "bull_history": final_state["investment_debate_state"]["bull_history"],
-                "bear_history": final_state["investment_debate_state"]["bear_history"],
-                "history": final_state["investment_debate_state"]["history"],
+                **history_views(final_state["investment_debate_state"], INVEST_SPEAKERS),
                 "current_response": final_state["investment_debate_state"][
                     "current_response"
                 ],
@@ -298,43 +323,91 @@ class TradingAgentsGraph:
             },
             "trader_investment_decision": final_state["trader_investment_plan"],
             "risk_debate_state": {
-                "risky_history": final_state["risk_debate_state"]["risky_history"],
-                "safe_history": final_state["risk_debate_state"]["safe_history"],
-                "neutral_history": final_state["risk_debate_state"]["neutral_history"],
-                "history": final_state["risk_debate_state"]["history"],
+                **history_views(final_state["risk_debate_state"], RISK_SPEAKERS),
                 "judge_decision": final_state["risk_debate_state"]["judge_decision"],
             },
             "investment_plan": final_state["investment_plan"],
             "final_trade_decision": final_state["final_trade_decision"],
+            "debate_convergence": list(debate_stats or []),
         }
 
-        # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
-        directory.mkdir(parents=True, exist_ok=True)
-
-        with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
-            "w",
-        ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+        # Save to file：与已有日志合并后写回，保留之前运行记录的决策供批量反思使用
+        log_file = self.state_log_path(self.ticker)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with _state_log_lock:
+            merged = {**self.load_state_log(self.ticker), str(trade_date): self.log_states_dict[str(trade_date)]}
+            tmp_file = log_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(merged, f, indent=4)
+            os.replace(tmp_file, log_file)
+
+    def _get_memories(self) -> Dict[str, Any]:
+        return {
+            "bull_memory": self.bull_memory,
+            "bear_memory": self.bear_memory,
+            "trader_memory": self.trader_memory,
+            "invest_judge_memory": self.invest_judge_memory,
+            "risk_manager_memory": self.risk_manager_memory,
+        }
 
     def reflect_and_remember(self, returns_losses):
         """Reflect on decisions and update memory based on returns."""
-        self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
-        )
-        self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
-        )
-        self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
-        )
-        self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
-        )
-        self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
-        )
+        self.reflector.reflect_all(self.curr_state, returns_losses, self._get_memories())
+
+    @staticmethod
+    def state_log_path(ticker: str) -> Path:
+        """某只股票的决策状态日志文件"""
+        return Path(f"eval_results/{ticker}/TradingAgentsStrategy_logs/full_states_log.json")
+
+    @staticmethod
+    def load_state_log(ticker: str) -> Dict[str, Any]:
+        """读取某只股票的全部决策状态日志 {交易日期: 状态}，文件不存在或损坏时返回空字典"""
+        log_file = TradingAgentsGraph.state_log_path(ticker)
+        if not log_file.exists():
+            return {}
+        try:
+            with open(log_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 读取决策日志失败: {log_file}: {e}")
+            return {}
+
+    @staticmethod
+    def load_logged_state(ticker: str, trade_date, state_log: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """从_log_state写出的日志中读取某次决策的最终状态，转换为反思所需的格式"""
+        if state_log is None:
+            state_log = TradingAgentsGraph.load_state_log(ticker)
+        state = state_log.get(str(trade_date))
+        if state is None:
+            return None
+
+        state = dict(state)
+        state.setdefault("trader_investment_plan", state.get("trader_investment_decision", ""))
+        return state
+
+    def reflect_and_remember_batch(self, outcomes: List[Tuple[str, Any, Any]], max_workers: int = 8) -> Dict[str, int]:
+        """
+        批量学习历史决策的结果
+
+        Args:
+            outcomes: [(股票代码, 交易日期, 收益), ...]，决策状态从eval_results日志中读取
+            max_workers: 并发的反思LLM调用数
+
+        Returns:
+            Dict[str, int]: 每个记忆写入的条数
+        """
+        states = []
+        state_logs: Dict[str, Dict[str, Any]] = {}  # 每只股票的日志只读取一次
+        for ticker, trade_date, returns_losses in outcomes:
+            if ticker not in state_logs:
+                state_logs[ticker] = self.load_state_log(ticker)
+            state = self.load_logged_state(ticker, trade_date, state_logs[ticker])
+            if state is None:
+                logger.warning(f"⚠️ [反思] 未找到{ticker} {trade_date}的决策日志，跳过")
+                continue
+            states.append((state, returns_losses))
+
+        return self.reflector.reflect_batch(states, self._get_memories(), max_workers)
 
     def process_signal(self, full_signal, stock_symbol=None):
         """Process a signal to extract the core decision."""
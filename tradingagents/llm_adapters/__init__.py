@@ -1,5 +1,16 @@
 # LLM Adapters for TradingAgents
-from .dashscope_adapter import ChatDashScope
-from .dashscope_openai_adapter import ChatDashScopeOpenAI
+# 适配器在首次访问时才导入，避免加载未使用的SDK
+from tradingagents.utils.provider_registry import get_llm_adapters
+
+_LAZY_ADAPTERS = {
+    "ChatDashScope": "dashscope",
+    "ChatDashScopeOpenAI": "dashscope_openai",
+}
 
 __all__ = ["ChatDashScope", "ChatDashScopeOpenAI"]
+
+
+def __getattr__(name):
+    if name in _LAZY_ADAPTERS:
+        return get_llm_adapters().get(_LAZY_ADAPTERS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+工具输出与报告的上下文压缩
+
+分析师把工具原始输出（数月的OHLCV表格、指标逐日数值、冗长的基本面文本）交给LLM，
+多空研究员和风险辩论者每一轮又会重新嵌入四份完整报告。本模块在它们进入提示词之前压缩：
+
+- 表格（CSV、Markdown、空格对齐的DataFrame输出、"日期: 数值"序列）只保留最近N行，
+  并在前面附上基于全部行的统计摘要（最新/最高/最低/均值/区间变化）
+- 重复出现的段落只保留第一次
+- 每个智能体有自己的token预算（本地tokenizer计数），仍超出时保留开头和结尾、省略中间
+
+用法:
+    compressor = ContextCompressor.from_config(config)     # 每个图实例一个，传入分析师和辩论节点
+    outputs = compressor.compress_tool_outputs([csv_text, indicator_text], agent="market")
+    reports = compressor.compress_reports({"market_report": ...}, agent="bull")
+"""
+
+import re
+import math
+import functools
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+
+DEFAULT_TOKEN_BUDGETS = {
+    # 分析师：一次工具调用返回的全部输出
+    "market": 4000,
+    "fundamentals": 5000,
+    "news": 4000,
+    "social": 3000,
+    # 辩论者：嵌入提示词的四份报告合计
+    "bull": 6000,
+    "bear": 6000,
+    "risky": 6000,
+    "safe": 6000,
+    "neutral": 6000,
+    "default": 4000,
+}
+DEFAULT_LOOKBACK_ROWS = 30
+# 超出预算时表格行数最少缩减到
+MIN_LOOKBACK_ROWS = 5
+# 长度不足该字符数的段落不参与去重（分隔线、短标题等）
+MIN_DEDUPE_CHARS = 20
+# 数值列的判定：至少该比例的行能解析为数字（指标序列中含非交易日的N/A行）
+NUMERIC_COLUMN_RATIO = 0.6
+# 截断时开头部分所占预算比例，其余留给结尾（报告的结论通常在末尾）
+HEAD_BUDGET_RATIO = 0.7
+
+_CJK_PATTERN = re.compile(r'[　-〿一-鿿＀-￯]')
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}')
+_DATE_VALUE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})\s*:\s*(.+)$')
+_NUMBER_PATTERN = re.compile(r'^[-+]?[¥$]?[-+]?\d[\d,]*(\.\d+)?%?$|^[-+]?\.\d+$')
+
+
+# ===== token计数 =====
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_failed = False
+
+
+def _get_encoding():
+    """加载tiktoken编码（首次需要本地已缓存的编码文件），失败后不再重试"""
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed or not TIKTOKEN_AVAILABLE:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                _encoding_failed = True
+                logger.warning(f"⚠️ [上下文压缩] tiktoken编码不可用，使用字符估算: {e}")
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """无tokenizer时的估算：中日韩字符每字约1个token，其余约4个字符1个token"""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def count_tokens(text: str) -> int:
+    """统计文本的token数，优先使用本地tiktoken"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+# ===== 表格识别与摘要 =====
+
+def _split_row(line: str) -> Tuple[Optional[str], List[str]]:
+    """识别一行表格数据的分隔方式，返回 (类型, 字段)"""
+    stripped = line.strip()
+    if not stripped:
+        return None, []
+    if stripped.startswith('|') and stripped.endswith('|') and stripped.count('|') >= 3:
+        return 'pipe', [cell.strip() for cell in stripped.strip('|').split('|')]
+    match = _DATE_VALUE_PATTERN.match(stripped)
+    if match:
+        return 'series', [match.group(1), match.group(2).strip()]
+    if stripped.count(',') >= 1 and not _CJK_PATTERN.search(stripped):
+        return 'csv', [cell.strip() for cell in stripped.split(',')]
+    fields = stripped.split()
+    if len(fields) >= 3:
+        return 'space', fields
+    return None, []
+
+
+def _parse_number(value: str) -> Optional[float]:
+    value = value.strip()
+    if not _NUMBER_PATTERN.match(value):
+        return None
+    try:
+        return float(value.replace(',', '').replace('¥', '').replace('$', '').rstrip('%'))
+    except ValueError:
+        return None
+
+
+def _format_number(value: float) -> str:
+    if abs(value) >= 1e6:
+        return f"{value:,.0f}"
+    if abs(value) >= 1:
+        return f"{value:,.2f}"
+    return f"{value:.4g}"
+
+
+def _is_header(fields: List[str]) -> bool:
+    """字段大多不是数字/日期的行视为表头（含Markdown分隔行）"""
+    values = [f for f in fields if f]
+    if not values:
+        return True
+    data_like = sum(1 for f in values if _parse_number(f) is not None or _DATE_PATTERN.match(f))
+    return data_like <= len(values) // 3
+
+
+def _has_data_column(rows: List[List[str]]) -> bool:
+    """至少有一列大多是数字或日期，排除恰好字数相同的普通文本行"""
+    for col in range(len(rows[0])):
+        values = [row[col] for row in rows if col < len(row)]
+        data_like = sum(1 for v in values if _parse_number(v) is not None or _DATE_PATTERN.match(v))
+        if data_like >= NUMERIC_COLUMN_RATIO * len(rows):
+            return True
+    return False
+
+
+def _find_tables(lines: List[str], min_rows: int) -> List[Tuple[int, int, int]]:
+    """
+    找出数据行数超过min_rows的表格
+
+    Returns:
+        List: (表头起始行, 数据起始行, 数据结束行+1)
+    """
+    parsed = [_split_row(line) for line in lines]
+    signatures = [(kind, len(fields)) if kind else None for kind, fields in parsed]
+
+    tables = []
+    previous_end = 0
+    index = 0
+    while index < len(lines):
+        signature = signatures[index]
+        if signature is None:
+            index += 1
+            continue
+        end = index
+        while end < len(lines) and signatures[end] == signature:
+            end += 1
+
+        # 运行开头的表头行（CSV表头、Markdown的表头和分隔行与数据行字段数相同）
+        data_start = index
+        while data_start < end and _is_header(parsed[data_start][1]):
+            data_start += 1
+        header_start = index
+        if data_start == index and index - 1 >= previous_end and signatures[index - 1] is not None \
+                and signatures[index - 1][0] == signature[0] and _is_header(parsed[index - 1][1]):
+            # DataFrame输出的表头比数据行少一个索引字段，单独成行
+            header_start = index - 1
+
+        rows = [fields for _, fields in parsed[data_start:end]]
+        if len(rows) > min_rows and _has_data_column(rows):
+            tables.append((header_start, data_start, end))
+            previous_end = end
+        index = end
+    return tables
+
+
+def summarize_table(header: List[str], rows: List[List[str]], kept_rows: int) -> List[str]:
+    """基于全部数据行计算各数值列的统计摘要"""
+    column_count = max(len(row) for row in rows)
+    # DataFrame的表头没有索引列，右对齐到数据列
+    offset = column_count - len(header) if header and len(header) < column_count else 0
+
+    date_column = None
+    for col in range(column_count):
+        if all(col < len(row) and _DATE_PATTERN.match(row[col]) for row in rows):
+            date_column = col
+            break
+
+    order = list(range(len(rows)))
+    if date_column is not None:
+        order.sort(key=lambda i: rows[i][date_column])
+
+    summary = []
+    if date_column is not None:
+        first, last = rows[order[0]][date_column][:10], rows[order[-1]][date_column][:10]
+        summary.append(f"[表格摘要] 共{len(rows)}行（{first} 至 {last}），以下仅保留最近{kept_rows}行")
+    else:
+        summary.append(f"[表格摘要] 共{len(rows)}行，以下仅保留最后{kept_rows}行")
+
+    for col in range(column_count):
+        if col == date_column:
+            continue
+        values = [_parse_number(rows[i][col]) if col < len(rows[i]) else None for i in order]
+        numeric = [v for v in values if v is not None]
+        if len(numeric) < NUMERIC_COLUMN_RATIO * len(rows) or len(set(numeric)) <= 1:
+            continue
+        header_index = col - offset
+        if header and header_index < 0:
+            # DataFrame的行索引列
+            continue
+        name = header[header_index] if header and header_index < len(header) and header[header_index] \
+            else f"列{col + 1}"
+        line = (f"- {name}: 最新 {_format_number(numeric[-1])}，最高 {_format_number(max(numeric))}，"
+                f"最低 {_format_number(min(numeric))}，均值 {_format_number(sum(numeric) / len(numeric))}")
+        if numeric[0] != 0:
+            line += f"，区间变化 {(numeric[-1] - numeric[0]) / abs(numeric[0]):+.2%}"
+        summary.append(line)
+    return summary
+
+
+def compress_tables(text: str, lookback_rows: int) -> str:
+    """把超过lookback_rows行的表格缩减为统计摘要+最近lookback_rows行"""
+    lines = text.split('\n')
+    tables = _find_tables(lines, lookback_rows)
+    if not tables:
+        return text
+
+    output = []
+    cursor = 0
+    for header_start, data_start, data_end in tables:
+        output.extend(lines[cursor:header_start])
+        header_lines = lines[header_start:data_start]
+        header_fields = _split_row(header_lines[0])[1] if header_lines else []
+        data_lines = lines[data_start:data_end]
+        rows = [_split_row(line)[1] for line in data_lines]
+
+        # 有日期列时保留日期最新的行（升序和降序的输出都适用），否则保留最后几行
+        date_column = next((col for col in range(len(rows[0]))
+                            if all(col < len(row) and _DATE_PATTERN.match(row[col]) for row in rows)), None)
+        if date_column is not None:
+            latest = sorted(range(len(rows)), key=lambda i: rows[i][date_column])[-lookback_rows:]
+            kept = [data_lines[i] for i in sorted(latest)]
+        else:
+            kept = data_lines[-lookback_rows:]
+
+        output.extend(summarize_table(header_fields, rows, len(kept)))
+        output.extend(header_lines)
+        output.extend(kept)
+        cursor = data_end
+    output.extend(lines[cursor:])
+    return '\n'.join(output)
+
+
+# ===== 去重与截断 =====
+
+def dedupe_sections(text: str, seen: Optional[set] = None) -> str:
+    """删除重复的段落（以空行分隔），seen可在多个输出之间共享"""
+    seen = set() if seen is None else seen
+    sections = re.split(r'\n\s*\n', text)
+    kept = []
+    for section in sections:
+        key = re.sub(r'\s+', ' ', section).strip()
+        if len(key) >= MIN_DEDUPE_CHARS:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(section)
+    return '\n\n'.join(kept)
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """保留开头和结尾、省略中间，使文本不超过budget个token"""
+    total = count_tokens(text)
+    if total <= budget:
+        return text
+
+    marker_budget = 20
+    head_budget = int((budget - marker_budget) * HEAD_BUDGET_RATIO)
+    tail_budget = budget - marker_budget - head_budget
+
+    lines = text.split('\n')
+    head, used = [], 0
+    for line in lines:
+        tokens = count_tokens(line) + 1
+        if used + tokens > head_budget:
+            break
+        head.append(line)
+        used += tokens
+
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        tokens = count_tokens(line) + 1
+        if used + tokens > tail_budget:
+            break
+        tail.append(line)
+        used += tokens
+    tail.reverse()
+
+    if not head and not tail:
+        # 没有换行的长文本按字符比例截取
+        keep_chars = max(int(len(text) * (budget - marker_budget) / total), 1)
+        head = [text[:int(keep_chars * HEAD_BUDGET_RATIO)]]
+        tail = [text[len(text) - (keep_chars - len(head[0])):]] if keep_chars > len(head[0]) else []
+
+    omitted = total - count_tokens('\n'.join(head + tail))
+    return '\n'.join(head + [f"……（已省略约{omitted}个token）……"] + tail)
+
+
+def allocate_budget(sizes: List[int], budget: int) -> List[int]:
+    """按"注水"方式分配预算：小于平均份额的输出全额保留，剩余预算由较大的输出均分"""
+    allocation = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for position, index in enumerate(order):
+        share = remaining // (len(sizes) - position)
+        allocation[index] = min(sizes[index], share)
+        remaining -= allocation[index]
+    return allocation
+
+
+@functools.lru_cache(maxsize=256)
+def _fit_text(text: str, budget: int, lookback_rows: int) -> str:
+    """压缩表格后仍超预算时逐步减少保留行数，最后截断；结果按参数缓存（辩论每轮嵌入相同的报告）"""
+    compressed = compress_tables(text, lookback_rows)
+    rows = lookback_rows
+    while count_tokens(compressed) > budget and rows > MIN_LOOKBACK_ROWS:
+        rows = max(rows // 2, MIN_LOOKBACK_ROWS)
+        compressed = compress_tables(text, rows)
+    return truncate_to_budget(compressed, budget)
+
+
+class ContextCompressor:
+    """按智能体预算压缩工具输出和报告"""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None,
+                 lookback_rows: int = DEFAULT_LOOKBACK_ROWS, enabled: bool = True):
+        self.budgets = {**DEFAULT_TOKEN_BUDGETS, **(budgets or {})}
+        self.lookback_rows = lookback_rows
+        self.enabled = enabled
+        # 每个智能体压缩前后的token累计，用于观察压缩效果
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ContextCompressor":
+        """按图配置（context_token_budgets 等）创建压缩器"""
+        return cls(
+            budgets=config.get("context_token_budgets"),
+            lookback_rows=config.get("context_lookback_rows", DEFAULT_LOOKBACK_ROWS),
+            enabled=config.get("context_compression", True),
+        )
+
+    def budget_for(self, agent: str) -> int:
+        return self.budgets.get(agent, self.budgets["default"])
+
+    def _record(self, agent: str, before: int, after: int):
+        with self._lock:
+            entry = self.stats.setdefault(agent, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+            entry["calls"] += 1
+            entry["tokens_before"] += before
+            entry["tokens_after"] += after
+        if after < before:
+            logger.info(f"🗜️ [上下文压缩] {agent}: {before} -> {after} tokens")
+
+    def compress_texts(self, texts: List[str], agent: str, budget: Optional[int] = None) -> List[str]:
+        """在一个预算内压缩多段文本：先去重、压缩表格，再按大小分配预算"""
+        if not self.enabled or not texts:
+            return list(texts)
+        budget = budget if budget is not None else self.budget_for(agent)
+        before = [count_tokens(text) for text in texts]
+        if sum(before) <= budget:
+            return list(texts)
+
+        seen: set = set()
+        deduped = [dedupe_sections(text, seen) for text in texts]
+        sizes = [count_tokens(compress_tables(text, self.lookback_rows)) for text in deduped]
+        allocation = allocate_budget(sizes, budget)
+        result = [_fit_text(text, share, self.lookback_rows) for text, share in zip(deduped, allocation)]
+        self._record(agent, sum(before), sum(count_tokens(text) for text in result))
+        return result
+
+    def compress_text(self, text: str, agent: str, budget: Optional[int] = None) -> str:
+        return self.compress_texts([text], agent, budget)[0]
+
+    def compress_tool_outputs(self, outputs: List[Any], agent: str) -> List[str]:
+        """压缩一次工具调用批次的全部输出"""
+        return self.compress_texts([str(output) for output in outputs], agent)
+
+    def compress_reports(self, reports: Dict[str, str], agent: str) -> Dict[str, str]:
+        """压缩辩论者提示词中嵌入的报告，返回同样键的字典"""
+        keys = list(reports)
+        compressed = self.compress_texts([reports[key] or "" for key in keys], agent)
+        return dict(zip(keys, compressed))
+
+    def compress_tool_messages(self, messages: List[Any], agent: str) -> List[Any]:
+        """原地压缩ToolMessage的内容（其他消息不变）"""
+        tool_messages = [m for m in messages if getattr(m, "type", None) == "tool" and isinstance(m.content, str)]
+        if tool_messages:
+            compressed = self.compress_texts([m.content for m in tool_messages], agent)
+            for message, content in zip(tool_messages, compressed):
+                message.content = content
+        return messages
+
+
+REPORT_KEYS = ("market_report", "sentiment_report", "news_report", "fundamentals_report")
+
+
+def compress_state_reports(state: Dict[str, Any], agent: str,
+                           compressor: ContextCompressor) -> Tuple[str, ...]:
+    """按智能体预算压缩状态中的四份分析师报告，按REPORT_KEYS顺序返回"""
+    reports = compressor.compress_reports({key: state[key] for key in REPORT_KEYS}, agent)
+    return tuple(reports[key] for key in REPORT_KEYS)
+
+
+def compress_tool_node(tool_node: Any, agent: str, compressor: ContextCompressor) -> Callable:
+    """包装LangGraph的ToolNode，工具结果写回状态前先压缩"""
+    def node(state, config=None):
+        result = tool_node.invoke(state, config)
+        messages = result.get("messages", []) if isinstance(result, dict) else result
+        compressor.compress_tool_messages(messages, agent)
+        return result
+    return node
+
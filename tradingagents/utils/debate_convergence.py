@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+辩论收敛判断
+投资辩论（看涨/看跌研究员）和风险辩论（激进/保守/中性分析师）每完成一轮后，衡量本轮发言相对之前
+各轮的新内容比例（词汇相似度，或可选的本地嵌入向量相似度）以及各方立场是否稳定，
+论点不再变化时提前结束辩论，轮数介于配置的最小/最大轮数之间
+
+- 新颖度 = 1 - 本轮发言与之前各轮发言的最大相似度；词汇相似度使用中文字二元组和英文单词的
+  加权重叠（本轮发言中已在之前出现过的比例）
+- 立场 = 发言中的投资建议（买入/持有/卖出，见decision_extractor.detect_action）
+- 达到最小轮数后，本轮所有发言者的新颖度都低于阈值且立场与上一轮相同，即判定收敛
+- replay_debate()在已保存的完整辩论上回放判断，统计可节省的轮数和提前结束时立场与完整辩论的差异
+
+用法:
+    convergence = DebateConvergence(min_rounds=1, novelty_threshold=0.35)
+    result = convergence.assess({"Bull Analyst": [...], "Bear Analyst": [...]})
+    if result['converged']:
+        ...
+"""
+
+import re
+import math
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from tradingagents.utils.decision_extractor import detect_action
+from tradingagents.utils.debate_history import INVEST_SPEAKERS, RISK_SPEAKERS, split_turns
+
+_CJK_RUN = re.compile(r'[一-鿿]+')
+_WORD = re.compile(r'[a-zA-Z]{2,}|\d+(?:\.\d+)?')
+
+
+def shingles(text: str) -> Counter:
+    """文本的词汇特征：中文字二元组 + 英文单词/数字"""
+    features = Counter()
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            features[run] += 1
+        features.update(run[i:i + 2] for i in range(len(run) - 1))
+    features.update(word.lower() for word in _WORD.findall(text))
+    return features
+
+
+def lexical_similarity(text: str, others: Iterable[str]) -> float:
+    """text的特征中已在others出现过的比例（按出现次数加权）"""
+    current = shingles(text)
+    total = sum(current.values())
+    if not total:
+        return 1.0
+    seen = Counter()
+    for other in others:
+        seen |= shingles(other)
+    return sum(min(count, seen[feature]) for feature, count in current.items()) / total
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class DebateConvergence:
+    """基于新颖度和立场稳定性的辩论收敛判断"""
+
+    def __init__(self, min_rounds: int = 1, novelty_threshold: float = 0.35,
+                 embedder: Optional[Callable[[str], Sequence[float]]] = None):
+        """
+        Args:
+            min_rounds: 至少进行的轮数（不少于2轮才能比较前后两轮）
+            novelty_threshold: 本轮新颖度低于该值视为没有新论点
+            embedder: 可选的本地嵌入函数（文本 -> 向量），提供时用向量余弦相似度代替词汇相似度
+        """
+        self.min_rounds = max(int(min_rounds), 2)
+        self.novelty_threshold = novelty_threshold
+        self.embedder = embedder
+
+    def novelty(self, text: str, prior: List[str]) -> float:
+        """发言相对之前发言的新颖度（0-1）"""
+        if not prior:
+            return 1.0
+        if self.embedder is not None:
+            vector = self.embedder(text)
+            return 1.0 - max(_cosine(vector, self.embedder(other)) for other in prior)
+        return 1.0 - lexical_similarity(text, prior)
+
+    def assess(self, speaker_turns: Dict[str, List[str]]) -> Dict[str, Any]:
+        """
+        判断辩论在最近一个完整轮次后是否收敛
+
+        Args:
+            speaker_turns: {发言者: [第1轮发言, 第2轮发言, ...]}
+
+        Returns:
+            Dict: rounds（完整轮数）、novelty（各发言者本轮新颖度）、stances（各发言者本轮立场）、
+                  stance_stable、converged
+        """
+        rounds = min((len(turns) for turns in speaker_turns.values()), default=0)
+        result = {'rounds': rounds, 'novelty': {}, 'stances': {}, 'stance_stable': False, 'converged': False}
+        if rounds < 2:
+            return result
+
+        prior = [turn for turns in speaker_turns.values() for turn in turns[:rounds - 1]]
+        stable = True
+        for speaker, turns in speaker_turns.items():
+            latest = turns[rounds - 1]
+            result['novelty'][speaker] = round(self.novelty(latest, prior), 3)
+            stance = detect_action(latest)[0]
+            result['stances'][speaker] = stance
+            stable = stable and stance == detect_action(turns[rounds - 2])[0]
+
+        result['stance_stable'] = stable
+        result['converged'] = (rounds >= self.min_rounds and stable and
+                               all(n < self.novelty_threshold for n in result['novelty'].values()))
+        return result
+
+
+def replay_debate(speaker_turns: Dict[str, List[str]], convergence: DebateConvergence = None) -> Dict[str, Any]:
+    """
+    在完整辩论记录上回放收敛判断
+
+    Returns:
+        Dict: rounds（实际轮数）、stop_round（收敛时的轮数，未收敛时等于rounds）、rounds_saved、
+              stance_changed（提前结束时的立场与完整辩论最后一轮是否不同）
+    """
+    convergence = convergence or DebateConvergence()
+    rounds = min((len(turns) for turns in speaker_turns.values()), default=0)
+    stop_round = rounds
+    for n in range(2, rounds):
+        if convergence.assess({s: turns[:n] for s, turns in speaker_turns.items()})['converged']:
+            stop_round = n
+            break
+
+    stance_changed = any(
+        detect_action(turns[stop_round - 1])[0] != detect_action(turns[rounds - 1])[0]
+        for turns in speaker_turns.values()) if rounds else False
+    return {'rounds': rounds, 'stop_round': stop_round, 'rounds_saved': rounds - stop_round,
+            'stance_changed': stance_changed}
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+结构化、有界的辩论历史
+投资辩论和风险辩论的状态只保存一份按发言顺序追加的发言记录（turns），不再把同一段发言
+重复拼接进 history / bull_history / risky_history 等多个不断增长的字符串：
+
+- 每条发言记录为 {"speaker": "Bull Analyst", "content": "..."}，各发言者的历史按需从记录派生
+- 嵌入提示词时只保留最近 window_turns 条原文，更早的发言在移出窗口时压缩为摘要（保留首句、
+  末句和含数据的句子），摘要整体不超过 summary_max_tokens，超出时丢弃最早的摘要
+- history_views() 派生出旧的字符串字段，供日志、CLI和Web展示使用；读取旧格式状态
+  （只有字符串字段、没有turns）时各函数回退到原字段
+
+用法:
+    window = DebateWindow.from_config(config)              # 每个图实例一个，传入辩论节点
+    history = window.prompt_history(debate_state)          # 提示词中的辩论历史
+    updates = window.append(debate_state, "Bull Analyst", response.content)
+    bull_history = speaker_history(debate_state, "Bull Analyst")
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from tradingagents.utils.context_compression import count_tokens
+
+# 辩论参与者（按发言顺序）
+INVEST_SPEAKERS = ("Bull Analyst", "Bear Analyst")
+RISK_SPEAKERS = ("Risky Analyst", "Safe Analyst", "Neutral Analyst")
+
+# 发言者对应的旧字符串字段
+HISTORY_KEYS = {
+    "Bull Analyst": "bull_history",
+    "Bear Analyst": "bear_history",
+    "Risky Analyst": "risky_history",
+    "Safe Analyst": "safe_history",
+    "Neutral Analyst": "neutral_history",
+}
+
+# 提示词中保留原文的最近发言条数
+DEFAULT_WINDOW_TURNS = 4
+# 移出窗口的每条发言压缩到的token数
+DEFAULT_SUMMARY_TURN_TOKENS = 200
+# 摘要整体的token上限
+DEFAULT_SUMMARY_MAX_TOKENS = 1500
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[。！？!?；;])\s*|\n+')
+_HAS_NUMBER = re.compile(r'\d')
+
+
+def split_turns(history: str, speaker: str) -> List[str]:
+    """把某个发言者的历史（'\\n{speaker}: 发言' 拼接而成）拆分为逐轮发言"""
+    if not history:
+        return []
+    parts = re.split(rf'(?:^|\n){re.escape(speaker)}: ', history)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def transcript(turns: Sequence[Dict[str, str]], speaker: Optional[str] = None) -> str:
+    """把发言记录渲染为 '\\n{发言者}: {发言}' 格式的文本，可只取某个发言者"""
+    return "".join(f"\n{turn['speaker']}: {turn['content']}"
+                   for turn in turns if speaker is None or turn["speaker"] == speaker)
+
+
+def speaker_history(debate_state: Dict[str, Any], speaker: str) -> str:
+    """某个发言者的完整历史（与旧的 bull_history 等字段格式相同）"""
+    if "turns" in debate_state:
+        return transcript(debate_state["turns"], speaker)
+    return debate_state.get(HISTORY_KEYS[speaker], "")
+
+
+def speaker_turns(debate_state: Dict[str, Any], speaker: str) -> List[str]:
+    """某个发言者的逐轮发言内容"""
+    if "turns" in debate_state:
+        return [turn["content"] for turn in debate_state["turns"] if turn["speaker"] == speaker]
+    return split_turns(debate_state.get(HISTORY_KEYS[speaker], ""), speaker)
+
+
+def full_history(debate_state: Dict[str, Any]) -> str:
+    """全部发言的完整历史（与旧的 history 字段格式相同）"""
+    if "turns" in debate_state:
+        return transcript(debate_state["turns"])
+    return debate_state.get("history", "")
+
+
+def history_views(debate_state: Dict[str, Any], speakers: Sequence[str]) -> Dict[str, str]:
+    """派生旧的字符串字段：history 和各发言者的 *_history"""
+    views = {"history": full_history(debate_state)}
+    for speaker in speakers:
+        views[HISTORY_KEYS[speaker]] = speaker_history(debate_state, speaker)
+    return views
+
+
+def summarize_turn(content: str, budget: int) -> str:
+    """抽取式压缩一条发言：优先保留首句（论点）、末句（结论）和含数据的句子，按原顺序拼接"""
+    text = " ".join(content.split())
+    if count_tokens(text) <= budget:
+        return text
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(content) if s and s.strip()]
+    if not sentences:
+        return ""
+    last = len(sentences) - 1
+    priority = [0, last] + [i for i in range(1, last) if _HAS_NUMBER.search(sentences[i])] + list(range(1, last))
+
+    kept, used = set(), 0
+    for index in priority:
+        if index in kept:
+            continue
+        tokens = count_tokens(sentences[index])
+        if used + tokens > budget:
+            continue
+        kept.add(index)
+        used += tokens
+    if not kept:
+        # 首句本身超出预算时按字符比例截取
+        first = sentences[0]
+        return first[:max(int(len(first) * budget / max(count_tokens(first), 1)), 1)] + "……"
+    return "……".join(sentences[i] for i in sorted(kept))
+
+
+class DebateWindow:
+    """维护辩论发言记录和滚动摘要，生成有界的提示词历史"""
+
+    def __init__(self, window_turns: int = DEFAULT_WINDOW_TURNS,
+                 summary_turn_tokens: int = DEFAULT_SUMMARY_TURN_TOKENS,
+                 summary_max_tokens: int = DEFAULT_SUMMARY_MAX_TOKENS):
+        self.window_turns = max(int(window_turns), 1)
+        self.summary_turn_tokens = summary_turn_tokens
+        self.summary_max_tokens = summary_max_tokens
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "DebateWindow":
+        """按图配置（debate_window_turns 等）创建辩论历史窗口"""
+        return cls(
+            window_turns=config.get("debate_window_turns", DEFAULT_WINDOW_TURNS),
+            summary_turn_tokens=config.get("debate_summary_turn_tokens", DEFAULT_SUMMARY_TURN_TOKENS),
+            summary_max_tokens=config.get("debate_summary_max_tokens", DEFAULT_SUMMARY_MAX_TOKENS),
+        )
+
+    def _roll(self, summary: str, turn: Dict[str, str]) -> str:
+        """把移出窗口的发言压缩后并入摘要，超出上限时丢弃最早的摘要"""
+        lines = summary.split("\n") if summary else []
+        lines.append(f"- {turn['speaker']}: {summarize_turn(turn['content'], self.summary_turn_tokens)}")
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def append(self, debate_state: Dict[str, Any], speaker: str, content: str) -> Dict[str, Any]:
+        """
+        追加一条发言，返回需要写回辩论状态的 turns 和 summary
+
+        发言记录只追加不修改，新列表与旧列表共享已有的记录对象，不复制发言文本
+        """
+        turns = list(debate_state.get("turns") or [])
+        turns.append({"speaker": speaker, "content": content})
+        summary = debate_state.get("summary", "")
+        if len(turns) > self.window_turns:
+            summary = self._roll(summary, turns[-self.window_turns - 1])
+        return {"turns": turns, "summary": summary}
+
+    def prompt_history(self, debate_state: Dict[str, Any]) -> str:
+        """提示词中的辩论历史：更早发言的摘要 + 最近 window_turns 条原文"""
+        if "turns" not in debate_state:
+            return debate_state.get("history", "")
+        recent = transcript(debate_state["turns"][-self.window_turns:])
+        summary = debate_state.get("summary", "")
+        if not summary:
+            return recent
+        return f"\n（更早发言摘要）\n{summary}\n（最近发言）{recent}"
+
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+交易决策的规则化提取
+从最终交易决策文本中直接解析投资建议、目标价、置信度和风险评分，省去一次LLM调用
+
+- 交易员/风控模板要求以'最终交易建议: **买入/持有/卖出**'结尾，并给出目标价位、置信度、风险评分，
+  这些字段用预编译的正则按可信程度逐级匹配
+- 每次解析给出解析置信度（建议来源的可信度 × 目标价的可信度），
+  达到阈值（SIGNAL_RULE_MIN_CONFIDENCE，默认0.75）时直接采用，否则交给LLM提取
+- evaluate_corpus()在保存的决策语料上统计命中率和准确率；
+  设置 SIGNAL_CORPUS_PATH 后，走LLM提取的决策会追加到该语料文件，用于持续评估规则
+
+用法:
+    extractor = DecisionExtractor()
+    decision = extractor.extract(final_trade_decision)
+    if decision['parse_confidence'] >= extractor.min_confidence:
+        ...
+"""
+
+import os
+import re
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 决策结果字段（与SignalProcessor的返回值一致）
+DECISION_FIELDS = ('action', 'target_price', 'confidence', 'risk_score', 'reasoning')
+
+DEFAULT_CONFIDENCE = 0.7
+DEFAULT_RISK_SCORE = 0.5
+DEFAULT_REASONING = '基于综合分析的投资建议'
+
+_ACTION_MAP = {
+    '买入': '买入', '增持': '买入', 'buy': '买入',
+    '持有': '持有', '观望': '持有', 'hold': '持有',
+    '卖出': '卖出', '减持': '卖出', 'sell': '卖出',
+}
+_RISK_LEVELS = {'低': 0.2, '较低': 0.3, '中低': 0.4, '中': 0.5, '中等': 0.5, '中高': 0.6, '较高': 0.7, '高': 0.8}
+
+_ACTION = r'(买入|增持|持有|观望|卖出|减持|BUY|HOLD|SELL)'
+# 排除提示模板中的'买入/持有/卖出'
+_NOT_TEMPLATE = r'(?![/／、])'
+_NUM = r'(\d+(?:,\d{3})*(?:\.\d+)?)(?![\d.,]*\s*%)'
+_CURRENCY = r'(?:HK\$|US\$|[¥￥\$]|RMB|USD|HKD)?'
+_SEP = r'[*_`\s]*[:：]?[*_`\s]*'
+
+# 最终建议标记（模板结尾），可信度最高
+_FINAL_ACTION = re.compile(
+    r'(?:最终(?:交易|投资)?(?:建议|决策|决定)|FINAL\s+TRANSACTION\s+PROPOSAL)' + _SEP + _ACTION + _NOT_TEMPLATE,
+    re.IGNORECASE)
+# '投资建议: 买入' 一类的标签
+_LABELED_ACTION = re.compile(
+    r'(?:投资建议|交易建议|操作建议|投资决策|交易决策|投资评级|评级|建议|决策|推荐)' + _SEP + _ACTION + _NOT_TEMPLATE,
+    re.IGNORECASE)
+_ANY_ACTION = re.compile(r'(?<![/／、])' + _ACTION + _NOT_TEMPLATE, re.IGNORECASE)
+_NEGATION = re.compile(r'(?:不|勿|避免|暂不|不宜|不建议)\s*$')
+
+_TARGET_PRICE = re.compile(
+    r'(?:目标价[位格]?|目标股价|价格目标|target\s+price)'
+    r'(?:\s*[（(][^）)\n]{0,20}[）)])?' + _SEP +
+    r'(?:约|为|在|是|看至|看到|(上调至|下调至|调整为|修正为))?\s*' + _CURRENCY + r'\s*' + _NUM +
+    r'\s*(?:元|美元|港元|港币)?'
+    r'(?:\s*(?:-|~|～|—|–|至|到)\s*' + _CURRENCY + r'\s*' + _NUM + r')?',
+    re.IGNORECASE)
+_CONFIDENCE = re.compile(
+    r'(?:置信度|信心程度|信心水平|confidence)' + _SEP + r'(\d+(?:\.\d+)?)\s*(%)?', re.IGNORECASE)
+_RISK_SCORE = re.compile(
+    r'(?:风险评分|风险分数|风险得分|风险等级|risk\s+score)' + _SEP +
+    r'(?:(\d+(?:\.\d+)?)\s*(%)?|(较低|中低|中高|较高|中等|低|中|高))', re.IGNORECASE)
+_REASONING = re.compile(
+    r'(?:详细推理|决策理由|主要理由|核心理由|推理|理由)' + _SEP + r'(.+?)(?:\n\s*\n|\n\s*#|\n\s*\d+\.\s*\*\*|$)',
+    re.DOTALL)
+_MARKUP = re.compile(r'[*#`>]+')
+
+# 解析置信度的组成
+_ACTION_SCORES = {'final': 1.0, 'labeled': 0.85, 'single': 0.5, 'mixed': 0.2, 'none': 0.0}
+_PRICE_SCORES = {'single': 1.0, 'range': 0.9, 'conflicting': 0.7, 'none': 0.0}
+
+
+def _normalize_action(word: str) -> str:
+    return _ACTION_MAP.get(word.lower(), _ACTION_MAP.get(word, '持有'))
+
+
+def _to_float(text: str) -> float:
+    return float(text.replace(',', ''))
+
+
+def _ratio(value: float, percent: bool) -> float:
+    """百分数或大于1的数按百分制换算到0-1"""
+    if percent or value > 1:
+        value /= 100
+    return min(max(value, 0.0), 1.0)
+
+
+def detect_action(text: str) -> Tuple[str, str]:
+    """
+    识别文本中的投资建议
+
+    Returns:
+        (买入/持有/卖出, 来源)：来源为 final（最终建议标记）、labeled（建议标签）、
+        single（只出现一种建议）、mixed（多种建议取最多的）、none（未提及，默认持有）
+    """
+    matches = _FINAL_ACTION.findall(text)
+    if matches:
+        return _normalize_action(matches[-1]), 'final'
+
+    actions = {_normalize_action(word) for word in _LABELED_ACTION.findall(text)}
+    if len(actions) == 1:
+        return actions.pop(), 'labeled'
+
+    counts = Counter(
+        _normalize_action(m.group(1)) for m in _ANY_ACTION.finditer(text)
+        if not _NEGATION.search(text[max(0, m.start() - 4):m.start()]))
+    if not counts:
+        return '持有', 'none'
+    if len(counts) == 1:
+        return next(iter(counts)), 'single'
+    return counts.most_common(1)[0][0], 'mixed'
+
+
+class DecisionExtractor:
+    """基于报告模板的规则化决策提取器"""
+
+    def __init__(self, min_confidence: float = None):
+        """
+        Args:
+            min_confidence: 直接采用规则结果的最低解析置信度，默认读取 SIGNAL_RULE_MIN_CONFIDENCE，默认0.75
+        """
+        if min_confidence is None:
+            min_confidence = float(os.getenv('SIGNAL_RULE_MIN_CONFIDENCE', '0.75'))
+        self.min_confidence = min_confidence
+
+    def _target_price(self, text: str) -> Tuple[Optional[float], str]:
+        """返回 (目标价, 来源)；区间取中值，多处目标价取最后一处"""
+        prices = []
+        kind = 'single'
+        revised = False
+        for match in _TARGET_PRICE.finditer(text):
+            revision, low, high = match.groups()
+            low = _to_float(low)
+            if high and _to_float(high) >= low:
+                low, kind = round((low + _to_float(high)) / 2, 2), 'range'
+            if low > 0:
+                prices.append(low)
+                revised = bool(revision)
+        if not prices:
+            return None, 'none'
+        # 多处目标价不一致时，只有最后一处明确写了"上调至/下调至"才视为可信
+        if len(set(prices)) > 1 and not revised:
+            kind = 'conflicting'
+        return prices[-1], kind
+
+    def _confidence(self, text: str) -> Optional[float]:
+        match = _CONFIDENCE.search(text)
+        return _ratio(float(match.group(1)), bool(match.group(2))) if match else None
+
+    def _risk_score(self, text: str) -> Optional[float]:
+        match = _RISK_SCORE.search(text)
+        if not match:
+            return None
+        if match.group(3):
+            return _RISK_LEVELS[match.group(3)]
+        return _ratio(float(match.group(1)), bool(match.group(2)))
+
+    def _reasoning(self, text: str, limit: int = 200) -> str:
+        match = _REASONING.search(text)
+        if match:
+            candidate = match.group(1)
+        else:
+            paragraphs = [p for p in re.split(r'\n\s*\n', text)
+                          if len(_MARKUP.sub('', p).strip()) > 10 and not p.lstrip().startswith('#')]
+            candidate = paragraphs[0] if paragraphs else ''
+        reasoning = ' '.join(_MARKUP.sub('', candidate).split())
+        if not reasoning:
+            return DEFAULT_REASONING
+        return reasoning if len(reasoning) <= limit else reasoning[:limit] + '…'
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """
+        解析决策文本
+
+        Returns:
+            Dict: DECISION_FIELDS 各字段，另加 parse_confidence（0-1）和 matched（来源说明）
+        """
+        text = text or ''
+        action, action_source = detect_action(text)
+        target_price, price_source = self._target_price(text)
+        confidence = self._confidence(text)
+        risk_score = self._risk_score(text)
+
+        return {
+            'action': action,
+            'target_price': target_price,
+            'confidence': DEFAULT_CONFIDENCE if confidence is None else confidence,
+            'risk_score': DEFAULT_RISK_SCORE if risk_score is None else risk_score,
+            'reasoning': self._reasoning(text),
+            'parse_confidence': _ACTION_SCORES[action_source] * _PRICE_SCORES[price_source],
+            'matched': {'action': action_source, 'target_price': price_source,
+                        'confidence': confidence is not None, 'risk_score': risk_score is not None},
+        }
+
+    def is_confident(self, extracted: Dict[str, Any]) -> bool:
+        """规则结果是否足以直接采用"""
+        return extracted.get('parse_confidence', 0.0) >= self.min_confidence
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """读取决策语料（JSONL，每行 {"text": ..., "expected": {...}}）"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+_corpus_lock = threading.Lock()
+
+def record_decision(text: str, decision: Dict[str, Any], path: str = None):
+    """把LLM提取的决策追加到语料（SIGNAL_CORPUS_PATH 未设置时不记录）"""
+    path = path or os.getenv('SIGNAL_CORPUS_PATH')
+    if not path:
+        return
+    record = {'text': text, 'expected': {k: decision.get(k) for k in ('action', 'target_price')}}
+    try:
+        with _corpus_lock:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError as e:
+        logger.warning(f"⚠️ 决策语料写入失败: {e}")
+
+
+def evaluate_corpus(records: Iterable[Dict[str, Any]], extractor: DecisionExtractor = None,
+                    price_tolerance: float = 0.01) -> Dict[str, Any]:
+    """
+    在决策语料上评估规则提取
+
+    命中 = 解析置信度达到阈值（不再调用LLM）；准确 = 命中且投资建议一致、目标价在容差内
+
+    Returns:
+        Dict: total, hits, hit_rate, correct, accuracy, errors（命中但不正确的样本）
+    """
+    extractor = extractor or DecisionExtractor()
+    total = hits = correct = 0
+    errors = []
+    for record in records:
+        total += 1
+        extracted = extractor.extract(record['text'])
+        if not extractor.is_confident(extracted):
+            continue
+        hits += 1
+        expected = record.get('expected') or {}
+        ok = extracted['action'] == expected.get('action')
+        expected_price = expected.get('target_price')
+        if expected_price is not None:
+            ok = ok and extracted['target_price'] is not None and \
+                abs(extracted['target_price'] - expected_price) <= price_tolerance * expected_price
+        if ok:
+            correct += 1
+        else:
+            errors.append({'id': record.get('id'), 'expected': expected,
+                           'extracted': {k: extracted[k] for k in ('action', 'target_price')}})
+    return {
+        'total': total,
+        'hits': hits,
+        'hit_rate': hits / total if total else 0.0,
+        'correct': correct,
+        'accuracy': correct / hits if hits else 0.0,
+        'errors': errors,
+    }
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+分析耗时模型
+从已完成分析的实际节点耗时中学习，预测一次分析的总耗时和剩余耗时，供进度ETA和任务队列准入使用
+
+- 每次分析结束后，从调用链追踪的node span汇总各图节点的耗时（多轮辩论的同一节点累加），
+  连同准备/收尾阶段一起写入本地SQLite
+- 按(节点, LLM供应商, 模型, 研究深度)维护指数加权平均耗时，同时在更粗的粒度上汇总，
+  精确组合没有样本时逐级回退：(供应商, 模型, 任意深度) → (供应商, 任意模型, 深度) → (任意, 深度) → 全局
+- 所有粒度都没有样本时使用原来的经验表作为冷启动先验
+- 预测只读内存中的统计，不访问数据库
+
+用法:
+    model = get_latency_model()
+    total = model.predict_total(['market', 'news'], 'dashscope', 'qwen-plus', 3)
+    model.record_trace(session_id, 'dashscope', 'qwen-plus', 3, setup_seconds=12.0)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 图执行之前（数据预获取、配置、初始化）和之后（结果整理、成本记录）的伪节点
+SETUP_NODE = "__setup__"
+FINALIZE_NODE = "__finalize__"
+
+# 分析师之后固定执行的节点
+DOWNSTREAM_NODES = ("Bull Researcher", "Bear Researcher", "Research Manager", "Trader",
+                    "Risky Analyst", "Safe Analyst", "Neutral Analyst", "Risk Judge")
+
+ANY = "*"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS node_latency (
+    node TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    depth TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    mean_seconds REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (node, provider, model, depth)
+);
+"""
+
+
+def analyst_nodes(analyst: str) -> Tuple[str, str]:
+    """分析师对应的图节点（分析师节点和其工具节点）"""
+    return f"{analyst.capitalize()} Analyst", f"tools_{analyst}"
+
+
+def expected_nodes(analysts: Iterable[str]) -> List[str]:
+    """一次分析按执行顺序会经过的节点"""
+    nodes = [SETUP_NODE]
+    for analyst in analysts:
+        nodes.extend(analyst_nodes(analyst))
+    nodes.extend(DOWNSTREAM_NODES)
+    nodes.append(FINALIZE_NODE)
+    return nodes
+
+
+def node_durations_from_spans(spans: Iterable[Any]) -> Dict[str, float]:
+    """把node span按节点名累加（接受Span对象或to_dict()的字典）"""
+    durations: Dict[str, float] = defaultdict(float)
+    for item in spans:
+        data = item if isinstance(item, dict) else item.to_dict()
+        if data.get('kind') == 'node' and data.get('duration') is not None:
+            durations[data['name']] += float(data['duration'])
+    return dict(durations)
+
+
+def _prior_seconds(node: str, provider: str, depth: Any) -> float:
+    """冷启动先验：沿用原来按研究深度、模型速度估算的经验表"""
+    depth = _depth_number(depth)
+    analyst_time = {1: 120, 2: 180, 3: 240}.get(depth, 180)
+    model_multiplier = {'dashscope': 1.0, 'deepseek': 0.7, 'google': 1.3}.get((provider or '').lower(), 1.0)
+    depth_multiplier = {1: 0.8, 2: 1.0, 3: 1.3}.get(depth, 1.0)
+    scale = model_multiplier * depth_multiplier
+
+    if node == SETUP_NODE:
+        return 45 * scale
+    if node == FINALIZE_NODE:
+        return 15 * scale
+    if node.startswith("tools_"):
+        return 0.3 * analyst_time * scale
+    if node.endswith(" Analyst") and node not in DOWNSTREAM_NODES:
+        return 0.7 * analyst_time * scale
+    # 原经验表把研究员/交易员/风控的耗时计入了每个分析师的时间
+    return 0.0
+
+
+def _depth_number(depth: Any) -> Optional[int]:
+    try:
+        return int(depth)
+    except (TypeError, ValueError):
+        return None
+
+
+class LatencyModel:
+    """按(节点, 供应商, 模型, 深度)学习的节点耗时模型"""
+
+    def __init__(self, db_path: Optional[str] = None, alpha: float = None):
+        """
+        Args:
+            db_path: SQLite文件路径，None时只在内存中学习（测试用）
+            alpha: 指数加权系数，越大越偏向最近的分析，默认读取 LATENCY_MODEL_ALPHA，默认0.3
+        """
+        self.alpha = alpha or float(os.getenv('LATENCY_MODEL_ALPHA', '0.3'))
+        self.db_path = Path(db_path) if db_path else None
+        self._stats: Dict[Tuple[str, str, str, str], List[float]] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if self.db_path:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+                for node, provider, model, depth, samples, mean in self._conn.execute(
+                        "SELECT node, provider, model, depth, samples, mean_seconds FROM node_latency"):
+                    self._stats[(node, provider, model, depth)] = [samples, mean]
+                logger.debug(f"⏱️ 耗时模型已加载 {len(self._stats)} 条统计: {self.db_path}")
+            except Exception as e:
+                logger.warning(f"⚠️ 耗时模型数据库不可用，仅在内存中学习: {e}")
+                self._conn = None
+
+    @staticmethod
+    def _levels(node: str, provider: str, model: str, depth: Any) -> List[Tuple[str, str, str, str]]:
+        """从精确到粗略的统计粒度"""
+        provider, model, depth = (provider or ANY).lower(), model or ANY, str(depth) if depth is not None else ANY
+        return [
+            (node, provider, model, depth),
+            (node, provider, model, ANY),
+            (node, provider, ANY, depth),
+            (node, ANY, ANY, depth),
+            (node, ANY, ANY, ANY),
+        ]
+
+    def record_run(self, node_durations: Dict[str, float], provider: str, model: str, depth: Any):
+        """记录一次完成的分析中各节点的实际耗时（秒）"""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for node, seconds in node_durations.items():
+                if seconds is None or seconds < 0:
+                    continue
+                for key in dict.fromkeys(self._levels(node, provider, model, depth)):
+                    stat = self._stats.get(key)
+                    if stat is None:
+                        stat = self._stats[key] = [0, 0.0]
+                    stat[0] += 1
+                    # 样本少时用算术平均，之后按alpha指数加权
+                    weight = max(self.alpha, 1.0 / stat[0])
+                    stat[1] += weight * (seconds - stat[1])
+                    rows.append((*key, stat[0], stat[1], now))
+
+            if self._conn is not None and rows:
+                try:
+                    with self._conn:
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO node_latency (node, provider, model, depth, samples, "
+                            "mean_seconds, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                except Exception as e:
+                    logger.warning(f"⚠️ 耗时模型写入失败: {e}")
+
+    def record_trace(self, trace_id: str, provider: str, model: str, depth: Any,
+                     setup_seconds: float = None, finalize_seconds: float = None) -> Dict[str, float]:
+        """从追踪缓冲区读取一次分析的node span并记录，返回记录的节点耗时"""
+        from tradingagents.utils.tracing import get_tracer
+
+        durations = node_durations_from_spans(get_tracer().get_spans(trace_id))
+        if not durations:
+            logger.debug(f"⏱️ 未找到分析 {trace_id} 的节点耗时（追踪可能已关闭）")
+            return {}
+        if setup_seconds is not None:
+            durations[SETUP_NODE] = setup_seconds
+        if finalize_seconds is not None:
+            durations[FINALIZE_NODE] = finalize_seconds
+        self.record_run(durations, provider, model, depth)
+        logger.info(f"⏱️ [耗时模型] 已记录 {len(durations)} 个节点耗时，合计 {sum(durations.values()):.1f}s")
+        return durations
+
+    def predict(self, node: str, provider: str, model: str, depth: Any) -> float:
+        """预测单个节点耗时（秒）"""
+        for key in self._levels(node, provider, model, depth):
+            stat = self._stats.get(key)
+            if stat and stat[0] > 0:
+                return stat[1]
+        return _prior_seconds(node, provider, depth)
+
+    def predict_nodes(self, analysts: Iterable[str], provider: str, model: str, depth: Any) -> Dict[str, float]:
+        """按执行顺序预测每个节点的耗时"""
+        return {node: self.predict(node, provider, model, depth) for node in expected_nodes(analysts)}
+
+    def predict_total(self, analysts: Iterable[str], provider: str, model: str, depth: Any) -> float:
+        """预测一次分析的总耗时（秒）"""
+        return sum(self.predict_nodes(analysts, provider, model, depth).values())
+
+    def predict_remaining(self, analysts: Iterable[str], provider: str, model: str, depth: Any,
+                          completed: Iterable[str] = (), current: Optional[str] = None,
+                          current_elapsed: float = 0.0) -> float:
+        """
+        预测剩余耗时：未完成节点的预测之和，当前节点扣除已运行的时间
+
+        Args:
+            completed: 已完成的节点
+            current: 正在执行的节点
+            current_elapsed: 当前节点已运行的秒数
+        """
+        completed = set(completed)
+        remaining = 0.0
+        for node, seconds in self.predict_nodes(analysts, provider, model, depth).items():
+            if node in completed:
+                continue
+            if node == current:
+                seconds = max(seconds - current_elapsed, 0.0)
+            remaining += seconds
+        return remaining
+
+    def sample_count(self, provider: str = None, model: str = None, depth: Any = None) -> int:
+        """某个组合已学习的分析次数（以准备阶段的样本数计）"""
+        stat = self._stats.get(self._levels(SETUP_NODE, provider, model, depth)[0])
+        return int(stat[0]) if stat else 0
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """全部统计（用于调试和展示）"""
+        with self._lock:
+            return [{'node': k[0], 'provider': k[1], 'model': k[2], 'depth': k[3],
+                     'samples': int(v[0]), 'mean_seconds': v[1]} for k, v in sorted(self._stats.items())]
+
+
+# 全局耗时模型实例
+_latency_model = None
+_model_lock = threading.Lock()
+
+def default_db_path() -> str:
+    """耗时模型数据库路径：LATENCY_MODEL_DB，未设置时为配置的数据目录下的latency_model.db"""
+    db_path = os.getenv('LATENCY_MODEL_DB')
+    if db_path:
+        return db_path
+    try:
+        from tradingagents.config.config_manager import config_manager
+        return os.path.join(config_manager.get_data_dir(), 'latency_model.db')
+    except Exception as e:
+        logger.warning(f"⚠️ 获取数据目录失败，耗时模型使用项目data目录: {e}")
+        return str(Path(__file__).resolve().parents[2] / 'data' / 'latency_model.db')
+
+
+def get_latency_model() -> LatencyModel:
+    """获取全局耗时模型（数据库路径见 default_db_path）"""
+    global _latency_model
+    if _latency_model is None:
+        with _model_lock:
+            if _latency_model is None:
+                _latency_model = LatencyModel(default_db_path())
+    return _latency_model
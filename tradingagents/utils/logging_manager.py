@@ -8,6 +8,10 @@ import logging
 import logging.handlers
 import os
 import sys
+import queue
+import atexit
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Union
@@ -69,12 +73,120 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_entry, ensure_ascii=False)
 
 
+# 可以安全延迟到监听线程再格式化的参数类型（入队后不会被修改）
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), bytes)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    异步日志入口：调用线程只把日志记录放入队列
+
+    消息合并、格式化和写文件都在QueueListener线程完成；
+    参数包含可变对象时才在调用线程提前合并消息，避免入队后参数被修改
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, dict) else args
+            if not all(isinstance(value, _IMMUTABLE_ARG_TYPES) for value in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                # 警告及以上级别不丢弃，短暂等待队列腾出空间
+                try:
+                    self.queue.put(record, timeout=1.0)
+                    return
+                except queue.Full:
+                    pass
+            # 队列已满时丢弃低级别日志，不阻塞业务线程
+            self.dropped += 1
+
+
+class LogSamplingFilter(logging.Filter):
+    """
+    重复日志采样与限流
+
+    - 限流：同一调用位置（文件+行号）在interval秒内最多输出per_callsite条，
+      超出的日志被丢弃，下一条输出的日志会注明被抑制的条数
+    - 采样：modules中配置了sample_rate的模块，每个调用位置按1/N的比例保留
+    只作用于max_level及以下级别，警告和错误始终输出
+    """
+
+    def __init__(self, max_level: int = logging.INFO, per_callsite: int = 50,
+                 interval: float = 10.0, modules: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__()
+        self.max_level = max_level
+        self.per_callsite = per_callsite
+        self.interval = interval
+        self.modules = modules or {}
+        self._windows: Dict[tuple, list] = {}  # 调用位置 -> [窗口开始时间, 已输出条数, 被抑制条数]
+        self._sample_counts: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # 同步模式下同一记录会经过多个处理器，只判定一次
+        decision = getattr(record, '_ta_sampled', None)
+        if decision is not None:
+            return decision
+        decision = self._decide(record)
+        record._ta_sampled = decision
+        return decision
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        key = (record.pathname, record.lineno)
+        module_config = self.modules.get(record.module, {})
+        sample_every = int(round(1 / module_config['sample_rate'])) if module_config.get('sample_rate') else 1
+        limit = module_config.get('per_callsite', self.per_callsite)
+        now = time.monotonic()
+
+        with self._lock:
+            if sample_every > 1:
+                count = self._sample_counts.get(key, 0)
+                self._sample_counts[key] = count + 1
+                if count % sample_every:
+                    return False
+
+            if not limit:
+                return True
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < limit:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} (同一位置另有{suppressed}条日志已被限流)"
+            record.args = None
+        return True
+
+
 class TradingAgentsLogger:
     """TradingAgents统一日志管理器"""
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or self._load_default_config()
         self.loggers: Dict[str, logging.Logger] = {}
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.queue_handler: Optional[DeferredQueueHandler] = None
         self._setup_logging()
     
     def _load_default_config(self) -> Dict[str, Any]:
@@ -125,6 +237,29 @@ class TradingAgentsLogger:
             'docker': {
                 'enabled': os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true',
                 'stdout_only': True  # Docker环境只输出到stdout
+            },
+            'async': {
+                'enabled': os.getenv('TRADINGAGENTS_LOG_ASYNC', 'true').lower() == 'true',
+                'queue_size': 10000
+            },
+            'sampling': self._default_sampling_config()
+        }
+
+    @staticmethod
+    def _default_sampling_config() -> Dict[str, Any]:
+        """默认采样/限流配置：缓存命中、限频等待这类每次请求都会出现的日志按模块采样"""
+        return {
+            'enabled': os.getenv('TRADINGAGENTS_LOG_SAMPLING', 'true').lower() == 'true',
+            'max_level': 'INFO',
+            'per_callsite': 50,
+            'interval': 10,
+            'modules': {
+                'cache_manager': {'sample_rate': 0.1},
+                'db_cache_manager': {'sample_rate': 0.1},
+                'adaptive_cache': {'sample_rate': 0.1},
+                'optimized_china_data': {'per_callsite': 10},
+                'optimized_us_data': {'per_callsite': 10},
+                'tushare_adapter': {'per_callsite': 10},
             }
         }
 
@@ -170,6 +305,11 @@ class TradingAgentsLogger:
                 'enabled': is_docker,
                 'stdout_only': logging_config.get('docker', {}).get('stdout_only', True)
             },
+            'async': {
+                'enabled': os.getenv('TRADINGAGENTS_LOG_ASYNC', str(logging_config.get('async', {}).get('enabled', True))).lower() == 'true',
+                'queue_size': logging_config.get('async', {}).get('queue_size', 10000)
+            },
+            'sampling': {**self._default_sampling_config(), **logging_config.get('sampling', {})},
             'performance': logging_config.get('performance', {}),
             'security': logging_config.get('security', {}),
             'business': logging_config.get('business', {})
@@ -196,9 +336,60 @@ class TradingAgentsLogger:
             self._add_file_handler(root_logger)
             if self.config['handlers']['structured']['enabled']:
                 self._add_structured_handler(root_logger)
+
+        sampling_filter = self._create_sampling_filter()
+        if self.config.get('async', {}).get('enabled', False):
+            self._start_queue_listener(root_logger, sampling_filter)
+        elif sampling_filter:
+            for handler in root_logger.handlers:
+                handler.addFilter(sampling_filter)
         
         # 配置特定日志器
         self._configure_specific_loggers()
+
+    def _create_sampling_filter(self) -> Optional[LogSamplingFilter]:
+        """根据配置创建采样/限流过滤器"""
+        sampling = self.config.get('sampling', {})
+        if not sampling.get('enabled', False):
+            return None
+        return LogSamplingFilter(
+            max_level=getattr(logging, str(sampling.get('max_level', 'INFO')).upper()),
+            per_callsite=int(sampling.get('per_callsite', 50)),
+            interval=float(sampling.get('interval', 10)),
+            modules=sampling.get('modules', {})
+        )
+
+    def _start_queue_listener(self, root_logger: logging.Logger, sampling_filter: Optional[LogSamplingFilter]):
+        """把已配置的处理器移到后台监听线程，根日志器只保留一个入队处理器"""
+        handlers = list(root_logger.handlers)
+        root_logger.handlers.clear()
+
+        log_queue = queue.Queue(maxsize=int(self.config['async'].get('queue_size', 10000)))
+        self.queue_handler = DeferredQueueHandler(log_queue)
+        if sampling_filter:
+            self.queue_handler.addFilter(sampling_filter)
+        root_logger.addHandler(self.queue_handler)
+
+        self.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.shutdown)
+
+    def flush(self):
+        """等待队列中的日志全部写出（测试和进程退出前使用）"""
+        if self.listener is not None:
+            self.listener.queue.join()
+
+    def shutdown(self):
+        """停止后台监听线程并写出剩余日志"""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    # 进程退出时输出流可能已关闭
+                    pass
     
     def _add_console_handler(self, logger: logging.Logger):
         """添加控制台处理器"""
@@ -406,5 +597,7 @@ def get_logger(name: str) -> logging.Logger:
 def setup_logging(config: Optional[Dict[str, Any]] = None):
     """设置项目日志系统（便捷函数）"""
     global _logger_manager
+    if _logger_manager is not None:
+        _logger_manager.shutdown()
     _logger_manager = TradingAgentsLogger(config)
     return _logger_manager
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+数据源阻塞调用的共享执行器
+
+AKShare/Tushare/BaoStock/TDX/yfinance 的SDK调用都是阻塞的网络请求。所有调用经由同一个
+有界线程池执行，每次调用带截止时间：
+- 调用方最多等待到截止时间，超时抛出ProviderCallTimeout，不会为每次调用新建线程
+- 每个数据源的并发数有上限；某个数据源的调用全部卡死（已被调用方放弃但仍在运行）时，
+  新调用立即失败，慢上游不会耗尽线程和文件描述符
+- Python线程无法强制终止，取消是协作式的：支持超时参数的SDK（如yfinance）通过timeout_arg
+  传入剩余时间，提供者代码可通过remaining_time()/check_deadline()在循环中主动检查截止时间
+- 调用在调用方的contextvars上下文中执行，调用内开启的追踪span挂在调用方的span下
+- 统计每个数据源的进行中、超时、泄漏（被放弃但仍在运行）等指标
+
+用法:
+    from tradingagents.utils.provider_executor import get_provider_executor
+    executor = get_provider_executor()
+    data = executor.call("akshare", ak.stock_hk_hist, symbol="00700", timeout=30)
+    api = executor.guard(ts.pro_api(), "tushare")   # 代理对象，方法调用自动经由执行器
+"""
+
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, CancelledError, TimeoutError as FuturesTimeout
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+from tradingagents.utils.tracing import span
+
+
+class ProviderCallTimeout(TimeoutError):
+    """数据源调用超过截止时间"""
+
+
+class ProviderBusyError(RuntimeError):
+    """数据源并发已满（或调用全部卡死），拒绝新的调用"""
+
+
+_local = threading.local()
+
+
+def remaining_time() -> Optional[float]:
+    """当前执行器调用剩余的时间（秒）；不在执行器线程中时返回None"""
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check_deadline():
+    """在执行器线程中检查截止时间，已超时则抛出ProviderCallTimeout（供分页等循环协作式退出）"""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise ProviderCallTimeout(f"{getattr(_local, 'provider', '数据源')}调用已超过截止时间")
+
+
+def _new_stats() -> Dict[str, float]:
+    return {
+        'calls': 0, 'completed': 0, 'failed': 0, 'timed_out': 0, 'rejected': 0,
+        'in_flight': 0, 'leaked': 0, 'leaked_total': 0, 'late_completed': 0, 'total_latency': 0.0,
+    }
+
+
+class ProviderExecutor:
+    """有界、带截止时间的数据源调用执行器"""
+
+    def __init__(self, max_workers: int = None, per_provider_limit: int = None,
+                 default_timeout: float = None):
+        """
+        Args:
+            max_workers: 线程池大小，默认读取 PROVIDER_MAX_WORKERS，默认16
+            per_provider_limit: 单个数据源的最大并发，默认读取 PROVIDER_CONCURRENCY_LIMIT，默认4
+            default_timeout: 默认截止时间（秒），默认读取 PROVIDER_CALL_TIMEOUT，默认60
+        """
+        self.max_workers = max_workers or int(os.getenv('PROVIDER_MAX_WORKERS', '16'))
+        self.per_provider_limit = per_provider_limit or int(os.getenv('PROVIDER_CONCURRENCY_LIMIT', '4'))
+        self.default_timeout = default_timeout or float(os.getenv('PROVIDER_CALL_TIMEOUT', '60'))
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="provider-call")
+        self._cond = threading.Condition()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _stats_for(self, provider: str) -> Dict[str, float]:
+        stats = self._stats.get(provider)
+        if stats is None:
+            stats = self._stats[provider] = _new_stats()
+        return stats
+
+    def _acquire_slot(self, provider: str, deadline: float):
+        """等待该数据源的并发名额，直到截止时间"""
+        with self._cond:
+            stats = self._stats_for(provider)
+            stats['calls'] += 1
+            while stats['in_flight'] >= self.per_provider_limit:
+                if stats['leaked'] >= self.per_provider_limit:
+                    stats['rejected'] += 1
+                    raise ProviderBusyError(f"{provider}的{stats['leaked']}个调用已超时仍未结束，暂停新的调用")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    stats['rejected'] += 1
+                    raise ProviderBusyError(f"{provider}并发已满（{self.per_provider_limit}），等待超时")
+                self._cond.wait(remaining)
+            stats['in_flight'] += 1
+
+    def _run(self, provider: str, state: Dict[str, bool], deadline: float,
+             func: Callable, args: tuple, kwargs: dict):
+        """在工作线程中执行调用，结束时归还名额并记录指标"""
+        _local.deadline, _local.provider = deadline, provider
+        start = time.monotonic()
+        failed = False
+        try:
+            if time.monotonic() >= deadline:
+                raise ProviderCallTimeout(f"{provider}调用在排队期间已超过截止时间")
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _local.deadline = _local.provider = None
+            with self._cond:
+                stats = self._stats_for(provider)
+                stats['in_flight'] -= 1
+                state['finished'] = True
+                if state['abandoned']:
+                    stats['leaked'] -= 1
+                    stats['late_completed'] += 1
+                elif failed:
+                    stats['failed'] += 1
+                else:
+                    stats['completed'] += 1
+                    stats['total_latency'] += time.monotonic() - start
+                self._cond.notify_all()
+
+    def call(self, provider: str, func: Callable, *args, timeout: float = None,
+             timeout_arg: str = None, **kwargs) -> Any:
+        """
+        在共享线程池中执行阻塞调用，最多等待timeout秒
+
+        Args:
+            provider: 数据源名称（akshare/tushare/baostock/tdx/yfinance）
+            func: 阻塞调用
+            timeout: 截止时间（秒），默认使用default_timeout
+            timeout_arg: 被调函数接受超时参数时的参数名，会传入剩余时间（如yfinance的timeout）
+
+        Raises:
+            ProviderCallTimeout: 超过截止时间
+            ProviderBusyError: 并发名额不足
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        name = getattr(func, '__name__', 'call')
+
+        with span(f"{provider}.{name}", kind="http", provider=provider):
+            self._acquire_slot(provider, deadline)
+            if timeout_arg:
+                kwargs[timeout_arg] = max(0.1, deadline - time.monotonic())
+
+            state = {'abandoned': False, 'finished': False}
+            try:
+                # 复制调用方的上下文，调用内开启的span以当前span为父节点
+                context = contextvars.copy_context()
+                future = self._pool.submit(context.run, self._run, provider, state, deadline, func, args, kwargs)
+            except RuntimeError:
+                with self._cond:
+                    self._stats_for(provider)['in_flight'] -= 1
+                    self._cond.notify_all()
+                raise
+
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except (FuturesTimeout, CancelledError):
+                pass
+
+            with self._cond:
+                stats = self._stats_for(provider)
+                if state['finished']:
+                    # 恰好在超时的同时完成
+                    finished = True
+                elif future.cancel():
+                    # 还在排队，直接取消，不占用线程
+                    stats['in_flight'] -= 1
+                    stats['timed_out'] += 1
+                    self._cond.notify_all()
+                    finished = False
+                else:
+                    state['abandoned'] = True
+                    stats['timed_out'] += 1
+                    stats['leaked'] += 1
+                    stats['leaked_total'] += 1
+                    finished = False
+            if finished:
+                return future.result()
+
+            logger.warning(f"⏱️ {provider}.{name} 超过截止时间（{timeout:g}秒）")
+            raise ProviderCallTimeout(f"{provider}.{name} 超过截止时间（{timeout:g}秒）")
+
+    def guard(self, target: Any, provider: str, timeout: float = None) -> 'GuardedApi':
+        """把SDK对象/模块包装为代理，其公开方法的调用都经由执行器"""
+        return GuardedApi(target, provider, self, timeout)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """各数据源的调用指标"""
+        with self._cond:
+            result = {}
+            for provider, stats in self._stats.items():
+                item = dict(stats)
+                item['avg_latency'] = stats['total_latency'] / stats['completed'] if stats['completed'] else 0.0
+                result[provider] = item
+            return result
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait)
+
+
+class GuardedApi:
+    """SDK代理：公开的可调用属性经由ProviderExecutor执行，其它属性原样返回"""
+
+    def __init__(self, target: Any, provider: str, executor: ProviderExecutor, timeout: float = None):
+        self._target = target
+        self._provider = provider
+        self._executor = executor
+        self._timeout = timeout
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @wraps(attr)
+        def guarded(*args, **kwargs):
+            return self._executor.call(self._provider, attr, *args, timeout=self._timeout, **kwargs)
+        return guarded
+
+    def __repr__(self):
+        return f"GuardedApi({self._provider}: {self._target!r})"
+
+
+# 全局执行器实例
+_provider_executor = None
+_executor_lock = threading.Lock()
+
+def get_provider_executor() -> ProviderExecutor:
+    """获取全局数据源调用执行器"""
+    global _provider_executor
+    if _provider_executor is None:
+        with _executor_lock:
+            if _provider_executor is None:
+                _provider_executor = ProviderExecutor()
+    return _provider_executor
+
+
+def provider_call(provider: str, func: Callable, *args, **kwargs) -> Any:
+    """便捷函数：经由全局执行器执行一次数据源调用"""
+    return get_provider_executor().call(provider, func, *args, **kwargs)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+延迟加载的提供者注册表
+
+数据源工具和LLM适配器按名称登记为"模块路径:属性"，首次使用时才导入。
+仅导入interface或trading_graph不会加载Tushare/AKShare/yfinance/ChromaDB等第三方SDK，
+CLI启动、Web工作进程和短时批处理任务只为实际用到的后端付出导入开销。
+
+用法:
+    from tradingagents.utils.provider_registry import get_data_providers
+    providers = get_data_providers()
+    if providers.is_available("yfinance"):
+        yf = providers.get("yfinance")
+"""
+
+import time
+import importlib
+import threading
+from typing import Any, Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class ProviderUnavailableError(ImportError):
+    """提供者依赖未安装或导入失败"""
+
+
+def resolve_target(target: str) -> Any:
+    """解析"模块路径:属性"，属性为空时返回模块本身"""
+    module_path, _, attribute = target.partition(":")
+    module = importlib.import_module(module_path)
+    return getattr(module, attribute) if attribute else module
+
+
+class ProviderRegistry:
+    """按名称延迟导入提供者，导入结果（包括失败）会被缓存"""
+
+    def __init__(self, name: str, targets: Optional[Dict[str, str]] = None):
+        self.name = name
+        self._targets: Dict[str, str] = dict(targets or {})
+        self._loaded: Dict[str, Any] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._load_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, target: str):
+        """登记提供者，target格式为"模块路径:属性"或"模块路径\""""
+        with self._lock:
+            self._targets[name] = target
+            self._loaded.pop(name, None)
+            self._errors.pop(name, None)
+
+    def registered(self) -> List[str]:
+        return list(self._targets)
+
+    def get(self, name: str) -> Any:
+        """返回提供者，首次调用时导入；依赖不可用时抛出ProviderUnavailableError"""
+        if name in self._loaded:
+            return self._loaded[name]
+        if name not in self._targets:
+            raise KeyError(f"未登记的{self.name}提供者: {name}")
+
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            if name in self._errors:
+                raise ProviderUnavailableError(f"{name}不可用: {self._errors[name]}") from self._errors[name]
+
+            start = time.perf_counter()
+            try:
+                provider = resolve_target(self._targets[name])
+            except Exception as e:
+                self._errors[name] = e
+                logger.warning(f"⚠️ {name}不可用: {e}")
+                raise ProviderUnavailableError(f"{name}不可用: {e}") from e
+
+            self._load_times[name] = time.perf_counter() - start
+            self._loaded[name] = provider
+            logger.debug(f"📦 [{self.name}] 已加载{name} ({self._load_times[name] * 1000:.0f}ms)")
+            return provider
+
+    def is_available(self, name: str) -> bool:
+        """尝试导入提供者并返回是否可用"""
+        try:
+            self.get(name)
+            return True
+        except ProviderUnavailableError:
+            return False
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def load_times(self) -> Dict[str, float]:
+        """已加载提供者的导入耗时（秒）"""
+        return dict(self._load_times)
+
+
+class LazyModule:
+    """模块代理，首次访问属性时才导入真实模块"""
+
+    def __init__(self, module_path: str):
+        self._module_path = module_path
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._module_path)
+        return self._module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._module_path} ({state})>"
+
+
+def lazy_import(module_path: str) -> LazyModule:
+    """返回延迟导入的模块代理"""
+    return LazyModule(module_path)
+
+
+# 数据源工具
+DATA_PROVIDERS = {
+    "yfinance": "yfinance",
+    "openai": "openai:OpenAI",
+    "yfin_utils": "tradingagents.dataflows.yfin_utils:YFinanceUtils",
+    "stockstats_utils": "tradingagents.dataflows.stockstats_utils:StockstatsUtils",
+    "google_news": "tradingagents.dataflows.googlenews_utils:getNewsData",
+    "reddit": "tradingagents.dataflows.reddit_utils:fetch_top_from_category",
+    "finnhub_data": "tradingagents.dataflows.finnhub_utils:get_data_in_range",
+    "chinese_social_sentiment": "tradingagents.dataflows.chinese_finance_utils:get_chinese_social_sentiment",
+    "hk_stock_data": "tradingagents.dataflows.hk_stock_utils:get_hk_stock_data",
+    "hk_stock_info": "tradingagents.dataflows.hk_stock_utils:get_hk_stock_info",
+    "akshare_hk_data": "tradingagents.dataflows.akshare_utils:get_hk_stock_data_akshare",
+    "akshare_hk_info": "tradingagents.dataflows.akshare_utils:get_hk_stock_info_akshare",
+}
+
+# LLM适配器，键与config["llm_provider"]一致
+LLM_ADAPTERS = {
+    "openai": "langchain_openai:ChatOpenAI",
+    "anthropic": "langchain_anthropic:ChatAnthropic",
+    "google": "langchain_google_genai:ChatGoogleGenerativeAI",
+    "dashscope": "tradingagents.llm_adapters.dashscope_adapter:ChatDashScope",
+    "dashscope_openai": "tradingagents.llm_adapters.dashscope_openai_adapter:ChatDashScopeOpenAI",
+    "deepseek": "tradingagents.llm_adapters.deepseek_adapter:ChatDeepSeek",
+}
+
+_data_providers: Optional[ProviderRegistry] = None
+_llm_adapters: Optional[ProviderRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_data_providers() -> ProviderRegistry:
+    """获取全局数据源注册表"""
+    global _data_providers
+    if _data_providers is None:
+        with _registry_lock:
+            if _data_providers is None:
+                _data_providers = ProviderRegistry("dataflows", DATA_PROVIDERS)
+    return _data_providers
+
+
+def get_llm_adapters() -> ProviderRegistry:
+    """获取全局LLM适配器注册表"""
+    global _llm_adapters
+    if _llm_adapters is None:
+        with _registry_lock:
+            if _llm_adapters is None:
+                _llm_adapters = ProviderRegistry("llm", LLM_ADAPTERS)
+    return _llm_adapters
@@ -162,6 +162,25 @@ class StockUtils:
             
         return ticker
     
+    @staticmethod
+    def is_listed_china_stock(ticker: str) -> Optional[bool]:
+        """
+        判断A股代码是否在股票列表中（查询常驻内存的股票检索索引，不访问数据库）
+
+        Returns:
+            Optional[bool]: 索引没有数据时返回None（无法判断），否则返回是否存在
+        """
+        try:
+            from tradingagents.dataflows.stock_search_index import get_stock_search_index
+            index = get_stock_search_index()
+            index.ensure_fresh()
+            if len(index) == 0:
+                return None
+            return index.contains(str(ticker))
+        except Exception as e:
+            logger.debug(f"股票检索索引不可用: {e}")
+            return None
+
     @staticmethod
     def get_market_info(ticker: str) -> Dict:
         """
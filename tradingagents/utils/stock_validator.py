@@ -294,6 +294,18 @@ class StockDataPreparer:
         """预获取A股数据"""
         logger.info(f"📊 [A股数据] 开始准备{stock_code}的数据 (时长: {period_days}天)")
 
+        # 股票列表中不存在的代码直接拒绝，不再请求数据源；索引没有数据时照常走数据源验证
+        from tradingagents.utils.stock_utils import StockUtils
+        if StockUtils.is_listed_china_stock(stock_code) is False:
+            logger.warning(f"⚠️ [A股数据] 股票列表中不存在: {stock_code}")
+            return StockDataPreparationResult(
+                is_valid=False,
+                stock_code=stock_code,
+                market_type="A股",
+                error_message=f"股票代码 {stock_code} 不存在",
+                suggestion="请检查股票代码是否正确，或确认该股票是否已上市"
+            )
+
         # 计算日期范围
         end_date = datetime.strptime(analysis_date, '%Y-%m-%d')
         start_date = end_date - timedelta(days=period_days)
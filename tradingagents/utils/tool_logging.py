@@ -13,6 +13,7 @@ from tradingagents.utils.logging_init import get_logger
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger, get_logger_manager
+from tradingagents.utils.tracing import span
 logger = get_logger('agents')
 
 # 工具调用日志器
@@ -64,7 +65,8 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
             
             try:
                 # 执行工具函数
-                result = func(*args, **kwargs)
+                with span(name, kind="tool"):
+                    result = func(*args, **kwargs)
                 
                 # 计算执行时间
                 duration = time.time() - start_time
@@ -140,7 +142,8 @@ def log_data_source_call(source_name: str):
             )
             
             try:
-                result = func(*args, **kwargs)
+                with span(source_name, kind="data_source", symbol=str(symbol)):
+                    result = func(*args, **kwargs)
                 duration = time.time() - start_time
                 
                 # 检查结果是否成功
@@ -219,7 +222,8 @@ def log_llm_call(provider: str, model: str):
             )
             
             try:
-                result = func(*args, **kwargs)
+                with span(f"{provider}/{model}", kind="llm"):
+                    result = func(*args, **kwargs)
                 duration = time.time() - start_time
                 
                 tool_logger.info(
@@ -360,7 +364,8 @@ def log_analysis_module(module_name: str, session_id: str = None):
 
             try:
                 # 执行分析函数
-                result = func(*args, **kwargs)
+                with span(module_name, kind="internal", symbol=symbol):
+                    result = func(*args, **kwargs)
 
                 # 计算执行时间
                 duration = time.time() - start_time
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+轻量级调用链追踪
+为分析流程提供嵌套的span计时：图节点 → 工具 → 数据源 → 缓存/HTTP，以及LLM调用
+
+- span默认写入进程内环形缓冲区（开销为一次perf_counter和一次deque追加）
+- 可选导出到JSONL文件或OpenTelemetry（TRACING_EXPORTER=jsonl/otel）
+- scripts/trace_report.py 读取JSONL文件，按分析输出火焰图式的耗时分解
+
+用法:
+    with start_trace("analysis", trace_id=session_id):
+        with span("tushare.daily", kind="http", symbol="000001"):
+            ...
+
+    @traced("cache.load", kind="cache")
+    def load(...): ...
+"""
+
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+import contextvars
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+
+# span类型，CLI按类型汇总耗时
+SPAN_KINDS = ("analysis", "node", "tool", "data_source", "cache", "http", "llm", "internal")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("tradingagents_span", default=None)
+
+
+class Span:
+    """一次计时区间"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind",
+                 "start_time", "duration", "attributes", "status", "error", "_start_perf")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_time = time.time()
+        self.duration = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self.error = None
+        self._start_perf = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start_perf
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class JSONLExporter:
+    """把结束的span逐行写入JSONL文件"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+
+class OpenTelemetryExporter:
+    """把结束的span转发给OpenTelemetry（需安装opentelemetry-api/sdk）"""
+
+    def __init__(self):
+        if not OTEL_AVAILABLE:
+            raise ImportError("opentelemetry未安装")
+        self._tracer = otel_trace.get_tracer("tradingagents")
+
+    def export(self, span: Span):
+        attributes = {k: v if isinstance(v, (str, int, float, bool)) else str(v)
+                      for k, v in span.attributes.items()}
+        attributes.update({
+            "tradingagents.trace_id": span.trace_id,
+            "tradingagents.span_id": span.span_id,
+            "tradingagents.parent_id": span.parent_id or "",
+            "tradingagents.kind": span.kind,
+        })
+        start_ns = int(span.start_time * 1e9)
+        otel_span = self._tracer.start_span(span.name, start_time=start_ns, attributes=attributes)
+        if span.error:
+            otel_span.set_attribute("error", span.error)
+        otel_span.end(end_time=start_ns + int((span.duration or 0) * 1e9))
+
+
+class Tracer:
+    """span收集器：环形缓冲区 + 可选导出器"""
+
+    def __init__(self, buffer_size: int = 10000, enabled: bool = True):
+        self.enabled = enabled
+        self._buffer = deque(maxlen=buffer_size)
+        self._exporters = []
+
+    def add_exporter(self, exporter):
+        self._exporters.append(exporter)
+
+    def record(self, span: Span):
+        self._buffer.append(span)
+        for exporter in self._exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.debug(f"⚠️ span导出失败: {e}")
+
+    def get_spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """获取缓冲区中的span（可按trace_id过滤）"""
+        spans = list(self._buffer)
+        if trace_id is not None:
+            spans = [s for s in spans if s.trace_id == trace_id]
+        return spans
+
+    def clear(self):
+        self._buffer.clear()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def _create_tracer_from_env() -> Tracer:
+    enabled = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+    tracer = Tracer(buffer_size=int(os.getenv('TRACING_BUFFER_SIZE', 10000)), enabled=enabled)
+
+    for name in filter(None, (x.strip() for x in os.getenv('TRACING_EXPORTER', '').lower().split(','))):
+        try:
+            if name == 'jsonl':
+                tracer.add_exporter(JSONLExporter(os.getenv('TRACING_JSONL_PATH', './logs/traces.jsonl')))
+            elif name == 'otel':
+                tracer.add_exporter(OpenTelemetryExporter())
+            else:
+                logger.warning(f"⚠️ 未知的追踪导出器: {name}")
+        except Exception as e:
+            logger.warning(f"⚠️ 追踪导出器 {name} 初始化失败: {e}")
+    return tracer
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器（根据TRACING_*环境变量初始化）"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = _create_tracer_from_env()
+    return _tracer
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def get_current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """
+    开始一个span；没有父span时自动开启新的trace
+
+    Yields:
+        Span: 可通过set_attribute补充属性；追踪关闭时为None
+    """
+    tracer = get_tracer()
+    if not tracer.enabled:
+        yield None
+        return
+
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else uuid.uuid4().hex
+    current = Span(name, kind, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        current.finish()
+        _current_span.reset(token)
+        tracer.record(current)
+
+
+@contextmanager
+def start_trace(name: str = "analysis", trace_id: Optional[str] = None, **attributes):
+    """开启一个新的trace（忽略外层span），trace_id通常使用分析的session_id"""
+    tracer = get_tracer()
+    if not tracer.enabled:
+        yield None
+        return
+
+    token = _current_span.set(None)
+    try:
+        with span(name, kind="analysis", **attributes) as root:
+            if trace_id:
+                root.trace_id = trace_id
+            yield root
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: Optional[str] = None, kind: str = "internal"):
+    """把函数调用记录为span的装饰器"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_node(node_name: str, node: Callable) -> Callable:
+    """包装LangGraph节点函数，使每次节点执行都成为一个span"""
+    @functools.wraps(node)
+    def wrapper(state, *args, **kwargs):
+        with span(node_name, kind="node"):
+            return node(state, *args, **kwargs)
+    return wrapper
+
+
+class _TracingCallbackMixin:
+    """
+    LangChain回调：把每次LLM调用记录为llm类型的span
+    
+    适用于所有LangChain聊天模型（OpenAI/Anthropic/Google/DashScope/DeepSeek），
+    span挂在发起调用时的当前span（通常是图节点）之下
+    """
+
+    def __init__(self):
+        self._runs: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, serialized: Optional[Dict[str, Any]], run_id, **kwargs):
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return
+        parent = _current_span.get()
+        kwargs_info = (serialized or {}).get("kwargs", {})
+        model = (kwargs.get("invocation_params") or {}).get("model") or \
+            kwargs_info.get("model_name") or kwargs_info.get("model") or "llm"
+        current = Span(f"llm/{model}", "llm",
+                       parent.trace_id if parent else uuid.uuid4().hex,
+                       parent.span_id if parent else None)
+        with self._lock:
+            self._runs[run_id] = current
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(serialized, run_id, **kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(serialized, run_id, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            current = self._runs.pop(run_id, None)
+        if current is None:
+            return
+        token_usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        if token_usage:
+            current.set_attribute("input_tokens", token_usage.get("prompt_tokens", 0))
+            current.set_attribute("output_tokens", token_usage.get("completion_tokens", 0))
+        current.finish()
+        get_tracer().record(current)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            current = self._runs.pop(run_id, None)
+        if current is None:
+            return
+        current.status = "error"
+        current.error = f"{type(error).__name__}: {error}"[:500]
+        current.finish()
+        get_tracer().record(current)
+
+
+_callback_handler_class = None
+
+
+def get_callback_handler_class():
+    """
+    返回TracingCallbackHandler类，langchain_core不可用时返回None
+
+    回调类在首次使用时才创建，导入本模块不会加载langchain_core
+    """
+    global _callback_handler_class
+    if _callback_handler_class is None:
+        try:
+            from langchain_core.callbacks import BaseCallbackHandler
+        except ImportError:
+            return None
+        _callback_handler_class = type("TracingCallbackHandler", (_TracingCallbackMixin, BaseCallbackHandler),
+                                       {"__doc__": _TracingCallbackMixin.__doc__, "__module__": __name__})
+    return _callback_handler_class
+
+
+def __getattr__(name):
+    if name == "TracingCallbackHandler":
+        handler_class = get_callback_handler_class()
+        if handler_class is None:
+            raise ImportError("langchain_core未安装，无法使用TracingCallbackHandler")
+        return handler_class
+    if name == "LANGCHAIN_AVAILABLE":
+        return get_callback_handler_class() is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def attach_llm_tracing(*llms):
+    """为LangChain模型实例添加TracingCallbackHandler（重复调用不会重复添加）"""
+    handler_class = get_callback_handler_class()
+    if handler_class is None:
+        return
+    for llm in llms:
+        if llm is None:
+            continue
+        try:
+            callbacks = list(getattr(llm, "callbacks", None) or [])
+            if not any(isinstance(cb, handler_class) for cb in callbacks):
+                callbacks.append(handler_class())
+                llm.callbacks = callbacks
+        except Exception as e:
+            logger.debug(f"⚠️ 无法为LLM添加追踪回调: {e}")
+
+
+# ===== 报告 =====
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """从JSONL文件读取span记录（忽略损坏的行）"""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def summarize_by_kind(spans: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    按span类型汇总自身耗时（扣除子span后的耗时），
+    避免嵌套的工具/数据源/HTTP耗时被重复计算
+    """
+    spans = list(spans)
+    child_time = defaultdict(float)
+    for s in spans:
+        if s.get("parent_id"):
+            child_time[s["parent_id"]] += s.get("duration") or 0
+
+    summary = defaultdict(lambda: {"count": 0, "total": 0.0, "self": 0.0})
+    for s in spans:
+        duration = s.get("duration") or 0
+        item = summary[s.get("kind", "internal")]
+        item["count"] += 1
+        item["total"] += duration
+        item["self"] += max(duration - child_time[s["span_id"]], 0)
+    return dict(summary)
+
+
+def format_flame(spans: Iterable[Dict[str, Any]], min_duration: float = 0.0, width: int = 30) -> str:
+    """
+    生成火焰图式的文本报告：按调用树缩进，同一父节点下同名span合并
+
+    Args:
+        spans: 同一trace的span字典列表
+        min_duration: 低于该耗时（秒）的合并节点不显示
+        width: 耗时条的最大宽度
+    """
+    spans = list(spans)
+    if not spans:
+        return "(无span记录)"
+
+    children = defaultdict(list)
+    ids = {s["span_id"] for s in spans}
+    roots = []
+    for s in spans:
+        parent = s.get("parent_id")
+        if parent and parent in ids:
+            children[parent].append(s)
+        else:
+            roots.append(s)
+
+    total = sum(s.get("duration") or 0 for s in roots) or 1e-9
+    lines = []
+
+    def walk(group: List[Dict[str, Any]], depth: int):
+        merged = {}
+        for s in sorted(group, key=lambda x: x.get("start_time", 0)):
+            key = (s["name"], s.get("kind"))
+            entry = merged.setdefault(key, {"duration": 0.0, "count": 0, "errors": 0, "spans": []})
+            entry["duration"] += s.get("duration") or 0
+            entry["count"] += 1
+            entry["errors"] += s.get("status") == "error"
+            entry["spans"].append(s)
+
+        for (name, kind), entry in sorted(merged.items(), key=lambda kv: -kv[1]["duration"]):
+            if entry["duration"] < min_duration:
+                continue
+            ratio = entry["duration"] / total
+            bar = "█" * max(1, int(ratio * width))
+            count = f" ×{entry['count']}" if entry["count"] > 1 else ""
+            errors = f" ❌{entry['errors']}" if entry["errors"] else ""
+            lines.append(f"{bar:<{width}} {entry['duration']:8.2f}s {ratio:6.1%}  "
+                         f"{'  ' * depth}[{kind}] {name}{count}{errors}")
+            grandchildren = [c for s in entry["spans"] for c in children.get(s["span_id"], [])]
+            if grandchildren:
+                walk(grandchildren, depth + 1)
+
+    walk(roots, 0)
+    return "\n".join(lines)
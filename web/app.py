@@ -29,7 +29,7 @@ from components.header import render_header
 from components.analysis_form import render_analysis_form
 from components.results_display import render_results
 from utils.api_checker import check_api_keys
-from utils.analysis_runner import run_stock_analysis, validate_analysis_params, format_analysis_results
+from utils.analysis_runner import validate_analysis_params, format_analysis_results
 from utils.progress_tracker import SmartStreamlitProgressDisplay, create_smart_progress_callback
 from utils.async_progress_tracker import AsyncProgressTracker
 from components.async_progress_display import display_unified_progress
@@ -224,7 +224,7 @@ def initialize_session_state():
             if actual_status == 'running':
                 st.session_state.analysis_running = True
                 st.session_state.current_analysis_id = persistent_analysis_id
-            elif actual_status in ['completed', 'failed']:
+            elif actual_status in ['completed', 'failed', 'cancelled']:
                 st.session_state.analysis_running = False
                 st.session_state.current_analysis_id = persistent_analysis_id
             else:  # not_found
@@ -250,12 +250,33 @@ def initialize_session_state():
     except Exception as e:
         logger.warning(f"⚠️ [配置恢复] 表单配置恢复失败: {e}")
 
+def get_queue_user_id() -> str:
+    """任务队列按用户限制并发，没有登录体系时以浏览器会话区分用户"""
+    fingerprint = st.session_state.get('file_session_fingerprint')
+    if fingerprint:
+        return fingerprint
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except ImportError:
+        pass
+    return "anonymous"
+
 def main():
     """主应用程序"""
 
     # 初始化会话状态
     initialize_session_state()
 
+    # 启动开盘前缓存预热（需在.env中启用，每个进程只启动一次）
+    try:
+        from tradingagents.dataflows.cache_refresher import start_cache_warmup_scheduler
+        start_cache_warmup_scheduler()
+    except Exception as e:
+        logger.warning(f"⚠️ 缓存预热调度启动失败: {e}")
+
     # 自定义CSS - 调整侧边栏宽度
     st.markdown("""
     <style>
@@ -716,6 +737,40 @@ def main():
                 import uuid
                 analysis_id = f"analysis_{uuid.uuid4().hex[:8]}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
+                # 创建异步进度跟踪器（排队状态），工作线程开始执行时会接着写入进度
+                async_tracker = AsyncProgressTracker(
+                    analysis_id=analysis_id,
+                    analysts=form_data['analysts'],
+                    research_depth=form_data['research_depth'],
+                    llm_provider=config['llm_provider'],
+                    llm_model=config['llm_model']
+                )
+                async_tracker.mark_queued()
+
+                # 提交到分析任务队列，由有限数量的工作线程执行
+                from web.utils.job_queue import get_job_queue, JobQueueError
+                try:
+                    job_queue = get_job_queue()
+                    job_queue.submit(
+                        payload={
+                            'stock_symbol': form_data['stock_symbol'],
+                            'analysis_date': form_data['analysis_date'],
+                            'analysts': form_data['analysts'],
+                            'research_depth': form_data['research_depth'],
+                            'llm_provider': config['llm_provider'],
+                            'market_type': form_data.get('market_type', '美股'),
+                            'llm_model': config['llm_model'],
+                        },
+                        job_id=analysis_id,
+                        user_id=get_queue_user_id()
+                    )
+                except JobQueueError as e:
+                    async_tracker.mark_failed(f"系统繁忙，未能提交分析: {e}")
+                    st.session_state.analysis_running = False
+                    logger.warning(f"🚦 [任务队列] 拒绝提交: {analysis_id}: {e}")
+                    st.error(f"🚦 系统繁忙，请稍后再试：{e}")
+                    st.stop()
+
                 # 保存分析ID和表单配置到session state和cookie
                 form_config = st.session_state.get('form_config', {})
                 set_persistent_analysis_id(
@@ -726,35 +781,12 @@ def main():
                     form_config=form_config
                 )
 
-                # 创建异步进度跟踪器
-                async_tracker = AsyncProgressTracker(
-                    analysis_id=analysis_id,
-                    analysts=form_data['analysts'],
-                    research_depth=form_data['research_depth'],
-                    llm_provider=config['llm_provider']
-                )
-
-                # 创建进度回调函数
-                def progress_callback(message: str, step: int = None, total_steps: int = None):
-                    async_tracker.update_progress(message, step)
-
-                # 显示启动成功消息和加载动效
-                st.success(f"🚀 分析已启动！分析ID: {analysis_id}")
-
-                # 添加加载动效
-                with st.spinner("🔄 正在初始化分析..."):
-                    time.sleep(1.5)  # 让用户看到反馈
-
+                position = job_queue.position(analysis_id)
+                if position:
+                    st.success(f"📥 分析已提交，当前排队位置: 第{position}位。分析ID: {analysis_id}")
+                else:
+                    st.success(f"🚀 分析已启动！分析ID: {analysis_id}")
                 st.info(f"📊 正在分析: {form_data.get('market_type', '美股')} {form_data['stock_symbol']}")
-                st.info("""
-                ⏱️ 页面将在6秒后自动刷新...
-
-                📋 **查看分析进度：**
-                刷新后请向下滚动到 "📊 股票分析" 部分查看实时进度
-                """)
-
-                # 确保AsyncProgressTracker已经保存初始状态
-                time.sleep(0.1)  # 等待100毫秒确保数据已写入
 
                 # 设置分析状态
                 st.session_state.analysis_running = True
@@ -772,56 +804,10 @@ def main():
                 for key in auto_refresh_keys:
                     st.session_state[key] = True
 
-                # 在后台线程中运行分析（立即启动，不等待倒计时）
-                import threading
-
-                def run_analysis_in_background():
-                    try:
-                        results = run_stock_analysis(
-                            stock_symbol=form_data['stock_symbol'],
-                            analysis_date=form_data['analysis_date'],
-                            analysts=form_data['analysts'],
-                            research_depth=form_data['research_depth'],
-                            llm_provider=config['llm_provider'],
-                            market_type=form_data.get('market_type', '美股'),
-                            llm_model=config['llm_model'],
-                            progress_callback=progress_callback
-                        )
-
-                        # 标记分析完成并保存结果（不访问session state）
-                        async_tracker.mark_completed("✅ 分析成功完成！", results=results)
-
-                        logger.info(f"✅ [分析完成] 股票分析成功完成: {analysis_id}")
+                logger.info(f"📥 [任务队列] 分析已提交: {analysis_id}")
 
-                    except Exception as e:
-                        # 标记分析失败（不访问session state）
-                        async_tracker.mark_failed(str(e))
-                        logger.error(f"❌ [分析失败] {analysis_id}: {e}")
-
-                    finally:
-                        # 分析结束后注销线程
-                        from utils.thread_tracker import unregister_analysis_thread
-                        unregister_analysis_thread(analysis_id)
-                        logger.info(f"🧵 [线程清理] 分析线程已注销: {analysis_id}")
-
-                # 启动后台分析线程
-                analysis_thread = threading.Thread(target=run_analysis_in_background)
-                analysis_thread.daemon = True  # 设置为守护线程，这样主程序退出时线程也会退出
-                analysis_thread.start()
-
-                # 注册线程到跟踪器
-                from utils.thread_tracker import register_analysis_thread
-                register_analysis_thread(analysis_id, analysis_thread)
-
-                logger.info(f"🧵 [后台分析] 分析线程已启动: {analysis_id}")
-
-                # 分析已在后台线程中启动，显示启动信息并刷新页面
-                st.success("🚀 分析已启动！正在后台运行...")
-
-                # 显示启动信息
+                # 显示启动信息并刷新页面
                 st.info("⏱️ 页面将自动刷新显示分析进度...")
-
-                # 等待2秒让用户看到启动信息，然后刷新页面
                 time.sleep(2)
                 st.rerun()
 
@@ -855,6 +841,8 @@ def main():
 
                 elif actual_status == 'failed':
                     st.error(f"❌ 分析失败: {current_analysis_id}")
+                elif actual_status == 'cancelled':
+                    st.warning(f"🛑 分析已取消: {current_analysis_id}")
                 else:
                     st.warning(f"⚠️ 分析状态未知: {current_analysis_id}")
 
@@ -10,6 +10,16 @@ from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('web')
 
 
+def _suggest_china_stocks(keyword, limit=5):
+    """从股票检索索引中查找候选股票（纯内存查询，索引不可用时返回空列表）"""
+    try:
+        from tradingagents.dataflows.stock_search_index import get_stock_search_index
+        return get_stock_search_index().search(keyword, limit=limit)
+    except Exception as e:
+        logger.debug(f"股票检索索引不可用: {e}")
+        return []
+
+
 def render_analysis_form():
     """渲染股票分析表单"""
 
@@ -86,6 +96,14 @@ def render_analysis_form():
                 ).strip()
 
                 logger.debug(f"🔍 [FORM DEBUG] A股text_input返回值: '{stock_symbol}'")
+
+                # 输入的是名称或拼音首字母时，通过内存中的股票检索索引给出候选
+                if stock_symbol and not stock_symbol.isdigit():
+                    matches = _suggest_china_stocks(stock_symbol)
+                    if matches:
+                        st.caption("💡 匹配的股票: " + "，".join(f"{m['code']} {m.get('name', '')}" for m in matches))
+                        if len(matches) == 1 or matches[0].get('name') == stock_symbol:
+                            stock_symbol = matches[0]['code']
             
             # 分析日期
             analysis_date = st.date_input(
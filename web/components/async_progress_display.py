@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """
 异步进度显示组件
-支持定时刷新，从Redis或文件获取进度状态
+订阅进度总线，只在收到进度推送时重绘；首次显示时从Redis或文件读取一次快照
 """
 
 import streamlit as st
 import time
 from typing import Optional, Dict, Any
 from web.utils.async_progress_tracker import get_progress_by_id, format_time
+from web.utils.progress_bus import ProgressWatcher
+
+# 没有新进度时，最长等待多久重绘一次（刷新已用时间）
+PUSH_HEARTBEAT_SECONDS = 10.0
+# 排队中刷新排队位置的间隔
+QUEUE_REFRESH_SECONDS = 3.0
+# 没有进度数据且分析不在运行或排队时，最多再等待推送的次数（覆盖刚提交、进度尚未写入的窗口）
+MAX_EMPTY_PROGRESS_WAITS = 3
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -448,6 +456,54 @@ def display_static_progress(analysis_id: str) -> bool:
     return status in ['completed', 'failed']
 
 
+def get_progress_watcher(analysis_id: str) -> ProgressWatcher:
+    """获取当前会话对该分析的进度订阅（保存在session_state中，跨重绘复用）"""
+    watcher_key = f"progress_watcher_{analysis_id}"
+    watcher = st.session_state.get(watcher_key)
+    if watcher is None:
+        watcher = ProgressWatcher(analysis_id)
+        st.session_state[watcher_key] = watcher
+    else:
+        watcher.poll()
+    return watcher
+
+
+def wait_for_progress_push(analysis_id: str, timeout: float = PUSH_HEARTBEAT_SECONDS):
+    """阻塞到有新的进度推送（或超时）后触发重绘，代替固定间隔的轮询刷新"""
+    watcher = get_progress_watcher(analysis_id)
+    watcher.poll(timeout=timeout)
+    if watcher.finished:
+        stop_watching_progress(analysis_id)
+    st.rerun()
+
+
+def keep_waiting_for_progress(analysis_id: str) -> bool:
+    """
+    没有进度数据时是否继续等待
+
+    分析在运行或排队中时一直等待；否则（ID不存在或进度已过期）最多等待MAX_EMPTY_PROGRESS_WAITS次，
+    避免自动刷新无限重绘
+    """
+    from web.utils.thread_tracker import check_analysis_status
+
+    attempts_key = f"empty_progress_waits_{analysis_id}"
+    if check_analysis_status(analysis_id) == 'running':
+        st.session_state[attempts_key] = 0
+        return True
+    attempts = st.session_state.get(attempts_key, 0)
+    if attempts >= MAX_EMPTY_PROGRESS_WAITS:
+        return False
+    st.session_state[attempts_key] = attempts + 1
+    return True
+
+
+def stop_watching_progress(analysis_id: str):
+    """关闭并移除当前会话对该分析的进度订阅"""
+    watcher = st.session_state.pop(f"progress_watcher_{analysis_id}", None)
+    if watcher is not None:
+        watcher.close()
+
+
 def display_unified_progress(analysis_id: str, show_refresh_controls: bool = True) -> bool:
     """
     统一的进度显示函数，避免重复元素
@@ -465,12 +521,17 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     显示静态进度，可控制是否显示刷新控件
     """
     import streamlit as st
-    from web.utils.async_progress_tracker import get_progress_by_id
 
-    # 获取进度数据
-    progress_data = get_progress_by_id(analysis_id)
+    # 获取进度数据（订阅推送的增量，不再每次重绘都读取存储）
+    progress_data = get_progress_watcher(analysis_id).state
 
     if not progress_data:
+        if not keep_waiting_for_progress(analysis_id):
+            # 分析不存在或进度已过期：停止订阅和自动刷新
+            stop_watching_progress(analysis_id)
+            st.warning(f"⚠️ 未找到分析 {analysis_id} 的进度数据，分析可能不存在或已过期")
+            return False
+
         # 如果没有进度数据，显示默认的准备状态
         st.info("🔄 **当前状态**: 准备开始分析...")
 
@@ -485,27 +546,29 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
                 # 获取默认值，如果是新分析则默认为True
                 default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
                 auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
-                if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                    import time
-                    time.sleep(3)  # 等待3秒
-                    st.rerun()
-                elif auto_refresh and status in ['completed', 'failed']:
-                    # 分析完成后自动关闭自动刷新
-                    st.session_state[auto_refresh_key] = False
+                if auto_refresh:
+                    # 等待第一条进度推送
+                    wait_for_progress_push(analysis_id)
 
         return False  # 返回False表示还未完成
 
+    st.session_state.pop(f"empty_progress_waits_{analysis_id}", None)
+
     # 解析进度数据（修复字段名称匹配）
     status = progress_data.get('status', 'running')
     current_step = progress_data.get('current_step', 0)
     current_step_name = progress_data.get('current_step_name', '准备阶段')
     progress_percentage = progress_data.get('progress_percentage', 0.0)
 
+    if status == 'queued':
+        display_queued_status(analysis_id, show_refresh_controls)
+        return False
+
     # 计算已用时间
     start_time = progress_data.get('start_time', 0)
     estimated_total_time = progress_data.get('estimated_total_time', 0)
     import time
-    if status == 'completed':
+    if status in ['completed', 'cancelled']:
         # 已完成的分析使用存储的最终耗时
         elapsed_time = progress_data.get('elapsed_time', 0)
     elif start_time > 0:
@@ -535,7 +598,7 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     with col3:
         if status == 'completed':
             st.metric("预计剩余", "已完成")
-        elif status == 'failed':
+        elif status in ['failed', 'cancelled']:
             st.metric("预计剩余", "已中断")
         else:
             st.metric("预计剩余", format_time(remaining_time))
@@ -550,7 +613,8 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     status_icon = {
         'running': '🔄',
         'completed': '✅',
-        'failed': '❌'
+        'failed': '❌',
+        'cancelled': '🛑'
     }.get(status, '🔄')
 
     if status == 'completed':
@@ -578,6 +642,8 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
             st.rerun()
     elif status == 'failed':
         st.error(f"{status_icon} **当前状态**: {last_message}")
+    elif status == 'cancelled':
+        st.warning(f"{status_icon} **当前状态**: {last_message}")
     else:
         st.info(f"{status_icon} **当前状态**: {last_message}")
 
@@ -585,23 +651,69 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     # 1. 需要显示刷新控件 AND
     # 2. (分析正在运行 OR 分析刚开始还没有状态)
     if show_refresh_controls and (status == 'running' or status == 'initializing'):
-        col1, col2 = st.columns([1, 1])
+        col1, col2, col3 = st.columns([1, 1, 1])
         with col1:
             if st.button("🔄 刷新进度", key=f"refresh_unified_{analysis_id}"):
                 st.rerun()
+        with col3:
+            render_cancel_button(analysis_id, "🛑 停止分析")
         with col2:
             auto_refresh_key = f"auto_refresh_unified_{analysis_id}"
             # 获取默认值，如果是新分析则默认为True
             default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
             auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
             if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                import time
-                time.sleep(3)  # 等待3秒
-                st.rerun()
+                # 有新进度推送时立即重绘，否则最多等待心跳间隔
+                wait_for_progress_push(analysis_id)
             elif auto_refresh and status in ['completed', 'failed']:
                 # 分析完成后自动关闭自动刷新
                 st.session_state[auto_refresh_key] = False
 
-    # 不需要清理session state，因为我们通过参数控制显示
+    # 分析结束后取消订阅，之后的重绘按需重新读取快照
+    if status in ['completed', 'failed', 'cancelled']:
+        watcher = st.session_state.pop(f"progress_watcher_{analysis_id}", None)
+        if watcher is not None:
+            watcher.close()
 
-    return status in ['completed', 'failed']
+    return status in ['completed', 'failed', 'cancelled']
+
+
+def render_cancel_button(analysis_id: str, label: str):
+    """取消按钮：排队中的分析立即出队，运行中的分析在下一个进度检查点停止"""
+    if st.button(label, key=f"cancel_analysis_{analysis_id}"):
+        from web.utils.analysis_runner import cancel_analysis
+        if cancel_analysis(analysis_id):
+            st.warning("🛑 已请求停止分析")
+        else:
+            st.info("分析已结束，无需取消")
+        st.rerun()
+
+
+def display_queued_status(analysis_id: str, show_refresh_controls: bool = True):
+    """排队中的分析：显示实时排队位置，排队位置由任务队列计算，不写入进度存储"""
+    from web.utils.job_queue import get_job_queue
+
+    job_queue = get_job_queue()
+    position = job_queue.position(analysis_id)
+    stats = job_queue.stats()
+
+    if position:
+        wait = job_queue.estimate_wait(analysis_id)
+        st.info(f"⏳ **当前状态**: 排队中，第 {position} 位（{stats['running']}/{stats['max_workers']} 个分析正在运行），"
+                f"预计 {format_time(wait)} 后开始")
+    else:
+        st.info("⏳ **当前状态**: 即将开始分析...")
+
+    if not show_refresh_controls:
+        return
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        render_cancel_button(analysis_id, "🛑 取消排队")
+    with col2:
+        auto_refresh_key = f"auto_refresh_unified_{analysis_id}"
+        default_value = st.session_state.get(auto_refresh_key, True)
+        auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
+    if auto_refresh:
+        # 排队位置不产生进度推送，缩短等待以便及时更新位置
+        wait_for_progress_push(analysis_id, timeout=QUEUE_REFRESH_SECONDS)
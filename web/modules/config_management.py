@@ -335,19 +335,13 @@ def render_usage_statistics():
     # 使用趋势
     st.markdown("**📈 使用趋势**")
     
-    records = config_manager.load_usage_records()
-    if records:
-        # 按日期聚合
-        daily_stats = {}
-        for record in records:
-            try:
-                date = datetime.fromisoformat(record.timestamp).date()
-                if date not in daily_stats:
-                    daily_stats[date] = {"cost": 0, "requests": 0}
-                daily_stats[date]["cost"] += record.cost
-                daily_stats[date]["requests"] += 1
-            except:
-                continue
+    # 按日汇总由本地账本预先聚合
+    daily_usage = config_manager.get_daily_usage(days)
+    if daily_usage:
+        daily_stats = {
+            datetime.strptime(item["date"], "%Y-%m-%d").date(): {"cost": item["cost"], "requests": item["requests"]}
+            for item in daily_usage
+        }
         
         if daily_stats:
             dates = sorted(daily_stats.keys())
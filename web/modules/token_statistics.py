@@ -64,10 +64,9 @@ def render_token_statistics():
         if st.button("📥 导出统计数据", use_container_width=True):
             export_statistics_data(days)
     
-    # 获取统计数据
+    # 获取统计数据（时间范围过滤和分组汇总都在存储端完成，页面只接收聚合结果）
     try:
         stats = config_manager.get_usage_statistics(days)
-        records = load_detailed_records(days)
         
         if not stats or stats.get('total_requests', 0) == 0:
             st.info(f"📊 {time_range}内暂无Token使用记录")
@@ -86,18 +85,16 @@ def render_token_statistics():
         render_overview_metrics(stats, time_range)
         
         # 显示详细图表
-        if records:
-            render_detailed_charts(records, stats)
+        render_detailed_charts(config_manager.get_model_statistics(days), stats)
         
         # 显示供应商统计
         render_provider_statistics(stats)
         
         # 显示成本趋势
-        if records:
-            render_cost_trends(records)
+        render_cost_trends(config_manager.get_daily_usage(days))
         
         # 显示详细记录表
-        render_detailed_records_table(records)
+        render_detailed_records_table(days)
         
     except Exception as e:
         st.error(f"❌ 获取统计数据失败: {str(e)}")
@@ -157,7 +154,7 @@ def render_overview_metrics(stats: Dict[str, Any], time_range: str):
             delta=f"{stats['total_output_tokens']/(stats['total_input_tokens']+stats['total_output_tokens'])*100:.1f}%"
         )
 
-def render_detailed_charts(records: List[UsageRecord], stats: Dict[str, Any]):
+def render_detailed_charts(model_stats: List[Dict[str, Any]], stats: Dict[str, Any]):
     """渲染详细图表"""
     st.markdown("**📊 详细分析图表**")
     
@@ -185,26 +182,28 @@ def render_detailed_charts(records: List[UsageRecord], stats: Dict[str, Any]):
     with col2:
         st.markdown("**📈 成本vs Token关系**")
         
-        # 创建散点图
-        df_records = pd.DataFrame([
+        # 创建散点图（每个模型一个点，点大小为调用次数）
+        df_models = pd.DataFrame([
             {
-                'total_tokens': record.input_tokens + record.output_tokens,
-                'cost': record.cost,
-                'provider': record.provider,
-                'model': record.model_name
+                'total_tokens': item['input_tokens'] + item['output_tokens'],
+                'cost': item['cost'],
+                'requests': item['requests'],
+                'provider': item['provider'],
+                'model': item['model_name']
             }
-            for record in records
+            for item in model_stats
         ])
         
-        if not df_records.empty:
+        if not df_models.empty:
             fig_scatter = px.scatter(
-                df_records,
+                df_models,
                 x='total_tokens',
                 y='cost',
+                size='requests',
                 color='provider',
-                hover_data=['model'],
-                title="成本与Token使用量关系",
-                labels={'total_tokens': 'Token总数', 'cost': '成本(¥)'}
+                hover_data=['model', 'requests'],
+                title="各模型成本与Token使用量",
+                labels={'total_tokens': 'Token总数', 'cost': '成本(¥)', 'requests': '调用次数'}
             )
             st.plotly_chart(fig_scatter, use_container_width=True)
 
@@ -262,30 +261,22 @@ def render_provider_statistics(stats: Dict[str, Any]):
         )
         st.plotly_chart(fig_requests, use_container_width=True)
 
-def render_cost_trends(records: List[UsageRecord]):
-    """渲染成本趋势图"""
+def render_cost_trends(daily_usage: List[Dict[str, Any]]):
+    """渲染成本趋势图（按日汇总由存储端完成）"""
     st.markdown("**📈 成本趋势分析**")
     
-    # 按日期聚合数据
-    df_records = pd.DataFrame([
-        {
-            'date': datetime.fromisoformat(record.timestamp).date(),
-            'cost': record.cost,
-            'tokens': record.input_tokens + record.output_tokens,
-            'provider': record.provider
-        }
-        for record in records
-    ])
-    
-    if df_records.empty:
+    if not daily_usage:
         st.info("暂无趋势数据")
         return
     
-    # 按日期聚合
-    daily_stats = df_records.groupby('date').agg({
-        'cost': 'sum',
-        'tokens': 'sum'
-    }).reset_index()
+    daily_stats = pd.DataFrame([
+        {
+            'date': item['date'],
+            'cost': item['cost'],
+            'tokens': item['input_tokens'] + item['output_tokens']
+        }
+        for item in daily_usage
+    ])
     
     # 创建双轴图表
     fig = make_subplots(
@@ -325,14 +316,23 @@ def render_cost_trends(records: List[UsageRecord]):
     fig.update_layout(height=400)
     st.plotly_chart(fig, use_container_width=True)
 
-def render_detailed_records_table(records: List[UsageRecord]):
-    """渲染详细记录表"""
+def render_detailed_records_table(days: int):
+    """渲染详细记录表（只从存储端读取当前页）"""
     st.markdown("**📋 详细使用记录**")
     
-    if not records:
+    total_records = config_manager.count_usage_records(days)
+    if not total_records:
         st.info("暂无详细记录")
         return
     
+    # 分页显示
+    page_size = 20
+    total_pages = (total_records + page_size - 1) // page_size
+    page = 1
+    if total_pages > 1:
+        page = st.selectbox(f"页面 (共{total_pages}页, {total_records}条记录)", range(1, total_pages + 1))
+    records = config_manager.load_usage_records(days=days, limit=page_size, offset=(page - 1) * page_size)
+    
     # 创建记录表格
     records_df = pd.DataFrame([
         {
@@ -346,42 +346,16 @@ def render_detailed_records_table(records: List[UsageRecord]):
             '会话ID': record.session_id[:12] + '...' if len(record.session_id) > 12 else record.session_id,
             '分析类型': record.analysis_type
         }
-        for record in sorted(records, key=lambda x: x.timestamp, reverse=True)
+        for record in reversed(records)
     ])
     
-    # 分页显示
-    page_size = 20
-    total_records = len(records_df)
-    total_pages = (total_records + page_size - 1) // page_size
-    
-    if total_pages > 1:
-        page = st.selectbox(f"页面 (共{total_pages}页, {total_records}条记录)", range(1, total_pages + 1))
-        start_idx = (page - 1) * page_size
-        end_idx = min(start_idx + page_size, total_records)
-        display_df = records_df.iloc[start_idx:end_idx]
-    else:
-        display_df = records_df
-    
-    st.dataframe(display_df, use_container_width=True)
+    st.dataframe(records_df, use_container_width=True)
 
 def load_detailed_records(days: int) -> List[UsageRecord]:
-    """加载详细记录"""
+    """加载时间范围内的全部详细记录（仅用于导出）"""
     try:
-        all_records = config_manager.load_usage_records()
-        
-        # 过滤时间范围
-        cutoff_date = datetime.now() - timedelta(days=days)
-        filtered_records = []
-        
-        for record in all_records:
-            try:
-                record_date = datetime.fromisoformat(record.timestamp)
-                if record_date >= cutoff_date:
-                    filtered_records.append(record)
-            except:
-                continue
-        
-        return filtered_records
+        # 时间范围过滤在账本查询中完成
+        return config_manager.load_usage_records(days=days)
     except Exception as e:
         st.error(f"加载记录失败: {e}")
         return []
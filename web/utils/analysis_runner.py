@@ -24,6 +24,14 @@ load_dotenv(project_root / ".env", override=True)
 from tradingagents.utils.logging_init import setup_web_logging
 logger = setup_web_logging()
 
+# 导入调用链追踪
+from tradingagents.utils.tracing import start_trace
+from tradingagents.utils.latency_model import get_latency_model
+from tradingagents.utils.debate_history import speaker_history
+
+# 任务队列的取消信号
+from web.utils.job_queue import JobCancelledError, get_job_queue
+
 # 添加配置管理器
 try:
     from tradingagents.config.config_manager import token_tracker
@@ -66,9 +74,9 @@ def extract_risk_assessment(state):
             return None
 
         # 提取各个风险分析师的观点并进行中文化
-        risky_analysis = translate_analyst_labels(risk_debate_state.get('risky_history', ''))
-        safe_analysis = translate_analyst_labels(risk_debate_state.get('safe_history', ''))
-        neutral_analysis = translate_analyst_labels(risk_debate_state.get('neutral_history', ''))
+        risky_analysis = translate_analyst_labels(speaker_history(risk_debate_state, 'Risky Analyst'))
+        safe_analysis = translate_analyst_labels(speaker_history(risk_debate_state, 'Safe Analyst'))
+        neutral_analysis = translate_analyst_labels(speaker_history(risk_debate_state, 'Neutral Analyst'))
         judge_decision = translate_analyst_labels(risk_debate_state.get('judge_decision', ''))
 
         # 格式化风险评估报告
@@ -153,6 +161,8 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
         logger.info(f"[{session_id}] {success_msg}")
         logger.info(f"[{session_id}] 缓存状态: {preparation_result.cache_status}")
 
+    except JobCancelledError:
+        raise
     except Exception as e:
         error_msg = f"❌ 数据预获取过程中发生错误: {str(e)}"
         update_progress(error_msg)
@@ -349,7 +359,11 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
         logger.debug(f"🔍 [RUNNER DEBUG]   symbol: '{formatted_symbol}'")
         logger.debug(f"🔍 [RUNNER DEBUG]   date: '{analysis_date}'")
 
-        state, decision = graph.propagate(formatted_symbol, analysis_date)
+        graph_start_time = time.time()
+        with start_trace("analysis", trace_id=session_id, symbol=formatted_symbol,
+                         llm_provider=llm_provider, llm_model=llm_model):
+            state, decision = graph.propagate(formatted_symbol, analysis_date)
+        graph_end_time = time.time()
 
         # 调试信息
         logger.debug(f"🔍 [DEBUG] 分析完成，decision类型: {type(decision)}")
@@ -395,7 +409,8 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
             'decision': decision,
             'success': True,
             'error': None,
-            'session_id': session_id if TOKEN_TRACKING_ENABLED else None
+            'session_id': session_id if TOKEN_TRACKING_ENABLED else None,
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
         # 记录分析完成的详细日志
@@ -425,9 +440,22 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
                        'event_type': 'web_analysis_complete'
                    })
 
+        # 用本次各节点的实际耗时更新耗时模型，供之后的进度预估和排队准入使用
+        try:
+            get_latency_model().record_trace(
+                session_id, llm_provider, llm_model, research_depth,
+                setup_seconds=graph_start_time - analysis_start_time,
+                finalize_seconds=time.time() - graph_end_time
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [耗时模型] 记录节点耗时失败: {e}")
+
         update_progress("✅ 分析成功完成！")
         return results
 
+    except JobCancelledError:
+        logger.info(f"🛑 [分析取消] 股票分析已停止: {stock_symbol}")
+        raise
     except Exception as e:
         # 记录分析失败的详细日志
         analysis_duration = time.time() - analysis_start_time
@@ -452,6 +480,88 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
         # 如果真实分析失败，返回模拟数据用于演示
         return generate_demo_results(stock_symbol, analysis_date, analysts, research_depth, llm_provider, llm_model, str(e), market_type)
 
+def run_analysis_job(job, check_cancelled):
+    """
+    任务队列的处理函数：在工作线程中执行一个排队的分析
+
+    Args:
+        job: AnalysisJob，payload为run_stock_analysis的参数
+        check_cancelled: 任务被取消时抛出JobCancelledError，在每次进度更新时调用
+    """
+    from web.utils.async_progress_tracker import AsyncProgressTracker
+    from web.utils.thread_tracker import register_analysis_thread, unregister_analysis_thread
+    import threading
+
+    payload = job.payload
+    analysis_id = job.job_id
+    check_cancelled()
+
+    # 工作线程里重新创建跟踪器，Redis队列下提交与执行可能不在同一进程
+    async_tracker = AsyncProgressTracker(
+        analysis_id=analysis_id,
+        analysts=payload['analysts'],
+        research_depth=payload['research_depth'],
+        llm_provider=payload['llm_provider'],
+        llm_model=payload.get('llm_model')
+    )
+    register_analysis_thread(analysis_id, threading.current_thread())
+
+    def progress_callback(message: str, step: int = None, total_steps: int = None):
+        check_cancelled()
+        async_tracker.update_progress(message, step)
+
+    try:
+        results = run_stock_analysis(progress_callback=progress_callback, **payload)
+        async_tracker.mark_completed("✅ 分析成功完成！", results=results)
+        logger.info(f"✅ [分析完成] 股票分析成功完成: {analysis_id}")
+        _prerender_reports(results)
+    except JobCancelledError:
+        async_tracker.mark_cancelled("🛑 分析已被用户停止")
+        raise
+    except Exception as e:
+        async_tracker.mark_failed(str(e))
+        logger.error(f"❌ [分析失败] {analysis_id}: {e}")
+        raise
+    finally:
+        unregister_analysis_thread(analysis_id)
+        logger.info(f"🧵 [线程清理] 分析线程已注销: {analysis_id}")
+
+
+def _prerender_reports(results):
+    """分析完成后在后台预渲染Word/PDF报告，用户点击下载时直接命中缓存"""
+    try:
+        from web.utils.report_export_service import get_report_export_service
+        if results and results.get('success'):
+            get_report_export_service().prerender(format_analysis_results(results))
+    except Exception as e:
+        logger.warning(f"⚠️ 报告预渲染提交失败: {e}")
+
+
+def cancel_analysis(analysis_id: str) -> bool:
+    """
+    取消分析：排队中的立即出队并标记为已取消，运行中的在下一次进度更新时停止
+
+    Returns:
+        bool: 是否找到可取消的任务
+    """
+    job_queue = get_job_queue()
+    if not job_queue.cancel(analysis_id):
+        return False
+
+    job = job_queue.get_job(analysis_id)
+    if job is not None and job.status == 'cancelled':
+        # 排队中的任务不会再进入工作线程，由这里写入最终状态
+        from web.utils.async_progress_tracker import AsyncProgressTracker
+        AsyncProgressTracker(
+            analysis_id=analysis_id,
+            analysts=job.payload['analysts'],
+            research_depth=job.payload['research_depth'],
+            llm_provider=job.payload['llm_provider'],
+            llm_model=job.payload.get('llm_model')
+        ).mark_cancelled()
+    return True
+
+
 def format_analysis_results(results):
     """格式化分析结果用于显示"""
     
@@ -565,6 +675,7 @@ def format_analysis_results(results):
         'research_depth': results['research_depth'],
         'llm_provider': results.get('llm_provider', 'dashscope'),
         'llm_model': results['llm_model'],
+        'generated_at': results.get('generated_at'),
         'metadata': {
             'analysis_date': results['analysis_date'],
             'analysts': results['analysts'],
@@ -834,5 +945,6 @@ def generate_demo_results(stock_symbol, analysis_date, analysts, research_depth,
         'success': True,
         'error': None,
         'is_demo': True,
-        'demo_reason': f"API调用失败，显示演示数据。错误信息: {error_msg}"
+        'demo_reason': f"API调用失败，显示演示数据。错误信息: {error_msg}",
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 异步进度跟踪器
-支持Redis和文件两种存储方式，前端定时轮询获取进度
+支持Redis和文件两种存储方式保存快照，每次更新的增量通过进度总线推送给页面
 """
 
 import json
@@ -16,6 +16,16 @@ from pathlib import Path
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('async_progress')
 
+from tradingagents.config.redis_pool import get_redis_client, is_redis_enabled
+from web.utils.progress_bus import compute_delta, get_progress_bus
+from tradingagents.utils.latency_model import (
+    get_latency_model, analyst_nodes, DOWNSTREAM_NODES, SETUP_NODE, FINALIZE_NODE
+)
+
+# 按最后更新时间索引分析ID的有序集合，替代 KEYS progress:* 扫描
+PROGRESS_INDEX_KEY = "progress_index"
+PROGRESS_TTL_SECONDS = 3600
+
 def safe_serialize(obj):
     """安全序列化对象，处理不可序列化的类型"""
     if hasattr(obj, 'dict'):
@@ -46,19 +56,22 @@ def safe_serialize(obj):
 class AsyncProgressTracker:
     """异步进度跟踪器"""
     
-    def __init__(self, analysis_id: str, analysts: List[str], research_depth: int, llm_provider: str):
+    def __init__(self, analysis_id: str, analysts: List[str], research_depth: int, llm_provider: str,
+                 llm_model: Optional[str] = None):
         self.analysis_id = analysis_id
         self.analysts = analysts
         self.research_depth = research_depth
         self.llm_provider = llm_provider
+        self.llm_model = llm_model
         self.start_time = time.time()
         
-        # 生成分析步骤
+        # 生成分析步骤，步骤权重和总时长来自耗时模型的预测
         self.analysis_steps = self._generate_dynamic_steps()
         self.estimated_duration = self._estimate_total_duration()
         
         # 初始化状态
         self.current_step = 0
+        self._step_started_at = self.start_time
         self.progress_data = {
             'analysis_id': analysis_id,
             'status': 'running',
@@ -76,6 +89,10 @@ class AsyncProgressTracker:
             'steps': self.analysis_steps
         }
         
+        # 推送给订阅者的事件序号和上次推送的状态
+        self._event_seq = 0
+        self._published_state: Dict[str, Any] = {}
+
         # 尝试初始化Redis，失败则使用文件
         self.redis_client = None
         self.use_redis = self._init_redis()
@@ -128,34 +145,15 @@ class AsyncProgressTracker:
                 logger.info(f"📊 [异步进度] Redis已禁用，使用文件存储")
                 return False
 
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-
-            # 创建Redis连接
-            if redis_password:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    password=redis_password,
-                    db=redis_db,
-                    decode_responses=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True
-                )
+            # 使用共享连接池
+            self.redis_client = get_redis_client()
+            if self.redis_client is None:
+                logger.info(f"📊 [异步进度] redis未安装，使用文件存储")
+                return False
 
             # 测试连接
             self.redis_client.ping()
-            logger.info(f"📊 [异步进度] Redis连接成功: {redis_host}:{redis_port}")
+            logger.info(f"📊 [异步进度] Redis连接成功")
             return True
         except Exception as e:
             logger.warning(f"📊 [异步进度] Redis连接失败，使用文件存储: {e}")
@@ -163,12 +161,13 @@ class AsyncProgressTracker:
     
     def _generate_dynamic_steps(self) -> List[Dict]:
         """根据分析师数量和研究深度动态生成分析步骤"""
+        # nodes: 该步骤对应的图节点，用于从耗时模型取预测耗时
         steps = [
-            {"name": "📋 准备阶段", "description": "验证股票代码，检查数据源可用性", "weight": 0.05},
-            {"name": "🔧 环境检查", "description": "检查API密钥配置，确保数据获取正常", "weight": 0.02},
-            {"name": "💰 成本估算", "description": "根据分析深度预估API调用成本", "weight": 0.01},
-            {"name": "⚙️ 参数设置", "description": "配置分析参数和AI模型选择", "weight": 0.02},
-            {"name": "🚀 启动引擎", "description": "初始化AI分析引擎，准备开始分析", "weight": 0.05},
+            {"name": "📋 准备阶段", "description": "验证股票代码，检查数据源可用性", "weight": 0.05, "nodes": [SETUP_NODE]},
+            {"name": "🔧 环境检查", "description": "检查API密钥配置，确保数据获取正常", "weight": 0.02, "nodes": [SETUP_NODE]},
+            {"name": "💰 成本估算", "description": "根据分析深度预估API调用成本", "weight": 0.01, "nodes": [SETUP_NODE]},
+            {"name": "⚙️ 参数设置", "description": "配置分析参数和AI模型选择", "weight": 0.02, "nodes": [SETUP_NODE]},
+            {"name": "🚀 启动引擎", "description": "初始化AI分析引擎，准备开始分析", "weight": 0.05, "nodes": [SETUP_NODE]},
         ]
 
         # 为每个分析师添加专门的步骤
@@ -178,42 +177,72 @@ class AsyncProgressTracker:
             steps.append({
                 "name": analyst_info["name"],
                 "description": analyst_info["description"],
-                "weight": analyst_base_weight
+                "weight": analyst_base_weight,
+                "nodes": list(analyst_nodes(analyst))
             })
 
+        research_nodes = ["Bull Researcher", "Bear Researcher", "Research Manager"]
+        risk_nodes = ["Risky Analyst", "Safe Analyst", "Neutral Analyst", "Risk Judge"]
+
         # 根据研究深度添加后续步骤
         if self.research_depth >= 2:
             # 标准和深度分析包含研究员辩论
             steps.extend([
-                {"name": "📈 多头观点", "description": "从乐观角度分析投资机会和上涨潜力", "weight": 0.06},
-                {"name": "📉 空头观点", "description": "从谨慎角度分析投资风险和下跌可能", "weight": 0.06},
-                {"name": "🤝 观点整合", "description": "综合多空观点，形成平衡的投资建议", "weight": 0.05},
+                {"name": "📈 多头观点", "description": "从乐观角度分析投资机会和上涨潜力", "weight": 0.06, "nodes": ["Bull Researcher"]},
+                {"name": "📉 空头观点", "description": "从谨慎角度分析投资风险和下跌可能", "weight": 0.06, "nodes": ["Bear Researcher"]},
+                {"name": "🤝 观点整合", "description": "综合多空观点，形成平衡的投资建议", "weight": 0.05, "nodes": ["Research Manager"]},
             ])
+            decision_nodes = ["Trader"]
+        else:
+            # 快速分析的研究员辩论计入投资建议步骤
+            decision_nodes = research_nodes + ["Trader"]
 
         # 所有深度都包含交易决策
-        steps.append({"name": "💡 投资建议", "description": "基于分析结果制定具体的买卖建议", "weight": 0.06})
+        steps.append({"name": "💡 投资建议", "description": "基于分析结果制定具体的买卖建议", "weight": 0.06, "nodes": decision_nodes})
 
         if self.research_depth >= 3:
             # 深度分析包含详细风险评估
             steps.extend([
-                {"name": "🔥 激进策略", "description": "评估高风险高收益的投资策略", "weight": 0.03},
-                {"name": "🛡️ 保守策略", "description": "评估低风险稳健的投资策略", "weight": 0.03},
-                {"name": "⚖️ 平衡策略", "description": "评估风险收益平衡的投资策略", "weight": 0.03},
-                {"name": "🎯 风险控制", "description": "制定风险控制措施和止损策略", "weight": 0.04},
+                {"name": "🔥 激进策略", "description": "评估高风险高收益的投资策略", "weight": 0.03, "nodes": ["Risky Analyst"]},
+                {"name": "🛡️ 保守策略", "description": "评估低风险稳健的投资策略", "weight": 0.03, "nodes": ["Safe Analyst"]},
+                {"name": "⚖️ 平衡策略", "description": "评估风险收益平衡的投资策略", "weight": 0.03, "nodes": ["Neutral Analyst"]},
+                {"name": "🎯 风险控制", "description": "制定风险控制措施和止损策略", "weight": 0.04, "nodes": ["Risk Judge"]},
             ])
         else:
             # 快速和标准分析的简化风险评估
-            steps.append({"name": "⚠️ 风险提示", "description": "识别主要投资风险并提供风险提示", "weight": 0.05})
+            steps.append({"name": "⚠️ 风险提示", "description": "识别主要投资风险并提供风险提示", "weight": 0.05, "nodes": risk_nodes})
 
         # 最后的整理步骤
-        steps.append({"name": "📊 生成报告", "description": "整理所有分析结果，生成最终投资报告", "weight": 0.04})
+        steps.append({"name": "📊 生成报告", "description": "整理所有分析结果，生成最终投资报告", "weight": 0.04, "nodes": [FINALIZE_NODE]})
+
+        self._apply_predicted_durations(steps)
+        return steps
 
-        # 重新平衡权重，确保总和为1.0
+    def _apply_predicted_durations(self, steps: List[Dict]):
+        """
+        用耗时模型的节点预测为每个步骤设置expected_seconds，并按预测耗时重新分配权重
+        同一节点对应多个步骤时（如准备阶段），按步骤原有权重拆分
+        """
+        model = get_latency_model()
+        node_weight: Dict[str, float] = {}
+        for step in steps:
+            for node in step["nodes"]:
+                node_weight[node] = node_weight.get(node, 0.0) + step["weight"]
+
+        for step in steps:
+            step["expected_seconds"] = sum(
+                model.predict(node, self.llm_provider, self.llm_model, self.research_depth) * step["weight"] / node_weight[node]
+                for node in step["nodes"]
+            )
+
+        total_seconds = sum(step["expected_seconds"] for step in steps)
+        if total_seconds > 0:
+            for step in steps:
+                # 预测为0的步骤保留很小的权重，进度条仍会经过它
+                step["weight"] = max(step["expected_seconds"], 0.005 * total_seconds)
         total_weight = sum(step["weight"] for step in steps)
         for step in steps:
             step["weight"] = step["weight"] / total_weight
-
-        return steps
     
     def _get_analyst_display_name(self, analyst: str) -> str:
         """获取分析师显示名称（保留兼容性）"""
@@ -265,35 +294,8 @@ class AsyncProgressTracker:
         })
     
     def _estimate_total_duration(self) -> float:
-        """根据分析师数量、研究深度、模型类型预估总时长（秒）"""
-        # 基础时间（秒）- 环境准备、配置等
-        base_time = 60
-        
-        # 每个分析师的实际耗时（基于真实测试数据）
-        analyst_base_time = {
-            1: 120,  # 快速分析：每个分析师约2分钟
-            2: 180,  # 基础分析：每个分析师约3分钟  
-            3: 240   # 标准分析：每个分析师约4分钟
-        }.get(self.research_depth, 180)
-        
-        analyst_time = len(self.analysts) * analyst_base_time
-        
-        # 模型速度影响（基于实际测试）
-        model_multiplier = {
-            'dashscope': 1.0,  # 阿里百炼速度适中
-            'deepseek': 0.7,   # DeepSeek较快
-            'google': 1.3      # Google较慢
-        }.get(self.llm_provider, 1.0)
-        
-        # 研究深度额外影响（工具调用复杂度）
-        depth_multiplier = {
-            1: 0.8,  # 快速分析，较少工具调用
-            2: 1.0,  # 基础分析，标准工具调用
-            3: 1.3   # 标准分析，更多工具调用和推理
-        }.get(self.research_depth, 1.0)
-        
-        total_time = (base_time + analyst_time) * model_multiplier * depth_multiplier
-        return total_time
+        """预估总时长（秒）：耗时模型对本次分析各节点的预测之和（无历史数据时使用经验先验）"""
+        return sum(step["expected_seconds"] for step in self.analysis_steps)
     
     def update_progress(self, message: str, step: Optional[int] = None):
         """更新进度状态"""
@@ -306,12 +308,15 @@ class AsyncProgressTracker:
 
         # 更新步骤（防止倒退）
         if step is not None and step >= self.current_step:
+            if step > self.current_step:
+                self._step_started_at = current_time
             self.current_step = step
             logger.debug(f"📊 [异步进度] 步骤推进到 {self.current_step + 1}/{len(self.analysis_steps)}")
 
         # 如果是完成消息，确保进度为100%
         if "分析完成" in message or "分析成功" in message or "✅ 分析完成" in message:
             self.current_step = len(self.analysis_steps) - 1
+            self._step_started_at = current_time
             logger.info(f"📊 [异步进度] 分析完成，设置为最终步骤")
 
         # 计算进度
@@ -458,24 +463,35 @@ class AsyncProgressTracker:
         return min(completed_weight / total_weight, 1.0)
     
     def _estimate_remaining_time(self, progress: float, elapsed_time: float) -> float:
-        """基于总预估时间计算剩余时间"""
+        """
+        基于各步骤的预测耗时计算剩余时间：
+        当前步骤的预测扣除已在该步骤花费的时间，加上后续步骤的预测；
+        已完成部分明显慢于/快于预测时，按实际节奏同比例调整后续预测
+        """
         # 如果进度已完成，剩余时间为0
         if progress >= 1.0:
             return 0.0
 
-        # 使用简单而准确的方法：总预估时间 - 已花费时间
-        remaining = max(self.estimated_duration - elapsed_time, 0)
+        steps = self.analysis_steps
+        index = min(self.current_step, len(steps) - 1)
+        in_step = max(self.start_time + elapsed_time - self._step_started_at, 0.0)
+        current_expected = steps[index]["expected_seconds"]
+        future = sum(step["expected_seconds"] for step in steps[index + 1:])
 
-        # 如果已经超过预估时间，根据当前进度动态调整
-        if remaining <= 0 and progress > 0:
-            # 基于当前进度重新估算总时间，然后计算剩余
-            estimated_total = elapsed_time / progress
-            remaining = max(estimated_total - elapsed_time, 0)
+        # 实际节奏：已花费时间 / 已完成部分的预测耗时（至少有一段预测耗时后才调整）
+        expected_so_far = sum(step["expected_seconds"] for step in steps[:index]) + min(in_step, current_expected)
+        pace = 1.0
+        if expected_so_far >= 0.2 * self.estimated_duration and expected_so_far > 0:
+            pace = min(max(elapsed_time / expected_so_far, 0.5), 3.0)
 
-        return remaining
+        return max(current_expected - in_step, 0.0) * pace + future * pace
     
     def _save_progress(self):
-        """保存进度到存储"""
+        """保存进度快照到存储，并推送本次更新的增量"""
+        self._event_seq += 1
+        self.progress_data['event_seq'] = self._event_seq
+        safe_data = safe_serialize(self.progress_data)
+
         try:
             current_step_name = self.progress_data.get('current_step_name', '未知')
             progress_pct = self.progress_data.get('progress_percentage', 0)
@@ -484,17 +500,23 @@ class AsyncProgressTracker:
             if self.use_redis:
                 # 保存到Redis（安全序列化）
                 key = f"progress:{self.analysis_id}"
-                safe_data = safe_serialize(self.progress_data)
                 data_json = json.dumps(safe_data, ensure_ascii=False)
-                self.redis_client.setex(key, 3600, data_json)  # 1小时过期
+                last_update = self.progress_data.get('last_update', time.time())
+
+                # 进度数据和更新时间索引在一次往返内写入，并清理索引中已过期的条目
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, PROGRESS_TTL_SECONDS, data_json)  # 1小时过期
+                pipe.zadd(PROGRESS_INDEX_KEY, {self.analysis_id: last_update})
+                pipe.zremrangebyscore(PROGRESS_INDEX_KEY, '-inf', time.time() - PROGRESS_TTL_SECONDS)
+                pipe.expire(PROGRESS_INDEX_KEY, PROGRESS_TTL_SECONDS)
+                pipe.execute()
 
                 logger.info(f"📊 [Redis写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
                 logger.debug(f"📊 [Redis详情] 键: {key}, 数据大小: {len(data_json)} 字节")
             else:
                 # 保存到文件（安全序列化）
-                safe_data = safe_serialize(self.progress_data)
                 with open(self.progress_file, 'w', encoding='utf-8') as f:
-                    json.dump(safe_data, f, ensure_ascii=False, indent=2)
+                    json.dump(safe_data, f, ensure_ascii=False)
 
                 logger.info(f"📊 [文件写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
                 logger.debug(f"📊 [文件详情] 路径: {self.progress_file}")
@@ -508,7 +530,6 @@ class AsyncProgressTracker:
                     logger.warning(f"📊 [异步进度] Redis保存失败，尝试文件存储")
                     backup_file = f"./data/progress_{self.analysis_id}.json"
                     os.makedirs(os.path.dirname(backup_file), exist_ok=True)
-                    safe_data = safe_serialize(self.progress_data)
                     with open(backup_file, 'w', encoding='utf-8') as f:
                         json.dump(safe_data, f, ensure_ascii=False, indent=2)
                     logger.info(f"📊 [备用存储] 文件保存成功: {backup_file}")
@@ -528,6 +549,23 @@ class AsyncProgressTracker:
                     logger.info(f"📊 [备用存储] 简化数据保存成功: {backup_file}")
             except Exception as backup_e:
                 logger.error(f"📊 [异步进度] 备用存储也失败: {backup_e}")
+
+        self._publish_progress(safe_data)
+
+    def _publish_progress(self, state: Dict[str, Any]):
+        """把与上次推送相比变化的字段发布到进度总线"""
+        try:
+            delta = compute_delta(self._published_state, state)
+            event = {
+                'analysis_id': self.analysis_id,
+                'seq': self._event_seq,
+                'type': 'delta' if self._published_state else 'snapshot',
+                **delta
+            }
+            get_progress_bus().publish(self.analysis_id, event)
+            self._published_state = state
+        except Exception as e:
+            logger.warning(f"📊 [异步进度] 推送进度事件失败: {e}")
     
     def get_progress(self) -> Dict[str, Any]:
         """获取当前进度"""
@@ -574,40 +612,39 @@ class AsyncProgressTracker:
         except ImportError:
             pass
 
+    def mark_queued(self, position: Optional[int] = None):
+        """标记分析正在排队等待工作线程"""
+        self.progress_data['status'] = 'queued'
+        self.progress_data['queue_position'] = position
+        self.progress_data['last_message'] = (f"排队中，前面还有{position - 1}个分析" if position
+                                              else "排队中，等待空闲的分析线程...")
+        self.progress_data['last_update'] = time.time()
+        self._save_progress()
+        logger.info(f"📊 [异步进度] 分析排队中: {self.analysis_id}, 位置: {position}")
+
+    def mark_cancelled(self, message: str = "分析已取消"):
+        """标记分析已被用户取消"""
+        self.progress_data['status'] = 'cancelled'
+        self.progress_data['last_message'] = message
+        self.progress_data['last_update'] = time.time()
+        self.progress_data['remaining_time'] = 0.0
+        self._save_progress()
+        logger.info(f"📊 [异步进度] 分析已取消: {self.analysis_id}")
+
+        # 从日志系统注销
+        try:
+            from .progress_log_handler import unregister_analysis_tracker
+            unregister_analysis_tracker(self.analysis_id)
+        except ImportError:
+            pass
+
 def get_progress_by_id(analysis_id: str) -> Optional[Dict[str, Any]]:
     """根据分析ID获取进度"""
     try:
-        # 检查REDIS_ENABLED环境变量
-        redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
-
         # 如果Redis启用，先尝试Redis
-        if redis_enabled:
+        if is_redis_enabled():
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
+                redis_client = get_redis_client()
                 key = f"progress:{analysis_id}"
                 data = redis_client.get(key)
                 if data:
@@ -641,58 +678,32 @@ def format_time(seconds: float) -> str:
 def get_latest_analysis_id() -> Optional[str]:
     """获取最新的分析ID"""
     try:
-        # 检查REDIS_ENABLED环境变量
-        redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
-
         # 如果Redis启用，先尝试从Redis获取
-        if redis_enabled:
+        if is_redis_enabled():
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                # 获取所有progress键
-                keys = redis_client.keys("progress:*")
-                if not keys:
+                redis_client = get_redis_client()
+
+                # 从更新时间索引中按时间倒序取候选（避免 KEYS 阻塞Redis）
+                candidates = redis_client.zrevrange(PROGRESS_INDEX_KEY, 0, 9)
+                if not candidates:
                     return None
 
-                # 获取每个键的数据，找到最新的
-                latest_time = 0
-                latest_id = None
+                # 一次往返检查候选的进度键是否仍然存在（可能已过期）
+                pipe = redis_client.pipeline(transaction=False)
+                for analysis_id in candidates:
+                    pipe.exists(f"progress:{analysis_id}")
+                exists_flags = pipe.execute()
 
-                for key in keys:
-                    try:
-                        data = redis_client.get(key)
-                        if data:
-                            progress_data = json.loads(data)
-                            last_update = progress_data.get('last_update', 0)
-                            if last_update > latest_time:
-                                latest_time = last_update
-                                # 从键名中提取analysis_id (去掉"progress:"前缀)
-                                latest_id = key.replace('progress:', '')
-                    except Exception:
-                        continue
+                stale_ids = []
+                latest_id = None
+                for analysis_id, exists in zip(candidates, exists_flags):
+                    if exists:
+                        latest_id = analysis_id
+                        break
+                    stale_ids.append(analysis_id)
+
+                if stale_ids:
+                    redis_client.zrem(PROGRESS_INDEX_KEY, *stale_ids)
 
                 if latest_id:
                     logger.info(f"📊 [恢复分析] 找到最新分析ID: {latest_id}")
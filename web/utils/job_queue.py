@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+分析任务队列
+Web端提交的分析先进入有界队列，由固定数量的工作线程执行，
+突发请求只会排队或被拒绝，不会同时占满CPU、内存和LLM调用限额
+
+- 优先级: high / normal / low，同优先级先进先出
+- 每个用户排队中+运行中的任务数有上限，队列总长度有上限
+- 排队中的任务取消后立即出队；运行中的任务在下一个进度检查点停止
+- 每个任务的运行时长由耗时模型预测，用于估算排队等待时间；设置了最长等待时间时，
+  预计等待超过上限的任务在提交时被拒绝
+- 后端可插拔：默认进程内队列；ANALYSIS_QUEUE_BACKEND=redis 时使用Redis列表，
+  多个Web进程共享同一队列，每个进程各自运行 ANALYSIS_MAX_WORKERS 个工作线程
+"""
+
+import os
+import json
+import time
+import heapq
+import itertools
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+from tradingagents.config.redis_pool import get_redis_client, is_redis_enabled
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+DEFAULT_PRIORITY = 'normal'
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_QUEUE_SIZE = 20
+DEFAULT_PER_USER_LIMIT = 2
+# 进程内后端保留的已结束任务数（供状态查询）
+FINISHED_JOB_RETENTION = 500
+# Redis中任务记录、用户计数和取消标记的过期时间
+REDIS_JOB_TTL_SECONDS = 24 * 3600
+# 无法预测运行时长时假定的任务时长（秒）
+DEFAULT_JOB_SECONDS = 600
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class JobQueueError(Exception):
+    """任务无法入队"""
+
+
+class QueueFullError(JobQueueError):
+    """队列已满"""
+
+
+class UserLimitError(JobQueueError):
+    """用户的排队+运行任务数已达上限"""
+
+
+class WaitTooLongError(JobQueueError):
+    """预计排队等待时间超过上限"""
+
+
+class JobCancelledError(Exception):
+    """任务已被取消，由处理函数在检查点抛出"""
+
+
+@dataclass
+class AnalysisJob:
+    """队列中的一个分析任务，payload需可JSON序列化（Redis后端跨进程传递）"""
+    job_id: str
+    user_id: str
+    payload: Dict[str, Any]
+    priority: str = DEFAULT_PRIORITY
+    status: str = 'queued'
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    estimated_seconds: Optional[float] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data) -> "AnalysisJob":
+        return cls(**json.loads(data))
+
+
+class InProcessJobBackend:
+    """进程内队列：优先级堆 + 条件变量"""
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._user_active: Counter = Counter()
+        self._running: set = set()
+        self._cancel_requested: set = set()
+        self._cond = threading.Condition()
+
+    def push(self, job: AnalysisJob, max_queue_size: int, per_user_limit: int):
+        """原子地检查容量和用户上限后入队，超限时抛出QueueFullError/UserLimitError"""
+        with self._cond:
+            if len(self._heap) >= max_queue_size:
+                raise QueueFullError(f"队列已满（{max_queue_size}个任务排队中）")
+            if self._user_active[job.user_id] >= per_user_limit:
+                raise UserLimitError(f"每个用户最多同时提交{per_user_limit}个分析")
+            self._jobs[job.job_id] = job
+            self._user_active[job.user_id] += 1
+            heapq.heappush(self._heap, (PRIORITIES[job.priority], next(self._seq), job.job_id))
+            self._cond.notify()
+
+    def pop(self, timeout: float) -> Optional[AnalysisJob]:
+        """取出优先级最高的任务并标记为运行中，超时返回None"""
+        with self._cond:
+            if not self._heap and not self._cond.wait_for(lambda: self._heap, timeout):
+                return None
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs[job_id]
+            job.status = 'running'
+            job.started_at = time.time()
+            self._running.add(job_id)
+            return job
+
+    def remove(self, job_id: str) -> Optional[AnalysisJob]:
+        """从队列中移除排队中的任务，返回被移除的任务"""
+        with self._cond:
+            for index, entry in enumerate(self._heap):
+                if entry[2] == job_id:
+                    self._heap[index] = self._heap[-1]
+                    self._heap.pop()
+                    heapq.heapify(self._heap)
+                    return self._jobs[job_id]
+            return None
+
+    def position(self, job_id: str) -> Optional[int]:
+        """排队位置（从1开始），不在队列中时返回None"""
+        with self._cond:
+            entry = next((e for e in self._heap if e[2] == job_id), None)
+            if entry is None:
+                return None
+            return 1 + sum(1 for other in self._heap if other < entry)
+
+    def finish(self, job: AnalysisJob, status: str, error: Optional[str] = None):
+        with self._cond:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+            self._running.discard(job.job_id)
+            self._cancel_requested.discard(job.job_id)
+            self._user_active[job.user_id] -= 1
+            if self._user_active[job.user_id] <= 0:
+                del self._user_active[job.user_id]
+            self._finished[job.job_id] = None
+            while len(self._finished) > FINISHED_JOB_RETENTION:
+                old_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(old_id, None)
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        return self._jobs.get(job_id)
+
+    def request_cancel(self, job_id: str):
+        with self._cond:
+            self._cancel_requested.add(job_id)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return job_id in self._cancel_requested
+
+    def queued_count(self) -> int:
+        return len(self._heap)
+
+    def running_count(self) -> int:
+        return len(self._running)
+
+    def queued_jobs(self) -> List[AnalysisJob]:
+        """按出队顺序排列的排队中任务"""
+        with self._cond:
+            return [self._jobs[entry[2]] for entry in sorted(self._heap)]
+
+    def running_jobs(self) -> List[AnalysisJob]:
+        with self._cond:
+            return [self._jobs[job_id] for job_id in self._running]
+
+
+class RedisJobBackend:
+    """
+    Redis列表队列
+
+    每个优先级一个列表，BLPOP按优先级顺序检查列表；任务记录以JSON保存，
+    入队时在WATCH事务中检查队列长度和用户计数，多进程并发提交也不会超限
+    """
+
+    def __init__(self, redis_client, namespace: str = "analysis_jobs"):
+        self.redis = redis_client
+        self.namespace = namespace
+        self.queue_keys = [f"{namespace}:queue:{name}"
+                           for name, _ in sorted(PRIORITIES.items(), key=lambda kv: kv[1])]
+        self.running_key = f"{namespace}:running"
+
+    def _queue_key(self, priority: str) -> str:
+        return self.queue_keys[PRIORITIES[priority]]
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.namespace}:job:{job_id}"
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.namespace}:user:{user_id}"
+
+    def _cancel_key(self, job_id: str) -> str:
+        return f"{self.namespace}:cancel:{job_id}"
+
+    def _save(self, job: AnalysisJob, pipe=None):
+        (pipe or self.redis).set(self._job_key(job.job_id), job.to_json(), ex=REDIS_JOB_TTL_SECONDS)
+
+    def push(self, job: AnalysisJob, max_queue_size: int, per_user_limit: int):
+        user_key = self._user_key(job.user_id)
+
+        def admit(pipe):
+            queued = sum(pipe.llen(key) for key in self.queue_keys)
+            if queued >= max_queue_size:
+                raise QueueFullError(f"队列已满（{max_queue_size}个任务排队中）")
+            if int(pipe.get(user_key) or 0) >= per_user_limit:
+                raise UserLimitError(f"每个用户最多同时提交{per_user_limit}个分析")
+            pipe.multi()
+            self._save(job, pipe)
+            pipe.incr(user_key)
+            pipe.expire(user_key, REDIS_JOB_TTL_SECONDS)
+            pipe.rpush(self._queue_key(job.priority), job.job_id)
+
+        self.redis.transaction(admit, user_key, *self.queue_keys)
+
+    def pop(self, timeout: float) -> Optional[AnalysisJob]:
+        item = self.redis.blpop(self.queue_keys, timeout=max(1, int(timeout)))
+        if item is None:
+            return None
+        job_id = item[1].decode('utf-8') if isinstance(item[1], bytes) else item[1]
+        job = self.get(job_id)
+        if job is None:
+            logger.warning(f"⚠️ [任务队列] 任务记录已过期，跳过: {job_id}")
+            return None
+        job.status = 'running'
+        job.started_at = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        self._save(job, pipe)
+        pipe.sadd(self.running_key, job_id)
+        pipe.execute()
+        return job
+
+    def remove(self, job_id: str) -> Optional[AnalysisJob]:
+        job = self.get(job_id)
+        if job is None or job.status != 'queued':
+            return None
+        if not self.redis.lrem(self._queue_key(job.priority), 1, job_id):
+            return None
+        return job
+
+    def position(self, job_id: str) -> Optional[int]:
+        job = self.get(job_id)
+        if job is None or job.status != 'queued':
+            return None
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self.queue_keys[:PRIORITIES[job.priority]]:
+            pipe.llen(key)
+        pipe.lrange(self._queue_key(job.priority), 0, -1)
+        *ahead, same_priority = pipe.execute()
+        same_priority = [i.decode('utf-8') if isinstance(i, bytes) else i for i in same_priority]
+        if job_id not in same_priority:
+            return None
+        return sum(ahead) + same_priority.index(job_id) + 1
+
+    def finish(self, job: AnalysisJob, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        user_key = self._user_key(job.user_id)
+        pipe = self.redis.pipeline(transaction=False)
+        self._save(job, pipe)
+        pipe.srem(self.running_key, job.job_id)
+        pipe.delete(self._cancel_key(job.job_id))
+        pipe.decr(user_key)
+        results = pipe.execute()
+        if results[-1] < 0:
+            self.redis.delete(user_key)
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        data = self.redis.get(self._job_key(job_id))
+        return AnalysisJob.from_json(data) if data else None
+
+    def request_cancel(self, job_id: str):
+        self.redis.set(self._cancel_key(job_id), 1, ex=REDIS_JOB_TTL_SECONDS)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return bool(self.redis.exists(self._cancel_key(job_id)))
+
+    def queued_count(self) -> int:
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self.queue_keys:
+            pipe.llen(key)
+        return sum(pipe.execute())
+
+    def running_count(self) -> int:
+        return self.redis.scard(self.running_key)
+
+    def _get_many(self, job_ids: List) -> List[AnalysisJob]:
+        if not job_ids:
+            return []
+        job_ids = [i.decode('utf-8') if isinstance(i, bytes) else i for i in job_ids]
+        records = self.redis.mget([self._job_key(job_id) for job_id in job_ids])
+        return [AnalysisJob.from_json(data) for data in records if data]
+
+    def queued_jobs(self) -> List[AnalysisJob]:
+        """按出队顺序排列的排队中任务"""
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self.queue_keys:
+            pipe.lrange(key, 0, -1)
+        return self._get_many([job_id for ids in pipe.execute() for job_id in ids])
+
+    def running_jobs(self) -> List[AnalysisJob]:
+        return self._get_many(list(self.redis.smembers(self.running_key)))
+
+
+class JobQueue:
+    """
+    有界工作线程池
+
+    handler(job, check_cancelled) 执行任务，check_cancelled() 在任务被取消时抛出JobCancelledError，
+    处理函数应在各阶段之间调用它
+    """
+
+    def __init__(self, handler: Callable[[AnalysisJob, Callable[[], None]], Any],
+                 backend=None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                 per_user_limit: int = DEFAULT_PER_USER_LIMIT,
+                 poll_interval: float = 1.0,
+                 estimator: Optional[Callable[[Dict[str, Any]], float]] = None,
+                 max_wait_seconds: Optional[float] = None):
+        """
+        Args:
+            estimator: 根据payload预测任务运行秒数，用于等待时间估算
+            max_wait_seconds: 预计排队等待超过该秒数时拒绝提交，None或0表示不限制
+        """
+        self.handler = handler
+        self.backend = backend or InProcessJobBackend()
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.per_user_limit = per_user_limit
+        self.poll_interval = poll_interval
+        self.estimator = estimator
+        self.max_wait_seconds = max_wait_seconds
+        self._workers: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def submit(self, payload: Dict[str, Any], job_id: str, user_id: str = "anonymous",
+               priority: str = DEFAULT_PRIORITY) -> AnalysisJob:
+        """提交任务；队列已满或用户超限时抛出JobQueueError的子类"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"未知的优先级: {priority}")
+        job = AnalysisJob(job_id=job_id, user_id=user_id, payload=payload, priority=priority,
+                          estimated_seconds=self._predict_seconds(payload))
+        if self.max_wait_seconds:
+            wait = self.estimate_wait(priority=priority)
+            if wait > self.max_wait_seconds:
+                raise WaitTooLongError(f"预计需要排队{wait / 60:.0f}分钟，超过上限{self.max_wait_seconds / 60:.0f}分钟")
+        self.backend.push(job, self.max_queue_size, self.per_user_limit)
+        self._ensure_workers()
+        logger.info(f"📥 [任务队列] 已入队: {job_id} (用户: {user_id}, 优先级: {priority}, "
+                    f"排队位置: {self.position(job_id)})")
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务：排队中的直接出队并结束，运行中的设置取消标记；返回是否产生了效果"""
+        job = self.backend.remove(job_id)
+        if job is not None:
+            self.backend.finish(job, 'cancelled')
+            logger.info(f"🛑 [任务队列] 已取消排队中的任务: {job_id}")
+            return True
+
+        job = self.backend.get(job_id)
+        if job is not None and job.status == 'running':
+            self.backend.request_cancel(job_id)
+            logger.info(f"🛑 [任务队列] 已请求停止运行中的任务: {job_id}")
+            return True
+        return False
+
+    def position(self, job_id: str) -> Optional[int]:
+        """排队位置（从1开始），已开始运行或不存在时返回None"""
+        return self.backend.position(job_id)
+
+    def get_job(self, job_id: str) -> Optional[AnalysisJob]:
+        return self.backend.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.backend.queued_count(),
+            'running': self.backend.running_count(),
+            'max_workers': self.max_workers,
+            'max_queue_size': self.max_queue_size,
+            'estimated_wait': self.estimate_wait(),
+        }
+
+    def _predict_seconds(self, payload: Dict[str, Any]) -> Optional[float]:
+        if self.estimator is None:
+            return None
+        try:
+            return float(self.estimator(payload))
+        except Exception as e:
+            logger.debug(f"⚠️ [任务队列] 运行时长预测失败: {e}")
+            return None
+
+    def _job_seconds(self, job: AnalysisJob) -> float:
+        if job.estimated_seconds is None:
+            job.estimated_seconds = self._predict_seconds(job.payload)
+        return job.estimated_seconds if job.estimated_seconds is not None else DEFAULT_JOB_SECONDS
+
+    def estimate_wait(self, job_id: Optional[str] = None, priority: str = DEFAULT_PRIORITY) -> float:
+        """
+        预计排队等待秒数：按运行中任务的剩余预测时长和前面排队任务的预测时长，模拟max_workers个工作线程依次取任务
+
+        Args:
+            job_id: 排队中的任务；为None时估算以priority新提交的任务
+        """
+        now = time.time()
+        workers = [max(self._job_seconds(job) - (now - (job.started_at or now)), 0.0)
+                   for job in self.backend.running_jobs()]
+        workers = sorted(workers)[:self.max_workers]
+        workers += [0.0] * (self.max_workers - len(workers))
+        heapq.heapify(workers)
+
+        queued = self.backend.queued_jobs()
+        if job_id is not None:
+            index = next((i for i, job in enumerate(queued) if job.job_id == job_id), None)
+            if index is None:
+                return 0.0
+            ahead = queued[:index]
+        else:
+            ahead = [job for job in queued if PRIORITIES[job.priority] <= PRIORITIES[priority]]
+
+        for job in ahead:
+            heapq.heappush(workers, heapq.heappop(workers) + self._job_seconds(job))
+        return workers[0]
+
+    def _ensure_workers(self):
+        if len(self._workers) >= self.max_workers:
+            return
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._worker_loop, daemon=True,
+                                          name=f"analysis-worker-{len(self._workers) + 1}")
+                worker.start()
+                self._workers.append(worker)
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.backend.pop(self.poll_interval)
+            except Exception as e:
+                logger.error(f"❌ [任务队列] 取任务失败: {e}")
+                self._stop.wait(self.poll_interval)
+                continue
+            if job is not None:
+                self._run(job)
+
+    def _run(self, job: AnalysisJob):
+        def check_cancelled():
+            if self.backend.is_cancel_requested(job.job_id):
+                raise JobCancelledError(job.job_id)
+
+        wait_seconds = job.started_at - job.submitted_at
+        logger.info(f"▶️ [任务队列] 开始执行: {job.job_id} (排队{wait_seconds:.1f}s)")
+        try:
+            self.handler(job, check_cancelled)
+        except JobCancelledError:
+            self.backend.finish(job, 'cancelled')
+            logger.info(f"🛑 [任务队列] 任务已停止: {job.job_id}")
+        except Exception as e:
+            self.backend.finish(job, 'failed', str(e))
+            logger.error(f"❌ [任务队列] 任务失败: {job.job_id}: {e}", exc_info=True)
+        else:
+            self.backend.finish(job, 'completed')
+            logger.info(f"✅ [任务队列] 任务完成: {job.job_id} "
+                        f"(运行{job.finished_at - job.started_at:.1f}s)")
+
+    def shutdown(self, wait: bool = True, timeout: float = 5.0):
+        """停止工作线程（正在执行的任务会先完成）"""
+        self._stop.set()
+        if wait:
+            for worker in self._workers:
+                worker.join(timeout=timeout)
+        self._workers = []
+
+
+_job_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """获取全局分析任务队列，配置来自环境变量"""
+    global _job_queue
+    if _job_queue is None:
+        with _queue_lock:
+            if _job_queue is None:
+                from web.utils.analysis_runner import run_analysis_job
+                _job_queue = JobQueue(
+                    handler=run_analysis_job,
+                    backend=_create_backend(),
+                    max_workers=int(os.getenv('ANALYSIS_MAX_WORKERS', DEFAULT_MAX_WORKERS)),
+                    max_queue_size=int(os.getenv('ANALYSIS_QUEUE_MAX_SIZE', DEFAULT_MAX_QUEUE_SIZE)),
+                    per_user_limit=int(os.getenv('ANALYSIS_PER_USER_LIMIT', DEFAULT_PER_USER_LIMIT)),
+                    estimator=predict_analysis_seconds,
+                    max_wait_seconds=float(os.getenv('ANALYSIS_MAX_WAIT_SECONDS', 0)),
+                )
+                # 启动工作线程，多进程部署时每个进程都参与消费Redis队列
+                _job_queue._ensure_workers()
+    return _job_queue
+
+
+def predict_analysis_seconds(payload: Dict[str, Any]) -> float:
+    """用耗时模型预测一个分析任务的运行秒数"""
+    from tradingagents.utils.latency_model import get_latency_model
+    return get_latency_model().predict_total(payload['analysts'], payload['llm_provider'],
+                                             payload.get('llm_model'), payload['research_depth'])
+
+
+def _create_backend():
+    if os.getenv('ANALYSIS_QUEUE_BACKEND', 'memory').lower() == 'redis':
+        if is_redis_enabled():
+            try:
+                redis_client = get_redis_client()
+                if redis_client is not None:
+                    redis_client.ping()
+                    logger.info(f"📥 [任务队列] 使用Redis列表队列")
+                    return RedisJobBackend(redis_client)
+            except Exception as e:
+                logger.warning(f"⚠️ [任务队列] Redis不可用，使用进程内队列: {e}")
+        else:
+            logger.warning(f"⚠️ [任务队列] REDIS_ENABLED未开启，使用进程内队列")
+    logger.info(f"📥 [任务队列] 使用进程内队列")
+    return InProcessJobBackend()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+进度事件总线
+跟踪器每次更新只发布与上次相比变化的字段（增量），页面端订阅后按需重绘，不再轮询存储
+
+- Redis可用时发布到 progress_events:<analysis_id> 频道，每个进程只有一个监听线程，
+  收到的事件转发给本进程内的所有订阅者
+- Redis不可用时使用进程内广播（分析线程与Streamlit在同一进程）
+- 事件带递增序号，订阅者发现序号不连续或队列溢出时重新读取一次快照
+"""
+
+import json
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('async_progress')
+
+from tradingagents.config.redis_pool import get_redis_client, is_redis_enabled
+
+PROGRESS_CHANNEL_PREFIX = "progress_events:"
+# 每个订阅者最多缓存的事件数，溢出后改为重新读取快照
+SUBSCRIBER_QUEUE_SIZE = 256
+# 增量中表示被删除字段的键
+_UNSET = "unset"
+_SET = "set"
+
+
+def compute_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """计算顶层字段的增量，只包含值发生变化的字段和被删除的字段"""
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    removed = [key for key in old if key not in new]
+    delta = {}
+    if changed:
+        delta[_SET] = changed
+    if removed:
+        delta[_UNSET] = removed
+    return delta
+
+
+def apply_delta(state: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """把增量应用到状态上（原地修改并返回）"""
+    state.update(delta.get(_SET, {}))
+    for key in delta.get(_UNSET, []):
+        state.pop(key, None)
+    return state
+
+
+class ProgressSubscription:
+    """单个订阅者的事件队列"""
+
+    def __init__(self, bus: "InProcessProgressBus", analysis_id: str, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.bus = bus
+        self.analysis_id = analysis_id
+        self.events: queue.Queue = queue.Queue(maxsize=maxsize)
+        # 队列溢出后置位，订阅者需要重新读取快照
+        self.overflowed = False
+
+    def deliver(self, event: Dict[str, Any]):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get_events(self, timeout: float = 0) -> List[Dict[str, Any]]:
+        """等待最多timeout秒直到有事件，然后取出所有已到达的事件"""
+        events = []
+        try:
+            events.append(self.events.get(timeout=timeout) if timeout > 0 else self.events.get_nowait())
+            while True:
+                events.append(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class InProcessProgressBus:
+    """进程内广播总线"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[ProgressSubscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, analysis_id: str, event: Dict[str, Any]):
+        self.published += 1
+        self._deliver(analysis_id, event)
+
+    def _deliver(self, analysis_id: str, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(analysis_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscribe(self, analysis_id: str) -> ProgressSubscription:
+        subscription = ProgressSubscription(self, analysis_id)
+        with self._lock:
+            self._subscribers.setdefault(analysis_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ProgressSubscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.analysis_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.analysis_id]
+
+    def subscriber_count(self, analysis_id: Optional[str] = None) -> int:
+        with self._lock:
+            if analysis_id is not None:
+                return len(self._subscribers.get(analysis_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class RedisProgressBus(InProcessProgressBus):
+    """
+    Redis发布/订阅总线
+
+    发布直接写入频道；订阅只在本进程内登记，由一个后台线程对 progress_events:* 做模式订阅，
+    把消息分发给本进程的订阅者，因此几百个页面也只占用一个Redis连接
+    """
+
+    def __init__(self, redis_client):
+        super().__init__()
+        self.redis_client = redis_client
+        self._pubsub = None
+        self._listener: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+
+    def publish(self, analysis_id: str, event: Dict[str, Any]):
+        self.published += 1
+        self.redis_client.publish(f"{PROGRESS_CHANNEL_PREFIX}{analysis_id}", json.dumps(event, ensure_ascii=False))
+
+    def subscribe(self, analysis_id: str) -> ProgressSubscription:
+        self._ensure_listener()
+        return super().subscribe(analysis_id)
+
+    def _ensure_listener(self):
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.psubscribe(f"{PROGRESS_CHANNEL_PREFIX}*")
+            self._listener = threading.Thread(target=self._listen, name="progress-bus", daemon=True)
+            self._listener.start()
+        self._ready.wait(timeout=2.0)
+
+    def _listen(self):
+        self._ready.set()
+        while not self._stop.is_set():
+            try:
+                message = self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.warning(f"⚠️ [进度总线] Redis订阅中断: {e}")
+                self._stop.wait(1.0)
+                continue
+            if not message or message.get('type') != 'pmessage':
+                continue
+            channel = message['channel']
+            if isinstance(channel, bytes):
+                channel = channel.decode('utf-8')
+            try:
+                event = json.loads(message['data'])
+            except (TypeError, ValueError):
+                continue
+            self._deliver(channel[len(PROGRESS_CHANNEL_PREFIX):], event)
+
+    def close(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=2.0)
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+class ProgressWatcher:
+    """
+    页面端的进度视图
+
+    首次使用时读取一次快照，之后只应用推送来的增量；
+    序号不连续或事件队列溢出时重新读取快照
+    """
+
+    def __init__(self, analysis_id: str, bus: Optional[InProcessProgressBus] = None,
+                 snapshot_loader: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None):
+        self.analysis_id = analysis_id
+        self.bus = bus or get_progress_bus()
+        self._snapshot_loader = snapshot_loader
+        # 先订阅再读快照，避免两者之间的事件丢失
+        self.subscription = self.bus.subscribe(analysis_id)
+        self.state: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        self.snapshot_loads = 0
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        loader = self._snapshot_loader
+        if loader is None:
+            from web.utils.async_progress_tracker import get_progress_by_id
+            loader = get_progress_by_id
+        self.snapshot_loads += 1
+        snapshot = loader(self.analysis_id)
+        self.subscription.overflowed = False
+        if snapshot is not None:
+            self.state = dict(snapshot)
+            self.seq = int(snapshot.get('event_seq', 0))
+
+    def poll(self, timeout: float = 0) -> bool:
+        """应用已到达的事件，最多等待timeout秒；返回状态是否变化"""
+        events = self.subscription.get_events(timeout)
+        if self.subscription.overflowed:
+            self._load_snapshot()
+            return True
+
+        changed = False
+        for event in events:
+            seq = event.get('seq', 0)
+            if event.get('type') == 'snapshot':
+                # 排队的分析开始执行时工作线程会创建新的跟踪器，序号从1重新开始
+                self.state = apply_delta({}, event)
+            elif seq <= self.seq:
+                continue
+            elif self.state is None or seq != self.seq + 1:
+                # 丢失了中间的事件，重新读取快照
+                self._load_snapshot()
+                return True
+            else:
+                apply_delta(self.state, event)
+            self.seq = seq
+            changed = True
+        return changed
+
+    @property
+    def finished(self) -> bool:
+        return bool(self.state) and self.state.get('status') in ('completed', 'failed', 'cancelled')
+
+    def close(self):
+        self.subscription.close()
+
+
+_progress_bus: Optional[InProcessProgressBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_progress_bus() -> InProcessProgressBus:
+    """获取全局进度总线：Redis可用时使用发布/订阅，否则使用进程内广播"""
+    global _progress_bus
+    if _progress_bus is None:
+        with _bus_lock:
+            if _progress_bus is None:
+                _progress_bus = _create_progress_bus()
+    return _progress_bus
+
+
+def _create_progress_bus() -> InProcessProgressBus:
+    if is_redis_enabled():
+        try:
+            redis_client = get_redis_client()
+            if redis_client is not None:
+                redis_client.ping()
+                logger.info(f"📡 [进度总线] 使用Redis发布/订阅")
+                return RedisProgressBus(redis_client)
+        except Exception as e:
+            logger.warning(f"⚠️ [进度总线] Redis不可用，使用进程内广播: {e}")
+    logger.info(f"📡 [进度总线] 使用进程内广播")
+    return InProcessProgressBus()
@@ -11,14 +11,18 @@ import streamlit as st
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('progress')
 
+from tradingagents.utils.latency_model import get_latency_model
+
 class SmartAnalysisProgressTracker:
     """智能分析进度跟踪器"""
 
-    def __init__(self, analysts: List[str], research_depth: int, llm_provider: str, callback: Optional[Callable] = None):
+    def __init__(self, analysts: List[str], research_depth: int, llm_provider: str, callback: Optional[Callable] = None,
+                 llm_model: Optional[str] = None):
         self.callback = callback
         self.analysts = analysts
         self.research_depth = research_depth
         self.llm_provider = llm_provider
+        self.llm_model = llm_model
         self.steps = []
         self.current_step = 0
         self.start_time = time.time()
@@ -64,35 +68,8 @@ class SmartAnalysisProgressTracker:
         return name_map.get(analyst, analyst)
 
     def _estimate_total_duration(self) -> float:
-        """根据分析师数量、研究深度、模型类型预估总时长（秒）"""
-        # 基础时间（秒）- 环境准备、配置等
-        base_time = 60
-
-        # 每个分析师的实际耗时（基于真实测试数据）
-        analyst_base_time = {
-            1: 120,  # 快速分析：每个分析师约2分钟
-            2: 180,  # 基础分析：每个分析师约3分钟
-            3: 240   # 标准分析：每个分析师约4分钟
-        }.get(self.research_depth, 180)
-
-        analyst_time = len(self.analysts) * analyst_base_time
-
-        # 模型速度影响（基于实际测试）
-        model_multiplier = {
-            'dashscope': 1.0,  # 阿里百炼速度适中
-            'deepseek': 0.7,   # DeepSeek较快
-            'google': 1.3      # Google较慢
-        }.get(self.llm_provider, 1.0)
-
-        # 研究深度额外影响（工具调用复杂度）
-        depth_multiplier = {
-            1: 0.8,  # 快速分析，较少工具调用
-            2: 1.0,  # 基础分析，标准工具调用
-            3: 1.3   # 标准分析，更多工具调用和推理
-        }.get(self.research_depth, 1.0)
-
-        total_time = (base_time + analyst_time) * model_multiplier * depth_multiplier
-        return total_time
+        """预估总时长（秒）：由历史分析的实际节点耗时学习得到，无历史数据时使用经验先验"""
+        return get_latency_model().predict_total(self.analysts, self.llm_provider, self.llm_model, self.research_depth)
     
     def update(self, message: str, step: Optional[int] = None, total_steps: Optional[int] = None):
         """更新进度"""
@@ -324,9 +301,10 @@ class SmartStreamlitProgressDisplay:
         """清除显示"""
         self.container.empty()
 
-def create_smart_progress_callback(display: SmartStreamlitProgressDisplay, analysts: List[str], research_depth: int, llm_provider: str) -> Callable:
+def create_smart_progress_callback(display: SmartStreamlitProgressDisplay, analysts: List[str], research_depth: int, llm_provider: str,
+                                   llm_model: Optional[str] = None) -> Callable:
     """创建智能进度回调函数"""
-    tracker = SmartAnalysisProgressTracker(analysts, research_depth, llm_provider)
+    tracker = SmartAnalysisProgressTracker(analysts, research_depth, llm_provider, llm_model=llm_model)
 
     def callback(message: str, step: Optional[int] = None, total_steps: Optional[int] = None):
         # 如果明确指定了步骤和总步骤，使用旧的固定模式（兼容性）
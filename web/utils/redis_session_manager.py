@@ -26,24 +26,12 @@ class RedisSessionManager:
             if redis_enabled != 'true':
                 return False
 
-            import redis
+            from tradingagents.config.redis_pool import get_redis_client
 
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-            
-            # 创建Redis连接
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password,
-                db=redis_db,
-                decode_responses=True,
-                socket_timeout=5,
-                socket_connect_timeout=5
-            )
+            # 使用共享连接池（配置来自REDIS_*环境变量）
+            self.redis_client = get_redis_client()
+            if self.redis_client is None:
+                return False
             
             # 测试连接
             self.redis_client.ping()
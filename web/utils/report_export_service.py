@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+报告导出服务
+按内容缓存渲染好的Word/PDF报告，并在后台线程池中渲染
+
+- 渲染产物以 sha256(格式 + Markdown内容) 为键缓存在磁盘（REPORT_CACHE_DIR），
+  最近使用的产物同时保存在内存中，重复下载不再调用pandoc
+- 记住本机上成功的PDF引擎，下次优先尝试，不再每次从头逐个试错
+- 渲染在小型后台线程池（REPORT_RENDER_WORKERS）中执行，同一内容的并发请求只渲染一次，
+  Streamlit请求线程只查询状态，不会被PDF转换阻塞
+- 分析完成后预渲染Word/PDF，用户点击下载时通常已经就绪
+
+用法:
+    service = get_report_export_service()
+    status = service.status(results, 'pdf')      # ready / rendering / failed / missing
+    service.submit(results, 'pdf')               # 后台渲染，立即返回
+    service.prerender(results)                   # 分析完成后预渲染
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+# 需要pandoc渲染的格式及其文件扩展名
+RENDERED_FORMATS = {'docx': 'docx', 'pdf': 'pdf'}
+
+_ENGINE_FILE = "pdf_engine.json"
+_DEFAULT_ENGINE = "default"
+
+
+def default_cache_dir() -> str:
+    """产物缓存目录：REPORT_CACHE_DIR，未设置时为配置的数据目录下的report_cache"""
+    cache_dir = os.getenv('REPORT_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+    try:
+        from tradingagents.config.config_manager import config_manager
+        return os.path.join(config_manager.get_data_dir(), 'report_cache')
+    except Exception as e:
+        logger.warning(f"⚠️ 获取数据目录失败，报告缓存使用项目data目录: {e}")
+        return str(Path(__file__).resolve().parents[2] / 'data' / 'report_cache')
+
+
+def artifact_key(md_content: str, format_type: str) -> str:
+    """渲染产物的内容地址"""
+    return hashlib.sha256(f"{format_type}\0{md_content}".encode('utf-8')).hexdigest()
+
+
+class ReportExportService:
+    """内容寻址的报告渲染缓存 + 后台渲染线程池"""
+
+    def __init__(self, exporter: Any = None, cache_dir: str = None, max_workers: int = None,
+                 max_items: int = None, memory_items: int = 16):
+        """
+        Args:
+            exporter: ReportExporter实例，默认使用全局的report_exporter（首次使用时导入）
+            cache_dir: 产物缓存目录，默认见 default_cache_dir
+            max_workers: 后台渲染线程数，默认读取 REPORT_RENDER_WORKERS，默认2
+            max_items: 磁盘最多保留的产物数，默认读取 REPORT_CACHE_MAX_ITEMS，默认200
+            memory_items: 内存中保留的最近产物数
+        """
+        self._exporter = exporter
+        self.cache_dir = Path(cache_dir or default_cache_dir())
+        self.max_workers = max_workers or int(os.getenv('REPORT_RENDER_WORKERS', '2'))
+        self.max_items = max_items or int(os.getenv('REPORT_CACHE_MAX_ITEMS', '200'))
+        self.memory_items = memory_items
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="report-render")
+        self._stats = {'hits': 0, 'misses': 0, 'renders': 0, 'failures': 0, 'render_seconds': 0.0}
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            logger.warning(f"⚠️ 报告缓存目录不可用，仅使用内存缓存: {e}")
+        self._pdf_engine = self._load_pdf_engine()
+
+    @property
+    def exporter(self):
+        if self._exporter is None:
+            from web.utils.report_exporter import report_exporter
+            self._exporter = report_exporter
+        return self._exporter
+
+    # ===== 缓存 =====
+
+    def _path(self, key: str, format_type: str) -> Path:
+        return self.cache_dir / f"{key}.{RENDERED_FORMATS[format_type]}"
+
+    def _lookup(self, key: str, format_type: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+
+        path = self._path(key, format_type)
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # 按访问时间淘汰
+        except OSError:
+            pass
+        self._remember(key, content)
+        return content
+
+    def _remember(self, key: str, content: bytes):
+        with self._lock:
+            self._memory[key] = content
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _store(self, key: str, format_type: str, content: bytes):
+        self._remember(key, content)
+        path = self._path(key, format_type)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"⚠️ 报告产物写入缓存失败: {e}")
+
+    def _evict(self):
+        """磁盘产物超过上限时删除最久未使用的"""
+        files = [p for ext in set(RENDERED_FORMATS.values()) for p in self.cache_dir.glob(f"*.{ext}")]
+        if len(files) <= self.max_items:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:len(files) - self.max_items]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    # ===== PDF引擎 =====
+
+    def _load_pdf_engine(self) -> Optional[str]:
+        try:
+            with open(self.cache_dir / _ENGINE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f).get('engine')
+        except (OSError, ValueError):
+            return None
+
+    def _save_pdf_engine(self, engine: Optional[str]):
+        name = engine or _DEFAULT_ENGINE
+        if name == self._pdf_engine:
+            return
+        self._pdf_engine = name
+        logger.info(f"📌 记住本机可用的PDF引擎: {name}")
+        try:
+            with open(self.cache_dir / _ENGINE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'engine': name, 'updated_at': time.time()}, f)
+        except OSError as e:
+            logger.warning(f"⚠️ PDF引擎记录写入失败: {e}")
+
+    def pdf_engines(self) -> List[Optional[str]]:
+        """PDF引擎尝试顺序：上次成功的引擎优先"""
+        engines = [engine for engine, _ in self.exporter.PDF_ENGINES]
+        if self._pdf_engine:
+            preferred = None if self._pdf_engine == _DEFAULT_ENGINE else self._pdf_engine
+            if preferred in engines:
+                engines.remove(preferred)
+                engines.insert(0, preferred)
+        return engines
+
+    # ===== 渲染 =====
+
+    def _convert(self, md_content: str, format_type: str) -> bytes:
+        if format_type == 'docx':
+            return self.exporter.markdown_to_docx(md_content)
+        content, engine = self.exporter.markdown_to_pdf(md_content, engines=self.pdf_engines())
+        self._save_pdf_engine(engine)
+        return content
+
+    def _render_markdown(self, key: str, md_content: str, format_type: str) -> bytes:
+        content = self._lookup(key, format_type)
+        if content is not None:
+            return content
+
+        start = time.time()
+        try:
+            content = self._convert(md_content, format_type)
+        except Exception as e:
+            with self._lock:
+                self._stats['failures'] += 1
+                self._errors[key] = str(e)
+            logger.error(f"❌ {format_type}报告渲染失败: {e}")
+            raise
+
+        elapsed = time.time() - start
+        with self._lock:
+            self._stats['renders'] += 1
+            self._stats['render_seconds'] += elapsed
+            self._errors.pop(key, None)
+        self._store(key, format_type, content)
+        logger.info(f"✅ {format_type}报告渲染完成，耗时 {elapsed:.1f}s，大小 {len(content)} 字节")
+        return content
+
+    def _prepare(self, results: Dict[str, Any], format_type: str):
+        if format_type not in RENDERED_FORMATS:
+            raise ValueError(f"不支持后台渲染的格式: {format_type}")
+        md_content = self.exporter.generate_markdown_report(results)
+        return artifact_key(md_content, format_type), md_content
+
+    def get(self, results: Dict[str, Any], format_type: str) -> Optional[bytes]:
+        """已缓存的产物，未渲染时返回None（不会触发渲染）"""
+        key, _ = self._prepare(results, format_type)
+        content = self._lookup(key, format_type)
+        with self._lock:
+            self._stats['hits' if content is not None else 'misses'] += 1
+        return content
+
+    def submit(self, results: Dict[str, Any], format_type: str) -> Future:
+        """提交后台渲染并立即返回；同一内容正在渲染时返回同一个Future"""
+        key, md_content = self._prepare(results, format_type)
+
+        content = self._lookup(key, format_type)
+        if content is not None:
+            future = Future()
+            future.set_result(content)
+            return future
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            self._errors.pop(key, None)
+            future = self._pool.submit(self._render_markdown, key, md_content, format_type)
+            self._pending[key] = future
+        future.add_done_callback(lambda _, key=key: self._finish(key))
+        return future
+
+    def _finish(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def render(self, results: Dict[str, Any], format_type: str, timeout: float = None) -> bytes:
+        """渲染并等待结果（脚本和测试使用；Web界面使用submit/status）"""
+        return self.submit(results, format_type).result(timeout=timeout)
+
+    def status(self, results: Dict[str, Any], format_type: str) -> Dict[str, Any]:
+        """
+        产物状态
+
+        Returns:
+            {'state': 'ready'|'rendering'|'failed'|'missing', 'content': bytes或None, 'error': str或None}
+        """
+        key, _ = self._prepare(results, format_type)
+        content = self._lookup(key, format_type)
+        if content is not None:
+            return {'state': 'ready', 'content': content, 'error': None}
+        with self._lock:
+            if key in self._pending:
+                return {'state': 'rendering', 'content': None, 'error': None}
+            if key in self._errors:
+                return {'state': 'failed', 'content': None, 'error': self._errors[key]}
+        return {'state': 'missing', 'content': None, 'error': None}
+
+    def prerender(self, results: Dict[str, Any], formats: Iterable[str] = ('docx', 'pdf')) -> List[Future]:
+        """分析完成后在后台预渲染报告（pandoc不可用时跳过）"""
+        if not results or not results.get('success', True):
+            return []
+        if not getattr(self.exporter, 'pandoc_available', False):
+            logger.debug("📄 pandoc不可用，跳过报告预渲染")
+            return []
+        futures = [self.submit(results, format_type) for format_type in formats]
+        logger.info(f"📄 已提交报告预渲染: {results.get('stock_symbol', 'N/A')} {list(formats)}")
+        return futures
+
+    def metrics(self) -> Dict[str, Any]:
+        """缓存命中、渲染次数与平均渲染耗时"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+            stats['memory_items'] = len(self._memory)
+        stats['avg_render_seconds'] = stats['render_seconds'] / stats['renders'] if stats['renders'] else 0.0
+        stats['pdf_engine'] = self._pdf_engine
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait)
+
+
+# 全局导出服务实例
+_report_export_service = None
+_service_lock = threading.Lock()
+
+def get_report_export_service() -> ReportExportService:
+    """获取全局报告导出服务"""
+    global _report_export_service
+    if _report_export_service is None:
+        with _service_lock:
+            if _report_export_service is None:
+                _report_export_service = ReportExportService()
+    return _report_export_service
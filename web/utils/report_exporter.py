@@ -10,7 +10,7 @@ import os
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import tempfile
 import base64
 
@@ -78,6 +78,13 @@ except ImportError as e:
 class ReportExporter:
     """报告导出器"""
 
+    # 简化的PDF引擎列表，优先使用最可能成功的
+    PDF_ENGINES = [
+        ('wkhtmltopdf', 'HTML转PDF引擎，推荐安装'),
+        ('weasyprint', '现代HTML转PDF引擎'),
+        (None, '使用pandoc默认引擎')  # 不指定引擎，让pandoc自己选择
+    ]
+
     def __init__(self):
         self.export_available = EXPORT_AVAILABLE
         self.pandoc_available = PANDOC_AVAILABLE
@@ -163,8 +170,8 @@ class ReportExporter:
         state = results.get('state', {})
         is_demo = results.get('is_demo', False)
         
-        # 生成时间戳
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # 生成时间戳（优先使用分析完成时间，同一份结果生成的报告内容不变，可按内容缓存）
+        timestamp = results.get('generated_at') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # 清理关键数据
         action = self._clean_text_for_markdown(decision.get('action', 'N/A')).upper()
@@ -266,6 +273,13 @@ class ReportExporter:
         logger.info("📝 生成Markdown内容...")
         md_content = self.generate_markdown_report(results)
         logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
+        return self.markdown_to_docx(md_content)
+
+    def markdown_to_docx(self, md_content: str) -> bytes:
+        """将Markdown内容转换为Word文档"""
+
+        if not self.pandoc_available:
+            raise Exception("Pandoc不可用，无法生成Word文档。请安装pandoc或使用Markdown格式导出。")
 
         try:
             logger.info("📁 创建临时文件用于docx输出...")
@@ -340,18 +354,30 @@ class ReportExporter:
         logger.info("📝 生成Markdown内容...")
         md_content = self.generate_markdown_report(results)
         logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
+        pdf_content, _ = self.markdown_to_pdf(md_content)
+        return pdf_content
 
-        # 简化的PDF引擎列表，优先使用最可能成功的
-        pdf_engines = [
-            ('wkhtmltopdf', 'HTML转PDF引擎，推荐安装'),
-            ('weasyprint', '现代HTML转PDF引擎'),
-            (None, '使用pandoc默认引擎')  # 不指定引擎，让pandoc自己选择
-        ]
+    def markdown_to_pdf(self, md_content: str, engines: Optional[List[Optional[str]]] = None) -> Tuple[bytes, Optional[str]]:
+        """
+        将Markdown内容转换为PDF，按顺序尝试PDF引擎
+
+        Args:
+            md_content: Markdown内容
+            engines: 尝试的引擎顺序（None表示pandoc默认引擎），默认使用PDF_ENGINES的顺序
+
+        Returns:
+            (PDF内容, 成功的引擎)
+        """
+
+        if not self.pandoc_available:
+            raise Exception("Pandoc不可用，无法生成PDF文档。请安装pandoc或使用Markdown格式导出。")
+
+        if engines is None:
+            engines = [engine for engine, _ in self.PDF_ENGINES]
 
         last_error = None
 
-        for engine_info in pdf_engines:
-            engine, description = engine_info
+        for engine in engines:
             try:
                 # 创建临时文件用于PDF输出
                 with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
@@ -391,7 +417,7 @@ class ReportExporter:
                     os.unlink(output_file)
 
                     logger.info(f"✅ PDF生成成功，使用引擎: {engine or '默认'}")
-                    return pdf_content
+                    return pdf_content, engine
                 else:
                     raise Exception("PDF文件生成失败或为空")
 
@@ -455,7 +481,9 @@ class ReportExporter:
                     logger.error("❌ pandoc不可用，无法生成Word文档")
                     st.error("❌ pandoc不可用，无法生成Word文档")
                     return None
-                content = self.generate_docx_report(results)
+                # 经由导出服务，命中内容缓存时不再调用pandoc
+                from web.utils.report_export_service import get_report_export_service
+                content = get_report_export_service().render(results, 'docx')
                 logger.info(f"✅ Word文档生成成功，大小: {len(content)} 字节")
                 return content
 
@@ -465,7 +493,9 @@ class ReportExporter:
                     logger.error("❌ pandoc不可用，无法生成PDF文档")
                     st.error("❌ pandoc不可用，无法生成PDF文档")
                     return None
-                content = self.generate_pdf_report(results)
+                # 经由导出服务，命中内容缓存时不再调用pandoc
+                from web.utils.report_export_service import get_report_export_service
+                content = get_report_export_service().render(results, 'pdf')
                 logger.info(f"✅ PDF文档生成成功，大小: {len(content)} 字节")
                 return content
 
@@ -563,122 +593,124 @@ def render_export_buttons(results: Dict[str, Any]):
                 logger.error("❌ Markdown导出失败，content为空")
     
     with col2:
-        if st.button("📝 导出 Word", help="导出为Word文档格式"):
-            logger.info(f"🖱️ [EXPORT] 用户点击Word导出按钮 - 股票: {stock_symbol}")
-            logger.info(f"🖱️ 用户点击Word导出按钮 - 股票: {stock_symbol}")
-            with st.spinner("正在生成Word文档，请稍候..."):
-                try:
-                    logger.info(f"🔄 [EXPORT] 开始Word导出流程...")
-                    logger.info("🔄 开始Word导出流程...")
-                    content = report_exporter.export_report(results, 'docx')
-                    if content:
-                        filename = f"{stock_symbol}_analysis_{timestamp}.docx"
-                        logger.info(f"✅ [EXPORT] Word导出成功，文件名: {filename}, 大小: {len(content)} 字节")
-                        logger.info(f"✅ Word导出成功，文件名: {filename}, 大小: {len(content)} 字节")
-                        st.success("✅ Word文档生成成功！")
-                        st.download_button(
-                            label="📥 下载 Word",
-                            data=content,
-                            file_name=filename,
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        )
-                    else:
-                        logger.error(f"❌ [EXPORT] Word导出失败，content为空")
-                        logger.error("❌ Word导出失败，content为空")
-                        st.error("❌ Word文档生成失败")
-                except Exception as e:
-                    logger.error(f"❌ [EXPORT] Word导出异常: {str(e)}")
-                    logger.error(f"❌ Word导出异常: {str(e)}", exc_info=True)
-                    st.error(f"❌ Word文档生成失败: {str(e)}")
-
-                    # 显示详细错误信息
-                    with st.expander("🔍 查看详细错误信息"):
-                        st.text(str(e))
-
-                    # 提供解决方案
-                    with st.expander("💡 解决方案"):
-                        st.markdown("""
-                        **Word导出需要pandoc工具，请检查:**
-
-                        1. **Docker环境**: 重新构建镜像确保包含pandoc
-                        2. **本地环境**: 安装pandoc
-                        ```bash
-                        # Windows
-                        choco install pandoc
-
-                        # macOS
-                        brew install pandoc
-
-                        # Linux
-                        sudo apt-get install pandoc
-                        ```
-
-                        3. **替代方案**: 使用Markdown格式导出
-                        """)
-    
+        _render_background_export(results, 'docx', stock_symbol, timestamp)
+
     with col3:
-        if st.button("📊 导出 PDF", help="导出为PDF格式 (需要额外工具)"):
-            logger.info(f"🖱️ 用户点击PDF导出按钮 - 股票: {stock_symbol}")
-            with st.spinner("正在生成PDF，请稍候..."):
-                try:
-                    logger.info("🔄 开始PDF导出流程...")
-                    content = report_exporter.export_report(results, 'pdf')
-                    if content:
-                        filename = f"{stock_symbol}_analysis_{timestamp}.pdf"
-                        logger.info(f"✅ PDF导出成功，文件名: {filename}, 大小: {len(content)} 字节")
-                        st.success("✅ PDF生成成功！")
-                        st.download_button(
-                            label="📥 下载 PDF",
-                            data=content,
-                            file_name=filename,
-                            mime="application/pdf"
-                        )
-                    else:
-                        logger.error("❌ PDF导出失败，content为空")
-                        st.error("❌ PDF生成失败")
-                except Exception as e:
-                    logger.error(f"❌ PDF导出异常: {str(e)}", exc_info=True)
-                    st.error(f"❌ PDF生成失败")
-
-                    # 显示详细错误信息
-                    with st.expander("🔍 查看详细错误信息"):
-                        st.text(str(e))
-
-                    # 提供解决方案
-                    with st.expander("💡 解决方案"):
-                        st.markdown("""
-                        **PDF导出需要额外的工具，请选择以下方案之一:**
-
-                        **方案1: 安装wkhtmltopdf (推荐)**
-                        ```bash
-                        # Windows
-                        choco install wkhtmltopdf
-
-                        # macOS
-                        brew install wkhtmltopdf
-
-                        # Linux
-                        sudo apt-get install wkhtmltopdf
-                        ```
-
-                        **方案2: 安装LaTeX**
-                        ```bash
-                        # Windows
-                        choco install miktex
-
-                        # macOS
-                        brew install mactex
-
-                        # Linux
-                        sudo apt-get install texlive-full
-                        ```
-
-                        **方案3: 使用替代格式**
-                        - 📄 Markdown格式 - 轻量级，兼容性好
-                        - 📝 Word格式 - 适合进一步编辑
-                        """)
-
-                    # 建议使用其他格式
-                    st.info("💡 建议：您可以先使用Markdown或Word格式导出，然后使用其他工具转换为PDF")
-    
- 
\ No newline at end of file
+        _render_background_export(results, 'pdf', stock_symbol, timestamp)
+
+
+# 后台渲染的导出格式: (名称, 图标, 导出按钮提示, MIME类型)
+_BACKGROUND_EXPORTS = {
+    'docx': ('Word', '📝', "导出为Word文档格式",
+             "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    'pdf': ('PDF', '📊', "导出为PDF格式 (需要额外工具)", "application/pdf"),
+}
+
+
+def _render_background_export(results: Dict[str, Any], format_type: str, stock_symbol: str, timestamp: str):
+    """渲染Word/PDF导出：已缓存的直接提供下载，否则提交后台渲染，页面只查询状态不等待pandoc"""
+    # 与分析完成时的预渲染共用同一个服务实例（Web应用以utils.*和web.utils.*两种路径导入本目录）
+    from web.utils.report_export_service import get_report_export_service
+
+    name, icon, help_text, mime = _BACKGROUND_EXPORTS[format_type]
+
+    service = get_report_export_service()
+    try:
+        status = service.status(results, format_type)
+    except Exception as e:
+        logger.error(f"❌ {name}导出状态查询失败: {e}", exc_info=True)
+        st.error(f"❌ {name}导出不可用: {e}")
+        return
+
+    if status['state'] == 'ready':
+        filename = f"{stock_symbol}_analysis_{timestamp}.{format_type}"
+        st.download_button(
+            label=f"📥 下载 {name}",
+            data=status['content'],
+            file_name=filename,
+            mime=mime,
+            key=f"download_{format_type}"
+        )
+        return
+
+    if status['state'] == 'rendering':
+        st.info(f"⏳ {name}正在后台生成，可继续浏览报告")
+        st.button("🔄 刷新", key=f"refresh_{format_type}")
+        return
+
+    if status['state'] == 'failed':
+        logger.error(f"❌ {name}导出失败: {status['error']}")
+        st.error(f"❌ {name}生成失败")
+        with st.expander("🔍 查看详细错误信息"):
+            st.text(status['error'])
+        if format_type == 'pdf':
+            _render_pdf_help()
+        else:
+            _render_docx_help()
+
+    if st.button(f"{icon} 导出 {name}", help=help_text, key=f"export_{format_type}"):
+        logger.info(f"🖱️ 用户点击{name}导出按钮 - 股票: {stock_symbol}")
+        service.submit(results, format_type)
+        st.rerun()
+
+
+def _render_docx_help():
+    """Word导出失败时的解决方案"""
+    with st.expander("💡 解决方案"):
+        st.markdown("""
+        **Word导出需要pandoc工具，请检查:**
+
+        1. **Docker环境**: 重新构建镜像确保包含pandoc
+        2. **本地环境**: 安装pandoc
+        ```bash
+        # Windows
+        choco install pandoc
+
+        # macOS
+        brew install pandoc
+
+        # Linux
+        sudo apt-get install pandoc
+        ```
+
+        3. **替代方案**: 使用Markdown格式导出
+        """)
+
+
+def _render_pdf_help():
+    """PDF导出失败时的解决方案"""
+    with st.expander("💡 解决方案"):
+        st.markdown("""
+        **PDF导出需要额外的工具，请选择以下方案之一:**
+
+        **方案1: 安装wkhtmltopdf (推荐)**
+        ```bash
+        # Windows
+        choco install wkhtmltopdf
+
+        # macOS
+        brew install wkhtmltopdf
+
+        # Linux
+        sudo apt-get install wkhtmltopdf
+        ```
+
+        **方案2: 安装LaTeX**
+        ```bash
+        # Windows
+        choco install miktex
+
+        # macOS
+        brew install mactex
+
+        # Linux
+        sudo apt-get install texlive-full
+        ```
+
+        **方案3: 使用替代格式**
+        - 📄 Markdown格式 - 轻量级，兼容性好
+        - 📝 Word格式 - 适合进一步编辑
+        """)
+
+    # 建议使用其他格式
+    st.info("💡 建议：您可以先使用Markdown或Word格式导出，然后使用其他工具转换为PDF")
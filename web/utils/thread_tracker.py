@@ -127,11 +127,20 @@ def get_all_analysis_threads() -> Dict[str, Dict]:
 def check_analysis_status(analysis_id: str) -> str:
     """
     检查分析状态
-    返回: 'running', 'completed', 'failed', 'not_found'
+    返回: 'running', 'completed', 'failed', 'cancelled', 'not_found'
     """
     # 首先检查线程是否存活
     if is_analysis_thread_alive(analysis_id):
         return 'running'
+
+    # 在任务队列中排队或在其他进程的工作线程中运行
+    try:
+        from web.utils.job_queue import get_job_queue
+        job = get_job_queue().get_job(analysis_id)
+        if job is not None and job.status in ['queued', 'running']:
+            return 'running'
+    except Exception as e:
+        logger.debug(f"📊 [状态检查] 查询任务队列失败: {e}")
     
     # 线程不存在，检查进度数据确定最终状态
     try:
@@ -140,7 +149,7 @@ def check_analysis_status(analysis_id: str) -> str:
         
         if progress_data:
             status = progress_data.get('status', 'unknown')
-            if status in ['completed', 'failed']:
+            if status in ['completed', 'failed', 'cancelled']:
                 return status
             else:
                 # 状态显示运行中但线程已死亡，说明异常终止